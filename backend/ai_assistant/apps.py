@@ -1,6 +1,39 @@
+import os
+import sys
+
 from django.apps import AppConfig
+from django.conf import settings
+
+
+def _serving_requests() -> bool:
+    """True unless running a one-off management command (migrate, test, ...)."""
+    program = os.path.basename(sys.argv[0]) if sys.argv else ''
+    if program in ('manage.py', 'django-admin'):
+        command = sys.argv[1] if len(sys.argv) > 1 else ''
+        # runserver's autoreloader parent process never handles requests
+        return command == 'runserver' and os.environ.get('RUN_MAIN') == 'true'
+    return True
 
 
 class AiAssistantConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'ai_assistant'
+
+    def ready(self):
+        if not getattr(settings, 'AI_ASSISTANT_ENABLED', False):
+            return
+
+        # Queue changed experiment records for incremental index updates
+        from .signals import connect_signals
+        connect_signals()
+
+        # Load the embedding model and index in the background at startup
+        if not getattr(settings, 'AI_ASSISTANT_WARMUP', False):
+            return
+        if not _serving_requests():
+            return
+
+        from .indexer import DEPENDENCIES_AVAILABLE
+        if DEPENDENCIES_AVAILABLE:
+            from .registry import start_warm_up
+            start_warm_up()
@@ -0,0 +1,131 @@
+"""
+Recall/latency benchmark of the documentation index types.
+
+Each index type is built over the stored chunk embeddings and compared with
+exact ``flat-ip`` search. Queries are held-out chunk embeddings, so no
+embedding model is needed (only faiss and numpy). Compressed types are
+timed as served, with their candidates reranked by the exact vectors, and
+their recall is reported both before and after reranking.
+
+NOTE: This is for documentation and research workflow support only.
+NOT for clinical diagnosis or patient treatment decisions.
+"""
+
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from ai_assistant.index_types import (
+    DEFAULT_INDEX_TYPE, FAISS_AVAILABLE, create_index, normalize, rerank_search, resolve_index,
+)
+
+if FAISS_AVAILABLE:
+    import faiss
+    import numpy as np
+
+
+def load_embeddings(index_path: Path):
+    """
+    Chunk embeddings saved by build_ai_index (ai_index/embeddings.npz).
+
+    Raises:
+        FileNotFoundError: No embeddings have been saved yet
+    """
+    with np.load(Path(index_path) / 'embeddings.npz', allow_pickle=False) as data:
+        return data['vectors'].astype('float32')
+
+
+def synthetic_embeddings(
+    num_vectors: int, dimension: int = 384, latent: int = 32, clusters: int = 50, seed: int = 0
+):
+    """
+    Clustered random unit vectors, for benchmarking at corpus sizes we don't have yet.
+
+    Like sentence embeddings, they lie close to a low-dimensional subspace
+    (isotropic noise in all dimensions would make nearest neighbors ties).
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, latent))
+    labels = rng.integers(0, clusters, num_vectors)
+    points = centers[labels] + 0.5 * rng.standard_normal((num_vectors, latent))
+    projection = rng.standard_normal((latent, dimension))
+    vectors = points @ projection + 0.1 * rng.standard_normal((num_vectors, dimension))
+    return normalize(vectors)
+
+
+def _percentile_ms(latencies, q):
+    return round(float(np.percentile(latencies, q)) * 1000, 3)
+
+
+def benchmark(
+    vectors,
+    index_types: List[str],
+    params: Optional[Dict[str, Dict]] = None,
+    num_queries: int = 100,
+    top_k: int = 10,
+    seed: int = 0,
+) -> List[Dict]:
+    """
+    Compare index types against exact search.
+
+    Args:
+        vectors: Chunk embeddings (normalized here)
+        index_types: Index types to benchmark
+        params: Parameter overrides per index type
+        num_queries: Embeddings held out as queries
+        top_k: Neighbors retrieved per query
+
+    Returns:
+        list: One row per index type with effective type/params, build time,
+        recall@k against flat-ip (raw, and reranked for compressed types),
+        single-query latency percentiles and serialized size (total and
+        per vector)
+    """
+    vectors = normalize(vectors)
+    order = np.random.default_rng(seed).permutation(len(vectors))
+    num_queries = max(1, min(num_queries, len(vectors) // 2))
+    queries, base = vectors[order[:num_queries]], vectors[order[num_queries:]]
+    ids = np.arange(len(base), dtype='int64')
+    top_k = min(top_k, len(base))
+
+    exact = create_index(DEFAULT_INDEX_TYPE, base.shape[1], {})
+    exact.add_with_ids(base, ids)
+    _, truth = exact.search(queries, top_k)
+
+    rows = []
+    for requested in index_types:
+        index_type, index_params = resolve_index(
+            requested, (params or {}).get(requested), len(base), base.shape[1]
+        )
+        started = time.perf_counter()
+        index = create_index(index_type, base.shape[1], index_params, training_vectors=base)
+        index.add_with_ids(base, ids)
+        build_seconds = time.perf_counter() - started
+
+        factor = index_params.get('rerank', 0)
+        latencies, found = [], []
+        for query in queries:
+            started = time.perf_counter()
+            _, neighbors = rerank_search(index, query[None, :], top_k, factor, ids, base)
+            latencies.append(time.perf_counter() - started)
+            found.append(neighbors[0])
+
+        def recall(rows):
+            hits = sum(len(set(row) & set(expected)) for row, expected in zip(rows, truth))
+            return round(hits / (len(queries) * top_k), 4)
+
+        index_bytes = int(faiss.serialize_index(index).nbytes)
+        rows.append({
+            'index_type': requested,
+            'effective_type': index_type,
+            'params': index_params,
+            'num_vectors': len(base),
+            'build_seconds': round(build_seconds, 3),
+            'recall_at_k': recall(index.search(queries, top_k)[1]),
+            'reranked_recall_at_k': recall(found) if factor > 1 else None,
+            'latency_ms_p50': _percentile_ms(latencies, 50),
+            'latency_ms_p95': _percentile_ms(latencies, 95),
+            'index_bytes': index_bytes,
+            'bytes_per_vector': round(index_bytes / len(base), 1),
+        })
+    return rows
@@ -0,0 +1,111 @@
+"""
+In-process LRU caches for the documentation assistant.
+
+- ``embedding_cache``: (model name, normalized query) -> query embedding.
+  Embeddings depend only on the model, so entries survive index rebuilds.
+- ``result_cache``: (index version, normalized query, top_k, ...) -> search
+  results. Every saved index gets a new version, and the registry clears
+  this cache when it loads a new index.
+
+Both are bounded by settings (AI_EMBEDDING_CACHE_SIZE, AI_RESULT_CACHE_SIZE)
+and count hits and misses for the /api/ai/status/ endpoint.
+"""
+
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable
+
+from django.conf import settings
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_query(query: str, lowercase: bool = False) -> str:
+    """
+    Canonical form of a query for cache keys.
+
+    Args:
+        query: Raw question text
+        lowercase: Also lower-case it (only safe for uncased tokenizers)
+
+    Returns:
+        str: Query with whitespace collapsed and trimmed
+    """
+    query = _WHITESPACE.sub(' ', query).strip()
+    return query.lower() if lowercase else query
+
+
+class LRUCache:
+    """
+    Thread-safe least-recently-used cache with hit/miss counters.
+
+    The size limit is read from a Django setting on every insert, so it can
+    be changed (e.g. in tests) without recreating the cache.
+    """
+
+    def __init__(self, size_setting: str, default_size: int):
+        self.size_setting = size_setting
+        self.default_size = default_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def maxsize(self) -> int:
+        return getattr(settings, self.size_setting, self.default_size)
+
+    def get(self, key: Hashable, default=None):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value):
+        maxsize = self.maxsize
+        if maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> Dict:
+        """Counters for monitoring."""
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else None,
+        }
+
+
+embedding_cache = LRUCache('AI_EMBEDDING_CACHE_SIZE', 1024)
+result_cache = LRUCache('AI_RESULT_CACHE_SIZE', 256)
+
+
+def cache_stats() -> Dict:
+    """Hit/miss counters of all assistant caches."""
+    return {
+        'embeddings': embedding_cache.stats(),
+        'results': result_cache.stats(),
+    }
@@ -0,0 +1,184 @@
+"""
+On-disk chunk store of the documentation index.
+
+Chunk texts and metadata are saved in a SQLite file (``chunks.sqlite3``)
+keyed by the chunk's FAISS vector ID, with zlib-compressed texts. Loading
+an index only opens the file, and searches read just the rows of their
+hits, so startup time and memory don't grow with the corpus. Full scans
+(incremental updates, re-saving) stream the rows in vector ID order.
+
+The file is written to a temporary name and renamed into place, and never
+modified afterwards, so readers open it immutable (no file locking). Each
+store keeps one connection, opened when the index is loaded, so it keeps
+reading the file it was loaded with even after a rebuild replaces it.
+
+NOTE: This is for documentation and research workflow support only.
+NOT for clinical diagnosis or patient treatment decisions.
+"""
+
+import os
+import sqlite3
+import threading
+import zlib
+from collections.abc import Mapping
+from dataclasses import dataclass, fields
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List
+from urllib.parse import quote
+
+CHUNK_STORE_FILE = 'chunks.sqlite3'
+
+# SQLite's default limit on parameters per statement
+MAX_QUERY_PARAMS = 999
+
+# Rows fetched per query when streaming all chunks
+SCAN_PAGE_SIZE = 1000
+
+
+@dataclass(slots=True)
+class DocChunk:
+    """Represents a chunk of documentation with metadata."""
+    text: str
+    filename: str
+    heading: str
+    line_start: int
+    line_end: int
+    chunk_index: int
+    vector_id: int = -1  # ID of the chunk's vector in the FAISS index
+    path: str = ''  # Document key: file relative to the base directory, or record ID
+    source: str = 'docs'  # Index source (see ai_assistant.sources)
+    record_id: str = ''  # Primary key of the experiment record, for record sources
+
+
+FIELDS = [field.name for field in fields(DocChunk)]
+COLUMNS = [name for name in FIELDS if name not in ('vector_id', 'text')]
+
+
+def write_chunks(path: Path, chunks: Iterable[DocChunk]):
+    """
+    Write chunks to a new store at path (atomically replacing any old one).
+
+    Args:
+        path: Store file
+        chunks: Chunks with unique vector IDs
+    """
+    path = Path(path)
+    tmp_path = path.with_name(path.name + '.tmp')
+    tmp_path.unlink(missing_ok=True)
+    connection = sqlite3.connect(tmp_path)
+    try:
+        # A crash leaves only the temporary file, so no journal is needed
+        connection.execute('PRAGMA journal_mode = OFF')
+        connection.execute('PRAGMA synchronous = OFF')
+        types = {field.name: 'INTEGER' if field.type is int else 'TEXT' for field in fields(DocChunk)}
+        connection.execute(
+            'CREATE TABLE chunks (vector_id INTEGER PRIMARY KEY, text BLOB NOT NULL, '
+            + ', '.join(f'{name} {types[name]}' for name in COLUMNS) + ')'
+        )
+        connection.executemany(
+            f"INSERT INTO chunks VALUES ({', '.join('?' * (len(COLUMNS) + 2))})",
+            (
+                (chunk.vector_id, zlib.compress(chunk.text.encode('utf-8')),
+                 *(getattr(chunk, name) for name in COLUMNS))
+                for chunk in chunks
+            ),
+        )
+        connection.commit()
+    finally:
+        connection.close()
+    os.replace(tmp_path, path)
+
+
+class ChunkStore(Mapping):
+    """
+    Read-only mapping of vector ID -> DocChunk backed by a store file.
+
+    Chunks are read on access and not kept; ``values()`` streams all of
+    them in vector ID order.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        uri = f'file:{quote(str(self.path.resolve()))}?mode=ro&immutable=1'
+        # Shared by the request threads; queries are serialized by the lock
+        self._connection = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        self._lock = threading.Lock()
+        # Columns of the file, so stores written before a DocChunk field existed still load
+        self._columns = [column[0] for column in self._query('SELECT * FROM chunks LIMIT 0', description=True)]
+        self._length = self._query('SELECT COUNT(*) FROM chunks')[0][0]
+
+    def _query(self, sql: str, params=(), description: bool = False) -> List:
+        with self._lock:
+            cursor = self._connection.execute(sql, params)
+            return cursor.description if description else cursor.fetchall()
+
+    def close(self):
+        self._connection.close()
+
+    def _chunk(self, row) -> DocChunk:
+        data = dict(zip(self._columns, row))
+        data['text'] = zlib.decompress(data['text']).decode('utf-8')
+        return DocChunk(**{name: data[name] for name in FIELDS if name in data})
+
+    def __getitem__(self, vector_id: int) -> DocChunk:
+        rows = self._query('SELECT * FROM chunks WHERE vector_id = ?', (int(vector_id),))
+        if not rows:
+            raise KeyError(vector_id)
+        return self._chunk(rows[0])
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> Iterator[int]:
+        for row in self._scan('vector_id'):
+            yield row[0]
+
+    def _scan(self, columns: str = '*') -> Iterator:
+        """All rows in vector ID order, a page per query (the lock isn't held between pages)."""
+        last = None
+        while True:
+            if last is None:
+                rows = self._query(f'SELECT {columns} FROM chunks ORDER BY vector_id LIMIT ?', (SCAN_PAGE_SIZE,))
+            else:
+                rows = self._query(
+                    f'SELECT {columns} FROM chunks WHERE vector_id > ? ORDER BY vector_id LIMIT ?',
+                    (last, SCAN_PAGE_SIZE),
+                )
+            yield from rows
+            if len(rows) < SCAN_PAGE_SIZE:
+                return
+            last = rows[-1][0]  # vector_id is the first column
+
+    def get_many(self, vector_ids: List[int]) -> Dict[int, DocChunk]:
+        """Chunks of the given IDs that exist, in a query per MAX_QUERY_PARAMS IDs."""
+        vector_ids = [int(vector_id) for vector_id in vector_ids]
+        found = {}
+        for start in range(0, len(vector_ids), MAX_QUERY_PARAMS):
+            batch = vector_ids[start:start + MAX_QUERY_PARAMS]
+            rows = self._query(f"SELECT * FROM chunks WHERE vector_id IN ({', '.join('?' * len(batch))})", batch)
+            for row in rows:
+                chunk = self._chunk(row)
+                found[chunk.vector_id] = chunk
+        return found
+
+    def values(self) -> 'StoredChunks':
+        return StoredChunks(self)
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the store file."""
+        return self.path.stat().st_size
+
+
+class StoredChunks:
+    """All chunks of a store, streamed in vector ID order on each iteration."""
+
+    def __init__(self, store: ChunkStore):
+        self.store = store
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    def __iter__(self) -> Iterator[DocChunk]:
+        for row in self.store._scan():
+            yield self.store._chunk(row)
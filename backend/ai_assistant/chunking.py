@@ -0,0 +1,235 @@
+"""
+Structure-aware markdown chunker for the documentation index.
+
+Documents are parsed into blocks (headings, fenced code, lists and
+paragraphs) and the blocks are packed into chunks up to a token budget:
+
+- A heading starts a new chunk, so a chunk stays within one section
+  (a heading directly followed by subheadings stays with them).
+- Blocks are never cut while they fit the budget, so code fences and
+  lists stay whole. Oversized lists are cut between top-level items,
+  other oversized blocks between lines, and single oversized lines
+  between words.
+- Tokens are counted with the embedding model's tokenizer, so no chunk
+  is truncated by the model (and none is needlessly small). Without a
+  tokenizer they are estimated as words plus punctuation marks.
+- ``line_start``/``line_end`` are the exact (1-indexed) lines a chunk's
+  text was taken from.
+
+Each line is tokenized once and spans are summed from prefix sums, so
+chunking is linear in the document size.
+
+NOTE: This is for documentation and research workflow support only.
+NOT for clinical diagnosis or patient treatment decisions.
+"""
+
+import re
+from dataclasses import dataclass
+from itertools import accumulate
+from typing import List, Optional, Sequence
+
+from ai_assistant.chunk_store import DocChunk
+
+# all-MiniLM-L6-v2 reads 256 tokens, two of which are [CLS] and [SEP]
+DEFAULT_MAX_TOKENS = 254
+
+_HEADING = re.compile(r'^ {0,3}#{1,6}(?:\s|$)')
+_FENCE = re.compile(r'^ {0,3}(`{3,}|~{3,})')
+_LIST_ITEM = re.compile(r'^(\s*)(?:[-*+]|\d{1,9}[.)])\s')
+# Estimate without a tokenizer: words and punctuation marks
+_ESTIMATE = re.compile(r'\w+|[^\w\s]')
+
+
+def extract_heading(line: str) -> str:
+    """Extract heading text from a markdown heading line."""
+    # Remove markdown heading markers (#, ##, etc.)
+    heading = re.sub(r'^#+\s*', '', line.strip())
+    return heading if heading else "Document"
+
+
+class TokenCounter:
+    """
+    Counts tokens the way the embedding model will.
+
+    Picklable (Hugging Face tokenizers are), so chunking process pools
+    can use it.
+    """
+
+    def __init__(self, tokenizer=None):
+        """
+        Args:
+            tokenizer: Hugging Face tokenizer of the embedding model
+                       (``SentenceTransformer.tokenizer``); None estimates
+        """
+        self.tokenizer = tokenizer
+
+    def count_many(self, texts: Sequence[str]) -> List[int]:
+        """Token counts of texts, without special tokens."""
+        if self.tokenizer is None:
+            return [len(_ESTIMATE.findall(text)) for text in texts]
+        if not texts:
+            return []
+        encoded = self.tokenizer(
+            list(texts), add_special_tokens=False, return_attention_mask=False, return_token_type_ids=False,
+        )
+        return [len(ids) for ids in encoded['input_ids']]
+
+
+@dataclass(slots=True)
+class Block:
+    """Lines [start, end) of one markdown element (0-indexed)."""
+    kind: str  # 'heading', 'code', 'list' or 'text'
+    start: int
+    end: int
+
+
+@dataclass(slots=True)
+class Piece:
+    """Part of a block packed into a chunk; text is set for parts of a line."""
+    start: int
+    end: int
+    tokens: int
+    text: Optional[str] = None
+
+
+def parse_blocks(lines: List[str]) -> List[Block]:
+    """
+    Split markdown lines into blocks; blank lines separate blocks and aren't part of any.
+
+    An unclosed code fence runs to the end of the document.
+    """
+    blocks = []
+    i, n = 0, len(lines)
+    while i < n:
+        line = lines[i]
+        if not line.strip():
+            i += 1
+            continue
+        if _HEADING.match(line):
+            blocks.append(Block('heading', i, i + 1))
+            i += 1
+            continue
+        fence = _FENCE.match(line)
+        if fence:
+            marker = fence.group(1)
+            closing = re.compile(rf'^ {{0,3}}{re.escape(marker[0])}{{{len(marker)},}}\s*$')
+            j = i + 1
+            while j < n and not closing.match(lines[j]):
+                j += 1
+            end = min(j + 1, n)
+            blocks.append(Block('code', i, end))
+            i = end
+            continue
+        j = i + 1
+        while j < n and lines[j].strip() and not _HEADING.match(lines[j]) and not _FENCE.match(lines[j]):
+            j += 1
+        blocks.append(Block('list' if _LIST_ITEM.match(line) else 'text', i, j))
+        i = j
+    return blocks
+
+
+def chunk_markdown(
+    text: str,
+    filename: str,
+    max_tokens: int = DEFAULT_MAX_TOKENS,
+    counter: Optional[TokenCounter] = None,
+) -> List[DocChunk]:
+    """
+    Split a markdown document into chunks of whole markdown blocks.
+
+    Args:
+        text: Document content
+        filename: Name stored on the chunks
+        max_tokens: Token budget per chunk (excluding special tokens)
+        counter: Token counter of the embedding model (default: estimate)
+
+    Returns:
+        List of DocChunk objects
+    """
+    lines = text.split('\n')
+    counter = counter or TokenCounter()
+    prefix = list(accumulate(counter.count_many(lines), initial=0))
+
+    def tokens(start, end):
+        return prefix[end] - prefix[start]
+
+    def split_line(index):
+        words = lines[index].split(' ')
+        pieces, start, size = [], 0, 0
+        for position, count in enumerate(counter.count_many(words)):
+            if size and size + count > max_tokens:
+                pieces.append(Piece(index, index + 1, size, ' '.join(words[start:position])))
+                start, size = position, 0
+            size += count
+        pieces.append(Piece(index, index + 1, size, ' '.join(words[start:])))
+        return pieces
+
+    def split_block(block):
+        """Pieces within the budget; the block itself if it fits."""
+        if tokens(block.start, block.end) <= max_tokens:
+            return [Piece(block.start, block.end, tokens(block.start, block.end))]
+        if block.kind == 'list':
+            indent = len(_LIST_ITEM.match(lines[block.start]).group(1))
+            cuts = [
+                i for i in range(block.start, block.end)
+                if (item := _LIST_ITEM.match(lines[i])) and len(item.group(1)) <= indent
+            ]
+        else:
+            cuts = list(range(block.start, block.end))
+        units = []
+        for start, end in zip(cuts, cuts[1:] + [block.end]):
+            if tokens(start, end) <= max_tokens:
+                units.append(Piece(start, end, tokens(start, end)))
+                continue
+            for i in range(start, end):
+                units.extend([Piece(i, i + 1, tokens(i, i + 1))] if tokens(i, i + 1) <= max_tokens else split_line(i))
+        # Merge consecutive whole-line units back up to the budget
+        pieces = []
+        for unit in units:
+            last = pieces[-1] if pieces else None
+            if (last is not None and last.text is None and unit.text is None
+                    and last.tokens + unit.tokens <= max_tokens):
+                last.end, last.tokens = unit.end, last.tokens + unit.tokens
+            else:
+                pieces.append(unit)
+        return pieces
+
+    chunks = []
+    heading, chunk_heading = "Introduction", "Introduction"
+    current, size, only_headings = [], 0, True
+
+    def emit():
+        if any(piece.text is not None for piece in current):
+            chunk_text = '\n'.join(
+                piece.text if piece.text is not None else '\n'.join(lines[piece.start:piece.end])
+                for piece in current
+            )
+        else:
+            chunk_text = '\n'.join(lines[current[0].start:current[-1].end])
+        chunks.append(DocChunk(
+            text=chunk_text.strip(),
+            filename=filename,
+            heading=chunk_heading,
+            line_start=current[0].start + 1,  # 1-indexed
+            line_end=current[-1].end,  # 1-indexed, inclusive
+            chunk_index=len(chunks),
+        ))
+
+    for block in parse_blocks(lines):
+        if block.kind == 'heading':
+            heading = extract_heading(lines[block.start])
+            if current and not only_headings:
+                emit()
+                current, size, only_headings = [], 0, True
+        for piece in split_block(block):
+            if current and size + piece.tokens > max_tokens:
+                emit()
+                current, size, only_headings = [], 0, True
+            if not current:
+                chunk_heading = heading
+            current.append(piece)
+            size += piece.tokens
+            only_headings = only_headings and block.kind == 'heading'
+    if current:
+        emit()
+    return chunks
@@ -0,0 +1,261 @@
+"""
+FAISS index types for the documentation index.
+
+- ``flat-ip``: Exact inner-product search over L2-normalized embeddings
+  (cosine similarity). Default; fine up to ~100k chunks.
+- ``hnsw``: HNSW graph (approximate, fast, all vectors kept in memory).
+  Graphs can't delete vectors, so incremental updates rebuild the graph
+  from the stored embeddings (no re-encoding).
+- ``sq8``: Exact scan over int8 scalar-quantized vectors (4x smaller than
+  ``flat-ip``; trained on the per-dimension value ranges at build time).
+- ``ivf-pq``: Inverted file with product quantization (approximate,
+  compressed). Trained on the embeddings at build time; corpora too small
+  to train on fall back to ``flat-ip``.
+- ``flat-l2``: Exact L2 search on raw embeddings. Only used for indexes
+  saved before index types existed.
+
+Raw scores of the normalized types are cosine similarities. They are
+calibrated against the corpus' background similarity (the mean cosine of
+random chunk pairs), so 0 means "no closer than an arbitrary chunk" and 1
+means identical, whichever index type produced them.
+
+The compressed types (``sq8``, ``ivf-pq``) score candidates on lossy
+codes, so they fetch ``rerank`` times more candidates than asked for and
+rescore them with the exact float32 vectors (kept on disk next to the
+index and memory-mapped, so only the candidates' rows are read). ``rerank``
+0 returns the approximate ranking as is.
+
+Saved indexes can be loaded memory-mapped (``mmap_flags``): the vectors
+stay in the page cache instead of being copied onto the heap, so several
+server processes share one copy and idle pages can be evicted.
+
+NOTE: This is for documentation and research workflow support only.
+NOT for clinical diagnosis or patient treatment decisions.
+"""
+
+from typing import Dict, Optional, Tuple
+
+try:
+    import faiss
+    import numpy as np
+    FAISS_AVAILABLE = True
+except ImportError:
+    FAISS_AVAILABLE = False
+
+DEFAULT_INDEX_TYPE = 'flat-ip'
+LEGACY_INDEX_TYPE = 'flat-l2'
+
+DEFAULT_PARAMS = {
+    'flat-ip': {},
+    'hnsw': {'M': 32, 'efConstruction': 200, 'efSearch': 64},
+    'sq8': {'rerank': 4},
+    'ivf-pq': {'nlist': 1024, 'm': 48, 'nbits': 8, 'nprobe': 16, 'rerank': 4},
+    'flat-l2': {},
+}
+INDEX_TYPES = tuple(DEFAULT_PARAMS)
+
+# Applied after loading, since they only affect search
+SEARCH_PARAMS = ('efSearch', 'nprobe')
+
+# Types storing lossy codes, whose candidates are reranked with exact vectors
+COMPRESSED_TYPES = ('sq8', 'ivf-pq')
+
+# k-means needs ~39 training points per centroid for stable centroids
+MIN_POINTS_PER_CENTROID = 39
+
+# Trained types learn from a random sample of at most this many vectors
+# (faiss subsamples k-means input to 256 points per centroid anyway)
+MAX_TRAINING_VECTORS = 65536
+
+
+def is_normalized(index_type: str) -> bool:
+    """Whether vectors and queries are L2-normalized (inner product = cosine)."""
+    return index_type != LEGACY_INDEX_TYPE
+
+
+def needs_training(index_type: str) -> bool:
+    """Whether the index must be trained before vectors are added."""
+    return index_type in ('sq8', 'ivf-pq')
+
+
+def is_compressed(index_type: str) -> bool:
+    """Whether the index stores lossy codes (see ``rerank_search``)."""
+    return index_type in COMPRESSED_TYPES
+
+
+def supports_remove(index_type: str) -> bool:
+    """Whether vectors can be removed by ID (HNSW graphs can't)."""
+    return index_type != 'hnsw'
+
+
+def resolve_index(
+    index_type: str,
+    params: Optional[Dict] = None,
+    num_vectors: Optional[int] = None,
+    dimension: Optional[int] = None,
+) -> Tuple[str, Dict]:
+    """
+    Effective index type and parameters for a corpus.
+
+    Args:
+        index_type: One of INDEX_TYPES
+        params: Overrides of DEFAULT_PARAMS for the type
+        num_vectors: Corpus size (sizes IVF-PQ; too small falls back to flat-ip)
+        dimension: Embedding dimension (PQ sub-quantizers must divide it)
+
+    Returns:
+        Tuple of (index type, parameters)
+
+    Raises:
+        ValueError: Unknown index type or parameter
+    """
+    if index_type not in DEFAULT_PARAMS:
+        raise ValueError(f"Unknown index type {index_type!r}; choose from {', '.join(INDEX_TYPES)}")
+    resolved = dict(DEFAULT_PARAMS[index_type])
+    unknown = set(params or {}) - set(resolved)
+    if unknown:
+        raise ValueError(f"Unknown parameters for {index_type}: {', '.join(sorted(unknown))}")
+    resolved.update({key: int(value) for key, value in (params or {}).items()})
+
+    if index_type == 'ivf-pq':
+        if num_vectors is not None:
+            if num_vectors < max(2 ** resolved['nbits'], MIN_POINTS_PER_CENTROID):
+                return DEFAULT_INDEX_TYPE, {}
+            resolved['nlist'] = max(1, min(resolved['nlist'], num_vectors // MIN_POINTS_PER_CENTROID))
+            resolved['nprobe'] = min(resolved['nprobe'], resolved['nlist'])
+        if dimension is not None:
+            # Largest sub-quantizer count <= m that divides the dimension
+            resolved['m'] = max(m for m in range(1, resolved['m'] + 1) if dimension % m == 0)
+    return index_type, resolved
+
+
+def create_index(index_type: str, dimension: int, params: Dict, training_vectors=None):
+    """
+    Empty index that supports add_with_ids, trained if the type needs it.
+
+    Args:
+        index_type: Effective type (see resolve_index)
+        dimension: Embedding dimension
+        params: Effective parameters
+        training_vectors: Vectors to train SQ8/IVF-PQ on (normalized float32)
+
+    Returns:
+        faiss.Index
+    """
+    if index_type == 'flat-l2':
+        index = faiss.index_factory(dimension, 'IDMap2,Flat', faiss.METRIC_L2)
+    elif index_type == 'flat-ip':
+        index = faiss.index_factory(dimension, 'IDMap2,Flat', faiss.METRIC_INNER_PRODUCT)
+    elif index_type == 'hnsw':
+        index = faiss.index_factory(dimension, f"IDMap2,HNSW{params['M']}", faiss.METRIC_INNER_PRODUCT)
+        faiss.downcast_index(index.index).hnsw.efConstruction = params['efConstruction']
+    elif index_type == 'sq8':
+        index = faiss.index_factory(dimension, 'IDMap2,SQ8', faiss.METRIC_INNER_PRODUCT)
+        index.train(training_vectors)
+    elif index_type == 'ivf-pq':
+        # IVF indexes store IDs natively and support remove_ids
+        index = faiss.index_factory(
+            dimension, f"IVF{params['nlist']},PQ{params['m']}x{params['nbits']}", faiss.METRIC_INNER_PRODUCT
+        )
+        index.train(training_vectors)
+    else:
+        raise ValueError(f"Unknown index type {index_type!r}")
+    apply_search_params(index, params)
+    return index
+
+
+def apply_search_params(index, params: Dict):
+    """Set search-time parameters (efSearch, nprobe) on an index."""
+    space = faiss.ParameterSpace()
+    for name in SEARCH_PARAMS:
+        if name in params:
+            space.set_index_parameter(index, name, params[name])
+
+
+def mmap_flags(index_type: str) -> int:
+    """
+    ``faiss.read_index`` flags that map a saved index instead of copying it.
+
+    IVF indexes map their inverted lists (IO_FLAG_MMAP); flat, SQ8 and
+    HNSW indexes map their code arrays (IO_FLAG_MMAP_IFC; faiss versions
+    without it copy them). Mapped indexes are read-only.
+    """
+    if index_type == 'ivf-pq':
+        return faiss.IO_FLAG_MMAP
+    return getattr(faiss, 'IO_FLAG_MMAP_IFC', 0)
+
+
+def rerank_search(index, queries, top_k: int, factor: int, vector_ids, vectors):
+    """
+    Search a compressed index and rescore the candidates exactly.
+
+    Args:
+        index: FAISS index over normalized vectors
+        queries: Normalized float32 queries, shape (n, d)
+        top_k: Results per query
+        factor: Candidates fetched per result (0 or 1: no reranking)
+        vector_ids: Sorted int64 IDs of the exact vectors
+        vectors: Normalized float32 vectors in vector_ids order (may be
+                 memory-mapped; only candidate rows are read)
+
+    Returns:
+        Tuple of (scores, IDs) arrays of shape (n, top_k), like
+        ``index.search``; missing results have ID -1
+    """
+    if factor <= 1 or not len(vector_ids):
+        return index.search(queries, top_k)
+    _, candidates = index.search(queries, top_k * factor)
+    positions = np.minimum(np.searchsorted(vector_ids, candidates), len(vector_ids) - 1)
+    found = (candidates >= 0) & (vector_ids[positions] == candidates)
+    rows = np.asarray(vectors[positions.ravel()]).reshape(*candidates.shape, -1)
+    scores = np.where(found, np.einsum('qkd,qd->qk', rows, queries), -np.inf)
+    order = np.argsort(-scores, axis=1, kind='stable')[:, :top_k]
+    ids = np.take_along_axis(np.where(found, candidates, -1), order, axis=1)
+    return np.take_along_axis(scores, order, axis=1), ids
+
+
+def normalize(vectors):
+    """L2-normalized float32 copy of a (n, d) array."""
+    vectors = np.array(vectors, dtype='float32', copy=True)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def calibrate(vectors, samples: int = 2000, seed: int = 0) -> Dict:
+    """
+    Background similarity of a corpus, used to calibrate scores.
+
+    Args:
+        vectors: Normalized embeddings of the indexed chunks
+        samples: Number of random chunk pairs to compare
+
+    Returns:
+        dict: {'floor': mean cosine similarity of random pairs}
+    """
+    if len(vectors) < 2:
+        return {'floor': 0.0}
+    rng = np.random.default_rng(seed)
+    first = rng.integers(0, len(vectors), samples)
+    second = rng.integers(0, len(vectors), samples)
+    distinct = first != second
+    sims = np.einsum('ij,ij->i', vectors[first[distinct]], vectors[second[distinct]])
+    floor = float(sims.mean()) if len(sims) else 0.0
+    return {'floor': round(min(max(floor, 0.0), 0.95), 4)}
+
+
+def similarity(raw: float, index_type: str, calibration: Optional[Dict] = None) -> float:
+    """
+    Convert a raw FAISS score into a 0-1 similarity.
+
+    Args:
+        raw: Distance (flat-l2) or inner product (normalized types)
+        index_type: Effective index type
+        calibration: Result of calibrate() for the corpus
+
+    Returns:
+        float: Similarity in [0, 1]
+    """
+    if not is_normalized(index_type):
+        return float(1.0 / (1.0 + raw))
+    floor = (calibration or {}).get('floor', 0.0)
+    return float(min(1.0, max(0.0, (raw - floor) / (1.0 - floor))))
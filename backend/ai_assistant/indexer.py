@@ -2,21 +2,49 @@
 Document indexer for RAG-based documentation Q&A.
 
 This module handles:
-- Collecting markdown documentation files
-- Splitting documents into chunks
+- Collecting markdown documentation files and experiment records
+  (see ``ai_assistant.sources``)
+- Splitting documents into chunks of whole markdown blocks within the
+  model's token budget (see ``ai_assistant.chunking``)
 - Generating embeddings using sentence-transformers
-- Building and persisting a FAISS vector index
+- Building and persisting a FAISS vector index, with chunk texts in a
+  SQLite store read lazily by vector ID (see ``ai_assistant.chunk_store``)
+- Incrementally updating the index when documentation files change
+- Choosing the FAISS index type (exact, HNSW, int8 scalar quantization or
+  IVF-PQ; see index_types), with compressed candidates reranked by the
+  exact vectors and saved indexes memory-mapped when serving
+- A BM25 lexical index over the same chunks, fused with vector search
+  (see ``ai_assistant.lexical``)
+
+Large builds are parallel and streamed: files are chunked in a process
+pool, new chunk texts are encoded in batches (optionally by a
+sentence-transformers multi-process pool over several devices), and the
+vectors are added to FAISS one batch at a time, so no array of all
+embeddings is built. Each stage is timed for the build report.
+
+Vectors are stored in an ID-mapped FAISS index (``IndexIDMap2``) under a
+stable ``vector_id`` per chunk, so the chunks of changed or deleted files
+can be removed without rebuilding. Embeddings are also kept on disk in
+``embeddings.npz``, keyed by the hash of the chunk text, so unchanged
+chunks are never re-embedded. Compressed indexes also save the
+normalized vectors by vector ID (``rerank_vectors.npy``), which are
+memory-mapped and read only for the candidates being reranked.
 
 NOTE: This is for documentation and research workflow support only.
 NOT for clinical diagnosis or patient treatment decisions.
 """
 
 import os
+import functools
+import hashlib
 import json
-import re
+import time
+import uuid
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Dict, Tuple
-from dataclasses import dataclass, asdict
+from typing import List, Dict, Optional, Tuple
 
 try:
     from sentence_transformers import SentenceTransformer
@@ -26,16 +54,99 @@ try:
 except ImportError:
     DEPENDENCIES_AVAILABLE = False
 
+from ai_assistant.caches import embedding_cache, normalize_query, result_cache
+from ai_assistant.chunk_store import CHUNK_STORE_FILE, ChunkStore, DocChunk, write_chunks
+from ai_assistant.chunking import DEFAULT_MAX_TOKENS, TokenCounter, chunk_markdown, extract_heading
+from ai_assistant.index_types import (
+    DEFAULT_INDEX_TYPE, LEGACY_INDEX_TYPE, MAX_TRAINING_VECTORS, apply_search_params, calibrate,
+    create_index, is_compressed, is_normalized, mmap_flags, needs_training, normalize, rerank_search,
+    resolve_index, similarity, supports_remove,
+)
+from ai_assistant.lexical import DEFAULT_RETRIEVAL_MODE, RETRIEVAL_MODES, LexicalIndex, reciprocal_rank_fusion
+
+# Starting a multi-process pool loads the model in every worker, which only
+# pays off for larger batches of new texts
+MIN_POOL_TEXTS = 256
+
+# Exact vectors of compressed indexes, in vector ID order, for reranking
+RERANK_IDS_FILE = 'rerank_ids.npy'
+RERANK_VECTORS_FILE = 'rerank_vectors.npy'
+
+
+def content_hash(data) -> str:
+    """SHA-256 hex digest of text or bytes (file and chunk identity)."""
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    return hashlib.sha256(data).hexdigest()
+
+
+def split_markdown(
+    file_path: Path, max_tokens: int = DEFAULT_MAX_TOKENS, counter: Optional[TokenCounter] = None,
+) -> List[DocChunk]:
+    """
+    Split a markdown document into chunks of whole markdown blocks.
+    
+    A module-level function so process pool workers can run it (see
+    ``chunk_files``).
+    
+    Args:
+        file_path: Path to the markdown file
+        max_tokens: Token budget per chunk (see ``ai_assistant.chunking``)
+        counter: Token counter of the embedding model (default: estimate)
+        
+    Returns:
+        List of DocChunk objects
+    """
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+    except Exception as e:
+        print(f"Warning: Could not read {file_path}: {e}")
+        return []
+    
+    return chunk_markdown(content, file_path.name, max_tokens, counter)
+
+
+def chunk_files(
+    files: List[Path],
+    workers: int = 1,
+    max_tokens: int = DEFAULT_MAX_TOKENS,
+    counter: Optional[TokenCounter] = None,
+) -> List[List[DocChunk]]:
+    """
+    Split files into chunks, in a process pool when workers > 1.
+    
+    Args:
+        files: Markdown files
+        workers: Number of worker processes (1 chunks in this process)
+        max_tokens: Token budget per chunk
+        counter: Token counter of the embedding model (sent to the workers)
+        
+    Returns:
+        List of each file's chunks, in the order of files
+    """
+    split = functools.partial(split_markdown, max_tokens=max_tokens, counter=counter)
+    workers = min(workers, len(files))
+    if workers <= 1:
+        return [split(file_path) for file_path in files]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Several files per task keeps inter-process overhead low for small files
+        return list(pool.map(split, files, chunksize=max(1, len(files) // (4 * workers))))
+
 
-@dataclass
-class DocChunk:
-    """Represents a chunk of documentation with metadata."""
-    text: str
-    filename: str
-    heading: str
-    line_start: int
-    line_end: int
-    chunk_index: int
+def _encoding_session(method):
+    """Reset the build timings before method and stop the encoding pool (if started) after it."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        self.timings.clear()
+        self.counts.clear()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            if self._encode_pool is not None:
+                self.model.stop_multi_process_pool(self._encode_pool)
+                self._encode_pool = None
+    return wrapper
 
 
 class DocumentIndexer:
@@ -46,13 +157,40 @@ class DocumentIndexer:
     nearest-neighbor search.
     """
     
-    def __init__(self, model_name: str = 'all-MiniLM-L6-v2'):
+    def __init__(
+        self,
+        model_name: str = 'all-MiniLM-L6-v2',
+        model=None,
+        index_type: str = DEFAULT_INDEX_TYPE,
+        index_params: Dict = None,
+        batch_size: int = 64,
+        devices: Optional[List[str]] = None,
+        chunk_workers: int = 1,
+        add_batch_size: int = 4096,
+        retrieval_mode: str = DEFAULT_RETRIEVAL_MODE,
+        chunk_tokens: Optional[int] = None,
+    ):
         """
         Initialize the indexer.
         
         Args:
             model_name: Name of the sentence-transformers model to use.
                        Default is a small, fast model suitable for documentation.
+            model: Already loaded SentenceTransformer to reuse (e.g. the
+                   process-wide one from ``ai_assistant.registry``)
+            index_type: FAISS index type for new builds ('flat-ip', 'hnsw',
+                        'sq8' or 'ivf-pq'; see ``ai_assistant.index_types``)
+            index_params: Overrides of the index type's default parameters
+            batch_size: Texts per forward pass of the embedding model
+            devices: Devices for a multi-process encoding pool, e.g.
+                     ['cpu'] * 4 or ['cuda:0', 'cuda:1'] (fewer than two
+                     encodes in this process)
+            chunk_workers: Processes used to chunk files
+            add_batch_size: Chunks embedded and added to FAISS per batch
+            retrieval_mode: Default search mode ('vector', 'lexical' or 'hybrid')
+            chunk_tokens: Token budget per markdown chunk (default and
+                          maximum: the model's max sequence length, less
+                          its special tokens)
         """
         if not DEPENDENCIES_AVAILABLE:
             raise ImportError(
@@ -61,9 +199,51 @@ class DocumentIndexer:
             )
         
         self.model_name = model_name
-        self.model = SentenceTransformer(model_name)
+        self.model = model if model is not None else SentenceTransformer(model_name)
+        # Validates the type and parameters before any work is done
+        resolve_index(index_type, index_params)
+        self.index_type = index_type
+        self.index_params = dict(index_params or {})
+        if retrieval_mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Unknown retrieval mode {retrieval_mode!r}; choose from {', '.join(RETRIEVAL_MODES)}")
+        self.retrieval_mode = retrieval_mode
         self.index = None
+        # BM25 index over the chunk texts, keyed by vector_id
+        self.lexical_index = None
+        # Type and parameters the current index was actually built with
+        self.index_config = {'index_type': index_type, 'index_params': {}}
+        self.score_calibration = {}
+        # Sorted vector IDs and their normalized vectors, for reranking the
+        # candidates of compressed indexes (memory-mapped when loaded so)
+        self.rerank_ids = None
+        self.rerank_vectors = None
+        # Whether the FAISS index was loaded memory-mapped (read-only)
+        self.mmap = False
+        # Chunks in vector ID order, and vector ID -> chunk. Built indexes keep
+        # them in memory; loaded indexes read them lazily from the chunk store.
         self.chunks = []
+        self.chunk_by_id = {}
+        # Identifies the index contents in result cache keys; new on every build
+        self.index_version = None
+        # Source name -> {document key -> content hash} of every indexed document
+        self.document_hashes = {}
+        # Sources of the last build/update, acknowledged once the index is saved
+        self._active_sources = []
+        # Chunk text hash -> embedding (persisted as embeddings.npz)
+        self.embedding_store = {}
+        self.batch_size = batch_size
+        self.devices = list(devices or [])
+        self.chunk_workers = max(1, chunk_workers)
+        self.add_batch_size = max(1, add_batch_size)
+        # Chunks are sized in the model's tokens, so none is truncated when embedded
+        self.token_counter = TokenCounter(getattr(self.model, 'tokenizer', None))
+        max_seq_length = getattr(self.model, 'max_seq_length', None)
+        model_tokens = max_seq_length - 2 if max_seq_length else DEFAULT_MAX_TOKENS
+        self.chunk_tokens = min(chunk_tokens or model_tokens, model_tokens)
+        self._encode_pool = None
+        # Seconds per build stage and item counts (see timing_report)
+        self.timings = defaultdict(float)
+        self.counts = Counter()
     
     def collect_documentation_files(self, base_dir: Path) -> List[Path]:
         """
@@ -103,97 +283,259 @@ class DocumentIndexer:
     
     def extract_heading_from_line(self, line: str) -> str:
         """Extract heading text from a markdown heading line."""
-        # Remove markdown heading markers (#, ##, etc.)
-        heading = re.sub(r'^#+\s*', '', line.strip())
-        return heading if heading else "Document"
+        return extract_heading(line)
     
     def split_document_into_chunks(
         self, 
         file_path: Path, 
-        chunk_size: int = 500, 
-        overlap: int = 50
+        max_tokens: Optional[int] = None,
     ) -> List[DocChunk]:
         """
-        Split a markdown document into overlapping chunks.
+        Split a markdown document into chunks of whole markdown blocks.
         
         Args:
             file_path: Path to the markdown file
-            chunk_size: Target size for each chunk (characters)
-            overlap: Number of characters to overlap between chunks
+            max_tokens: Token budget per chunk (default: self.chunk_tokens)
             
         Returns:
             List of DocChunk objects
         """
+        return split_markdown(file_path, max_tokens or self.chunk_tokens, self.token_counter)
+    
+    def _sources(self, base_dir: Path, sources) -> List:
+        """The markdown documentation followed by the given record sources."""
+        from ai_assistant.sources import MarkdownSource
+        
+        active = [MarkdownSource(base_dir, self)] + list(sources or [])
+        for source in active:
+            source.snapshot()
+        self._active_sources = active
+        return active
+    
+    def _chunk_documents(self, source, documents: List) -> List[DocChunk]:
+        """Chunk a source's documents, tagging the chunks with the source."""
+        with self._timed('chunk'):
+            chunks = source.chunk_documents(documents)
+        for chunk in chunks:
+            chunk.source = source.name
+        self.counts['documents_chunked'] += len(documents)
+        return chunks
+    
+    def acknowledge_changes(self):
+        """Clear the record changes consumed by the last build/update (call after saving)."""
+        for source in self._active_sources:
+            source.acknowledge()
+    
+    @contextmanager
+    def _timed(self, stage: str):
+        started = time.perf_counter()
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-        except Exception as e:
-            print(f"Warning: Could not read {file_path}: {e}")
-            return []
-        
-        lines = content.split('\n')
-        chunks = []
-        current_chunk_text = ""
-        current_heading = "Introduction"
-        chunk_start_line = 0
-        chunk_index = 0
-        
-        for i, line in enumerate(lines):
-            # Update heading if we encounter one
-            if line.strip().startswith('#'):
-                current_heading = self.extract_heading_from_line(line)
-            
-            current_chunk_text += line + '\n'
-            
-            # Create a chunk when we reach the target size
-            if len(current_chunk_text) >= chunk_size:
-                chunks.append(DocChunk(
-                    text=current_chunk_text.strip(),
-                    filename=file_path.name,
-                    heading=current_heading,
-                    line_start=chunk_start_line + 1,  # 1-indexed
-                    line_end=i + 1,  # 1-indexed
-                    chunk_index=chunk_index
-                ))
-                
-                # Set overlap for next chunk
-                overlap_text = current_chunk_text[-overlap:] if len(current_chunk_text) > overlap else ""
-                current_chunk_text = overlap_text
-                chunk_start_line = i - (overlap // 20)  # Approximate line count for overlap
-                chunk_index += 1
-        
-        # Add remaining text as final chunk
-        if current_chunk_text.strip():
-            chunks.append(DocChunk(
-                text=current_chunk_text.strip(),
-                filename=file_path.name,
-                heading=current_heading,
-                line_start=chunk_start_line + 1,
-                line_end=len(lines),
-                chunk_index=chunk_index
-            ))
+            yield
+        finally:
+            self.timings[stage] += time.perf_counter() - started
+    
+    def _encode(self, texts: List[str]):
+        """Encode texts in batches, on the device pool when it pays off."""
+        with self._timed('embed'):
+            if self._encode_pool is None and len(self.devices) > 1 and len(texts) >= MIN_POOL_TEXTS:
+                self._encode_pool = self.model.start_multi_process_pool(target_devices=self.devices)
+            if self._encode_pool is not None:
+                encoded = self.model.encode_multi_process(texts, self._encode_pool, batch_size=self.batch_size)
+            else:
+                encoded = self.model.encode(
+                    texts, batch_size=self.batch_size, show_progress_bar=False, convert_to_numpy=True
+                )
+        self.counts['texts_encoded'] += len(texts)
+        return np.asarray(encoded, dtype='float32')
+    
+    def timing_report(self) -> Dict:
+        """
+        Time spent per stage of the last build or update, and throughput.
         
-        return chunks
+        Returns:
+            dict: Seconds for chunking, embedding, FAISS training/adding and
+            BM25 indexing, item counts and texts encoded per second
+        """
+        embed = self.timings.get('embed', 0.0)
+        return {
+            'chunk_seconds': round(self.timings.get('chunk', 0.0), 3),
+            'embed_seconds': round(embed, 3),
+            'index_seconds': round(self.timings.get('index', 0.0), 3),
+            'lexical_seconds': round(self.timings.get('lexical', 0.0), 3),
+            'lexical_terms': len(self.lexical_index.terms) if self.lexical_index else 0,
+            'lexical_bytes': self.lexical_index.nbytes if self.lexical_index else 0,
+            'documents_chunked': self.counts['documents_chunked'],
+            'texts_encoded': self.counts['texts_encoded'],
+            'vectors_added': self.counts['vectors_added'],
+            'texts_per_second': round(self.counts['texts_encoded'] / embed, 1) if embed else None,
+            'batch_size': self.batch_size,
+            'devices': self.devices or ['default'],
+            'chunk_workers': self.chunk_workers,
+        }
+    
+    def _embed_chunks(self, chunks: List[DocChunk]):
+        """
+        Embeddings for chunks, encoding only texts not in the embedding store.
+        
+        Returns:
+            Tuple of (float32 array of shape (len(chunks), dimension), number encoded)
+        """
+        hashes = [content_hash(chunk.text) for chunk in chunks]
+        missing = {}  # hash -> text, each distinct text encoded once
+        for digest, chunk in zip(hashes, chunks):
+            if digest not in self.embedding_store:
+                missing.setdefault(digest, chunk.text)
+        if missing:
+            encoded = self._encode(list(missing.values()))
+            for digest, vector in zip(missing, encoded):
+                self.embedding_store[digest] = vector
+        
+        embeddings = np.vstack([self.embedding_store[h] for h in hashes]).astype('float32')
+        return embeddings, len(missing)
+    
+    def _vectors(self, chunks: List[DocChunk]):
+        """Index-ready embeddings (normalized unless the index is legacy L2)."""
+        embeddings, encoded = self._embed_chunks(chunks)
+        if is_normalized(self.index_config['index_type']):
+            faiss.normalize_L2(embeddings)
+        return embeddings, encoded
+    
+    def _sample(self, chunks: List[DocChunk], size: int) -> List[DocChunk]:
+        """Reproducible random sample of chunks (all of them if there are few)."""
+        if len(chunks) <= size:
+            return chunks
+        positions = np.random.default_rng(0).choice(len(chunks), size, replace=False)
+        return [chunks[position] for position in sorted(positions)]
+    
+    def _new_index(self, embeddings, num_vectors: int):
+        """
+        Empty index of the configured type, trained on embeddings if needed.
+        
+        Small corpora fall back to flat-ip when the type can't be trained.
+        
+        Args:
+            embeddings: Training sample (or any vector, for untrained types)
+            num_vectors: Number of vectors the index will hold
+        """
+        index_type, params = resolve_index(
+            self.index_type, self.index_params, num_vectors, embeddings.shape[1]
+        )
+        if index_type != self.index_type:
+            print(f"Only {num_vectors} chunks: using {index_type} instead of {self.index_type}")
+        self.index_config = {'index_type': index_type, 'index_params': params}
+        return create_index(index_type, embeddings.shape[1], params, training_vectors=embeddings)
     
-    def build_index(self, base_dir: Path) -> Tuple[int, int]:
+    def _add_chunks(self, chunks: List[DocChunk], first_id: int = None) -> int:
+        """
+        Embed chunks and add them to the index, one batch at a time.
+        
+        A new index is created first; trained types are trained on a
+        random sample of the chunks.
+        
+        Args:
+            chunks: Chunks to add
+            first_id: Assign new vector IDs starting here (None keeps the
+                      chunks' current IDs)
+        
+        Returns:
+            int: Number of embeddings reused from the embedding store
+        """
+        if first_id is not None:
+            for offset, chunk in enumerate(chunks):
+                chunk.vector_id = first_id + offset
+        encoded = 0
+        if self.index is None:
+            # A fallback type (see _new_index) normalizes like the requested one
+            self.index_config = {'index_type': self.index_type, 'index_params': {}}
+            # Untrained types only need one vector for the dimension
+            sample_size = MAX_TRAINING_VECTORS if needs_training(self.index_type) else 1
+            training_vectors, encoded = self._vectors(self._sample(chunks, sample_size))
+            with self._timed('index'):
+                self.index = self._new_index(training_vectors, num_vectors=len(chunks))
+            del training_vectors
+        
+        for offset in range(0, len(chunks), self.add_batch_size):
+            batch = chunks[offset:offset + self.add_batch_size]
+            embeddings, batch_encoded = self._vectors(batch)
+            encoded += batch_encoded
+            ids = np.array([chunk.vector_id for chunk in batch], dtype='int64')
+            with self._timed('index'):
+                self.index.add_with_ids(embeddings, ids)
+            self.counts['vectors_added'] += len(batch)
+            if len(chunks) > self.add_batch_size:
+                print(f"Indexed {offset + len(batch)}/{len(chunks)} chunks")
+        return len(chunks) - encoded
+    
+    def _set_chunks(self, chunks: List[DocChunk]):
+        self.chunks = chunks
+        self.chunk_by_id = {chunk.vector_id: chunk for chunk in chunks}
+    
+    def _chunks_by_id(self, vector_ids: List[int]) -> Dict[int, DocChunk]:
+        """Chunks of the given vector IDs that exist (one query for a chunk store)."""
+        if isinstance(self.chunk_by_id, ChunkStore):
+            return self.chunk_by_id.get_many(vector_ids)
+        return {vector_id: self.chunk_by_id[vector_id] for vector_id in vector_ids if vector_id in self.chunk_by_id}
+    
+    def _exact_vectors(self):
+        """
+        Normalized embeddings of all chunks in vector ID order, from the embedding store.
+        
+        Returns:
+            Tuple of (sorted int64 vector IDs, float32 array), or None if
+            an embedding isn't in the store
+        """
+        ids, rows = [], []
+        for chunk in self.chunks:
+            vector = self.embedding_store.get(content_hash(chunk.text))
+            if vector is None:
+                return None
+            ids.append(chunk.vector_id)
+            rows.append(vector)
+        if not rows:
+            return None
+        ids = np.array(ids, dtype='int64')
+        order = np.argsort(ids, kind='stable')
+        return ids[order], normalize(np.vstack(rows)[order])
+    
+    def _set_rerank_vectors(self):
+        """Keep the exact vectors of a compressed index for reranking (none for other types)."""
+        self.rerank_ids, self.rerank_vectors = None, None
+        if is_compressed(self.index_config['index_type']):
+            with self._timed('index'):
+                exact = self._exact_vectors()
+            if exact is not None:
+                self.rerank_ids, self.rerank_vectors = exact
+    
+    def _build_lexical(self):
+        """Re-index the chunk texts for BM25 (no embedding, so cheap to redo on updates)."""
+        with self._timed('lexical'):
+            self.lexical_index = LexicalIndex.build((chunk.vector_id, chunk.text) for chunk in self.chunks)
+    
+    @_encoding_session
+    def build_index(self, base_dir: Path, sources=None) -> Tuple[int, int]:
         """
         Build the complete vector index from all documentation.
         
+        Embeddings already in the embedding store (see
+        ``load_embedding_cache``) are reused.
+        
         Args:
             base_dir: Base directory of the project
+            sources: Record sources to index besides the markdown files
+                     (see ``ai_assistant.sources.record_sources``)
             
         Returns:
-            Tuple of (number of files processed, number of chunks created)
+            Tuple of (number of documents processed, number of chunks created)
         """
-        print("Collecting documentation files...")
-        doc_files = self.collect_documentation_files(base_dir)
-        print(f"Found {len(doc_files)} documentation files")
-        
-        print("Splitting documents into chunks...")
         all_chunks = []
-        for file_path in doc_files:
-            chunks = self.split_document_into_chunks(file_path)
-            all_chunks.extend(chunks)
+        self.document_hashes = {}
+        for source in self._sources(base_dir, sources):
+            print(f"Collecting {source.name} documents...")
+            documents = list(source.documents())
+            print(f"Found {len(documents)} {source.name} documents")
+            self.document_hashes[source.name] = {doc.key: doc.content_hash for doc in documents}
+            all_chunks += self._chunk_documents(source, documents)
+        num_documents = sum(len(hashes) for hashes in self.document_hashes.values())
         
         print(f"Created {len(all_chunks)} chunks")
         
@@ -201,19 +543,137 @@ class DocumentIndexer:
             print("Warning: No chunks created. No documentation to index.")
             return 0, 0
         
-        print("Generating embeddings...")
-        texts = [chunk.text for chunk in all_chunks]
-        embeddings = self.model.encode(texts, show_progress_bar=True, convert_to_numpy=True)
-        
-        print("Building FAISS index...")
-        dimension = embeddings.shape[1]
-        self.index = faiss.IndexFlatL2(dimension)  # L2 distance index
-        self.index.add(embeddings.astype('float32'))
-        
-        self.chunks = all_chunks
+        print("Generating embeddings and building FAISS index...")
+        self.index = None
+        reused = self._add_chunks(all_chunks, first_id=0)
+        if is_normalized(self.index_config['index_type']):
+            self.score_calibration = calibrate(self._vectors(self._sample(all_chunks, 2000))[0])
+        
+        self._set_chunks(all_chunks)
+        self._set_rerank_vectors()
+        self._build_lexical()
+        self.index_version = uuid.uuid4().hex
+        
+        print(f"Index built successfully: {len(all_chunks)} chunks indexed "
+              f"({self.index_config['index_type']}, {reused} embeddings reused)")
+        return num_documents, len(all_chunks)
+    
+    @_encoding_session
+    def update_index(self, base_dir: Path, sources=None) -> Dict[str, int]:
+        """
+        Bring a loaded index up to date with the documentation and records.
+        
+        Only documents whose content hash changed are re-chunked; their old
+        vectors (and those of deleted documents) are removed by ID. Markdown
+        files are all re-hashed, while record sources only re-read the
+        records queued by model signals (a source new to the index is read
+        in full, and sources no longer given are dropped). HNSW graphs
+        can't remove vectors, so they are rebuilt from the stored
+        embeddings instead. Indexes saved without ID mapping are rebuilt in
+        full. The index type, trained parameters and score calibration of
+        the existing index are kept; use a full build to change them.
         
-        print(f"Index built successfully: {len(all_chunks)} chunks indexed")
-        return len(doc_files), len(all_chunks)
+        Args:
+            base_dir: Base directory of the project
+            sources: Record sources to index besides the markdown files
+            
+        Returns:
+            dict: Counts of documents added/changed/removed/unchanged and
+            chunks embedded/reused/removed
+            
+        Raises:
+            ValueError: The index was loaded memory-mapped (read-only)
+        """
+        if self.mmap:
+            raise ValueError("Index was loaded memory-mapped (read-only); load it with mmap=False to update it")
+        if self.index is None or not isinstance(self.index, (faiss.IndexIDMap2, faiss.IndexIVF)):
+            print("Existing index is not ID-mapped; rebuilding in full")
+            num_documents, num_chunks = self.build_index(base_dir, sources)
+            return {'documents_added': num_documents, 'chunks_embedded': num_chunks, 'full_rebuild': 1}
+        
+        added, changed, removed, unchanged = 0, 0, 0, 0
+        stale = set()  # (source, key) of documents whose chunks are replaced
+        dirty = []  # (source, documents to chunk)
+        active = self._sources(base_dir, sources)
+        for name in set(self.document_hashes) - {source.name for source in active}:
+            dropped = self.document_hashes.pop(name)
+            stale |= {(name, key) for key in dropped}
+            removed += len(dropped)
+        
+        for source in active:
+            previous = self.document_hashes.get(source.name)
+            keys = source.changed_keys() if previous is not None else None
+            if keys is None:
+                documents = {doc.key: doc for doc in source.documents()}
+                candidates = set(previous or {}) | set(documents)
+            else:
+                documents = {doc.key: doc for doc in source.documents(keys)} if keys else {}
+                candidates = keys
+            
+            previous = previous or {}
+            hashes = dict(previous)
+            to_chunk = []
+            for key in candidates:
+                document = documents.get(key)
+                if document is None:
+                    if hashes.pop(key, None) is not None:
+                        removed += 1
+                        stale.add((source.name, key))
+                elif key not in previous:
+                    added += 1
+                    to_chunk.append(document)
+                elif previous[key] != document.content_hash:
+                    changed += 1
+                    stale.add((source.name, key))
+                    to_chunk.append(document)
+                if document is not None:
+                    hashes[key] = document.content_hash
+            unchanged += len(hashes) - len(to_chunk)
+            self.document_hashes[source.name] = hashes
+            dirty.append((source, to_chunk))
+        
+        def document_of(chunk):
+            return (chunk.source or 'docs', chunk.path or chunk.filename)
+        
+        stale_ids = [chunk.vector_id for chunk in self.chunks if document_of(chunk) in stale]
+        kept = [chunk for chunk in self.chunks if document_of(chunk) not in stale]
+        if stale_ids:
+            index_type = self.index_config['index_type']
+            if supports_remove(index_type):
+                self.index.remove_ids(np.array(stale_ids, dtype='int64'))
+            else:
+                self.index = create_index(index_type, self.index.d, self.index_config['index_params'])
+                if kept:
+                    self._add_chunks(kept)
+        
+        new_chunks = []
+        for source, documents in dirty:
+            if documents:
+                new_chunks += self._chunk_documents(source, documents)
+        reused = 0
+        if new_chunks:
+            next_id = max(self.chunk_by_id, default=-1) + 1
+            reused = self._add_chunks(new_chunks, first_id=next_id)
+        
+        self._set_chunks(kept + new_chunks)
+        if added or changed or removed or self.rerank_vectors is None:
+            self._set_rerank_vectors()
+        if added or changed or removed or self.lexical_index is None:
+            self._build_lexical()
+        if added or changed or removed:
+            self.index_version = uuid.uuid4().hex
+        
+        stats = {
+            'documents_added': added,
+            'documents_changed': changed,
+            'documents_removed': removed,
+            'documents_unchanged': unchanged,
+            'chunks_removed': len(stale_ids),
+            'chunks_embedded': len(new_chunks) - reused,
+            'chunks_reused': reused,
+        }
+        print(f"Index updated: {stats}")
+        return stats
     
     def save_index(self, index_path: Path):
         """
@@ -227,31 +687,107 @@ class DocumentIndexer:
         
         index_path.mkdir(parents=True, exist_ok=True)
         
-        # Save FAISS index
-        faiss.write_index(self.index, str(index_path / 'index.faiss'))
-        
-        # Save chunk metadata
-        metadata = [asdict(chunk) for chunk in self.chunks]
-        with open(index_path / 'metadata.json', 'w', encoding='utf-8') as f:
-            json.dump(metadata, f, indent=2)
+        # Each file is written to a temporary name and renamed into place, so
+        # servers reloading the index (ai_assistant.registry) never read a
+        # partially written file. config.json goes last and marks completion.
+        tmp_index = index_path / 'index.faiss.tmp'
+        faiss.write_index(self.index, str(tmp_index))
+        os.replace(tmp_index, index_path / 'index.faiss')
+        
+        # Save chunk texts and metadata by vector ID
+        write_chunks(index_path / CHUNK_STORE_FILE, self.chunks)
+        
+        if self.lexical_index is not None:
+            self.lexical_index.save(index_path)
+        self.save_embedding_cache(index_path)
+        
+        # Exact vectors for reranking (written before config.json, so a
+        # compressed index is never loaded with another index's vectors)
+        if self.rerank_vectors is not None:
+            self._write_array(index_path / RERANK_IDS_FILE, self.rerank_ids)
+            self._write_array(index_path / RERANK_VECTORS_FILE, self.rerank_vectors)
+        else:
+            (index_path / RERANK_IDS_FILE).unlink(missing_ok=True)
+            (index_path / RERANK_VECTORS_FILE).unlink(missing_ok=True)
         
         # Save configuration
         config = {
             'model_name': self.model_name,
             'num_chunks': len(self.chunks),
-            'embedding_dimension': self.index.d
+            'embedding_dimension': self.index.d,
+            'index_version': self.index_version,
+            'index_type': self.index_config['index_type'],
+            'index_params': self.index_config['index_params'],
+            'requested_index_type': self.index_type,
+            'requested_index_params': self.index_params,
+            'score_calibration': self.score_calibration,
+            'document_hashes': self.document_hashes,
         }
-        with open(index_path / 'config.json', 'w', encoding='utf-8') as f:
-            json.dump(config, f, indent=2)
+        self._write_json(index_path / 'config.json', config)
+        # Chunk metadata of indexes saved before the chunk store
+        (index_path / 'metadata.json').unlink(missing_ok=True)
         
         print(f"Index saved to {index_path}")
     
-    def load_index(self, index_path: Path):
+    def save_embedding_cache(self, index_path: Path):
+        """
+        Persist embeddings of the indexed chunks (keyed by chunk text hash).
+        
+        Entries for chunks no longer in the index are dropped.
+        """
+        live = {content_hash(chunk.text) for chunk in self.chunks}
+        hashes = sorted(h for h in live if h in self.embedding_store)
+        if not hashes:
+            return
+        vectors = np.vstack([self.embedding_store[h] for h in hashes]).astype('float32')
+        tmp_path = index_path / 'embeddings.tmp.npz'
+        np.savez(tmp_path, model_name=np.array(self.model_name), hashes=np.array(hashes), vectors=vectors)
+        os.replace(tmp_path, index_path / 'embeddings.npz')
+    
+    def load_embedding_cache(self, index_path: Path) -> int:
+        """
+        Load embeddings saved by a previous build into the embedding store.
+        
+        Embeddings made by a different model are ignored.
+        
+        Returns:
+            int: Number of cached embeddings loaded
+        """
+        cache_path = index_path / 'embeddings.npz'
+        if not cache_path.exists():
+            return 0
+        with np.load(cache_path, allow_pickle=False) as data:
+            if str(data['model_name']) != self.model_name:
+                return 0
+            for digest, vector in zip(data['hashes'], data['vectors']):
+                self.embedding_store[str(digest)] = vector
+        return len(self.embedding_store)
+    
+    @staticmethod
+    def _write_json(path: Path, data):
+        """Write JSON atomically (temporary file + rename)."""
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, path)
+    
+    @staticmethod
+    def _write_array(path: Path, array):
+        """Write a .npy file atomically (temporary file + rename)."""
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            np.save(f, np.ascontiguousarray(array))
+        os.replace(tmp_path, path)
+    
+    def load_index(self, index_path: Path, mmap: bool = False):
         """
         Load a previously saved index from disk.
         
         Args:
             index_path: Directory where index files are stored
+            mmap: Memory-map the vectors instead of reading them onto the
+                  heap (for serving: pages are shared between processes
+                  and loaded on demand; the index can't be updated)
         """
         if not index_path.exists():
             raise FileNotFoundError(f"Index directory not found: {index_path}")
@@ -265,42 +801,218 @@ class DocumentIndexer:
             print(f"Warning: Index was built with {config['model_name']}, "
                   f"but loading with {self.model_name}")
         
+        # Indexes saved before index types existed are exact L2 on raw embeddings
+        self.index_config = {
+            'index_type': config.get('index_type', LEGACY_INDEX_TYPE),
+            'index_params': config.get('index_params', {}),
+        }
+        
         # Load FAISS index
-        self.index = faiss.read_index(str(index_path / 'index.faiss'))
+        flags = mmap_flags(self.index_config['index_type']) if mmap else 0
+        self.index = faiss.read_index(str(index_path / 'index.faiss'), flags)
+        self.mmap = mmap
+        self.rerank_ids, self.rerank_vectors = None, None
+        if is_compressed(self.index_config['index_type']) and (index_path / RERANK_VECTORS_FILE).exists():
+            self.rerank_ids = np.load(index_path / RERANK_IDS_FILE)
+            self.rerank_vectors = np.load(index_path / RERANK_VECTORS_FILE, mmap_mode='r' if mmap else None)
+        self.index_type = config.get('requested_index_type', self.index_config['index_type'])
+        self.index_params = config.get('requested_index_params', self.index_config['index_params'])
+        self.score_calibration = config.get('score_calibration', {})
+        apply_search_params(self.index, self.index_config['index_params'])
+        # Indexes saved before versioning are identified by their file's mtime
+        self.index_version = config.get('index_version') or str((index_path / 'index.faiss').stat().st_mtime_ns)
+        
+        # Indexes saved before record sources only hashed markdown files
+        self.document_hashes = config.get('document_hashes') or {'docs': config.get('file_hashes', {})}
+        
+        # Chunks are read from the store on demand, so loading doesn't scale with the corpus
+        if (index_path / CHUNK_STORE_FILE).exists():
+            self.chunk_by_id = ChunkStore(index_path / CHUNK_STORE_FILE)
+            self.chunks = self.chunk_by_id.values()
+        else:
+            # Indexes saved before the chunk store keep all chunks in metadata.json
+            with open(index_path / 'metadata.json', 'r') as f:
+                metadata = json.load(f)
+                chunks = [DocChunk(**chunk_data) for chunk_data in metadata]
+            
+            # Indexes saved before ID mapping address vectors by position
+            for position, chunk in enumerate(chunks):
+                if chunk.vector_id < 0:
+                    chunk.vector_id = position
+            self._set_chunks(chunks)
         
-        # Load chunk metadata
-        with open(index_path / 'metadata.json', 'r') as f:
-            metadata = json.load(f)
-            self.chunks = [DocChunk(**chunk_data) for chunk_data in metadata]
+        self.lexical_index = LexicalIndex.load(index_path)
+        if self.lexical_index is None or len(self.lexical_index) != len(self.chunks):
+            # Indexes saved before lexical search only have vectors
+            self._build_lexical()
         
         print(f"Index loaded: {len(self.chunks)} chunks")
     
-    def search(self, query: str, top_k: int = 5) -> List[Tuple[DocChunk, float]]:
+    def _normalize(self, query: str) -> str:
+        # Lower-casing is only key-safe when the tokenizer lower-cases anyway
+        lowercase = getattr(getattr(self.model, 'tokenizer', None), 'do_lower_case', False)
+        return normalize_query(query, lowercase=bool(lowercase))
+    
+    def embed_query(self, query: str):
         """
-        Search the index for relevant documentation chunks.
+        Embed a query, reusing cached embeddings of identical queries.
         
         Args:
             query: Natural language query
-            top_k: Number of results to return
             
         Returns:
-            List of (DocChunk, similarity_score) tuples, ordered by relevance
+            Read-only float32 array of shape (1, dimension)
         """
-        if self.index is None:
-            raise ValueError("No index loaded. Build or load an index first.")
+        normalized = self._normalize(query)
+        key = (self.model_name, normalized)
+        embedding = embedding_cache.get(key)
+        if embedding is None:
+            embedding = self.model.encode([normalized], convert_to_numpy=True).astype('float32')
+            embedding.setflags(write=False)
+            embedding_cache.set(key, embedding)
+        return embedding
+    
+    def _vector_search(self, query: str, top_k: int) -> List[Tuple[int, float]]:
+        """(vector_id, calibrated 0-1 similarity) of the nearest chunks."""
+        index_type = self.index_config['index_type']
+        query_embedding = self.embed_query(query)
+        if is_normalized(index_type):
+            query_embedding = np.array(query_embedding)  # The cached embedding is read-only
+            faiss.normalize_L2(query_embedding)
+        
+        scores, indices = self._ann_search(query_embedding, top_k)
+        
+        # -1 marks missing results when the index has fewer than top_k vectors
+        return [
+            (int(idx), similarity(float(raw), index_type, self.score_calibration))
+            for idx, raw in zip(indices[0], scores[0]) if idx >= 0
+        ]
+    
+    def _rerank_factor(self) -> int:
+        """Candidates fetched per result (0 without exact vectors to rerank with)."""
+        if self.rerank_vectors is None:
+            return 0
+        return self.index_config['index_params'].get('rerank', 0)
+    
+    def _ann_search(self, queries, top_k: int, rerank: bool = True):
+        """index.search, with the candidates of compressed indexes rescored exactly."""
+        factor = self._rerank_factor() if rerank else 0
+        return rerank_search(self.index, queries, top_k, factor, self.rerank_ids, self.rerank_vectors)
+    
+    def quality_report(self, num_queries: int = 200, top_k: int = 10, seed: int = 0) -> Dict:
+        """
+        Memory per vector and recall of the index against exact search.
         
-        # Generate query embedding
-        query_embedding = self.model.encode([query], convert_to_numpy=True)
+        Queries are a random sample of the indexed chunks' own embeddings,
+        so nothing is encoded.
         
-        # Search index
-        distances, indices = self.index.search(query_embedding.astype('float32'), top_k)
+        Args:
+            num_queries: Chunks sampled as queries
+            top_k: Neighbors compared per query
+            seed: Seed of the query sample
         
-        # Convert distances to similarity scores (lower distance = higher similarity)
-        # Using negative distance as score (closer to 0 is better)
-        results = []
-        for idx, distance in zip(indices[0], distances[0]):
-            if idx < len(self.chunks):  # Verify index is valid
-                similarity = float(1.0 / (1.0 + distance))  # Convert distance to 0-1 similarity
-                results.append((self.chunks[idx], similarity))
+        Returns:
+            dict: Serialized index bytes (total and per vector, with the
+            float32 size for comparison), bytes of the exact rerank vectors
+            (on disk, mapped when serving), and recall@k of the raw and
+            reranked results; recall is None for legacy L2 indexes and when
+            embeddings are missing from the embedding store
+        """
+        if self.index is None:
+            raise ValueError("No index loaded. Build or load an index first.")
+        index_type = self.index_config['index_type']
+        num_vectors = self.index.ntotal
+        index_bytes = int(faiss.serialize_index(self.index).nbytes)
+        report = {
+            'index_type': index_type,
+            'num_vectors': num_vectors,
+            'index_bytes': index_bytes,
+            'bytes_per_vector': round(index_bytes / num_vectors, 1) if num_vectors else None,
+            'float32_bytes_per_vector': self.index.d * 4,
+            'rerank': self._rerank_factor(),
+            'rerank_bytes': int(self.rerank_vectors.nbytes) if self.rerank_vectors is not None else 0,
+            'recall_k': None,
+            'recall_queries': 0,
+            'recall_at_k': None,
+            'reranked_recall_at_k': None,
+        }
+        exact = self._exact_vectors() if is_normalized(index_type) and num_vectors else None
+        if exact is None:
+            return report
+        
+        ids, vectors = exact
+        sample = np.random.default_rng(seed).choice(len(ids), min(num_queries, len(ids)), replace=False)
+        queries = vectors[np.sort(sample)]
+        k = min(top_k, len(ids))
+        _, truth = faiss.knn(queries, vectors, k, metric=faiss.METRIC_INNER_PRODUCT)
+        truth = ids[truth]
+        
+        def recall(found):
+            hits = sum(len(set(row) & set(expected)) for row, expected in zip(found, truth))
+            return round(hits / (len(queries) * k), 4)
+        
+        report.update({
+            'recall_k': k,
+            'recall_queries': len(queries),
+            'recall_at_k': recall(self._ann_search(queries, k, rerank=False)[1]),
+        })
+        if report['rerank']:
+            report['reranked_recall_at_k'] = recall(self._ann_search(queries, k)[1])
+        return report
+    
+    def search(
+        self, query: str, top_k: int = 5, use_cache: bool = True, mode: Optional[str] = None,
+    ) -> List[Tuple[DocChunk, float]]:
+        """
+        Search the index for relevant documentation chunks.
         
+        Args:
+            query: Natural language query
+            top_k: Number of results to return
+            use_cache: Serve repeated (query, top_k, mode) lookups on the
+                       same index version from the result cache
+            mode: 'vector' (embedding similarity), 'lexical' (BM25) or
+                  'hybrid' (both, fused by reciprocal rank); default
+                  self.retrieval_mode
+            
+        Returns:
+            List of (DocChunk, score) tuples, ordered by relevance. Scores
+            are 0-1: calibrated similarity for 'vector', BM25 relative to
+            the best match for 'lexical', and the fused reciprocal rank
+            (1.0 = first in both rankings) for 'hybrid'.
+        """
+        if self.index is None:
+            raise ValueError("No index loaded. Build or load an index first.")
+        mode = mode or self.retrieval_mode
+        if mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Unknown retrieval mode {mode!r}; choose from {', '.join(RETRIEVAL_MODES)}")
+        
+        cache_key = (self.index_version, self._normalize(query), top_k, mode)
+        if use_cache and self.index_version:
+            cached = result_cache.get(cache_key)
+            if cached is not None:
+                return list(cached)
+        
+        if mode == 'vector':
+            ranked = self._vector_search(query, top_k)
+        else:
+            # Fuse deeper rankings so documents found by only one side still place
+            depth = top_k if mode == 'lexical' else max(4 * top_k, 20)
+            lexical = self.lexical_index.search(query, depth)
+            if mode == 'lexical':
+                best = lexical[0][1] if lexical else 1.0
+                ranked = [(vector_id, score / best) for vector_id, score in lexical]
+            else:
+                vector = self._vector_search(query, depth)
+                ranked = reciprocal_rank_fusion([
+                    [vector_id for vector_id, _ in vector],
+                    [vector_id for vector_id, _ in lexical],
+                ])[:top_k]
+        
+        # Only the hits are read from a loaded index's chunk store
+        found = self._chunks_by_id([vector_id for vector_id, _ in ranked])
+        results = [(found[vector_id], score) for vector_id, score in ranked if vector_id in found]
+        
+        if use_cache and self.index_version:
+            result_cache.set(cache_key, tuple(results))
         return results
@@ -0,0 +1,256 @@
+"""
+BM25 lexical index for the documentation assistant.
+
+Sentence embeddings capture meaning but not exact identifiers, so queries
+for names like ``PIPELINE_CLI_GMM`` or a run's UUID are also matched
+lexically. Identifiers are kept whole as tokens and are also split on
+``_`` and ``-``. The lexical ranking is fused with the vector ranking by
+reciprocal rank fusion (``hybrid`` retrieval mode).
+
+Postings are stored compressed: per term, the sorted document ordinals
+are delta-encoded and interleaved with term frequencies as varints (one
+byte for most numbers). They are saved next to the FAISS index as
+``lexical.json`` (term dictionary and BM25 statistics) and
+``postings.bin`` (postings, then the document table). Postings are
+decoded only for the query's terms.
+
+Pure Python, so it needs no dependencies beyond the standard library.
+
+NOTE: This is for documentation and research workflow support only.
+NOT for clinical diagnosis or patient treatment decisions.
+"""
+
+import heapq
+import json
+import math
+import os
+import re
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+RETRIEVAL_MODES = ('vector', 'lexical', 'hybrid')
+DEFAULT_RETRIEVAL_MODE = 'hybrid'
+
+# Standard BM25 parameters (term frequency saturation, length normalization)
+K1 = 1.2
+B = 0.75
+
+# Reciprocal rank fusion constant (Cormack et al.); damps the weight of top ranks
+RRF_K = 60
+
+FORMAT_VERSION = 1
+
+# Words, numbers and identifiers such as pipeline_cli_gmm or UUIDs
+_TOKEN = re.compile(r'[0-9a-z_]+(?:-[0-9a-z_]+)*')
+_SEPARATORS = re.compile(r'[-_]+')
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lower-cased tokens of a text; compound identifiers also yield their parts.
+
+    Example: "Run PIPELINE_CLI_GMM" -> ['run', 'pipeline_cli_gmm', 'pipeline', 'cli', 'gmm']
+    """
+    tokens = []
+    for match in _TOKEN.finditer(text.lower()):
+        token = match.group()
+        tokens.append(token)
+        parts = [part for part in _SEPARATORS.split(token) if part]
+        if len(parts) > 1 or (parts and parts[0] != token):
+            tokens.extend(parts)
+    return tokens
+
+
+def encode_varints(numbers: Iterable[int], out: bytearray):
+    """Append non-negative integers to out as LEB128 varints (7 bits per byte)."""
+    for number in numbers:
+        while number >= 0x80:
+            out.append((number & 0x7F) | 0x80)
+            number >>= 7
+        out.append(number)
+
+
+def decode_varints(data, start: int = 0, end: Optional[int] = None) -> List[int]:
+    """Decode the varints in data[start:end]."""
+    numbers = []
+    number, shift = 0, 0
+    for byte in memoryview(data)[start:end]:
+        number |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            numbers.append(number)
+            number, shift = 0, 0
+    return numbers
+
+
+def reciprocal_rank_fusion(rankings: List[List[int]], k: int = RRF_K) -> List[Tuple[int, float]]:
+    """
+    Fuse rankings of document IDs by reciprocal rank.
+
+    Args:
+        rankings: Document IDs per ranking, best first
+        k: Rank damping constant
+
+    Returns:
+        List of (document ID, score), best first. Scores are scaled so a
+        document ranked first by every ranking scores 1.0.
+    """
+    scores = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] += 1.0 / (k + rank)
+    best = len(rankings) / (k + 1)
+    fused = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+    return [(doc_id, score / best) for doc_id, score in fused]
+
+
+class LexicalIndex:
+    """
+    BM25 over an inverted index with varint-compressed postings.
+
+    Documents are addressed by the vector_id of their chunk, so lexical
+    and vector results can be fused directly.
+    """
+
+    def __init__(self, doc_ids: List[int], lengths: List[int], terms: Dict[str, Tuple[int, int, int]],
+                 postings: bytes, k1: float = K1, b: float = B):
+        """
+        Args:
+            doc_ids: vector_id of each document ordinal
+            lengths: Token count of each document ordinal
+            terms: Term -> (document frequency, postings offset, postings bytes)
+            postings: Concatenated postings of all terms
+        """
+        self.doc_ids = doc_ids
+        self.lengths = lengths
+        self.terms = terms
+        self.postings = postings
+        self.k1 = k1
+        self.b = b
+        average = sum(lengths) / len(lengths) if lengths else 0.0
+        # Length-normalization part of the BM25 denominator, per document
+        self._norms = [k1 * (1 - b + b * length / average) if average else k1 for length in lengths]
+
+    @classmethod
+    def build(cls, documents: Iterable[Tuple[int, str]], k1: float = K1, b: float = B) -> 'LexicalIndex':
+        """
+        Index documents.
+
+        Args:
+            documents: (vector_id, text) pairs
+
+        Returns:
+            LexicalIndex
+        """
+        doc_ids, lengths = [], []
+        term_postings = defaultdict(list)
+        for ordinal, (doc_id, text) in enumerate(sorted(documents, key=lambda doc: doc[0])):
+            tokens = tokenize(text)
+            doc_ids.append(doc_id)
+            lengths.append(len(tokens))
+            for term, frequency in Counter(tokens).items():
+                term_postings[term].append((ordinal, frequency))
+
+        terms, postings = {}, bytearray()
+        for term in sorted(term_postings):
+            entries = term_postings[term]
+            offset = len(postings)
+            previous = 0
+            for ordinal, frequency in entries:
+                encode_varints((ordinal - previous, frequency), postings)
+                previous = ordinal
+            terms[term] = (len(entries), offset, len(postings) - offset)
+        return cls(doc_ids, lengths, terms, bytes(postings), k1, b)
+
+    def __len__(self):
+        return len(self.doc_ids)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate size of the postings and document table."""
+        return len(self.postings) + 8 * len(self.doc_ids) + 4 * len(self.lengths)
+
+    def _postings(self, term: str) -> List[Tuple[int, int]]:
+        """(document ordinal, term frequency) pairs of a term."""
+        _, offset, size = self.terms[term]
+        numbers = decode_varints(self.postings, offset, offset + size)
+        entries, ordinal = [], 0
+        for gap, frequency in zip(numbers[::2], numbers[1::2]):
+            ordinal += gap
+            entries.append((ordinal, frequency))
+        return entries
+
+    def search(self, query: str, top_k: int = 10) -> List[Tuple[int, float]]:
+        """
+        Rank documents by BM25.
+
+        Args:
+            query: Query text (tokenized like the documents)
+            top_k: Number of results
+
+        Returns:
+            List of (vector_id, BM25 score), best first; only documents
+            sharing a term with the query
+        """
+        num_docs = len(self.doc_ids)
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            if term not in self.terms:
+                continue
+            frequency_in_corpus = self.terms[term][0]
+            idf = math.log(1 + (num_docs - frequency_in_corpus + 0.5) / (frequency_in_corpus + 0.5))
+            for ordinal, frequency in self._postings(term):
+                scores[ordinal] += idf * frequency * (self.k1 + 1) / (frequency + self._norms[ordinal])
+        best = heapq.nlargest(top_k, scores.items(), key=lambda item: (item[1], -item[0]))
+        return [(self.doc_ids[ordinal], score) for ordinal, score in best]
+
+    def save(self, index_path: Path):
+        """Write lexical.json and postings.bin (atomically, postings first)."""
+        index_path = Path(index_path)
+        table = bytearray()
+        encode_varints(self.doc_ids, table)
+        encode_varints(self.lengths, table)
+        tmp_postings = index_path / 'postings.bin.tmp'
+        with open(tmp_postings, 'wb') as f:
+            f.write(self.postings)
+            f.write(table)
+        os.replace(tmp_postings, index_path / 'postings.bin')
+
+        header = {
+            'format_version': FORMAT_VERSION,
+            'k1': self.k1,
+            'b': self.b,
+            'num_docs': len(self.doc_ids),
+            'postings_bytes': len(self.postings),
+            'terms': self.terms,
+        }
+        tmp_header = index_path / 'lexical.json.tmp'
+        with open(tmp_header, 'w', encoding='utf-8') as f:
+            json.dump(header, f, separators=(',', ':'))
+        os.replace(tmp_header, index_path / 'lexical.json')
+
+    @classmethod
+    def load(cls, index_path: Path) -> Optional['LexicalIndex']:
+        """
+        Read an index written by save().
+
+        Returns:
+            LexicalIndex, or None if the index has none (or an older format)
+        """
+        index_path = Path(index_path)
+        try:
+            with open(index_path / 'lexical.json', 'r', encoding='utf-8') as f:
+                header = json.load(f)
+            data = (index_path / 'postings.bin').read_bytes()
+        except FileNotFoundError:
+            return None
+        if header.get('format_version') != FORMAT_VERSION:
+            return None
+
+        size = header['postings_bytes']
+        table = decode_varints(data, size)
+        num_docs = header['num_docs']
+        terms = {term: tuple(entry) for term, entry in header['terms'].items()}
+        return cls(table[:num_docs], table[num_docs:], terms, data[:size], header['k1'], header['b'])
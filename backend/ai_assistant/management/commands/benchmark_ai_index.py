@@ -0,0 +1,103 @@
+"""
+Django management command to compare documentation index types.
+
+Usage:
+    python manage.py benchmark_ai_index                      # Embeddings of the built index
+    python manage.py benchmark_ai_index --synthetic 100000   # Simulated larger corpus
+    python manage.py benchmark_ai_index --index-types hnsw --param hnsw:efSearch=32
+
+Each index type is built over the chunk embeddings saved by build_ai_index
+(ai_index/embeddings.npz) and compared with exact flat-ip search: recall@k
+(also after reranking, for the compressed sq8 and ivf-pq types),
+single-query latency (p50/p95), build time and index size (total and per
+vector).
+
+Note: This is for documentation and research workflow support only.
+NOT for clinical diagnosis or patient treatment decisions.
+"""
+
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Benchmark recall and latency of the AI assistant index types'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--index-types',
+            nargs='+',
+            default=['flat-ip', 'hnsw', 'sq8', 'ivf-pq'],
+            help='Index types to benchmark',
+        )
+        parser.add_argument(
+            '--param',
+            action='append',
+            default=[],
+            metavar='TYPE:NAME=VALUE',
+            help='Parameter override, e.g. ivf-pq:nprobe=32 (repeatable)',
+        )
+        parser.add_argument('--queries', type=int, default=100, help='Held-out query embeddings')
+        parser.add_argument('--top-k', type=int, default=10, help='Neighbors per query')
+        parser.add_argument(
+            '--synthetic',
+            type=int,
+            metavar='N',
+            help='Benchmark N clustered random vectors instead of the built index',
+        )
+
+    def handle(self, *args, **options):
+        from ai_assistant.index_types import FAISS_AVAILABLE
+
+        if not FAISS_AVAILABLE:
+            raise CommandError('faiss is not installed. Install with: pip install faiss-cpu')
+
+        from ai_assistant.benchmark import benchmark, load_embeddings, synthetic_embeddings
+
+        if options['synthetic']:
+            vectors = synthetic_embeddings(options['synthetic'])
+        else:
+            index_path = Path(settings.AI_VECTOR_INDEX_PATH)
+            try:
+                vectors = load_embeddings(index_path)
+            except FileNotFoundError:
+                raise CommandError(f'No embeddings at {index_path}; run build_ai_index first or use --synthetic')
+
+        self.stdout.write(f'Benchmarking {len(vectors)} vectors of dimension {vectors.shape[1]}...')
+        try:
+            rows = benchmark(
+                vectors,
+                options['index_types'],
+                params=self._params(options['param']),
+                num_queries=options['queries'],
+                top_k=options['top_k'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(
+            f'\n{"type":<10} {"built as":<10} {"recall@k":>9} {"reranked":>9} {"p50 ms":>8} {"p95 ms":>8} '
+            f'{"build s":>8} {"MB":>8} {"B/vector":>9}  params'
+        )
+        for row in rows:
+            reranked = row['reranked_recall_at_k']
+            self.stdout.write(
+                f'{row["index_type"]:<10} {row["effective_type"]:<10} {row["recall_at_k"]:>9.3f} '
+                f'{f"{reranked:.3f}" if reranked is not None else "-":>9} '
+                f'{row["latency_ms_p50"]:>8.3f} {row["latency_ms_p95"]:>8.3f} '
+                f'{row["build_seconds"]:>8.2f} {row["index_bytes"] / 1e6:>8.2f} '
+                f'{row["bytes_per_vector"]:>9.1f}  {row["params"]}'
+            )
+
+    def _params(self, items):
+        """Parse TYPE:NAME=VALUE overrides into {type: {name: value}}."""
+        params = {}
+        for item in items:
+            index_type, _, assignment = item.partition(':')
+            name, sep, value = assignment.partition('=')
+            if not sep or not value.isdigit():
+                raise CommandError(f'Invalid --param {item!r}; expected TYPE:NAME=INTEGER')
+            params.setdefault(index_type, {})[name] = int(value)
+        return params
@@ -3,13 +3,32 @@ Django management command to build the AI assistant documentation index.
 
 Usage:
     python manage.py build_ai_index
+    python manage.py build_ai_index --incremental  # Re-embed changed files/records only
+    python manage.py build_ai_index --force --sources pipeline_runs organoids
+    python manage.py build_ai_index --force        # Rebuild from scratch
+    python manage.py build_ai_index --force --index-type hnsw --index-param efSearch=128
+    python manage.py build_ai_index --force --index-type sq8 --index-param rerank=8
+    python manage.py build_ai_index --force --devices cpu,cpu,cpu,cpu --batch-size 128
 
 This command:
-1. Collects all markdown documentation files from the project
-2. Splits them into chunks
-3. Generates embeddings using sentence-transformers
-4. Builds a FAISS vector index for fast similarity search
-5. Saves the index to disk (ai_index/ directory)
+1. Collects all markdown documentation files from the project, plus the
+   free-text fields of experiment records (--sources or
+   settings.AI_INDEX_SOURCES; incremental updates re-read only the records
+   queued by model signals)
+2. Splits them into chunks (files in a process pool of --workers processes;
+   markdown chunks are whole headings, code blocks, lists and paragraphs
+   within the model's token budget, settings.AI_CHUNK_TOKENS)
+3. Generates embeddings using sentence-transformers in batches, on a
+   multi-process pool when --devices lists several devices (embeddings of
+   chunks whose text is unchanged are reused from ai_index/embeddings.npz)
+4. Builds a FAISS vector index for fast similarity search (type from
+   --index-type or settings.AI_INDEX_TYPE; incremental updates keep the
+   existing index's type; compressed types, sq8 and ivf-pq, keep the exact
+   vectors on disk to rerank their candidates)
+5. Builds a BM25 lexical index over the same chunks (compressed postings;
+   rebuilt from the chunk texts on incremental updates)
+6. Saves the index to disk (ai_index/ directory) and reports its bytes per
+   vector and recall@10 against exact search, before and after reranking
 
 Note: This is for documentation and research workflow support only.
 NOT for clinical diagnosis or patient treatment decisions.
@@ -20,7 +39,7 @@ from django.conf import settings
 from pathlib import Path
 
 class Command(BaseCommand):
-    help = 'Build the AI assistant documentation index from project markdown files'
+    help = 'Build the AI assistant index from project markdown files and experiment records'
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -28,6 +47,46 @@ class Command(BaseCommand):
             action='store_true',
             help='Force rebuild even if index already exists',
         )
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help='Update an existing index, re-embedding only added or changed files and records',
+        )
+        parser.add_argument(
+            '--sources',
+            nargs='*',
+            help='Experiment record sources to index besides the markdown files: '
+                 'experiment_configs, model_versions, pipeline_runs, organoids '
+                 '(default: settings.AI_INDEX_SOURCES)',
+        )
+        parser.add_argument(
+            '--index-type',
+            choices=['flat-ip', 'hnsw', 'sq8', 'ivf-pq'],
+            help='FAISS index type (default: settings.AI_INDEX_TYPE)',
+        )
+        parser.add_argument(
+            '--index-param',
+            action='append',
+            default=[],
+            metavar='NAME=VALUE',
+            help='Index parameter override, e.g. M=32, efSearch=128, nlist=1024, nprobe=16, '
+                 'rerank=4 (repeatable)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help='Texts per embedding batch (default: settings.AI_EMBEDDING_BATCH_SIZE)',
+        )
+        parser.add_argument(
+            '--devices',
+            help='Comma-separated encoding devices, e.g. cpu,cpu,cpu,cpu or cuda:0,cuda:1 '
+                 '(default: settings.AI_EMBEDDING_DEVICES)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            help='Processes used to chunk files (default: settings.AI_CHUNK_WORKERS)',
+        )
 
     def handle(self, *args, **options):
         # Check if AI assistant is enabled
@@ -56,12 +115,20 @@ class Command(BaseCommand):
         index_path = Path(settings.AI_VECTOR_INDEX_PATH)
         base_dir = settings.BASE_DIR
 
+        index_exists = (index_path / 'config.json').exists()
+
+        from ai_assistant.sources import record_sources
+        try:
+            sources = record_sources(options['sources'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
         # Check if index already exists
-        if index_path.exists() and not options['force']:
+        if index_exists and not (options['force'] or options['incremental']):
             self.stdout.write(
                 self.style.WARNING(
                     f'\nIndex already exists at: {index_path}\n'
-                    'Use --force to rebuild.'
+                    'Use --incremental to update it or --force to rebuild.'
                 )
             )
             return
@@ -69,11 +136,29 @@ class Command(BaseCommand):
         try:
             # Create indexer
             self.stdout.write('\nInitializing indexer...')
-            indexer = DocumentIndexer()
+            indexer = DocumentIndexer(
+                index_type=options['index_type'] or getattr(settings, 'AI_INDEX_TYPE', 'flat-ip'),
+                index_params=self._index_params(options),
+                batch_size=options['batch_size'] or getattr(settings, 'AI_EMBEDDING_BATCH_SIZE', 64),
+                devices=(
+                    [d for d in options['devices'].split(',') if d] if options['devices'] is not None
+                    else getattr(settings, 'AI_EMBEDDING_DEVICES', [])
+                ),
+                chunk_workers=options['workers'] or getattr(settings, 'AI_CHUNK_WORKERS', 1),
+                add_batch_size=getattr(settings, 'AI_INDEX_ADD_BATCH_SIZE', 4096),
+                chunk_tokens=getattr(settings, 'AI_CHUNK_TOKENS', 0) or None,
+            )
+            if index_exists:
+                cached = indexer.load_embedding_cache(index_path)
+                self.stdout.write(f'Loaded {cached} cached embeddings')
+
+            if index_exists and options['incremental'] and not options['force']:
+                self._update(indexer, index_path, base_dir, sources)
+                return
 
             # Build index
             self.stdout.write(f'\nSearching for documentation in: {base_dir}')
-            num_files, num_chunks = indexer.build_index(base_dir)
+            num_documents, num_chunks = indexer.build_index(base_dir, sources)
 
             if num_chunks == 0:
                 self.stdout.write(
@@ -87,17 +172,23 @@ class Command(BaseCommand):
             # Save index
             self.stdout.write(f'\nSaving index to: {index_path}')
             indexer.save_index(index_path)
+            indexer.acknowledge_changes()
 
             # Success message
             self.stdout.write('\n' + '=' * 60)
             self.stdout.write(
                 self.style.SUCCESS(
                     f'\nSuccessfully built documentation index:\n'
-                    f'  - Files processed: {num_files}\n'
+                    f'  - Documents processed: {num_documents} '
+                    f'({self._document_counts(indexer)})\n'
                     f'  - Chunks created: {num_chunks}\n'
+                    f'  - Index type: {indexer.index_config["index_type"]} '
+                    f'{indexer.index_config["index_params"]}\n'
                     f'  - Index location: {index_path}\n'
                 )
             )
+            self._write_timings(indexer)
+            self._write_quality(indexer)
             self.stdout.write(
                 '\nThe AI assistant is now ready to answer documentation questions!'
             )
@@ -110,3 +201,83 @@ class Command(BaseCommand):
 
         except Exception as e:
             raise CommandError(f'Failed to build index: {e}')
+
+    def _index_params(self, options):
+        """settings.AI_INDEX_PARAMS overridden by --index-param NAME=VALUE."""
+        params = dict(getattr(settings, 'AI_INDEX_PARAMS', {}))
+        if options['index_type'] and options['index_type'] != getattr(settings, 'AI_INDEX_TYPE', None):
+            # Settings parameters belong to the settings index type
+            params = {}
+        for item in options['index_param']:
+            name, sep, value = item.partition('=')
+            if not sep or not value.strip().isdigit():
+                raise CommandError(f'Invalid --index-param {item!r}; expected NAME=INTEGER')
+            params[name.strip()] = int(value)
+        return params
+
+    def _write_timings(self, indexer):
+        """Print time per stage and embedding throughput of the last build/update."""
+        report = indexer.timing_report()
+        rate = report['texts_per_second']
+        self.stdout.write(
+            f'Timings:\n'
+            f'  - Chunking: {report["chunk_seconds"]:.2f}s '
+            f'({report["documents_chunked"]} documents, {report["chunk_workers"]} workers)\n'
+            f'  - Embedding: {report["embed_seconds"]:.2f}s ({report["texts_encoded"]} texts, '
+            f'{f"{rate:.1f} texts/s" if rate else "all cached"}, batch size {report["batch_size"]}, '
+            f'devices {",".join(report["devices"])})\n'
+            f'  - FAISS train/add: {report["index_seconds"]:.2f}s ({report["vectors_added"]} vectors)\n'
+            f'  - BM25 index: {report["lexical_seconds"]:.2f}s ({report["lexical_terms"]} terms, '
+            f'{report["lexical_bytes"] / 1024:.1f} KiB)'
+        )
+
+    def _write_quality(self, indexer):
+        """Print the index's memory per vector and its recall against exact search."""
+        report = indexer.quality_report()
+        lines = [
+            'Memory and recall:',
+            f'  - FAISS index: {report["bytes_per_vector"]} bytes/vector '
+            f'(float32: {report["float32_bytes_per_vector"]}), {report["index_bytes"] / 1024:.1f} KiB',
+        ]
+        if report['rerank_bytes']:
+            lines.append(f'  - Rerank vectors on disk: {report["rerank_bytes"] / 1024:.1f} KiB')
+        if report['recall_at_k'] is not None:
+            recall = f'  - Recall@{report["recall_k"]}: {report["recall_at_k"]:.3f}'
+            if report['reranked_recall_at_k'] is not None:
+                recall += f' (reranked x{report["rerank"]}: {report["reranked_recall_at_k"]:.3f})'
+            lines.append(f'{recall} over {report["recall_queries"]} sample chunks')
+        self.stdout.write('\n'.join(lines))
+
+    def _document_counts(self, indexer):
+        """Indexed documents per source, e.g. 'docs: 12, pipeline_runs: 40'."""
+        return ', '.join(f'{name}: {len(hashes)}' for name, hashes in indexer.document_hashes.items())
+
+    def _update(self, indexer, index_path, base_dir, sources):
+        """Incrementally update and save an existing index."""
+        self.stdout.write(f'\nUpdating index at: {index_path}')
+        indexer.load_index(index_path)
+        stats = indexer.update_index(base_dir, sources)
+
+        if not any(stats.get(key) for key in ('documents_added', 'documents_changed', 'documents_removed')):
+            # Leave the files untouched so running servers don't reload
+            indexer.acknowledge_changes()
+            self.stdout.write(self.style.SUCCESS('\nIndex is up to date; nothing to do.'))
+            return
+
+        indexer.save_index(index_path)
+        indexer.acknowledge_changes()
+        self.stdout.write('\n' + '=' * 60)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'\nSuccessfully updated documentation index:\n'
+                f'  - Documents added/changed/removed: {stats.get("documents_added", 0)}/'
+                f'{stats.get("documents_changed", 0)}/{stats.get("documents_removed", 0)}\n'
+                f'  - Documents unchanged: {stats.get("documents_unchanged", 0)} '
+                f'({self._document_counts(indexer)})\n'
+                f'  - Chunks embedded: {stats.get("chunks_embedded", 0)} '
+                f'(reused: {stats.get("chunks_reused", 0)}, removed: {stats.get("chunks_removed", 0)})\n'
+                f'  - Total chunks: {len(indexer.chunks)}\n'
+            )
+        )
+        self._write_timings(indexer)
+        self._write_quality(indexer)
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingIndexUpdate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(help_text="Index source name (e.g. 'pipeline_runs')", max_length=50)),
+                ('key', models.CharField(help_text='Record ID within the source', max_length=100)),
+                ('queued_at', models.DateTimeField(help_text='Time of the latest change')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='pendingindexupdate',
+            constraint=models.UniqueConstraint(fields=('source', 'key'), name='pending_index_update_unique'),
+        ),
+    ]
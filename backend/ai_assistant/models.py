@@ -1,3 +1,21 @@
 from django.db import models
 
-# Create your models here.
+
+class PendingIndexUpdate(models.Model):
+    """
+    A record changed since the assistant index was last updated.
+
+    Queued by the model signals in ``ai_assistant.signals`` and consumed by
+    ``build_ai_index --incremental`` (see ``ai_assistant.sources``).
+    """
+    source = models.CharField(max_length=50, help_text="Index source name (e.g. 'pipeline_runs')")
+    key = models.CharField(max_length=100, help_text="Record ID within the source")
+    queued_at = models.DateTimeField(help_text="Time of the latest change")
+
+    def __str__(self):
+        return f"{self.source}:{self.key}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['source', 'key'], name='pending_index_update_unique'),
+        ]
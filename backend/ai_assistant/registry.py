@@ -0,0 +1,252 @@
+"""
+Process-wide registry of embedding models and the loaded documentation index.
+
+Loading the SentenceTransformer model and reading the FAISS index take
+seconds and hundreds of MB, so they are done once per process and shared by
+all requests. The FAISS index (and the exact vectors of compressed
+indexes) are memory-mapped unless settings.AI_INDEX_MMAP is False, so
+worker processes share them through the page cache. The index is reloaded
+only when ``build_ai_index`` finishes saving a new one: ``save_index``
+renames config.json into place after every other file, so its mtime, size
+and inode are compared on each lookup (one ``stat`` call) and a save still
+in progress is never picked up half-written. A reload builds the new
+indexer first and then swaps it in, so searches already running keep using
+the old one.
+
+NOTE: This is for documentation and research workflow support only.
+NOT for clinical diagnosis or patient treatment decisions.
+"""
+
+import json
+import logging
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from django.conf import settings
+
+from ai_assistant.caches import cache_stats, result_cache
+from ai_assistant.chunk_store import CHUNK_STORE_FILE, ChunkStore
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+# Files written by DocumentIndexer.save_index; config.json is written last
+INDEX_FILES = ('config.json', 'index.faiss')
+# Either holds the chunks (metadata.json for indexes saved before the chunk store)
+CHUNK_FILES = (CHUNK_STORE_FILE, 'metadata.json')
+
+
+def index_signature(index_path: Path) -> Optional[Tuple]:
+    """
+    Cheap fingerprint of an on-disk index.
+
+    Only config.json is fingerprinted. It is replaced after the other files
+    of a save, so a changed signature means the whole new index is on disk.
+
+    Returns:
+        Tuple of (mtime_ns, size, inode) of config.json, or None if the index is incomplete
+    """
+    try:
+        stat = (index_path / 'config.json').stat()
+    except FileNotFoundError:
+        return None
+    if not all((index_path / name).exists() for name in INDEX_FILES):
+        return None
+    if not any((index_path / name).exists() for name in CHUNK_FILES):
+        return None
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+
+def _file_size(path: Path) -> int:
+    try:
+        return path.stat().st_size
+    except FileNotFoundError:
+        return 0
+
+
+class IndexRegistry:
+    """
+    Lazily loaded, thread-safe holder of models and the current indexer.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._models = {}
+        self._indexer = None
+        self._index_path = None
+        self._signature = None
+        self._loaded_at = None
+        self.reloads = 0
+
+    def get_model(self, model_name: str):
+        """Return the shared SentenceTransformer for a model name, loading it once."""
+        model = self._models.get(model_name)
+        if model is not None:
+            return model
+        with self._lock:
+            if model_name not in self._models:
+                from sentence_transformers import SentenceTransformer
+
+                started = time.perf_counter()
+                self._models[model_name] = SentenceTransformer(model_name)
+                logger.info(f"Loaded embedding model {model_name} in {time.perf_counter() - started:.1f}s")
+            return self._models[model_name]
+
+    def _load(self, index_path: Path):
+        from ai_assistant.indexer import DocumentIndexer
+
+        with open(index_path / 'config.json', 'r') as f:
+            model_name = json.load(f)['model_name']
+
+        indexer = DocumentIndexer(
+            model_name,
+            model=self.get_model(model_name),
+            retrieval_mode=getattr(settings, 'AI_RETRIEVAL_MODE', 'hybrid'),
+        )
+        indexer.load_index(index_path, mmap=getattr(settings, 'AI_INDEX_MMAP', True))
+        return indexer
+
+    def get_indexer(self, index_path: Optional[Path] = None):
+        """
+        Return the shared indexer, (re)loading it if the index files changed.
+
+        Args:
+            index_path: Index directory (default: settings.AI_VECTOR_INDEX_PATH)
+
+        Returns:
+            DocumentIndexer
+
+        Raises:
+            FileNotFoundError: No complete index at index_path
+        """
+        index_path = Path(index_path or settings.AI_VECTOR_INDEX_PATH)
+        signature = index_signature(index_path)
+        if signature is None:
+            raise FileNotFoundError(f"Index not found: {index_path}")
+
+        indexer = self._indexer
+        if indexer is not None and self._index_path == index_path and self._signature == signature:
+            return indexer
+
+        with self._lock:
+            # Another thread may have reloaded while we waited for the lock
+            if self._indexer is not None and self._index_path == index_path and self._signature == signature:
+                return self._indexer
+
+            started = time.perf_counter()
+            indexer = self._load(index_path)
+            # Keep the pre-load signature: a rebuild finishing mid-load is picked up next call
+            self._indexer = indexer
+            self._index_path = index_path
+            self._signature = signature
+            self._loaded_at = time.time()
+            self.reloads += 1
+            # Results of the previous index can never be hit again
+            result_cache.clear()
+            logger.info(f"Loaded documentation index from {index_path} in {time.perf_counter() - started:.2f}s")
+            return indexer
+
+    def clear(self):
+        """Drop the loaded index and models (they are reloaded on next use)."""
+        with self._lock:
+            self._models.clear()
+            self._indexer = None
+            self._index_path = None
+            self._signature = None
+            self._loaded_at = None
+
+    def warm_up(self, index_path: Optional[Path] = None) -> bool:
+        """
+        Load the model and index ahead of the first request.
+
+        Returns:
+            bool: True if an index was loaded
+        """
+        try:
+            self.get_indexer(index_path)
+            return True
+        except FileNotFoundError:
+            logger.info("No documentation index to warm up; run build_ai_index")
+        except Exception:
+            logger.exception("Documentation index warm-up failed")
+        return False
+
+    def memory_report(self) -> Dict:
+        """
+        Approximate memory held by the registry.
+
+        Returns:
+            dict: Per-model parameter bytes, index vector/rerank/text/BM25 bytes and process peak RSS
+        """
+        models = {}
+        for name, model in list(self._models.items()):
+            parameters = list(model.parameters()) if hasattr(model, 'parameters') else []
+            models[name] = {
+                'parameters': sum(p.numel() for p in parameters),
+                'bytes': sum(p.numel() * p.element_size() for p in parameters),
+            }
+
+        index = None
+        indexer = self._indexer
+        if indexer is not None and indexer.index is not None:
+            index_bytes = _file_size(self._index_path / 'index.faiss')
+            index = {
+                'path': str(self._index_path),
+                'loaded_at': self._loaded_at,
+                'num_vectors': indexer.index.ntotal,
+                'dimension': indexer.index.d,
+                # Serialized size: heap memory, or shared page cache when memory-mapped
+                'vector_bytes': index_bytes,
+                'mmap': indexer.mmap,
+                'bytes_per_vector': (
+                    round(index_bytes / indexer.index.ntotal, 1) if indexer.index.ntotal else None
+                ),
+                # Exact vectors of compressed indexes; only reranked rows are read when mapped
+                'rerank_vector_bytes': (
+                    int(indexer.rerank_vectors.nbytes) if indexer.rerank_vectors is not None else 0
+                ),
+                # Chunks of a chunk store stay on disk until they are hits
+                'chunk_text_bytes': (
+                    0 if isinstance(indexer.chunk_by_id, ChunkStore)
+                    else sum(len(chunk.text.encode('utf-8')) for chunk in indexer.chunks)
+                ),
+                'chunk_store_bytes': _file_size(self._index_path / CHUNK_STORE_FILE),
+                'lexical_bytes': indexer.lexical_index.nbytes if indexer.lexical_index else 0,
+            }
+
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        peak = None
+        if resource is not None:
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            if sys.platform != 'darwin':
+                peak *= 1024
+
+        return {
+            'models': models,
+            'index': index,
+            'reloads': self.reloads,
+            'caches': cache_stats(),
+            'process_peak_rss_bytes': peak,
+        }
+
+
+registry = IndexRegistry()
+
+
+def get_indexer(index_path: Optional[Path] = None):
+    """Shared DocumentIndexer for the current on-disk index (see IndexRegistry.get_indexer)."""
+    return registry.get_indexer(index_path)
+
+
+def start_warm_up():
+    """Warm up the registry in a daemon thread so startup isn't blocked."""
+    thread = threading.Thread(target=registry.warm_up, name='ai-index-warm-up', daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,31 @@
+"""
+Signal handlers for the AI assistant app.
+
+Queue changed experiment records for the next incremental index update
+(see ``ai_assistant.sources``).
+"""
+
+from django.db.models.signals import post_delete, post_save
+
+from .sources import queue_change, record_sources
+
+# Model -> record source, for the sources in settings.AI_INDEX_SOURCES
+SOURCES_BY_MODEL = {}
+
+
+def queue_record_change(sender, instance, update_fields=None, **kwargs):
+    """Queue a saved or deleted record unless the save touched no indexed field."""
+    source = SOURCES_BY_MODEL.get(sender)
+    if source is None:
+        return
+    if update_fields is not None and not set(update_fields) & source.watched_fields:
+        return
+    queue_change(source.name, instance.pk)
+
+
+def connect_signals():
+    """Connect handlers for the models of the indexed record sources."""
+    for source in record_sources():
+        SOURCES_BY_MODEL[source.model] = source
+        post_save.connect(queue_record_change, sender=source.model, dispatch_uid=f'ai_index_save_{source.name}')
+        post_delete.connect(queue_record_change, sender=source.model, dispatch_uid=f'ai_index_delete_{source.name}')
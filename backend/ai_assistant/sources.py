@@ -0,0 +1,358 @@
+"""
+Document sources for the assistant index.
+
+The index covers the markdown documentation plus the free-text fields of
+experiment records, so questions about runs, configurations and QC notes
+can be answered too. Each source yields documents (one per file or
+record) and has its own chunker:
+
+- ``docs``: markdown files (structure-aware chunks, see ``ai_assistant.chunking``)
+- ``experiment_configs``: ExperimentConfig.description
+- ``model_versions``: ModelVersion.description and training_dataset_description
+- ``pipeline_runs``: PipelineRun.qc_notes and log_excerpt
+- ``organoids``: Organoid.notes
+
+Record sources stream rows with ``QuerySet.iterator()``. Prose fields are
+chunked on paragraph boundaries and log excerpts on whole lines. Each
+chunk carries the record's ID, so search results can link to the record.
+
+Record changes are tracked by model signals (``ai_assistant.signals``),
+which queue the record in PendingIndexUpdate. Incremental updates re-read
+only queued records, and the queue is cleared once the updated index is
+saved.
+
+NOTE: This is for documentation and research workflow support only.
+NOT for clinical diagnosis or patient treatment decisions.
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from django.conf import settings
+from django.utils import timezone
+
+from ai_assistant.indexer import DocChunk, chunk_files, content_hash
+from experiments.models import ExperimentConfig, ModelVersion, Organoid, PipelineRun
+
+
+@dataclass
+class SourceDocument:
+    """One file or record to index."""
+    key: str  # Unique within its source (relative path or record ID)
+    content_hash: str
+    payload: object = None  # Whatever the source's chunker needs
+
+
+class DocumentSource:
+    """
+    Base class of index sources.
+
+    Subclasses set ``name`` and implement ``documents`` and ``chunk``.
+    """
+    name = ''
+
+    def snapshot(self):
+        """Called when a build or update starts (before any document is read)."""
+
+    def documents(self, keys: Optional[Set[str]] = None) -> Iterator[SourceDocument]:
+        """Stream documents (only those with the given keys, if keys is set)."""
+        raise NotImplementedError
+
+    def changed_keys(self) -> Optional[Set[str]]:
+        """Keys changed since the last update, or None if untracked (scan everything)."""
+        return None
+
+    def acknowledge(self):
+        """Forget the changes seen since snapshot(); called once the index is saved."""
+
+    def chunk(self, document: SourceDocument) -> List[DocChunk]:
+        raise NotImplementedError
+
+    def chunk_documents(self, documents: Iterable[SourceDocument]) -> List[DocChunk]:
+        return [chunk for document in documents for chunk in self.chunk(document)]
+
+
+class MarkdownSource(DocumentSource):
+    """Markdown documentation files (see DocumentIndexer.collect_documentation_files)."""
+    name = 'docs'
+
+    def __init__(self, base_dir: Path, indexer):
+        self.base_dir = Path(base_dir)
+        self.indexer = indexer
+
+    def _relative_path(self, file_path: Path) -> str:
+        try:
+            return file_path.relative_to(self.base_dir).as_posix()
+        except ValueError:
+            return file_path.name
+
+    def documents(self, keys=None):
+        for file_path in self.indexer.collect_documentation_files(self.base_dir):
+            key = self._relative_path(file_path)
+            if keys is None or key in keys:
+                yield SourceDocument(key, content_hash(file_path.read_bytes()), file_path)
+
+    def chunk_documents(self, documents):
+        documents = list(documents)
+        per_file = chunk_files(
+            [document.payload for document in documents],
+            self.indexer.chunk_workers,
+            self.indexer.chunk_tokens,
+            self.indexer.token_counter,
+        )
+        chunks = []
+        for document, file_chunks in zip(documents, per_file):
+            for chunk in file_chunks:
+                chunk.path = document.key
+                chunks.append(chunk)
+        return chunks
+
+
+def split_paragraphs(text: str, chunk_size: int = 500) -> List[Tuple[str, int, int]]:
+    """
+    Chunk prose on blank lines, merging paragraphs up to chunk_size characters.
+
+    Returns:
+        List of (text, first line, last line), lines 1-indexed within text
+    """
+    lines = text.split('\n')
+    pieces = []
+    start, end, size = None, None, 0
+    for number, line in enumerate(lines, start=1):
+        if line.strip():
+            start = start or number
+            end = number
+            size += len(line) + 1
+        # Cut at paragraph boundaries once big enough; a paragraph far above
+        # the target is cut at a line boundary
+        if start and (size >= 2 * chunk_size or (size >= chunk_size and not line.strip())):
+            pieces.append(('\n'.join(lines[start - 1:end]).strip(), start, end))
+            start, end, size = None, None, 0
+    if start:
+        pieces.append(('\n'.join(lines[start - 1:end]).strip(), start, end))
+    return pieces
+
+
+def split_log_lines(text: str, max_lines: int = 40, chunk_size: int = 1000) -> List[Tuple[str, int, int]]:
+    """
+    Chunk log output into windows of whole lines.
+
+    Returns:
+        List of (text, first line, last line), lines 1-indexed within text
+    """
+    lines = text.rstrip('\n').split('\n')
+    pieces = []
+    start, size = 0, 0
+    for index, line in enumerate(lines):
+        size += len(line) + 1
+        if index - start + 1 >= max_lines or size >= chunk_size or index == len(lines) - 1:
+            window = '\n'.join(lines[start:index + 1]).strip()
+            if window:
+                pieces.append((window, start + 1, index + 1))
+            start, size = index + 1, 0
+    return pieces
+
+
+class RecordSource(DocumentSource):
+    """
+    Free-text fields of one model, one document per record.
+
+    Subclasses set ``model``, ``fields`` (field name, heading, chunker),
+    ``api_path`` and ``title``.
+    """
+    model = None
+    fields: List[Tuple[str, str, Callable]] = []
+    # Other fields rendered in the title; changes to them re-index the record
+    title_fields: Tuple[str, ...] = ()
+    related: Tuple[str, ...] = ()
+    api_path = ''
+
+    def __init__(self):
+        self._snapshot = None
+
+    @property
+    def watched_fields(self) -> Set[str]:
+        return {name for name, _, _ in self.fields} | set(self.title_fields)
+
+    def title(self, record) -> str:
+        raise NotImplementedError
+
+    def queryset(self):
+        return self.model.objects.select_related(*self.related).order_by('pk')
+
+    def snapshot(self):
+        self._snapshot = timezone.now()
+
+    def documents(self, keys=None):
+        queryset = self.queryset()
+        if keys is not None:
+            queryset = queryset.filter(pk__in=list(keys))
+        for record in queryset.iterator(chunk_size=500):
+            sections = [
+                (heading, getattr(record, name), chunker)
+                for name, heading, chunker in self.fields
+                if getattr(record, name).strip()
+            ]
+            if not sections:
+                # Records without text aren't indexed (and are removed if they were)
+                continue
+            title = self.title(record)
+            rendered = title + ''.join(f'\n{heading}:\n{text}' for heading, text, _ in sections)
+            yield SourceDocument(str(record.pk), content_hash(rendered), (title, sections))
+
+    def changed_keys(self):
+        return pending_keys(self.name, self._snapshot)
+
+    def acknowledge(self):
+        clear_pending(self.name, self._snapshot)
+
+    def chunk(self, document):
+        title, sections = document.payload
+        chunks = []
+        for heading, text, chunker in sections:
+            for piece, line_start, line_end in chunker(text):
+                chunks.append(DocChunk(
+                    # The title gives the embedding context the field text lacks
+                    text=f'{title}\n{heading}:\n{piece}',
+                    filename=title,
+                    heading=heading,
+                    line_start=line_start,
+                    line_end=line_end,
+                    chunk_index=len(chunks),
+                    path=document.key,
+                    source=self.name,
+                    record_id=document.key,
+                ))
+        return chunks
+
+
+class ExperimentConfigSource(RecordSource):
+    name = 'experiment_configs'
+    model = ExperimentConfig
+    fields = [('description', 'Description', split_paragraphs)]
+    title_fields = ('name',)
+    api_path = 'experiment-configs'
+
+    def title(self, record):
+        return f'Experiment config "{record.name}"'
+
+
+class ModelVersionSource(RecordSource):
+    name = 'model_versions'
+    model = ModelVersion
+    fields = [
+        ('description', 'Training notes', split_paragraphs),
+        ('training_dataset_description', 'Training dataset', split_paragraphs),
+    ]
+    title_fields = ('name',)
+    api_path = 'model-versions'
+
+    def title(self, record):
+        return f'Model version "{record.name}"'
+
+
+class PipelineRunSource(RecordSource):
+    name = 'pipeline_runs'
+    model = PipelineRun
+    fields = [
+        ('qc_notes', 'QC notes', split_paragraphs),
+        ('log_excerpt', 'Log excerpt', split_log_lines),
+    ]
+    title_fields = ('stage', 'status', 'qc_status', 'mri_scan')
+    related = ('mri_scan__organoid',)
+    api_path = 'pipeline-runs'
+
+    def title(self, record):
+        return (
+            f'Pipeline run {record.pk} ({record.stage}, {record.status}, QC {record.qc_status}) '
+            f'of organoid "{record.mri_scan.organoid.name}"'
+        )
+
+
+class OrganoidSource(RecordSource):
+    name = 'organoids'
+    model = Organoid
+    fields = [('notes', 'Notes', split_paragraphs)]
+    title_fields = ('name', 'species')
+    api_path = 'organoids'
+
+    def title(self, record):
+        return f'Organoid "{record.name}" ({record.species})'
+
+
+RECORD_SOURCES = {
+    source.name: source
+    for source in (ExperimentConfigSource, ModelVersionSource, PipelineRunSource, OrganoidSource)
+}
+
+
+def record_sources(names: Optional[Iterable[str]] = None) -> List[RecordSource]:
+    """
+    Record sources to index.
+
+    Args:
+        names: Source names (default: settings.AI_INDEX_SOURCES)
+
+    Raises:
+        ValueError: Unknown source name
+    """
+    if names is None:
+        names = getattr(settings, 'AI_INDEX_SOURCES', list(RECORD_SOURCES))
+    unknown = set(names) - set(RECORD_SOURCES)
+    if unknown:
+        raise ValueError(f"Unknown index sources: {', '.join(sorted(unknown))}")
+    return [RECORD_SOURCES[name]() for name in names]
+
+
+def record_url(source: str, record_id: str) -> Optional[str]:
+    """API URL of an indexed record (None for documentation chunks)."""
+    source_class = RECORD_SOURCES.get(source)
+    if source_class is None or not record_id:
+        return None
+    return f'/api/{source_class.api_path}/{record_id}/'
+
+
+def queue_change(source: str, key: str):
+    """Queue a record for the next incremental update (one upsert query)."""
+    from ai_assistant.models import PendingIndexUpdate
+
+    PendingIndexUpdate.objects.bulk_create(
+        [PendingIndexUpdate(source=source, key=str(key), queued_at=timezone.now())],
+        update_conflicts=True,
+        unique_fields=['source', 'key'],
+        update_fields=['queued_at'],
+    )
+
+
+def pending_keys(source: str, before=None) -> Set[str]:
+    """Keys of a source queued up to before (default: now)."""
+    from ai_assistant.models import PendingIndexUpdate
+
+    return set(
+        PendingIndexUpdate.objects.filter(source=source, queued_at__lte=before or timezone.now())
+        .values_list('key', flat=True)
+    )
+
+
+def clear_pending(source: str, before=None):
+    """
+    Drop queued changes of a source up to before.
+
+    Changes queued later (while the index was being built) stay queued.
+    """
+    from ai_assistant.models import PendingIndexUpdate
+
+    if before is None:
+        return
+    PendingIndexUpdate.objects.filter(source=source, queued_at__lte=before).delete()
+
+
+def pending_counts() -> Dict[str, int]:
+    """Number of queued changes per source."""
+    from django.db.models import Count
+
+    from ai_assistant.models import PendingIndexUpdate
+
+    rows = PendingIndexUpdate.objects.values('source').annotate(count=Count('id'))
+    return {row['source']: row['count'] for row in rows}
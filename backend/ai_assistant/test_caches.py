@@ -0,0 +1,116 @@
+"""
+Tests for the query embedding and search result caches.
+"""
+
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from ai_assistant.caches import LRUCache, embedding_cache, normalize_query, result_cache
+
+try:
+    from ai_assistant.indexer import DocumentIndexer, DEPENDENCIES_AVAILABLE
+    AI_AVAILABLE = DEPENDENCIES_AVAILABLE
+except ImportError:
+    AI_AVAILABLE = False
+
+
+class LRUCacheTest(TestCase):
+    """Test eviction order and counters."""
+
+    @override_settings(TEST_LRU_SIZE=2)
+    def test_least_recently_used_is_evicted(self):
+        """Reading an entry protects it from eviction."""
+        cache = LRUCache('TEST_LRU_SIZE', 10)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_counters(self):
+        """Hits and misses are counted."""
+        cache = LRUCache('UNSET_LRU_SIZE', 10)
+        cache.get('missing')
+        cache.set('key', 'value')
+        cache.get('key')
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['hit_rate']), (1, 1, 0.5))
+        self.assertEqual(stats['maxsize'], 10)
+
+    @override_settings(TEST_LRU_SIZE=0)
+    def test_zero_size_disables_cache(self):
+        """A size of 0 stores nothing."""
+        cache = LRUCache('TEST_LRU_SIZE', 10)
+        cache.set('key', 'value')
+        self.assertEqual(len(cache), 0)
+
+    def test_normalize_query(self):
+        """Whitespace differences map to one key."""
+        self.assertEqual(normalize_query('  How do I\n install?  '), 'How do I install?')
+        self.assertEqual(normalize_query('How  DO I', lowercase=True), 'how do i')
+
+    def test_status_reports_cache_counters(self):
+        """GET /api/ai/status/ includes the cache counters."""
+        staff = get_user_model().objects.create_user(username="ops", password="unused", is_staff=True)
+        response = self.client.get(
+            '/api/ai/status/', headers={'Authorization': f'Bearer {AccessToken.for_user(staff)}'}
+        )
+        caches = response.json()['caches']
+        self.assertEqual(set(caches), {'embeddings', 'results'})
+        self.assertIn('hit_rate', caches['results'])
+
+
+class SearchCacheTest(TestCase):
+    """Search results and embeddings are reused (needs the AI dependencies)."""
+
+    def setUp(self):
+        if not AI_AVAILABLE:
+            self.skipTest("AI dependencies not available")
+        self.temp_dir = Path(tempfile.mkdtemp())
+        (self.temp_dir / "README.md").write_text("# Install\nRun `pip install -r requirements.txt`.\n")
+        embedding_cache.clear()
+        result_cache.clear()
+        self.indexer = DocumentIndexer()
+        self.indexer.build_index(self.temp_dir)
+
+    def tearDown(self):
+        if hasattr(self, 'temp_dir'):
+            shutil.rmtree(self.temp_dir)
+
+    def test_repeated_query_hits_result_cache(self):
+        """The second identical search is served from the result cache."""
+        first = self.indexer.search("How do I install?", top_k=1)
+        hits = result_cache.hits
+        second = self.indexer.search("How do I   install?", top_k=1)
+        self.assertEqual(result_cache.hits, hits + 1)
+        self.assertEqual(first, second)
+
+    def test_rebuild_invalidates_results(self):
+        """A rebuilt index gets a new version, so old results aren't reused."""
+        self.indexer.search("install", top_k=1)
+        version = self.indexer.index_version
+        self.indexer.build_index(self.temp_dir)
+        self.assertNotEqual(self.indexer.index_version, version)
+
+        hits = result_cache.hits
+        embedding_hits = embedding_cache.hits
+        self.indexer.search("install", top_k=1)
+        self.assertEqual(result_cache.hits, hits)
+        # The query embedding is still reused
+        self.assertEqual(embedding_cache.hits, embedding_hits + 1)
+
+    def test_saved_version_survives_reload(self):
+        """The version is persisted, so a reloaded index shares cache entries."""
+        index_path = self.temp_dir / 'index'
+        self.indexer.save_index(index_path)
+        loaded = DocumentIndexer(model=self.indexer.model)
+        loaded.load_index(index_path)
+        self.assertEqual(loaded.index_version, self.indexer.index_version)
@@ -0,0 +1,127 @@
+"""
+Tests for the SQLite chunk store of the documentation index.
+"""
+
+import json
+import shutil
+import sqlite3
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.test import TestCase
+
+from ai_assistant.chunk_store import ChunkStore, DocChunk, write_chunks
+
+try:
+    from ai_assistant.indexer import DocumentIndexer, DEPENDENCIES_AVAILABLE
+    AI_AVAILABLE = DEPENDENCIES_AVAILABLE
+except ImportError:
+    AI_AVAILABLE = False
+
+
+def make_chunks(count, first_id=0):
+    return [
+        DocChunk(
+            text=f"Chunk {i} text. " * 20, filename=f"doc{i}.md", heading=f"Heading {i}",
+            line_start=i, line_end=i + 2, chunk_index=0, vector_id=first_id + i, path=f"docs/doc{i}.md",
+        )
+        for i in range(count)
+    ]
+
+
+class ChunkStoreTest(TestCase):
+    """Chunks are written once and read by vector ID."""
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.path = self.temp_dir / 'chunks.sqlite3'
+        self.chunks = make_chunks(5, first_id=100)
+        write_chunks(self.path, self.chunks)
+        self.store = ChunkStore(self.path)
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_lookup_by_vector_id(self):
+        self.assertEqual(len(self.store), 5)
+        self.assertEqual(self.store[102], self.chunks[2])
+        self.assertNotIn(99, self.store)
+        with self.assertRaises(KeyError):
+            self.store[99]
+        self.assertEqual(self.store.get_many([104, 100, 7]), {104: self.chunks[4], 100: self.chunks[0]})
+
+    def test_streams_in_vector_id_order(self):
+        """Full scans page through the rows."""
+        with mock.patch('ai_assistant.chunk_store.SCAN_PAGE_SIZE', 2):
+            self.assertEqual(list(self.store), [100, 101, 102, 103, 104])
+            self.assertEqual(list(self.store.values()), self.chunks)
+
+    def test_texts_compressed(self):
+        connection = sqlite3.connect(self.path)
+        stored = connection.execute('SELECT SUM(LENGTH(text)) FROM chunks').fetchone()[0]
+        connection.close()
+        self.assertLess(stored, sum(len(chunk.text) for chunk in self.chunks) / 4)
+
+    def test_open_store_survives_rewrite(self):
+        """A loaded index keeps reading its own file after a rebuild replaces it."""
+        write_chunks(self.path, make_chunks(2))
+        self.assertEqual(self.store[100], self.chunks[0])
+        self.assertEqual(len(ChunkStore(self.path)), 2)
+
+    def test_records_have_slots(self):
+        self.assertFalse(hasattr(self.chunks[0], '__dict__'))
+
+    def test_missing_columns_use_defaults(self):
+        """Stores written before a DocChunk field existed still load."""
+        connection = sqlite3.connect(self.path)
+        connection.execute('ALTER TABLE chunks DROP COLUMN record_id')
+        connection.commit()
+        connection.close()
+        self.assertEqual(ChunkStore(self.path)[100].record_id, '')
+
+
+class LazyIndexLoadTest(TestCase):
+    """Loaded indexes read chunks from the store (needs the AI dependencies)."""
+
+    def setUp(self):
+        if not AI_AVAILABLE:
+            self.skipTest("AI dependencies not available")
+        self.temp_dir = Path(tempfile.mkdtemp())
+        (self.temp_dir / "README.md").write_text("# Install\nRun `pip install -r requirements.txt`.\n")
+        (self.temp_dir / "USAGE.md").write_text("# Usage\nStart the server with runserver.\n")
+        self.indexer = DocumentIndexer()
+        self.indexer.build_index(self.temp_dir)
+        self.index_path = self.temp_dir / 'index'
+        self.indexer.save_index(self.index_path)
+
+    def tearDown(self):
+        if hasattr(self, 'temp_dir'):
+            shutil.rmtree(self.temp_dir)
+
+    def test_load_is_lazy(self):
+        loaded = DocumentIndexer(model=self.indexer.model)
+        loaded.load_index(self.index_path)
+        self.assertIsInstance(loaded.chunk_by_id, ChunkStore)
+        self.assertEqual(len(loaded.chunks), len(self.indexer.chunks))
+
+        chunk, _ = loaded.search("runserver", top_k=1, mode='lexical')[0]
+        self.assertEqual(chunk.filename, "USAGE.md")
+        self.assertEqual(list(loaded.chunks), self.indexer.chunks)
+
+    def test_legacy_metadata_json_loads(self):
+        """Indexes saved before the chunk store are loaded from metadata.json and migrated on save."""
+        from dataclasses import asdict
+
+        (self.index_path / 'chunks.sqlite3').unlink()
+        metadata = [asdict(chunk) for chunk in self.indexer.chunks]
+        (self.index_path / 'metadata.json').write_text(json.dumps(metadata))
+
+        loaded = DocumentIndexer(model=self.indexer.model)
+        loaded.load_index(self.index_path)
+        self.assertEqual(loaded.chunks, self.indexer.chunks)
+
+        loaded.save_index(self.index_path)
+        self.assertTrue((self.index_path / 'chunks.sqlite3').exists())
+        self.assertFalse((self.index_path / 'metadata.json').exists())
@@ -0,0 +1,104 @@
+"""
+Tests for the structure-aware markdown chunker.
+"""
+
+from django.test import TestCase
+
+from ai_assistant.chunking import TokenCounter, chunk_markdown, parse_blocks
+
+try:
+    from ai_assistant.indexer import DocumentIndexer, DEPENDENCIES_AVAILABLE
+    AI_AVAILABLE = DEPENDENCIES_AVAILABLE
+except ImportError:
+    AI_AVAILABLE = False
+
+DOCUMENT = """# Pipeline
+
+Runs preprocessing and segmentation.
+
+## Configuration
+### Environment
+
+Set these before running:
+
+```bash
+# Not a heading inside a fence
+export PIPELINE_CLI_GMM="python -m gmm"
+
+export PIPELINE_CLI_UNET="python -m unet"
+```
+
+## Stages
+- Preprocessing: bias field correction
+- GMM: three-component mixture
+  with spatial priors
+- U-Net: 3D segmentation
+"""
+
+
+def source_lines(text, chunk):
+    return '\n'.join(text.split('\n')[chunk.line_start - 1:chunk.line_end]).strip()
+
+
+class ParseBlocksTest(TestCase):
+
+    def test_blocks(self):
+        blocks = [(block.kind, block.start + 1, block.end) for block in parse_blocks(DOCUMENT.split('\n'))]
+        self.assertEqual(blocks, [
+            ('heading', 1, 1), ('text', 3, 3), ('heading', 5, 5), ('heading', 6, 6),
+            ('text', 8, 8), ('code', 10, 15), ('heading', 17, 17), ('list', 18, 21),
+        ])
+
+
+class ChunkMarkdownTest(TestCase):
+    """Chunks are whole blocks within the token budget, with exact line spans."""
+
+    def test_sections_become_chunks(self):
+        chunks = chunk_markdown(DOCUMENT, 'PIPELINE.md', max_tokens=200)
+        self.assertEqual(
+            [(chunk.heading, chunk.line_start, chunk.line_end) for chunk in chunks],
+            [('Pipeline', 1, 3), ('Configuration', 5, 15), ('Stages', 17, 21)],
+        )
+        for chunk in chunks:
+            self.assertEqual(chunk.text, source_lines(DOCUMENT, chunk))
+
+    def test_code_fence_never_cut_when_it_fits(self):
+        counter = TokenCounter()
+        fence = '\n'.join(DOCUMENT.split('\n')[9:15])
+        budget = counter.count_many([fence])[0]
+        chunks = chunk_markdown(DOCUMENT, 'PIPELINE.md', max_tokens=budget)
+        self.assertIn(fence, [chunk.text for chunk in chunks])
+        for chunk in chunks:
+            self.assertLessEqual(counter.count_many([chunk.text])[0], budget)
+
+    def test_oversized_list_cut_between_items(self):
+        chunks = chunk_markdown(DOCUMENT, 'PIPELINE.md', max_tokens=12)
+        stages = [chunk for chunk in chunks if chunk.heading == 'Stages']
+        self.assertEqual([(chunk.line_start, chunk.line_end) for chunk in stages], [(17, 18), (19, 20), (21, 21)])
+        self.assertTrue(all(chunk.text.lstrip('#').strip()[0] in '-S' for chunk in stages))
+
+    def test_long_line_cut_between_words(self):
+        text = "# Notes\n" + " ".join(f"word{i}" for i in range(50))
+        chunks = chunk_markdown(text, 'NOTES.md', max_tokens=20)
+        self.assertEqual(" ".join(chunk.text for chunk in chunks[1:]), text.split('\n')[1])
+        for chunk in chunks[1:]:
+            self.assertEqual((chunk.line_start, chunk.line_end), (2, 2))
+            self.assertLessEqual(len(chunk.text.split()), 20)
+
+    def test_linear_in_document_size(self):
+        """A large document is chunked in one pass (old chunker re-concatenated strings)."""
+        chunks = chunk_markdown(DOCUMENT * 2000, 'BIG.md', max_tokens=100)
+        self.assertEqual(chunks[-1].line_end, len((DOCUMENT * 2000).split('\n')) - 1)
+        self.assertEqual([chunk.chunk_index for chunk in chunks], list(range(len(chunks))))
+
+
+class ModelTokenBudgetTest(TestCase):
+    """Chunks fit the embedding model's input (needs the AI dependencies)."""
+
+    def test_chunks_within_model_length(self):
+        if not AI_AVAILABLE:
+            self.skipTest("AI dependencies not available")
+        indexer = DocumentIndexer()
+        chunks = chunk_markdown(DOCUMENT * 20, 'BIG.md', indexer.chunk_tokens, indexer.token_counter)
+        counts = indexer.token_counter.count_many([chunk.text for chunk in chunks])
+        self.assertLessEqual(max(counts), indexer.chunk_tokens)
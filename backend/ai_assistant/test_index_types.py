@@ -0,0 +1,254 @@
+"""
+Tests for the configurable FAISS index types and their benchmark.
+"""
+
+import json
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.test import TestCase
+
+from ai_assistant.index_types import FAISS_AVAILABLE, resolve_index
+
+if FAISS_AVAILABLE:
+    import numpy as np
+
+    from ai_assistant.benchmark import benchmark, synthetic_embeddings
+    from ai_assistant.index_types import calibrate, create_index, mmap_flags, rerank_search, similarity
+
+try:
+    from ai_assistant.indexer import DocumentIndexer, DEPENDENCIES_AVAILABLE
+    AI_AVAILABLE = DEPENDENCIES_AVAILABLE
+except ImportError:
+    AI_AVAILABLE = False
+
+# Small enough to train IVF-PQ quickly
+SMALL_IVF_PQ = {'nlist': 4, 'm': 8, 'nbits': 6, 'nprobe': 4}
+
+
+class ResolveIndexTest(TestCase):
+    """Parameter defaults, validation and corpus-based sizing."""
+
+    def test_defaults_and_overrides(self):
+        index_type, params = resolve_index('hnsw', {'efSearch': '128'})
+        self.assertEqual(index_type, 'hnsw')
+        self.assertEqual(params, {'M': 32, 'efConstruction': 200, 'efSearch': 128})
+
+    def test_invalid_type_and_params(self):
+        with self.assertRaises(ValueError):
+            resolve_index('annoy')
+        with self.assertRaises(ValueError):
+            resolve_index('hnsw', {'nprobe': 4})
+
+    def test_ivf_pq_sized_to_corpus(self):
+        """nlist shrinks to the training set and m divides the dimension."""
+        index_type, params = resolve_index('ivf-pq', {'m': 20}, num_vectors=10000, dimension=384)
+        self.assertEqual(index_type, 'ivf-pq')
+        self.assertEqual(params['nlist'], 10000 // 39)
+        self.assertEqual(params['m'], 16)
+
+    def test_small_corpus_falls_back_to_flat(self):
+        """Too few vectors to train IVF-PQ (e.g. our 18 chunks) use exact search."""
+        self.assertEqual(resolve_index('ivf-pq', num_vectors=18, dimension=384), ('flat-ip', {}))
+
+
+class IndexTypesTest(TestCase):
+    """Every index type finds the true neighbors of normalized vectors."""
+
+    def setUp(self):
+        if not FAISS_AVAILABLE:
+            self.skipTest("faiss not available")
+        self.vectors = synthetic_embeddings(800, dimension=32, latent=8, clusters=8)
+        self.ids = np.arange(1000, 1800, dtype='int64')
+
+    def _build(self, index_type, params):
+        index_type, params = resolve_index(index_type, params, len(self.vectors), 32)
+        index = create_index(index_type, 32, params, training_vectors=self.vectors)
+        index.add_with_ids(self.vectors, self.ids)
+        return index
+
+    def test_self_queries_return_own_id(self):
+        """Querying with an indexed vector finds its own ID (near the top for lossy PQ)."""
+        for index_type, params, k in [
+            ('flat-ip', None, 1), ('hnsw', None, 1), ('sq8', None, 1), ('ivf-pq', SMALL_IVF_PQ, 10),
+        ]:
+            with self.subTest(index_type=index_type):
+                index = self._build(index_type, params)
+                _, neighbors = index.search(self.vectors[:50], k)
+                hits = np.mean([own in row for own, row in zip(self.ids[:50], neighbors)])
+                self.assertGreaterEqual(hits, 0.9)
+
+    def test_remove_ids(self):
+        """Flat, SQ8 and IVF-PQ indexes remove vectors by ID (incremental updates)."""
+        for index_type, params in [('flat-ip', None), ('sq8', None), ('ivf-pq', SMALL_IVF_PQ)]:
+            with self.subTest(index_type=index_type):
+                index = self._build(index_type, params)
+                index.remove_ids(self.ids[:10])
+                self.assertEqual(index.ntotal, 790)
+                _, neighbors = index.search(self.vectors[:10], 5)
+                self.assertFalse(set(neighbors.ravel()) & set(self.ids[:10]))
+
+    def test_rerank_restores_exact_ranking(self):
+        """Rescoring PQ candidates with the exact vectors recovers the true neighbors."""
+        exact = self._build('flat-ip', None)
+        compressed = self._build('ivf-pq', SMALL_IVF_PQ)
+        queries = self.vectors[:50]
+        _, truth = exact.search(queries, 5)
+
+        def recall(neighbors):
+            return np.mean([len(set(row) & set(expected)) / 5 for row, expected in zip(neighbors, truth)])
+
+        raw = recall(compressed.search(queries, 5)[1])
+        scores, reranked = rerank_search(compressed, queries, 5, 8, self.ids, self.vectors)
+        self.assertGreater(recall(reranked), raw)
+        self.assertGreaterEqual(recall(reranked), 0.95)
+        # Reranked scores are exact inner products, best first
+        self.assertTrue(np.all(np.diff(scores, axis=1) <= 0))
+        self.assertAlmostEqual(float(scores[0, 0]), 1.0, places=5)
+
+    def test_memory_mapped_load(self):
+        """Saved indexes are searchable when memory-mapped."""
+        import faiss
+
+        temp_dir = Path(tempfile.mkdtemp())
+        try:
+            for index_type, params in [('flat-ip', None), ('sq8', None), ('ivf-pq', SMALL_IVF_PQ)]:
+                with self.subTest(index_type=index_type):
+                    index = self._build(index_type, params)
+                    path = str(temp_dir / f'{index_type}.faiss')
+                    faiss.write_index(index, path)
+                    mapped = faiss.read_index(path, mmap_flags(index_type))
+                    self.assertEqual(mapped.ntotal, 800)
+                    self.assertEqual(mapped.search(self.vectors[:5], 3)[1].tolist(),
+                                     index.search(self.vectors[:5], 3)[1].tolist())
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_search_params_applied(self):
+        """efSearch is set on the wrapped HNSW graph."""
+        import faiss
+
+        index = self._build('hnsw', {'efSearch': 99})
+        self.assertEqual(faiss.downcast_index(index.index).hnsw.efSearch, 99)
+
+    def test_calibrated_similarity(self):
+        """Background pairs score near 0, identical vectors score 1."""
+        calibration = calibrate(self.vectors)
+        self.assertGreater(calibration['floor'], 0.0)
+        self.assertEqual(similarity(1.0, 'flat-ip', calibration), 1.0)
+        self.assertEqual(similarity(calibration['floor'] - 0.1, 'hnsw', calibration), 0.0)
+        # Legacy L2 indexes keep the distance-based score
+        self.assertEqual(similarity(1.0, 'flat-l2'), 0.5)
+
+    def test_benchmark_against_flat(self):
+        """The benchmark reports recall against exact search."""
+        rows = benchmark(
+            self.vectors, ['flat-ip', 'hnsw', 'sq8', 'ivf-pq'],
+            params={'ivf-pq': SMALL_IVF_PQ}, num_queries=50, top_k=5,
+        )
+        by_type = {row['index_type']: row for row in rows}
+        self.assertEqual(by_type['flat-ip']['recall_at_k'], 1.0)
+        self.assertGreaterEqual(by_type['hnsw']['recall_at_k'], 0.9)
+        self.assertEqual(by_type['ivf-pq']['effective_type'], 'ivf-pq')
+        self.assertLess(by_type['ivf-pq']['index_bytes'], by_type['flat-ip']['index_bytes'])
+        self.assertIn('latency_ms_p95', by_type['hnsw'])
+
+    def test_sq8_quarter_size(self):
+        """int8 codes take a quarter of the float32 bytes (plus the 8-byte ID), and reranking keeps recall."""
+        rows = benchmark(self.vectors, ['flat-ip', 'sq8'], num_queries=50, top_k=5)
+        flat, sq8 = rows
+        self.assertEqual(sq8['effective_type'], 'sq8')
+        self.assertAlmostEqual(4 * (sq8['bytes_per_vector'] - 8), flat['bytes_per_vector'] - 8, delta=4)
+        self.assertIsNone(flat['reranked_recall_at_k'])
+        self.assertEqual(sq8['reranked_recall_at_k'], 1.0)
+
+
+class IndexerIndexTypeTest(TestCase):
+    """DocumentIndexer builds, persists and updates typed indexes (needs the AI dependencies)."""
+
+    def setUp(self):
+        if not AI_AVAILABLE:
+            self.skipTest("AI dependencies not available")
+        self.temp_dir = Path(tempfile.mkdtemp())
+        (self.temp_dir / "README.md").write_text("# Install\nRun `pip install -r requirements.txt`.\n")
+        (self.temp_dir / "USAGE.md").write_text("# Usage\nStart the server with runserver.\n")
+
+    def tearDown(self):
+        if hasattr(self, 'temp_dir'):
+            shutil.rmtree(self.temp_dir)
+
+    def test_hnsw_persisted_and_updated(self):
+        """HNSW parameters survive save/load and deletions rebuild the graph."""
+        index_path = self.temp_dir / 'index'
+        indexer = DocumentIndexer(index_type='hnsw', index_params={'efSearch': 40})
+        indexer.build_index(self.temp_dir)
+        indexer.save_index(index_path)
+
+        config = json.loads((index_path / 'config.json').read_text())
+        self.assertEqual(config['index_type'], 'hnsw')
+        self.assertEqual(config['index_params']['efSearch'], 40)
+        self.assertIn('floor', config['score_calibration'])
+
+        loaded = DocumentIndexer(model=indexer.model)
+        loaded.load_embedding_cache(index_path)
+        loaded.load_index(index_path)
+        self.assertEqual(loaded.index_config['index_type'], 'hnsw')
+
+        (self.temp_dir / "USAGE.md").unlink()
+        stats = loaded.update_index(self.temp_dir)
+        self.assertEqual(stats['documents_removed'], 1)
+        self.assertEqual(loaded.index.ntotal, len(loaded.chunks))
+
+        chunk, score = loaded.search("How do I install?", top_k=1)[0]
+        self.assertEqual(chunk.filename, "README.md")
+        self.assertTrue(0.0 <= score <= 1.0)
+
+    def test_sq8_reranked_and_memory_mapped(self):
+        """Compressed indexes save exact vectors for reranking and load memory-mapped."""
+        import numpy as np
+
+        index_path = self.temp_dir / 'index'
+        indexer = DocumentIndexer(index_type='sq8')
+        indexer.build_index(self.temp_dir)
+        self.assertEqual(indexer.index_config['index_type'], 'sq8')
+        self.assertEqual(len(indexer.rerank_ids), len(indexer.chunks))
+        indexer.save_index(index_path)
+        self.assertTrue((index_path / 'rerank_vectors.npy').exists())
+
+        loaded = DocumentIndexer(model=indexer.model)
+        loaded.load_index(index_path, mmap=True)
+        self.assertIsInstance(loaded.rerank_vectors, np.memmap)
+        chunk, score = loaded.search("How do I install?", top_k=1, mode='vector')[0]
+        self.assertEqual(chunk.filename, "README.md")
+        self.assertEqual(
+            loaded.search("How do I install?", top_k=2, mode='vector'),
+            indexer.search("How do I install?", top_k=2, mode='vector'),
+        )
+        with self.assertRaises(ValueError):
+            loaded.update_index(self.temp_dir)
+
+        report = indexer.quality_report()
+        self.assertEqual(report['float32_bytes_per_vector'], indexer.index.d * 4)
+        self.assertEqual(report['rerank'], 4)
+        self.assertEqual(report['reranked_recall_at_k'], 1.0)
+
+    def test_rerank_vectors_dropped_for_exact_types(self):
+        """Rebuilding as flat-ip removes the exact vectors of a previous compressed index."""
+        index_path = self.temp_dir / 'index'
+        indexer = DocumentIndexer(index_type='sq8')
+        indexer.build_index(self.temp_dir)
+        indexer.save_index(index_path)
+
+        indexer = DocumentIndexer(model=indexer.model)
+        indexer.build_index(self.temp_dir)
+        indexer.save_index(index_path)
+        self.assertFalse((index_path / 'rerank_vectors.npy').exists())
+        self.assertIsNone(indexer.quality_report()['reranked_recall_at_k'])
+
+    def test_ivf_pq_falls_back_on_small_corpus(self):
+        """Two files are too few to train IVF-PQ."""
+        indexer = DocumentIndexer(index_type='ivf-pq')
+        indexer.build_index(self.temp_dir)
+        self.assertEqual(indexer.index_config['index_type'], 'flat-ip')
+        self.assertEqual(indexer.index_type, 'ivf-pq')
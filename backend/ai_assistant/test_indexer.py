@@ -8,6 +8,8 @@ from pathlib import Path
 from django.test import TestCase
 from django.conf import settings
 
+from ai_assistant.indexer import chunk_files
+
 try:
     from ai_assistant.indexer import DocumentIndexer, DEPENDENCIES_AVAILABLE
     AI_AVAILABLE = DEPENDENCIES_AVAILABLE
@@ -81,7 +83,7 @@ Required fields:
             self.skipTest("AI dependencies not available")
         
         test_file = self.temp_dir / "README.md"
-        chunks = self.indexer.split_document_into_chunks(test_file, chunk_size=100, overlap=20)
+        chunks = self.indexer.split_document_into_chunks(test_file, max_tokens=30)
         
         self.assertGreater(len(chunks), 0)
         # Verify chunks have required attributes
@@ -128,7 +130,7 @@ Required fields:
         
         # Verify files were created
         self.assertTrue((index_path / "index.faiss").exists())
-        self.assertTrue((index_path / "metadata.json").exists())
+        self.assertTrue((index_path / "chunks.sqlite3").exists())
         self.assertTrue((index_path / "config.json").exists())
         
         # Load index in new indexer
@@ -157,3 +159,86 @@ Required fields:
         # Request 3 results
         results_3 = self.indexer.search("test query", top_k=3)
         self.assertLessEqual(len(results_3), 3)  # May be fewer if not enough chunks
+    
+    def test_incremental_update(self):
+        """Only changed files are re-embedded and deleted files are removed."""
+        if not AI_AVAILABLE:
+            self.skipTest("AI dependencies not available")
+        
+        self.indexer.build_index(self.temp_dir)
+        index_path = self.temp_dir / "test_index"
+        self.indexer.save_index(index_path)
+        
+        (self.temp_dir / "README.md").write_text("# Test Project\n\nOnly installation notes remain.\n")
+        (self.temp_dir / "API_DOCS.md").unlink()
+        (self.temp_dir / "USAGE.md").write_text("# Usage\n\nStart the server with runserver.\n")
+        
+        updated = DocumentIndexer()
+        updated.load_embedding_cache(index_path)
+        updated.load_index(index_path)
+        stats = updated.update_index(self.temp_dir)
+        
+        self.assertEqual(stats['documents_changed'], 1)
+        self.assertEqual(stats['documents_removed'], 1)
+        self.assertEqual(stats['documents_added'], 1)
+        self.assertEqual(updated.index.ntotal, len(updated.chunks))
+        self.assertNotIn("API_DOCS.md", {chunk.filename for chunk in updated.chunks})
+        
+        chunk, score = updated.search("runserver", top_k=1)[0]
+        self.assertEqual(chunk.filename, "USAGE.md")
+        
+        # A second update with no changes does nothing
+        stats = updated.update_index(self.temp_dir)
+        self.assertEqual(stats['chunks_embedded'] + stats['chunks_removed'], 0)
+    
+    def test_embedding_cache_reused_on_rebuild(self):
+        """A full rebuild reuses saved embeddings of unchanged chunks."""
+        if not AI_AVAILABLE:
+            self.skipTest("AI dependencies not available")
+        
+        self.indexer.build_index(self.temp_dir)
+        index_path = self.temp_dir / "test_index"
+        self.indexer.save_index(index_path)
+        self.assertTrue((index_path / "embeddings.npz").exists())
+        
+        rebuilt = DocumentIndexer()
+        self.assertEqual(rebuilt.load_embedding_cache(index_path), len(self.indexer.chunks))
+        rebuilt.build_index(self.temp_dir)
+        self.assertEqual(len(rebuilt.embedding_store), len(self.indexer.chunks))
+    
+    def test_streamed_build_reports_timings(self):
+        """Chunks are added in batches and every stage is timed."""
+        if not AI_AVAILABLE:
+            self.skipTest("AI dependencies not available")
+        
+        indexer = DocumentIndexer(model=self.indexer.model, chunk_workers=2, add_batch_size=2)
+        num_files, num_chunks = indexer.build_index(self.temp_dir)
+        self.assertEqual(indexer.index.ntotal, num_chunks)
+        
+        report = indexer.timing_report()
+        self.assertEqual(report['documents_chunked'], num_files)
+        self.assertEqual(report['vectors_added'], num_chunks)
+        self.assertEqual(report['texts_encoded'], len({chunk.text for chunk in indexer.chunks}))
+        self.assertGreater(report['embed_seconds'], 0)
+
+
+class ChunkFilesTestCase(TestCase):
+    """Chunking in a process pool (no AI dependencies needed)."""
+    
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.files = []
+        for i in range(6):
+            path = self.temp_dir / f"doc{i}.md"
+            path.write_text(f"# Doc {i}\n" + "".join(f"Line {j} of document {i}.\n" for j in range(100)))
+            self.files.append(path)
+    
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+    
+    def test_pool_matches_serial(self):
+        """Pool workers return the same chunks, in file order."""
+        serial = chunk_files(self.files, workers=1)
+        pooled = chunk_files(self.files, workers=3)
+        self.assertEqual(pooled, serial)
+        self.assertEqual([chunks[0].filename for chunks in pooled], [f.name for f in self.files])
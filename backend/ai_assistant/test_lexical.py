@@ -0,0 +1,134 @@
+"""
+Tests for the BM25 lexical index and hybrid retrieval.
+"""
+
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from ai_assistant.lexical import (
+    LexicalIndex, decode_varints, encode_varints, reciprocal_rank_fusion, tokenize,
+)
+
+try:
+    from ai_assistant.indexer import DocumentIndexer, DEPENDENCIES_AVAILABLE
+    AI_AVAILABLE = DEPENDENCIES_AVAILABLE
+except ImportError:
+    AI_AVAILABLE = False
+
+RUN_ID = '3f2b9c1e-7a4d-4e8b-9c0f-1d2e3f4a5b6c'
+
+DOCUMENTS = [
+    (10, "Set PIPELINE_CLI_GMM to the GMM segmentation command."),
+    (11, "The pipeline runs preprocessing, then segmentation."),
+    (12, f"Run {RUN_ID} failed with an out of memory error."),
+    (13, "Organoids are imaged at 9.4 T with a T2-weighted sequence."),
+]
+
+
+class TokenizeTest(TestCase):
+
+    def test_identifiers_kept_whole_and_split(self):
+        self.assertEqual(
+            tokenize("Set PIPELINE_CLI_GMM now"),
+            ['set', 'pipeline_cli_gmm', 'pipeline', 'cli', 'gmm', 'now'],
+        )
+        self.assertIn(RUN_ID, tokenize(f"run {RUN_ID}."))
+
+    def test_varints_round_trip(self):
+        numbers = [0, 1, 127, 128, 300, 2 ** 31]
+        data = bytearray()
+        encode_varints(numbers, data)
+        self.assertEqual(len(data), 1 + 1 + 1 + 2 + 2 + 5)
+        self.assertEqual(decode_varints(bytes(data)), numbers)
+
+
+class LexicalIndexTest(TestCase):
+    """BM25 ranking, persistence and rank fusion."""
+
+    def setUp(self):
+        self.index = LexicalIndex.build(DOCUMENTS)
+
+    def test_exact_identifiers_rank_first(self):
+        self.assertEqual(self.index.search("What does PIPELINE_CLI_GMM do?", top_k=1)[0][0], 10)
+        self.assertEqual(self.index.search(f"Why did {RUN_ID} fail?", top_k=1)[0][0], 12)
+        self.assertEqual(self.index.search("unrelated words", top_k=5), [])
+
+    def test_rarer_terms_weigh_more(self):
+        """'segmentation' is in two documents, 'preprocessing' in one."""
+        ranked = [doc_id for doc_id, _ in self.index.search("preprocessing segmentation")]
+        self.assertEqual(ranked[0], 11)
+        self.assertEqual(set(ranked), {10, 11})
+
+    def test_save_and_load(self):
+        temp_dir = Path(tempfile.mkdtemp())
+        try:
+            self.index.save(temp_dir)
+            loaded = LexicalIndex.load(temp_dir)
+        finally:
+            shutil.rmtree(temp_dir)
+        self.assertEqual(loaded.doc_ids, [10, 11, 12, 13])
+        self.assertEqual(loaded.search("pipeline"), self.index.search("pipeline"))
+        self.assertIsNone(LexicalIndex.load(Path(tempfile.gettempdir()) / 'no-such-index'))
+
+    def test_postings_compressed(self):
+        """Postings take about two bytes per (document, term) pair."""
+        pairs = sum(df for df, _, _ in self.index.terms.values())
+        self.assertEqual(len(self.index.postings), 2 * pairs)
+
+    def test_reciprocal_rank_fusion(self):
+        fused = reciprocal_rank_fusion([[1, 2, 3], [3, 1]])
+        self.assertEqual([doc_id for doc_id, _ in fused], [1, 3, 2])
+        self.assertAlmostEqual(reciprocal_rank_fusion([[7], [7]])[0][1], 1.0)
+
+
+class AskDocsModeTest(TestCase):
+
+    def test_invalid_mode_rejected(self):
+        response = APIClient().post('/api/ai/ask-docs/', {'question': 'gmm', 'mode': 'fuzzy'}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class HybridSearchTest(TestCase):
+    """The indexer searches by vector, BM25 or both (needs the AI dependencies)."""
+
+    def setUp(self):
+        if not AI_AVAILABLE:
+            self.skipTest("AI dependencies not available")
+        self.temp_dir = Path(tempfile.mkdtemp())
+        (self.temp_dir / "README.md").write_text("# Install\nRun `pip install -r requirements.txt`.\n")
+        (self.temp_dir / "PIPELINE.md").write_text(
+            "# Pipeline\nThe GMM stage runs the command in PIPELINE_CLI_GMM.\n"
+        )
+        self.indexer = DocumentIndexer()
+        self.indexer.build_index(self.temp_dir)
+
+    def tearDown(self):
+        if hasattr(self, 'temp_dir'):
+            shutil.rmtree(self.temp_dir)
+
+    def test_modes(self):
+        for mode in ('vector', 'lexical', 'hybrid'):
+            with self.subTest(mode=mode):
+                chunk, score = self.indexer.search("PIPELINE_CLI_GMM", top_k=1, mode=mode)[0]
+                self.assertTrue(0.0 <= score <= 1.0)
+                if mode != 'vector':
+                    self.assertEqual(chunk.filename, "PIPELINE.md")
+        with self.assertRaises(ValueError):
+            self.indexer.search("gmm", mode='fuzzy')
+
+    def test_lexical_index_persisted(self):
+        index_path = self.temp_dir / 'index'
+        self.indexer.save_index(index_path)
+        self.assertTrue((index_path / 'postings.bin').exists())
+
+        loaded = DocumentIndexer(model=self.indexer.model)
+        loaded.load_index(index_path)
+        self.assertEqual(len(loaded.lexical_index), len(loaded.chunks))
+        self.assertEqual(
+            loaded.search("PIPELINE_CLI_GMM", mode='lexical'),
+            self.indexer.search("PIPELINE_CLI_GMM", mode='lexical'),
+        )
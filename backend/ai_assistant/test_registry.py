@@ -0,0 +1,162 @@
+"""
+Tests for the shared model/index registry.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from ai_assistant.registry import IndexRegistry, index_signature
+
+try:
+    from ai_assistant.indexer import DocumentIndexer, DEPENDENCIES_AVAILABLE
+    AI_AVAILABLE = DEPENDENCIES_AVAILABLE
+except ImportError:
+    AI_AVAILABLE = False
+
+
+class CountingRegistry(IndexRegistry):
+    """Registry whose loader records calls instead of loading a model."""
+
+    def __init__(self):
+        super().__init__()
+        self.loads = []
+
+    def _load(self, index_path):
+        self.loads.append(index_path)
+        return {'config': json.loads((index_path / 'config.json').read_text())}
+
+
+class IndexRegistryTest(TestCase):
+    """Test lazy loading and mtime-based reloads."""
+
+    def setUp(self):
+        self.index_dir = Path(tempfile.mkdtemp())
+        self._write_index(num_chunks=1)
+        self.registry = CountingRegistry()
+
+    def tearDown(self):
+        shutil.rmtree(self.index_dir)
+
+    def _write_index(self, num_chunks):
+        for name in ('index.faiss', 'chunks.sqlite3'):
+            (self.index_dir / name).write_text(name)
+        (self.index_dir / 'config.json').write_text(json.dumps({'num_chunks': num_chunks}))
+
+    def test_signature_requires_all_files(self):
+        """An incomplete index has no signature."""
+        self.assertIsNotNone(index_signature(self.index_dir))
+        (self.index_dir / 'chunks.sqlite3').unlink()
+        self.assertIsNone(index_signature(self.index_dir))
+        # Indexes saved before the chunk store have metadata.json instead
+        (self.index_dir / 'metadata.json').write_text('[]')
+        self.assertIsNotNone(index_signature(self.index_dir))
+        (self.index_dir / 'metadata.json').unlink()
+        with self.assertRaises(FileNotFoundError):
+            self.registry.get_indexer(self.index_dir)
+
+    def test_index_loaded_once(self):
+        """Repeated lookups reuse the loaded index."""
+        first = self.registry.get_indexer(self.index_dir)
+        self.assertIs(self.registry.get_indexer(self.index_dir), first)
+        self.assertEqual(len(self.registry.loads), 1)
+
+    def test_reload_when_files_change(self):
+        """Rewriting the index files triggers exactly one reload."""
+        self.registry.get_indexer(self.index_dir)
+
+        self._write_index(num_chunks=2)
+        stat = (self.index_dir / 'config.json').stat()
+        os.utime(self.index_dir / 'config.json', ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        indexer = self.registry.get_indexer(self.index_dir)
+        self.assertEqual(indexer['config']['num_chunks'], 2)
+        self.registry.get_indexer(self.index_dir)
+        self.assertEqual(len(self.registry.loads), 2)
+
+    def test_half_finished_save_not_loaded(self):
+        """New vectors and chunks are ignored until config.json is replaced."""
+        self.registry.get_indexer(self.index_dir)
+
+        for name in ('index.faiss', 'chunks.sqlite3'):
+            (self.index_dir / name).write_text(name * 2)
+            stat = (self.index_dir / name).stat()
+            os.utime(self.index_dir / name, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.registry.get_indexer(self.index_dir)
+        self.assertEqual(len(self.registry.loads), 1)
+
+        tmp_config = self.index_dir / 'config.json.tmp'
+        tmp_config.write_text(json.dumps({'num_chunks': 2}))
+        os.replace(tmp_config, self.index_dir / 'config.json')
+        self.assertEqual(self.registry.get_indexer(self.index_dir)['config']['num_chunks'], 2)
+        self.assertEqual(len(self.registry.loads), 2)
+
+    def test_concurrent_first_lookup_loads_once(self):
+        """Threads racing on a cold registry share one load."""
+        threads = [threading.Thread(target=self.registry.get_indexer, args=(self.index_dir,)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(self.registry.loads), 1)
+
+    def test_memory_report_before_load(self):
+        """Nothing is reported before the first load."""
+        self.assertIsNone(self.registry.memory_report()['index'])
+        self.assertEqual(self.registry.memory_report()['models'], {})
+
+    def test_warm_up_without_index(self):
+        """Warm-up is a no-op when no index has been built."""
+        self.assertFalse(self.registry.warm_up(self.index_dir / 'missing'))
+
+    def test_status_endpoint(self):
+        """GET /api/ai/status/ reports whether an index exists (staff only)."""
+        self.assertEqual(self.client.get('/api/ai/status/').status_code, 401)
+
+        staff = get_user_model().objects.create_user(username="ops", password="unused", is_staff=True)
+        with override_settings(AI_VECTOR_INDEX_PATH=self.index_dir):
+            response = self.client.get(
+                '/api/ai/status/', headers={'Authorization': f'Bearer {AccessToken.for_user(staff)}'}
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['index_exists'])
+        self.assertIn('models', response.json())
+
+
+class SharedIndexerTest(TestCase):
+    """End-to-end reload with real models (needs the AI dependencies)."""
+
+    def setUp(self):
+        if not AI_AVAILABLE:
+            self.skipTest("AI dependencies not available")
+        self.temp_dir = Path(tempfile.mkdtemp())
+        (self.temp_dir / "README.md").write_text("# Install\nRun `pip install -r requirements.txt`.\n")
+        self.registry = IndexRegistry()
+
+    def tearDown(self):
+        if hasattr(self, 'temp_dir'):
+            shutil.rmtree(self.temp_dir)
+
+    def test_shared_model_and_reload(self):
+        """The model is loaded once and a rebuilt index is picked up."""
+        index_path = self.temp_dir / 'index'
+        indexer = DocumentIndexer(model=self.registry.get_model('all-MiniLM-L6-v2'))
+        indexer.build_index(self.temp_dir)
+        indexer.save_index(index_path)
+
+        first = self.registry.get_indexer(index_path)
+        self.assertIs(first.model, indexer.model)
+        self.assertGreater(len(first.search("install", top_k=1)), 0)
+
+        (self.temp_dir / "USAGE.md").write_text("# Usage\nStart the server.\n")
+        indexer.build_index(self.temp_dir)
+        indexer.save_index(index_path)
+        self.assertIsNot(self.registry.get_indexer(index_path), first)
+        self.assertEqual(len(self.registry._models), 1)
@@ -0,0 +1,150 @@
+"""
+Tests for the experiment record sources of the assistant index.
+"""
+
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.test import TestCase
+from django.utils import timezone
+
+from ai_assistant.models import PendingIndexUpdate
+from ai_assistant.sources import (
+    OrganoidSource, PipelineRunSource, clear_pending, pending_counts, pending_keys,
+    record_sources, record_url, split_log_lines, split_paragraphs,
+)
+from experiments.models import MRIScan, Organoid, PipelineRun
+
+try:
+    from ai_assistant.indexer import DocumentIndexer, DEPENDENCIES_AVAILABLE
+    AI_AVAILABLE = DEPENDENCIES_AVAILABLE
+except ImportError:
+    AI_AVAILABLE = False
+
+
+class ChunkerTest(TestCase):
+    """Record fields are chunked on paragraph and line boundaries."""
+
+    def test_split_paragraphs(self):
+        text = "First paragraph.\n\nSecond paragraph,\nover two lines.\n\n\nThird."
+        self.assertEqual(split_paragraphs(text, chunk_size=10), [
+            ("First paragraph.", 1, 1),
+            ("Second paragraph,\nover two lines.", 3, 4),
+            ("Third.", 7, 7),
+        ])
+        # Small paragraphs are merged into one chunk
+        self.assertEqual(split_paragraphs(text), [(text, 1, 7)])
+
+    def test_split_log_lines(self):
+        log = "\n".join(f"epoch {i}: loss 0.{i}" for i in range(1, 6)) + "\n"
+        pieces = split_log_lines(log, max_lines=2)
+        self.assertEqual([(start, end) for _, start, end in pieces], [(1, 2), (3, 4), (5, 5)])
+        self.assertEqual(pieces[2][0], "epoch 5: loss 0.5")
+
+
+class RecordSourceTest(TestCase):
+    """Records become documents keyed by ID, and chunks link back to them."""
+
+    def setUp(self):
+        self.organoid = Organoid.objects.create(name="H1", species="HUMAN", notes="Fixed in PFA.")
+        self.scan = MRIScan.objects.create(
+            organoid=self.organoid, sequence_type="T1W", data_type="IN_VITRO", resolution="100um"
+        )
+        self.run = PipelineRun.objects.create(
+            mri_scan=self.scan, stage="GMM", status="FAILED",
+            qc_notes="Ventricles under-segmented.", log_excerpt="ERROR: out of memory\n",
+        )
+        PipelineRun.objects.create(mri_scan=self.scan, stage="UNET")  # No text: not indexed
+
+    def test_documents_and_chunks(self):
+        source = PipelineRunSource()
+        documents = list(source.documents())
+        self.assertEqual([document.key for document in documents], [str(self.run.pk)])
+
+        chunks = source.chunk(documents[0])
+        self.assertEqual([chunk.heading for chunk in chunks], ["QC notes", "Log excerpt"])
+        for chunk in chunks:
+            self.assertEqual(chunk.record_id, str(self.run.pk))
+            self.assertEqual(chunk.source, "pipeline_runs")
+            # The title puts the field text in context
+            self.assertIn('(GMM, FAILED, QC NOT_REVIEWED) of organoid "H1"', chunk.text)
+
+    def test_content_hash_tracks_text(self):
+        source = OrganoidSource()
+        before = next(source.documents()).content_hash
+        self.organoid.notes = "Fixed in PFA, then cleared."
+        self.organoid.save()
+        self.assertNotEqual(next(source.documents()).content_hash, before)
+
+    def test_record_sources_and_urls(self):
+        self.assertEqual([source.name for source in record_sources(['organoids'])], ['organoids'])
+        with self.assertRaises(ValueError):
+            record_sources(['patients'])
+        self.assertEqual(record_url('pipeline_runs', 'abc'), '/api/pipeline-runs/abc/')
+        self.assertIsNone(record_url('docs', ''))
+
+
+class PendingUpdateTest(TestCase):
+    """Model signals queue changed records until the updated index is saved."""
+
+    def setUp(self):
+        self.organoid = Organoid.objects.create(name="H1", species="HUMAN")
+
+    def test_save_and_delete_queue_record(self):
+        key = str(self.organoid.pk)
+        self.assertEqual(pending_keys('organoids'), {key})
+
+        PendingIndexUpdate.objects.all().delete()
+        self.organoid.experiment_id = "EXP-1"
+        self.organoid.save(update_fields=['experiment_id'])  # Not an indexed field
+        self.assertEqual(pending_keys('organoids'), set())
+
+        self.organoid.delete()
+        self.assertEqual(pending_keys('organoids'), {key})
+        self.assertEqual(pending_counts(), {'organoids': 1})
+
+    def test_changes_after_snapshot_stay_queued(self):
+        snapshot = timezone.now()
+        later = Organoid.objects.create(name="H2", species="HUMAN")
+
+        self.assertEqual(pending_keys('organoids', snapshot), {str(self.organoid.pk)})
+        clear_pending('organoids', snapshot)
+        self.assertEqual(pending_keys('organoids'), {str(later.pk)})
+
+
+class RecordIndexTest(TestCase):
+    """Records are indexed and updated incrementally (needs the AI dependencies)."""
+
+    def setUp(self):
+        if not AI_AVAILABLE:
+            self.skipTest("AI dependencies not available")
+        self.temp_dir = Path(tempfile.mkdtemp())
+        (self.temp_dir / "README.md").write_text("# Install\nRun `pip install -r requirements.txt`.\n")
+        self.organoid = Organoid.objects.create(name="H1", species="HUMAN", notes="Imaged at 9.4 T.")
+
+    def tearDown(self):
+        if hasattr(self, 'temp_dir'):
+            shutil.rmtree(self.temp_dir)
+
+    def test_build_and_update_records(self):
+        indexer = DocumentIndexer()
+        num_documents, _ = indexer.build_index(self.temp_dir, record_sources(['organoids']))
+        self.assertEqual(num_documents, 2)
+        indexer.acknowledge_changes()
+        self.assertEqual(pending_keys('organoids'), set())
+
+        self.organoid.notes = "Ventricles collapsed during fixation."
+        self.organoid.save()
+        stats = indexer.update_index(self.temp_dir, record_sources(['organoids']))
+        self.assertEqual(stats['documents_changed'], 1)
+        self.assertEqual(stats['documents_unchanged'], 1)  # README.md
+        self.assertEqual(indexer.index.ntotal, len(indexer.chunks))
+
+        chunk, _ = indexer.search("collapsed ventricles", top_k=1)[0]
+        self.assertEqual(chunk.record_id, str(self.organoid.pk))
+
+        # Dropping the source removes its records
+        stats = indexer.update_index(self.temp_dir)
+        self.assertEqual(stats['documents_removed'], 1)
+        self.assertEqual({chunk.source for chunk in indexer.chunks}, {'docs'})
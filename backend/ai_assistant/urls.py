@@ -9,4 +9,5 @@ app_name = 'ai_assistant'
 
 urlpatterns = [
     path('ask-docs/', views.ask_docs, name='ask-docs'),
+    path('status/', views.assistant_status, name='status'),
 ]
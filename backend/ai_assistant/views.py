@@ -5,12 +5,15 @@ Provides RAG-based documentation Q&A functionality.
 """
 
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAdminUser
 from rest_framework.response import Response
 from rest_framework import status
 from django.conf import settings
 from pathlib import Path
 
+# Largest number of chunks a single question may request
+MAX_TOP_K = 50
+
 
 @api_view(['POST'])
 @permission_classes([AllowAny])  # TODO: Change to IsAuthenticated for production
@@ -19,11 +22,19 @@ def ask_docs(request):
     Answer questions about project documentation using RAG.
     
     POST /api/ai/ask-docs/
-    Request: { "question": "<string>" }
+    Request: {
+        "question": "<string>",
+        "top_k": <int, optional, 1-50, default 5>,
+        "mode": <optional, "vector", "lexical" or "hybrid", default settings.AI_RETRIEVAL_MODE>
+    }
+    
+    "lexical" (BM25) matches exact identifiers such as PIPELINE_CLI_GMM or run
+    IDs; "hybrid" fuses it with vector similarity by reciprocal rank.
     
     Response:
     {
         "answer": null or "<string>",  # Null if no LLM configured
+        "mode": "vector" | "lexical" | "hybrid",
         "chunks": [
             {
                 "text": "...",
@@ -31,7 +42,10 @@ def ask_docs(request):
                 "heading": "...",
                 "line_start": int,
                 "line_end": int,
-                "score": float
+                "source": "docs" or "<record source>",  # e.g. "pipeline_runs"
+                "record_id": null or "<id>",  # Experiment record the chunk came from
+                "record_url": null or "<API URL of the record>",
+                "score": float  # 0-1, see DocumentIndexer.search
             },
             ...
         ],
@@ -56,9 +70,28 @@ def ask_docs(request):
             status=status.HTTP_400_BAD_REQUEST
         )
     
+    try:
+        top_k = int(request.data.get('top_k', 5))
+        if not 1 <= top_k <= MAX_TOP_K:
+            raise ValueError
+    except (TypeError, ValueError):
+        return Response(
+            {'error': f'top_k must be an integer between 1 and {MAX_TOP_K}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    from ai_assistant.lexical import RETRIEVAL_MODES
+    mode = request.data.get('mode') or getattr(settings, 'AI_RETRIEVAL_MODE', 'hybrid')
+    if mode not in RETRIEVAL_MODES:
+        return Response(
+            {'error': f"mode must be one of: {', '.join(RETRIEVAL_MODES)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
     # Check if dependencies are available
     try:
-        from ai_assistant.indexer import DocumentIndexer, DEPENDENCIES_AVAILABLE
+        from ai_assistant.indexer import DEPENDENCIES_AVAILABLE
+        from ai_assistant.registry import get_indexer
         
         if not DEPENDENCIES_AVAILABLE:
             return Response(
@@ -86,13 +119,13 @@ def ask_docs(request):
         )
     
     try:
-        # Create indexer and load existing index
-        indexer = DocumentIndexer()
-        indexer.load_index(index_path)
+        # Shared indexer; reloaded only when build_ai_index rewrites the index
+        indexer = get_indexer(index_path)
         
         # Search for relevant chunks
-        top_k = request.data.get('top_k', 5)
-        results = indexer.search(question, top_k=top_k)
+        results = indexer.search(question, top_k=top_k, mode=mode)
+        
+        from ai_assistant.sources import record_url
         
         # Format results
         chunks = [
@@ -102,6 +135,9 @@ def ask_docs(request):
                 'heading': chunk.heading,
                 'line_start': chunk.line_start,
                 'line_end': chunk.line_end,
+                'source': chunk.source,
+                'record_id': chunk.record_id or None,
+                'record_url': record_url(chunk.source, chunk.record_id),
                 'score': round(score, 3)
             }
             for chunk, score in results
@@ -115,6 +151,7 @@ def ask_docs(request):
         
         response_data = {
             'answer': None,  # No LLM in this minimal implementation
+            'mode': mode,
             'chunks': chunks,
             'note': (
                 'Showing relevant documentation snippets. '
@@ -134,3 +171,37 @@ def ask_docs(request):
             {'error': f'Search failed: {str(e)}'},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])  # Reports process memory and file paths
+def assistant_status(request):
+    """
+    Report the loaded embedding models and index, and their memory use.
+    
+    GET /api/ai/status/
+    
+    Response:
+    {
+        "enabled": bool,
+        "dependencies_available": bool,
+        "index_exists": bool,
+        "models": {"<name>": {"parameters": int, "bytes": int}},
+        "index": null or {"num_vectors": int, "vector_bytes": int, ...},
+        "reloads": int,
+        "caches": {"embeddings": {...}, "results": {...}},  # hit/miss counters
+        "pending_updates": {"<source>": int},  # Record changes not yet indexed
+        "process_peak_rss_bytes": int
+    }
+    """
+    from ai_assistant.indexer import DEPENDENCIES_AVAILABLE
+    from ai_assistant.registry import index_signature, registry
+    from ai_assistant.sources import pending_counts
+    
+    return Response({
+        'enabled': getattr(settings, 'AI_ASSISTANT_ENABLED', False),
+        'dependencies_available': DEPENDENCIES_AVAILABLE,
+        'index_exists': index_signature(Path(settings.AI_VECTOR_INDEX_PATH)) is not None,
+        **registry.memory_report(),
+        'pending_updates': pending_counts(),
+    })
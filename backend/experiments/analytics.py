@@ -7,40 +7,176 @@ MRI Organoids Segmentation platform, including:
 - Data distributions (by species, data type, role, sequence type)
 - Metrics distributions (Dice, IoU histograms)
 - Performance by model/config
+- Pipeline throughput and latency over time
 """
 
-from django.db.models import Count, Avg, Q
+import math
+
+import numpy as np
+from django.db.models import Count, Avg, Q, Value, F, Func, IntegerField, Min, Max, Subquery, Sum
+from django.db.models.functions import Cast, Floor, Least, Trunc
 from django.utils import timezone
 from datetime import timedelta
+from experiments.caching import get_or_compute
 from experiments.models import (
     Organoid, MRIScan, PipelineRun, SegmentationResult, 
-    Metric, ExperimentConfig, ModelVersion
+    Metric, MetricSummary, PipelineRunSummary, ExperimentConfig, ModelVersion,
+    normalize_metric_name
 )
+from experiments.rollups import histogram_percentile
+
+
+# Tables the overview depends on (used for versioned caching)
+OVERVIEW_MODELS = [Organoid, MRIScan, PipelineRun, SegmentationResult, Metric, ModelVersion, ExperimentConfig]
+
+# Tables behind the metric histograms and the MetricSummary averages
+METRIC_ANALYTICS_MODELS = [Metric, SegmentationResult, PipelineRun, MRIScan, Organoid, ModelVersion, ExperimentConfig]
+
+# Rows of the flat analytics summary: label -> overview count key
+SUMMARY_COUNTS = [
+    ('Total Organoids', 'num_organoids'),
+    ('Total MRI Scans', 'num_scans'),
+    ('Total Pipeline Runs', 'num_pipeline_runs'),
+    ('Successful Pipeline Runs', 'num_successful_runs'),
+    ('Failed Pipeline Runs', 'num_failed_runs'),
+    ('Success Rate (%)', 'success_rate'),
+    ('Total Segmentation Results', 'num_results'),
+    ('Total Metrics', 'num_metrics'),
+    ('Total Model Versions', 'num_models'),
+    ('Total Experiment Configs', 'num_configs'),
+]
+
+# Scan distribution dimensions: response key -> MRIScan lookup
+SCAN_DISTRIBUTIONS = {
+    'scans_by_species': 'organoid__species',
+    'scans_by_data_type': 'data_type',
+    'scans_by_role': 'role',
+    'scans_by_sequence_type': 'sequence_type',
+}
+
+
+class TableCount(Subquery):
+    """
+    Scalar ``(SELECT COUNT(id) FROM table)`` subquery.
+
+    Marked as an aggregate so it can sit next to real aggregates in
+    ``QuerySet.aggregate()``; it doesn't reference the outer query, so its
+    value is the same for every row.
+    """
+    contains_aggregate = True
+
+    def __init__(self, model):
+        queryset = model.objects.order_by().annotate(
+            total=Func(F('pk'), function='COUNT')
+        ).values('total')
+        super().__init__(queryset, output_field=IntegerField())
 
 
 def get_overview_counts():
     """
     Get high-level counts of key entities.
     
+    All counts come from one query: run totals are conditional aggregates
+    over a single scan of the run table, and the other tables are counted
+    in scalar subqueries.
+    
     Returns:
         dict: Dictionary with counts for organoids, scans, runs, etc.
     """
-    total_runs = PipelineRun.objects.count()
-    successful_runs = PipelineRun.objects.filter(status='COMPLETED').count()
-    failed_runs = PipelineRun.objects.filter(status='FAILED').count()
+    counts = PipelineRun.objects.order_by().aggregate(
+        num_pipeline_runs=Count('pk'),
+        num_successful_runs=Count('pk', filter=Q(status='SUCCESS')),
+        num_failed_runs=Count('pk', filter=Q(status='FAILED')),
+        num_organoids=TableCount(Organoid),
+        num_scans=TableCount(MRIScan),
+        num_results=TableCount(SegmentationResult),
+        num_metrics=TableCount(Metric),
+        num_models=TableCount(ModelVersion),
+        num_configs=TableCount(ExperimentConfig),
+    )
+    
+    total_runs = counts['num_pipeline_runs']
+    successful_runs = counts['num_successful_runs']
     
     return {
-        'num_organoids': Organoid.objects.count(),
-        'num_scans': MRIScan.objects.count(),
+        'num_organoids': counts['num_organoids'],
+        'num_scans': counts['num_scans'],
         'num_pipeline_runs': total_runs,
         'num_successful_runs': successful_runs,
-        'num_failed_runs': failed_runs,
-        'num_models': ModelVersion.objects.count(),
-        'num_configs': ExperimentConfig.objects.count(),
+        'num_failed_runs': counts['num_failed_runs'],
+        'num_results': counts['num_results'],
+        'num_metrics': counts['num_metrics'],
+        'num_models': counts['num_models'],
+        'num_configs': counts['num_configs'],
         'success_rate': round(successful_runs / total_runs * 100, 1) if total_runs > 0 else 0,
     }
 
 
+def get_scan_distributions():
+    """
+    Get scan counts grouped by species, data type, role and sequence type.
+    
+    Uses one GROUP BY over all four dimensions (a few hundred combinations
+    at most) and rolls the rows up into the individual distributions.
+    
+    Returns:
+        dict: Distribution key -> list of dicts with 'label' and 'value' keys,
+              ordered by descending count
+    """
+    lookups = list(SCAN_DISTRIBUTIONS.values())
+    rows = MRIScan.objects.order_by().values(*lookups).annotate(count=Count('id'))
+    
+    totals = {key: {} for key in SCAN_DISTRIBUTIONS}
+    for row in rows:
+        for key, lookup in SCAN_DISTRIBUTIONS.items():
+            label = row[lookup] or 'Unknown'
+            totals[key][label] = totals[key].get(label, 0) + row['count']
+    
+    return {
+        key: [
+            {'label': label, 'value': count}
+            for label, count in sorted(counts.items(), key=lambda item: -item[1])
+        ]
+        for key, counts in totals.items()
+    }
+
+
+def get_overview():
+    """
+    Get the full analytics overview (counts and scan distributions).
+    
+    Cached under a key that embeds the version of every table involved, so
+    any save/delete of those models invalidates it (see experiments.caching).
+    
+    Returns:
+        dict: 'counts' plus the four 'scans_by_*' distributions
+    """
+    def compute():
+        return {
+            'counts': get_overview_counts(),
+            **get_scan_distributions(),
+        }
+    
+    return get_or_compute('analytics:overview', OVERVIEW_MODELS, compute)
+
+
+def get_summary_rows():
+    """
+    Flatten the cached overview into ``(section, metric, value)`` rows.
+    
+    Shared by the CSV and Parquet summary exports so they always agree with
+    the dashboard JSON.
+    
+    Returns:
+        list: Tuples of section ('counts' or a 'scans_by_*' key), label and value
+    """
+    overview = get_overview()
+    rows = [('counts', label, overview['counts'][key]) for label, key in SUMMARY_COUNTS]
+    for section in SCAN_DISTRIBUTIONS:
+        rows.extend((section, item['label'], item['value']) for item in overview[section])
+    return rows
+
+
 def get_scans_by_species():
     """
     Get count of scans grouped by organoid species.
@@ -48,14 +184,7 @@ def get_scans_by_species():
     Returns:
         list: List of dicts with 'label' and 'value' keys
     """
-    results = MRIScan.objects.values('organoid__species').annotate(
-        count=Count('id')
-    ).order_by('-count')
-    
-    return [
-        {'label': item['organoid__species'] or 'Unknown', 'value': item['count']}
-        for item in results
-    ]
+    return get_scan_distributions()['scans_by_species']
 
 
 def get_scans_by_data_type():
@@ -65,14 +194,7 @@ def get_scans_by_data_type():
     Returns:
         list: List of dicts with 'label' and 'value' keys
     """
-    results = MRIScan.objects.values('data_type').annotate(
-        count=Count('id')
-    ).order_by('-count')
-    
-    return [
-        {'label': item['data_type'], 'value': item['count']}
-        for item in results
-    ]
+    return get_scan_distributions()['scans_by_data_type']
 
 
 def get_scans_by_role():
@@ -82,14 +204,7 @@ def get_scans_by_role():
     Returns:
         list: List of dicts with 'label' and 'value' keys
     """
-    results = MRIScan.objects.values('role').annotate(
-        count=Count('id')
-    ).order_by('-count')
-    
-    return [
-        {'label': item['role'], 'value': item['count']}
-        for item in results
-    ]
+    return get_scan_distributions()['scans_by_role']
 
 
 def get_scans_by_sequence_type():
@@ -99,13 +214,118 @@ def get_scans_by_sequence_type():
     Returns:
         list: List of dicts with 'label' and 'value' keys
     """
-    results = MRIScan.objects.values('sequence_type').annotate(
-        count=Count('id')
-    ).order_by('-count')
+    return get_scan_distributions()['scans_by_sequence_type']
+
+
+# Request filters accepted by metric_histogram -> Metric lookups
+METRIC_FILTER_LOOKUPS = {
+    'model_version': 'segmentation_result__pipeline_run__model_version',
+    'experiment_config': 'segmentation_result__pipeline_run__experiment_config',
+    'stage': 'segmentation_result__pipeline_run__stage',
+    'status': 'segmentation_result__pipeline_run__status',
+    'species': 'segmentation_result__pipeline_run__mri_scan__organoid__species',
+    'sequence_type': 'segmentation_result__pipeline_run__mri_scan__sequence_type',
+}
+
+
+def _bin_label(lower, upper, width):
+    """Format a bin label with just enough decimals for the bin width."""
+    decimals = max(1, -math.floor(math.log10(width))) if width > 0 else 1
+    return f"{lower:.{decimals}f}–{upper:.{decimals}f}"
+
+
+def metric_histogram(metric_name, bins=5, range=None, filters=None, method='sql'):
+    """
+    Get a histogram of a metric's values.
+    
+    Bins are equal-width over ``range``; the last bin is closed on the right
+    so the maximum value is counted (same convention as ``np.histogram``).
+    With ``method='sql'`` each value is mapped to its bin index in the
+    database and only one row per non-empty bin is returned. ``method='numpy'``
+    fetches the values in a single ``values_list`` query and bins them with
+    ``np.histogram`` instead.
+    
+    Args:
+        metric_name: Metric name (case-insensitive, e.g. 'dice', 'Volume')
+        bins: Number of bins
+        range: (min, max) tuple; a missing tuple or a None bound is filled
+            from the observed value range
+        filters: Optional dict of METRIC_FILTER_LOOKUPS keys to values
+        method: 'sql' or 'numpy'
+    
+    Returns:
+        list: List of dicts with 'label', 'value', 'lower' and 'upper' keys
+    """
+    if bins < 1:
+        raise ValueError("bins must be a positive integer")
+    
+    queryset = Metric.objects.filter(metric_name=normalize_metric_name(metric_name))
+    for key, value in (filters or {}).items():
+        if key not in METRIC_FILTER_LOOKUPS:
+            raise ValueError(f"Unsupported filter: {key}")
+        queryset = queryset.filter(**{METRIC_FILTER_LOOKUPS[key]: value})
+    
+    lower, upper = range or (None, None)
+    upper_given = lower is None and upper is not None
+    if lower is None or upper is None:
+        bounds = queryset.aggregate(lower=Min('metric_value'), upper=Max('metric_value'))
+        if bounds['lower'] is None:
+            return []
+        # A filled-in bound never crosses the given one (empty bins instead)
+        if lower is None:
+            lower = min(bounds['lower'], upper) if upper is not None else bounds['lower']
+        if upper is None:
+            upper = max(bounds['upper'], lower)
+    
+    lower, upper = float(lower), float(upper)
+    if not (math.isfinite(lower) and math.isfinite(upper)):
+        raise ValueError("range bounds must be finite numbers")
+    if upper < lower:
+        raise ValueError("range maximum must not be below range minimum")
+    if upper == lower:
+        # Degenerate range (single distinct value): one bin of width 1,
+        # extended away from the only bound the caller gave
+        if upper_given:
+            lower = upper - 1.0
+        else:
+            upper = lower + 1.0
+    width = (upper - lower) / bins
+    
+    if method == 'numpy':
+        values = np.fromiter(
+            queryset.values_list('metric_value', flat=True).iterator(),
+            dtype=float
+        )
+        counts, _ = np.histogram(values, bins=bins, range=(lower, upper))
+        counts = counts.tolist()
+    elif method == 'sql':
+        bucket = Least(
+            Cast(
+                Floor((F('metric_value') - Value(lower)) / Value(width)),
+                IntegerField()
+            ),
+            Value(bins - 1)
+        )
+        rows = queryset.filter(
+            metric_value__gte=lower, metric_value__lte=upper
+        ).order_by().annotate(
+            bucket=bucket
+        ).values('bucket').annotate(count=Count('id')).values_list('bucket', 'count')
+        
+        counts = [0] * bins
+        for index, count in rows:
+            counts[index] += count
+    else:
+        raise ValueError(f"Unknown histogram method: {method}")
     
     return [
-        {'label': item['sequence_type'], 'value': item['count']}
-        for item in results
+        {
+            'label': _bin_label(lower + i * width, lower + (i + 1) * width, width),
+            'value': count,
+            'lower': lower + i * width,
+            'upper': lower + (i + 1) * width,
+        }
+        for i, count in enumerate(counts)
     ]
 
 
@@ -119,25 +339,7 @@ def get_metrics_histogram_dice(bins=5):
     Returns:
         list: List of dicts with 'label' and 'value' keys
     """
-    # Get all Dice metrics from successful runs
-    dice_metrics = Metric.objects.filter(
-        metric_name='dice',
-        segmentation_result__pipeline_run__status='COMPLETED'
-    ).values_list('metric_value', flat=True)
-    
-    # Create bins
-    bin_size = 1.0 / bins
-    histogram = []
-    
-    for i in range(bins):
-        lower = i * bin_size
-        upper = (i + 1) * bin_size
-        count = sum(1 for value in dice_metrics if lower <= value < upper or (i == bins - 1 and value == 1.0))
-        
-        label = f"{lower:.1f}–{upper:.1f}"
-        histogram.append({'label': label, 'value': count})
-    
-    return histogram
+    return metric_histogram('dice', bins=bins, range=(0.0, 1.0), filters={'status': 'SUCCESS'})
 
 
 def get_metrics_histogram_iou(bins=5):
@@ -150,25 +352,29 @@ def get_metrics_histogram_iou(bins=5):
     Returns:
         list: List of dicts with 'label' and 'value' keys
     """
-    # Get all IoU metrics from successful runs
-    iou_metrics = Metric.objects.filter(
-        metric_name='iou',
-        segmentation_result__pipeline_run__status='COMPLETED'
-    ).values_list('metric_value', flat=True)
-    
-    # Create bins
-    bin_size = 1.0 / bins
-    histogram = []
+    return metric_histogram('iou', bins=bins, range=(0.0, 1.0), filters={'status': 'SUCCESS'})
+
+
+def _summary_average(metric_name, group_field):
+    """
+    Average a metric per group from the MetricSummary rollup.
     
-    for i in range(bins):
-        lower = i * bin_size
-        upper = (i + 1) * bin_size
-        count = sum(1 for value in iou_metrics if lower <= value < upper or (i == bins - 1 and value == 1.0))
-        
-        label = f"{lower:.1f}–{upper:.1f}"
-        histogram.append({'label': label, 'value': count})
+    Reads pre-aggregated sums and counts, so the cost depends on the number
+    of summary rows rather than the number of metrics.
+    """
+    results = MetricSummary.objects.filter(
+        metric_name=normalize_metric_name(metric_name),
+        **{f'{group_field}__isnull': False}
+    ).order_by().values(f'{group_field}__name').annotate(
+        total=Sum('value_sum'),
+        n=Sum('count')
+    ).filter(n__gt=0)
     
-    return histogram
+    averages = [
+        {'label': item[f'{group_field}__name'], 'value': round(item['total'] / item['n'], 3)}
+        for item in results
+    ]
+    return sorted(averages, key=lambda item: -item['value'])
 
 
 def get_avg_dice_by_model():
@@ -178,23 +384,7 @@ def get_avg_dice_by_model():
     Returns:
         list: List of dicts with 'label' (model name) and 'value' (avg dice)
     """
-    results = Metric.objects.filter(
-        metric_name='dice',
-        segmentation_result__pipeline_run__status='COMPLETED',
-        segmentation_result__pipeline_run__model_version__isnull=False
-    ).values(
-        'segmentation_result__pipeline_run__model_version__name'
-    ).annotate(
-        avg_dice=Avg('metric_value')
-    ).order_by('-avg_dice')
-    
-    return [
-        {
-            'label': item['segmentation_result__pipeline_run__model_version__name'],
-            'value': round(item['avg_dice'], 3)
-        }
-        for item in results
-    ]
+    return _summary_average('dice', 'model_version')
 
 
 def get_avg_dice_by_config():
@@ -204,23 +394,7 @@ def get_avg_dice_by_config():
     Returns:
         list: List of dicts with 'label' (config name) and 'value' (avg dice)
     """
-    results = Metric.objects.filter(
-        metric_name='dice',
-        segmentation_result__pipeline_run__status='COMPLETED',
-        segmentation_result__pipeline_run__experiment_config__isnull=False
-    ).values(
-        'segmentation_result__pipeline_run__experiment_config__name'
-    ).annotate(
-        avg_dice=Avg('metric_value')
-    ).order_by('-avg_dice')
-    
-    return [
-        {
-            'label': item['segmentation_result__pipeline_run__experiment_config__name'],
-            'value': round(item['avg_dice'], 3)
-        }
-        for item in results
-    ]
+    return _summary_average('dice', 'experiment_config')
 
 
 def get_recent_activity(days=7, limit=10):
@@ -253,3 +427,94 @@ def get_recent_activity(days=7, limit=10):
         }
         for run in recent_runs
     ]
+
+
+TIMESERIES_INTERVALS = ('minute', 'hour', 'day')
+
+# Percentiles reported for queue wait and execution time
+LATENCY_PERCENTILES = (50, 95, 99)
+
+
+def _latency_stats(count, total, histogram):
+    """Mean and percentile estimates (seconds) for one duration series."""
+    stats = {'mean': round(total / count, 3) if count else None}
+    for q in LATENCY_PERCENTILES:
+        value = histogram_percentile(histogram, q)
+        stats[f'p{q}'] = round(value, 3) if value is not None else None
+    return stats
+
+
+def get_pipeline_timeseries(interval='hour', since=None, until=None, stage=None):
+    """
+    Get pipeline throughput and latency per time bucket.
+    
+    Reads the per-minute PipelineRunSummary rollup and re-buckets it with
+    SQL date truncation, then merges duration histograms per bucket to
+    estimate latency percentiles.
+    
+    Args:
+        interval: 'minute', 'hour' or 'day'
+        since: Start datetime (default: 24 hours ago)
+        until: End datetime (default: now)
+        stage: Optional stage filter (e.g. 'GMM')
+    
+    Returns:
+        dict: 'buckets' (one entry per non-empty bucket) and 'in_flight'
+              counts of pending and running runs
+    """
+    if interval not in TIMESERIES_INTERVALS:
+        raise ValueError(f"interval must be one of: {', '.join(TIMESERIES_INTERVALS)}")
+    
+    until = until or timezone.now()
+    since = since or until - timedelta(days=1)
+    
+    rows = PipelineRunSummary.objects.filter(bucket_start__gte=since, bucket_start__lt=until)
+    if stage:
+        rows = rows.filter(stage=stage)
+    rows = rows.annotate(period=Trunc('bucket_start', interval)).order_by('period').values(
+        'period', 'stage', 'status', 'count',
+        'queue_wait_count', 'queue_wait_sum', 'queue_wait_histogram',
+        'execution_count', 'execution_sum', 'execution_histogram',
+    )
+    
+    buckets = {}
+    for row in rows.iterator():
+        bucket = buckets.get(row['period'])
+        if bucket is None:
+            bucket = buckets[row['period']] = {
+                'runs': 0, 'by_stage': {}, 'by_status': {},
+                'queue_wait': [0, 0.0, [0] * len(row['queue_wait_histogram'])],
+                'execution': [0, 0.0, [0] * len(row['execution_histogram'])],
+            }
+        bucket['runs'] += row['count']
+        bucket['by_stage'][row['stage']] = bucket['by_stage'].get(row['stage'], 0) + row['count']
+        bucket['by_status'][row['status']] = bucket['by_status'].get(row['status'], 0) + row['count']
+        for series in ('queue_wait', 'execution'):
+            totals = bucket[series]
+            totals[0] += row[f'{series}_count']
+            totals[1] += row[f'{series}_sum']
+            totals[2] = [a + b for a, b in zip(totals[2], row[f'{series}_histogram'])]
+    
+    in_flight = PipelineRun.objects.aggregate(
+        pending=Count('id', filter=Q(status='PENDING')),
+        running=Count('id', filter=Q(status='RUNNING')),
+    )
+    
+    return {
+        'interval': interval,
+        'since': since.isoformat(),
+        'until': until.isoformat(),
+        'buckets': [
+            {
+                'start': period.isoformat(),
+                'runs': bucket['runs'],
+                'by_stage': bucket['by_stage'],
+                'by_status': bucket['by_status'],
+                'failure_rate': round(bucket['by_status'].get('FAILED', 0) / bucket['runs'], 3),
+                'queue_wait': _latency_stats(*bucket['queue_wait']),
+                'execution': _latency_stats(*bucket['execution']),
+            }
+            for period, bucket in buckets.items()
+        ],
+        'in_flight': in_flight,
+    }
@@ -0,0 +1,149 @@
+"""
+Versioned caching for expensive read paths (analytics, dashboards).
+
+Every model table tracked here has a version stamp in the ``TableVersion``
+table. The stamp is bumped by the post_save/post_delete signal handlers in
+``experiments.signals`` whenever a row changes. Cached values embed the
+versions of the tables they were computed from in their cache key, so a
+single version bump invalidates every dependent entry without having to
+know which keys exist.
+
+The stamps are stored in the database, not the Django cache, because the
+default cache is private to each process: a metric saved by the
+``run_pipeline_jobs`` process must invalidate the web server's entries too.
+Reading them costs one indexed query per lookup; the cached values
+themselves may live in any cache.
+
+Versions are nanosecond timestamps of the last change (never decreasing,
+even across processes with skewed clocks), so they can also be used to
+derive Last-Modified headers.
+
+Each bump is a single UPDATE of the table's row. On PostgreSQL that row is
+locked until the writing transaction commits, so concurrent writers to the
+same table queue behind each other there. Writes in this app run in
+autocommit (no ATOMIC_REQUESTS), which holds the lock for one statement
+only; keep long ``transaction.atomic()`` blocks that save tracked models
+short, or bump once after a bulk write instead of per row.
+
+NOTE: ``QuerySet.update()`` and ``bulk_create()`` don't send model signals.
+Code using them must call ``bump_table_version`` itself; otherwise stale
+entries live until their timeout expires.
+"""
+
+import hashlib
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+
+from .models import TableVersion
+
+
+def bump_table_version(model):
+    """
+    Mark a model's table as changed.
+
+    Args:
+        model: Model class whose rows were created, updated or deleted
+    """
+    label = model._meta.label_lower
+    now = time.time_ns()
+    # Strictly increasing, so Last-Modified never moves backwards
+    bumped = TableVersion.objects.filter(label=label).update(version=Greatest(F('version') + 1, Value(now)))
+    if not bumped:
+        try:
+            with transaction.atomic():
+                TableVersion.objects.create(label=label, version=now)
+        except IntegrityError:
+            # Another process created the row first
+            TableVersion.objects.filter(label=label).update(version=Greatest(F('version') + 1, Value(now)))
+
+
+def get_table_versions(models: Iterable) -> Dict[str, int]:
+    """
+    Get the current version stamps for a set of model tables.
+
+    Tables without a stamp yet are initialized to "now" (once, for all
+    processes).
+
+    Args:
+        models: Iterable of model classes
+
+    Returns:
+        Dict mapping model label to version stamp
+    """
+    labels = {model._meta.label_lower for model in models}
+    versions = dict(TableVersion.objects.filter(label__in=labels).values_list('label', 'version'))
+
+    missing = labels - set(versions)
+    if missing:
+        now = time.time_ns()
+        TableVersion.objects.bulk_create(
+            [TableVersion(label=label, version=now) for label in missing], ignore_conflicts=True
+        )
+        versions.update(TableVersion.objects.filter(label__in=missing).values_list('label', 'version'))
+    return versions
+
+
+def tables_last_modified(models: Iterable) -> datetime:
+    """
+    Time of the most recent change to any of the tables.
+
+    Args:
+        models: Iterable of model classes
+
+    Returns:
+        datetime: UTC timestamp derived from the newest version stamp
+    """
+    newest = max(get_table_versions(models).values())
+    return datetime.fromtimestamp(newest / 1e9, tz=timezone.utc)
+
+
+def versioned_key(prefix: str, models: Iterable, *parts) -> str:
+    """
+    Build a cache key that changes whenever one of the tables changes.
+
+    Args:
+        prefix: Key namespace (e.g. 'analytics:overview')
+        models: Model classes the cached value depends on
+        *parts: Extra key components (e.g. query parameters)
+
+    Returns:
+        str: Cache key
+    """
+    versions = get_table_versions(models)
+    signature = '|'.join(
+        [f"{label}={version}" for label, version in sorted(versions.items())]
+        + [str(part) for part in parts]
+    )
+    digest = hashlib.md5(signature.encode('utf-8')).hexdigest()
+    return f"{prefix}:{digest}"
+
+
+def get_or_compute(prefix: str, models: Iterable, compute: Callable, *parts, timeout=None):
+    """
+    Return a cached value, computing and storing it on a miss.
+
+    Args:
+        prefix: Key namespace
+        models: Model classes the value depends on
+        compute: Zero-argument callable producing the value
+        *parts: Extra key components
+        timeout: Cache timeout in seconds (default: ANALYTICS_CACHE_TIMEOUT)
+
+    Returns:
+        The cached or freshly computed value
+    """
+    key = versioned_key(prefix, models, *parts)
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        if timeout is None:
+            timeout = getattr(settings, 'ANALYTICS_CACHE_TIMEOUT', 300)
+        cache.set(key, value, timeout=timeout)
+    return value
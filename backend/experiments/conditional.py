@@ -0,0 +1,135 @@
+"""
+Conditional GET support (ETag / Last-Modified) for read endpoints.
+
+Validators are derived from the table version stamps in
+``experiments.caching``, which the model signals bump on every change. A
+request whose ``If-None-Match`` or ``If-Modified-Since`` still matches is
+answered with 304 before the view queries or serializes anything, so
+polling an unchanged dashboard costs one indexed query. The stamps live in
+the database, so a change made by any process (web workers,
+``run_pipeline_jobs``) changes the validators everywhere.
+"""
+
+import hashlib
+from functools import wraps
+
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from .caching import get_table_versions
+
+# Headers that select a different representation of the same URL
+VARY_HEADERS = ('Accept',)
+
+
+def table_validators(request, models):
+    """
+    ETag and Last-Modified timestamp for a request over a set of tables.
+
+    The ETag covers the table versions, the full path (query string
+    included) and the Accept header, so each representation gets its own.
+
+    Args:
+        request: HTTP (or DRF) request
+        models: Model classes the response is built from
+
+    Returns:
+        Tuple of (quoted weak ETag, Last-Modified as a Unix timestamp)
+    """
+    versions = get_table_versions(models)
+    signature = '|'.join(
+        [f"{label}={version}" for label, version in sorted(versions.items())]
+        + [request.get_full_path()]
+        + [request.META.get(f"HTTP_{header.upper()}", '') for header in VARY_HEADERS]
+    )
+    etag = 'W/' + quote_etag(hashlib.md5(signature.encode('utf-8')).hexdigest())
+    return etag, max(versions.values()) // 10**9
+
+
+def set_cache_headers(response, etag, last_modified, max_age=0):
+    """
+    Attach validators and Cache-Control to a response.
+
+    Args:
+        response: Response to modify
+        etag: Quoted ETag
+        last_modified: Unix timestamp
+        max_age: Seconds a client may reuse the response without revalidating
+            (0 means revalidate on every use)
+    """
+    if response.status_code not in (200, 304):
+        return response
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    if max_age:
+        patch_cache_control(response, private=True, max_age=max_age, must_revalidate=True)
+    else:
+        patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, VARY_HEADERS)
+    return response
+
+
+def conditional_response(request, models, max_age=0, respond=None):
+    """
+    Answer a GET with 304 if unchanged, otherwise build it with ``respond``.
+
+    Args:
+        request: HTTP (or DRF) request
+        models: Model classes the response is built from
+        max_age: Cache-Control max-age in seconds
+        respond: Zero-argument callable producing the full response
+
+    Returns:
+        304 response or the response from ``respond`` with cache headers
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return respond()
+
+    etag, last_modified = table_validators(request, models)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = respond()
+    return set_cache_headers(response, etag, last_modified, max_age)
+
+
+def conditional_on_tables(models, max_age=0):
+    """
+    Decorator adding conditional GET to a function view.
+
+    Apply it below ``@api_view``/``@permission_classes``.
+
+    Args:
+        models: Model classes the view's response depends on
+        max_age: Cache-Control max-age in seconds
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            return conditional_response(
+                request, models, max_age, lambda: view(request, *args, **kwargs)
+            )
+        return wrapper
+    return decorator
+
+
+class ConditionalGetMixin:
+    """
+    ViewSet mixin adding conditional GET to ``list`` and ``retrieve``.
+
+    Set ``conditional_models`` to every table the serialized output reads
+    (the model itself plus related names and counts).
+    """
+    conditional_models = []
+    cache_max_age = 0
+
+    def list(self, request, *args, **kwargs):
+        return conditional_response(
+            request, self.conditional_models, self.cache_max_age,
+            lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return conditional_response(
+            request, self.conditional_models, self.cache_max_age,
+            lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs)
+        )
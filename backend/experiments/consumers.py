@@ -41,7 +41,20 @@ class PipelineStatusConsumer(AsyncWebsocketConsumer):
             data = json.loads(text_data)
             action = data.get('action')
             
-            if action == 'subscribe':
+            if action == 'subscribe_export':
+                job_id = data.get('job_id')
+                if job_id:
+                    # Join a specific export job group
+                    await self.channel_layer.group_add(
+                        f"export_{job_id}",
+                        self.channel_name
+                    )
+                    await self.send(text_data=json.dumps({
+                        'type': 'subscription_confirmed',
+                        'job_id': job_id
+                    }))
+            
+            elif action == 'subscribe':
                 run_id = data.get('run_id')
                 if run_id:
                     # Join specific pipeline group
@@ -88,3 +101,9 @@ class PipelineStatusConsumer(AsyncWebsocketConsumer):
         Send pipeline progress update to WebSocket client.
         """
         await self.send(text_data=json.dumps(event))
+    
+    async def export_progress(self, event):
+        """
+        Send export job progress to WebSocket client.
+        """
+        await self.send(text_data=json.dumps(event))
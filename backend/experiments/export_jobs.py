@@ -0,0 +1,402 @@
+"""
+Background export jobs.
+
+Large exports are written to disk by the ``run_export_jobs`` worker instead
+of being streamed from a request worker. A job is identified by the hash of
+its spec (kind, format, filters, columns) and the current versions of the
+exported tables, so repeated identical requests are served from the
+finished file until it expires or the data changes.
+
+A RUNNING job whose ``updated_at`` is older than
+settings.EXPORT_JOB_STALE_SECONDS is treated as abandoned by a crashed
+worker: it is no longer reused for new requests and ``run_export_jobs``
+claims it again.
+
+Progress is broadcast over the channel layer as ``export.progress``
+messages to the ``export_<job id>`` group and the global updates group.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+from datetime import timedelta
+from pathlib import Path
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+
+from . import exports
+from .caching import get_table_versions
+from .models import ExportJob, Metric, PipelineRun, SegmentationResult
+from .streams import ALL_PIPELINES_GROUP
+
+logger = logging.getLogger(__name__)
+
+# kind -> (tracked model, CSV export function, columnar export function)
+EXPORT_KINDS = {
+    'metrics': (Metric, 'export_metrics_csv', 'export_metrics_columnar'),
+    'runs': (PipelineRun, 'export_pipeline_runs_csv', 'export_pipeline_runs_columnar'),
+    'metrics_wide': (SegmentationResult, None, None),
+}
+
+CONTENT_TYPES = {'csv': 'text/csv', **exports.COLUMNAR_FORMATS}
+
+# Jobs already satisfying a spec (finished ones only until they expire)
+ACTIVE_STATUSES = ('PENDING', 'RUNNING')
+
+RANGE_PATTERN = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def stale_before():
+    """RUNNING jobs last updated before this time are considered abandoned."""
+    return timezone.now() - timedelta(seconds=getattr(settings, 'EXPORT_JOB_STALE_SECONDS', 1800))
+
+
+def claimable_jobs():
+    """Jobs a worker may start: pending ones and abandoned running ones."""
+    return ExportJob.objects.filter(Q(status='PENDING') | Q(status='RUNNING', updated_at__lt=stale_before()))
+
+
+def export_group_name(job_id) -> str:
+    """Channel-layer group used for progress of a single export job."""
+    return f"export_{job_id}"
+
+
+def available_columns(kind, file_format):
+    """Column names produced by an export kind in a format."""
+    if kind == 'metrics_wide':
+        if file_format == 'csv':
+            return exports.wide_metrics_columns()
+        return exports.wide_metrics_arrow_schema().names
+    if file_format == 'csv':
+        return exports.METRIC_CSV_COLUMNS if kind == 'metrics' else exports.RUN_CSV_COLUMNS
+    schema = exports.metrics_arrow_schema() if kind == 'metrics' else exports.runs_arrow_schema()
+    return schema.names
+
+
+def validate_spec(kind, file_format, filters=None, columns=None):
+    """
+    Check an export spec and normalize it.
+
+    Args:
+        kind: One of ExportJob.KIND_CHOICES
+        file_format: One of ExportJob.FORMAT_CHOICES
+        filters: Dict of filters ('since' for every kind, WIDE_FILTER_LOOKUPS for metrics_wide)
+        columns: Optional list of columns to include
+
+    Returns:
+        dict: Normalized spec with 'kind', 'file_format', 'filters' and 'columns'
+
+    Raises:
+        ValueError: Invalid spec
+    """
+    if kind not in EXPORT_KINDS:
+        raise ValueError(f"kind must be one of: {', '.join(EXPORT_KINDS)}")
+    if file_format not in CONTENT_TYPES:
+        raise ValueError(f"format must be one of: {', '.join(CONTENT_TYPES)}")
+    if file_format != 'csv' and not exports.PYARROW_AVAILABLE:
+        raise ValueError("Parquet/Arrow exports require pyarrow")
+
+    filters = {key: str(value) for key, value in (filters or {}).items() if value not in (None, '')}
+    allowed = {'since'} | (set(exports.WIDE_FILTER_LOOKUPS) if kind == 'metrics_wide' else set())
+    unknown = set(filters) - allowed
+    if unknown:
+        raise ValueError(f"Unsupported filter: {', '.join(sorted(unknown))}")
+
+    # Fail early on malformed tokens/filters rather than in the worker
+    model = EXPORT_KINDS[kind][0]
+    exports.ChangeWindow(model, filters.get('since'))
+    if kind == 'metrics_wide':
+        try:
+            exports.wide_metrics_queryset(_wide_filters(filters))
+        except ValidationError as e:
+            raise ValueError(e.messages[0])
+
+    columns = list(columns or [])
+    missing = [column for column in columns if column not in available_columns(kind, file_format)]
+    if missing:
+        raise ValueError(f"Unknown columns: {', '.join(missing)}")
+
+    return {'kind': kind, 'file_format': file_format, 'filters': filters, 'columns': columns}
+
+
+def spec_hash(spec) -> str:
+    """Hash of a normalized spec plus the versions of the exported tables."""
+    model = EXPORT_KINDS[spec['kind']][0]
+    tracked = [Metric, PipelineRun, SegmentationResult] if spec['kind'] == 'metrics_wide' else [model]
+    payload = json.dumps({**spec, 'versions': get_table_versions(tracked)}, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def find_reusable_job(digest):
+    """Return a pending, live running or unexpired finished job for a spec hash."""
+    now = timezone.now()
+    cutoff = stale_before()
+    for job in ExportJob.objects.filter(spec_hash=digest).order_by('-created_at'):
+        if job.status == 'RUNNING' and job.updated_at < cutoff:
+            continue
+        if job.status in ACTIVE_STATUSES:
+            return job
+        if job.status == 'SUCCESS' and job.expires_at and job.expires_at > now and os.path.exists(job.file_path):
+            return job
+    return None
+
+
+def submit_export(kind, file_format, filters=None, columns=None):
+    """
+    Create an export job, or reuse an identical one.
+
+    Returns:
+        Tuple of (ExportJob, created)
+
+    Raises:
+        ValueError: Invalid spec
+    """
+    spec = validate_spec(kind, file_format, filters, columns)
+    digest = spec_hash(spec)
+    job = find_reusable_job(digest)
+    if job is not None:
+        return job, False
+    return ExportJob.objects.create(spec_hash=digest, **spec), True
+
+
+def broadcast_export_progress(job):
+    """Send an export job's status and progress to WebSocket clients."""
+    channel_layer = get_channel_layer()
+    if channel_layer:
+        try:
+            event = {
+                'type': 'export.progress',
+                'job_id': str(job.id),
+                'status': job.status,
+                'progress': job.progress,
+                'rows_written': job.rows_written,
+                'timestamp': timezone.now().isoformat(),
+            }
+            async_to_sync(channel_layer.group_send)(ALL_PIPELINES_GROUP, event)
+            async_to_sync(channel_layer.group_send)(export_group_name(job.id), event)
+        except Exception as e:
+            logger.warning(f"Failed to broadcast export progress: {e}")
+
+
+def _wide_filters(filters):
+    return {key: value for key, value in filters.items() if key != 'since'}
+
+
+def _export_rows(job, window):
+    """
+    Columns (or schema), row iterator and expected row count for a job.
+    """
+    if job.kind == 'metrics_wide':
+        queryset = exports.wide_metrics_queryset(_wide_filters(job.filters), window)
+        rows = queryset.iterator(chunk_size=exports.EXPORT_CHUNK_SIZE)
+        if job.file_format == 'csv':
+            columns = exports.wide_metrics_columns()
+        else:
+            columns = exports.wide_metrics_arrow_schema()
+        return columns, rows, queryset.count()
+
+    model, csv_export, columnar_export = EXPORT_KINDS[job.kind]
+    export = csv_export if job.file_format == 'csv' else columnar_export
+    columns, rows = getattr(exports, export)(window)
+    return columns, rows, window.filter(model.objects.all()).count()
+
+
+def _select_columns(names, rows, selected):
+    indexes = [names.index(column) for column in selected]
+    return ([row[i] for i in indexes] for row in rows)
+
+
+def _job_paths(job):
+    """Destination of a job's file and the partial file it is written to."""
+    export_dir = Path(getattr(settings, 'EXPORT_JOB_DIR', settings.BASE_DIR / 'export_jobs'))
+    destination = export_dir / f"{job.id}.{job.file_format}"
+    return destination, destination.with_suffix(destination.suffix + '.part')
+
+
+def run_export_job(job):
+    """
+    Produce the file for an export job.
+
+    Writes to a temporary file next to the destination and renames it once
+    complete, so a download never sees a partial file.
+
+    Returns:
+        bool: True if the export succeeded, None if another worker has it
+    """
+    # Claim the job atomically so concurrent workers don't both run it;
+    # a RUNNING job is only taken over once its worker has gone quiet
+    started_at = timezone.now()
+    claimed = ExportJob.objects.filter(pk=job.pk).filter(
+        ~Q(status='RUNNING') | Q(updated_at__lt=stale_before())
+    ).update(
+        status='RUNNING', started_at=started_at, updated_at=started_at, progress=0, rows_written=0, error=''
+    )
+    if not claimed:
+        logger.info(f"Export job {job.id} is already running")
+        return None
+    job.status, job.started_at, job.progress, job.rows_written, job.error = 'RUNNING', started_at, 0, 0, ''
+    job.updated_at = started_at
+    broadcast_export_progress(job)
+
+    destination, partial = _job_paths(job)
+    destination.parent.mkdir(parents=True, exist_ok=True)
+
+    try:
+        model = EXPORT_KINDS[job.kind][0]
+        window = exports.ChangeWindow(model, job.filters.get('since'))
+        columns, rows, total = _export_rows(job, window)
+        total = max(total, 1)
+
+        names = columns if job.file_format == 'csv' else columns.names
+        if job.columns:
+            rows = _select_columns(names, rows, job.columns)
+            if job.file_format == 'csv':
+                columns = job.columns
+            else:
+                columns = exports.pa.schema([columns.field(name) for name in job.columns])
+
+        def counted(rows):
+            for row in rows:
+                job.rows_written += 1
+                if job.rows_written % exports.EXPORT_CHUNK_SIZE == 0:
+                    job.progress = min(99, int(100 * job.rows_written / total))
+                    job.save(update_fields=['rows_written', 'progress', 'updated_at'])
+                    broadcast_export_progress(job)
+                yield row
+
+        if job.file_format == 'csv':
+            chunks = (line.encode('utf-8') for line in exports.iter_csv(columns, counted(rows)))
+        else:
+            chunks = exports.iter_columnar(columns, counted(rows), job.file_format)
+
+        with open(partial, 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+        os.replace(partial, destination)
+    except Exception as e:
+        logger.exception(f"Export job {job.id} failed")
+        if partial.exists():
+            partial.unlink()
+        job.status = 'FAILED'
+        job.error = str(e)
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'error', 'finished_at', 'rows_written', 'updated_at'])
+        broadcast_export_progress(job)
+        return False
+
+    ttl = getattr(settings, 'EXPORT_JOB_TTL_SECONDS', 24 * 3600)
+    job.status = 'SUCCESS'
+    job.progress = 100
+    job.file_path = str(destination)
+    job.file_size = destination.stat().st_size
+    job.finished_at = timezone.now()
+    job.expires_at = job.finished_at + timedelta(seconds=ttl)
+    job.save()
+    broadcast_export_progress(job)
+    return True
+
+
+def purge_expired_jobs():
+    """
+    Delete files of finished jobs past their expiry, and abandoned jobs
+    that a newer job for the same spec has replaced.
+
+    Abandoned jobs without a replacement are left for ``run_export_jobs``
+    to claim again.
+
+    Returns:
+        int: Number of jobs expired or failed
+    """
+    expired = ExportJob.objects.filter(status='SUCCESS', expires_at__lte=timezone.now())
+    count = 0
+    for job in expired:
+        if job.file_path and os.path.exists(job.file_path):
+            os.remove(job.file_path)
+        job.status = 'EXPIRED'
+        job.save(update_fields=['status', 'updated_at'])
+        count += 1
+
+    abandoned = ExportJob.objects.filter(status='RUNNING', updated_at__lt=stale_before())
+    for job in abandoned:
+        if not ExportJob.objects.filter(spec_hash=job.spec_hash, created_at__gt=job.created_at).exists():
+            continue
+        _job_paths(job)[1].unlink(missing_ok=True)
+        job.status = 'FAILED'
+        job.error = "Export worker stopped responding; replaced by a newer job"
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'error', 'finished_at', 'updated_at'])
+        count += 1
+    return count
+
+
+def _file_range(path, start, length, chunk_size=64 * 1024):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            data = f.read(min(chunk_size, length))
+            if not data:
+                break
+            length -= len(data)
+            yield data
+
+
+def ranged_file_response(request, job):
+    """
+    Serve a finished export, honoring single-range ``Range`` requests.
+
+    Args:
+        request: HTTP request
+        job: ExportJob with status SUCCESS
+
+    Returns:
+        FileResponse or StreamingHttpResponse (200 or 206), or HttpResponse (416)
+    """
+    size = os.path.getsize(job.file_path)
+    filename = f"{job.kind}_export.{job.file_format}"
+    content_type = CONTENT_TYPES[job.file_format]
+
+    range_header = request.headers.get('Range', '')
+    match = RANGE_PATTERN.match(range_header.strip())
+    if not match or match.groups() == ('', ''):
+        if not exports.is_asgi_request(request):
+            response = FileResponse(
+                open(job.file_path, 'rb'), as_attachment=True, filename=filename, content_type=content_type
+            )
+            response['Accept-Ranges'] = 'bytes'
+            return response
+        # FileResponse would be read into memory before sending under ASGI
+        start, end, status = 0, size - 1, 200
+    else:
+        first, last = match.groups()
+        if first == '':
+            # Suffix range: the last N bytes
+            start, end = max(size - int(last), 0), size - 1
+        else:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+
+        if start >= size or start > end:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+        status = 206
+
+    length = end - start + 1
+    response = StreamingHttpResponse(
+        exports.streaming_content(_file_range(job.file_path, start, length), request),
+        status=status, content_type=content_type
+    )
+    if status == 206:
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Content-Length'] = str(length)
+    response['Accept-Ranges'] = 'bytes'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -1,61 +1,247 @@
 """
-Export utilities for generating CSV files from experiment data.
+Export utilities for generating CSV, Parquet and Arrow files from experiment data.
+
+Exports of metrics, pipeline runs and segmentation results can be
+incremental: passing the resume token returned by a previous export as
+``since`` restricts the rows to those created or updated after it (ordered by
+``updated_at`` with the primary key as tiebreak).
+
+NOTE: Deletions are not reported by incremental exports, and rows written by
+``QuerySet.update()`` without setting ``updated_at`` are not picked up.
 """
+import base64
+import binascii
 import csv
-from io import StringIO
-from django.http import HttpResponse
+from datetime import date, datetime
+from itertools import islice
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Max, Q
+from django.http import StreamingHttpResponse
+from django.utils.dateparse import parse_datetime
 from .models import Metric, ExperimentConfig, PipelineRun, SegmentationResult
 
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# Rows fetched per database round trip while streaming exports
+EXPORT_CHUNK_SIZE = 2000
+
+METRIC_CSV_COLUMNS = ['id', 'metric_name', 'metric_value', 'experiment_config', 'pipeline_run_id', 'created_at']
+
+RUN_CSV_COLUMNS = [
+    'id', 'stage', 'status', 'mri_scan_id', 'experiment_config',
+    'model_version', 'started_at', 'finished_at', 'created_at',
+]
+
+
+class Echo:
+    """Pseudo-buffer whose write() returns the value instead of storing it."""
+    
+    def write(self, value):
+        return value
+
+
+def _format_value(value):
+    """Render a database value as a CSV cell."""
+    if value is None:
+        return ''
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
 
-def generate_csv_response(data, filename):
+def iter_csv(columns, rows):
     """
-    Generate HTTP response with CSV data
+    Yield CSV lines one at a time.
     
     Args:
-        data: List of dictionaries containing data to export
+        columns: Header row
+        rows: Iterable of row tuples (consumed lazily)
+        
+    Yields:
+        str: One CSV-formatted line per row, header first
+    """
+    writer = csv.writer(Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow([_format_value(value) for value in row])
+
+
+async def _aiter_batches(chunks, batch_size):
+    """Pull ``batch_size`` chunks at a time from a sync iterator in Django's sync thread."""
+    next_batch = sync_to_async(lambda: list(islice(chunks, batch_size)))
+    try:
+        while True:
+            batch = await next_batch()
+            if not batch:
+                return
+            yield ''.join(batch) if isinstance(batch[0], str) else b''.join(batch)
+    finally:
+        if hasattr(chunks, 'close'):
+            await sync_to_async(chunks.close)()
+
+
+def is_asgi_request(request) -> bool:
+    """Whether a request (HttpRequest or DRF Request) is served over ASGI."""
+    return isinstance(getattr(request, '_request', request), ASGIRequest)
+
+
+def streaming_content(chunks, request=None, batch_size=1):
+    """
+    Adapt a sync chunk iterator to the server handling a request.
+    
+    Under ASGI, Django 4.2 reads a sync iterator with ``list()`` before
+    sending anything, which would hold a whole export in memory. ASGI
+    requests therefore get an async iterator that fetches the chunks (and
+    the database rows behind them) ``batch_size`` at a time.
+    
+    Args:
+        chunks: Iterable of str or bytes chunks
+        request: Request being answered (HttpRequest or DRF Request)
+        batch_size: Chunks fetched and sent together under ASGI
+        
+    Returns:
+        The sync iterator under WSGI, an async iterator under ASGI
+    """
+    chunks = iter(chunks)
+    if is_asgi_request(request):
+        return _aiter_batches(chunks, batch_size)
+    return chunks
+
+
+def generate_csv_response(columns, rows, filename, request=None):
+    """
+    Generate a streaming HTTP response with CSV data
+    
+    Rows are written as the client reads them, so memory use stays
+    constant regardless of the number of rows.
+    
+    Args:
+        columns: Header row
+        rows: Iterable of row tuples
         filename: Name for the downloaded file
+        request: Request being answered, to stream asynchronously under ASGI
         
     Returns:
-        HttpResponse with CSV attachment
+        StreamingHttpResponse with CSV attachment
     """
-    response = HttpResponse(content_type='text/csv')
+    response = StreamingHttpResponse(
+        streaming_content(iter_csv(columns, rows), request, batch_size=EXPORT_CHUNK_SIZE),
+        content_type='text/csv'
+    )
     response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def encode_resume_token(updated_at, pk):
+    """Encode a (updated_at, pk) watermark as an opaque URL-safe token."""
+    raw = f"{updated_at.isoformat()}|{pk}".encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def decode_resume_token(token, model):
+    """
+    Decode a resume token into an (updated_at, pk) watermark.
     
-    if not data:
-        return response
+    Args:
+        token: Token from encode_resume_token
+        model: Model whose primary key the token refers to
+        
+    Returns:
+        Tuple of (datetime, primary key)
+        
+    Raises:
+        ValueError: Malformed token
+    """
+    try:
+        updated_at, pk = base64.urlsafe_b64decode(token.encode('ascii')).decode('utf-8').split('|', 1)
+        updated_at = parse_datetime(updated_at)
+        pk = model._meta.pk.to_python(pk)
+    except (binascii.Error, UnicodeError, ValueError, ValidationError):
+        raise ValueError("Invalid resume token")
+    if updated_at is None:
+        raise ValueError("Invalid resume token")
+    return updated_at, pk
+
+
+class ChangeWindow:
+    """
+    Range of rows changed after a resume token, up to a watermark.
     
-    writer = csv.DictWriter(response, fieldnames=data[0].keys())
-    writer.writeheader()
-    writer.writerows(data)
+    The upper watermark is the newest (updated_at, pk) at the time the
+    window is opened, so rows written while an export streams are left for
+    the next sync instead of being missed or duplicated.
+    """
     
-    return response
+    def __init__(self, model, since=None):
+        """
+        Args:
+            model: Model with an ``updated_at`` field
+            since: Resume token from a previous export (None for everything)
+            
+        Raises:
+            ValueError: Malformed token
+        """
+        self.start = decode_resume_token(since, model) if since else None
+        self.end = model.objects.order_by('-updated_at', '-pk').values_list('updated_at', 'pk').first()
+        if self.start and (self.end is None or self.end <= self.start):
+            self.end = self.start
+    
+    @property
+    def resume_token(self):
+        """Token to pass as ``since`` on the next export (None if no rows)."""
+        return encode_resume_token(*self.end) if self.end else None
+    
+    def filter(self, queryset):
+        """Restrict a queryset of the tracked model to rows inside the window."""
+        if self.end is None:
+            return queryset.none()
+        end_at, end_pk = self.end
+        queryset = queryset.filter(Q(updated_at__lt=end_at) | Q(updated_at=end_at, pk__lte=end_pk))
+        if self.start:
+            start_at, start_pk = self.start
+            queryset = queryset.filter(Q(updated_at__gt=start_at) | Q(updated_at=start_at, pk__gt=start_pk))
+        return queryset
+
 
+def _stream(queryset, fields, window=None):
+    """Iterate a values_list projection in chunks without caching rows."""
+    if window is not None:
+        queryset = window.filter(queryset)
+    return queryset.order_by().values_list(*fields).iterator(chunk_size=EXPORT_CHUNK_SIZE)
 
-def export_metrics_csv():
+
+def export_metrics_csv(window=None):
     """
     Export all metrics to CSV format
     
+    Args:
+        window: Optional ChangeWindow over Metric for incremental exports
+        
     Returns:
-        List of dictionaries with metric data
+        Tuple of (columns, row iterator) with metric data
     """
-    metrics = Metric.objects.select_related(
-        'segmentation_result',
-        'segmentation_result__pipeline_run',
-        'segmentation_result__pipeline_run__experiment_config'
-    ).all()
+    columns = METRIC_CSV_COLUMNS
+    rows = _stream(Metric.objects.all(), [
+        'id',
+        'metric_name',
+        'metric_value',
+        'segmentation_result__pipeline_run__experiment_config__name',
+        'segmentation_result__pipeline_run_id',
+        'created_at',
+    ], window)
     
-    data = []
-    for metric in metrics:
-        data.append({
-            'id': metric.id,
-            'metric_name': metric.metric_name,
-            'metric_value': metric.metric_value,
-            'experiment_config': metric.segmentation_result.pipeline_run.experiment_config.name if metric.segmentation_result and metric.segmentation_result.pipeline_run else 'N/A',
-            'pipeline_run_id': metric.segmentation_result.pipeline_run.id if metric.segmentation_result and metric.segmentation_result.pipeline_run else 'N/A',
-            'created_at': metric.created_at.isoformat() if metric.created_at else '',
-        })
+    def generate():
+        for metric_id, name, value, config_name, run_id, created_at in rows:
+            yield metric_id, name, value, config_name or 'N/A', run_id or 'N/A', created_at
     
-    return data
+    return columns, generate()
 
 
 def export_experiments_csv():
@@ -63,72 +249,402 @@ def export_experiments_csv():
     Export all experiment configurations to CSV format
     
     Returns:
-        List of dictionaries with experiment data
+        Tuple of (columns, row iterator) with experiment data
     """
-    experiments = ExperimentConfig.objects.select_related('model_version', 'created_by').all()
-    
-    data = []
-    for exp in experiments:
-        data.append({
-            'id': exp.id,
-            'name': exp.name,
-            'description': exp.description,
-            'model_version': exp.model_version.name if exp.model_version else 'N/A',
-            'created_by': exp.created_by.username if exp.created_by else 'N/A',
-            'created_at': exp.created_at.isoformat() if exp.created_at else '',
-        })
-    
-    return data
+    columns = ['id', 'name', 'description', 'created_at', 'updated_at']
+    return columns, _stream(ExperimentConfig.objects.all(), columns)
 
 
-def export_pipeline_runs_csv():
+def export_pipeline_runs_csv(window=None):
     """
     Export all pipeline runs to CSV format
     
+    Args:
+        window: Optional ChangeWindow over PipelineRun for incremental exports
+        
     Returns:
-        List of dictionaries with pipeline run data
-    """
-    runs = PipelineRun.objects.select_related(
-        'mri_scan',
-        'experiment_config',
-        'model_version'
-    ).all()
-    
-    data = []
-    for run in runs:
-        data.append({
-            'id': run.id,
-            'stage': run.stage,
-            'status': run.status,
-            'mri_scan_id': run.mri_scan.id if run.mri_scan else 'N/A',
-            'experiment_config': run.experiment_config.name if run.experiment_config else 'N/A',
-            'model_version': run.model_version.name if run.model_version else 'N/A',
-            'started_at': run.started_at.isoformat() if run.started_at else '',
-            'finished_at': run.finished_at.isoformat() if run.finished_at else '',
-            'created_at': run.created_at.isoformat() if run.created_at else '',
-        })
-    
-    return data
+        Tuple of (columns, row iterator) with pipeline run data
+    """
+    columns = RUN_CSV_COLUMNS
+    rows = _stream(PipelineRun.objects.all(), [
+        'id', 'stage', 'status', 'mri_scan_id', 'experiment_config__name',
+        'model_version__name', 'started_at', 'finished_at', 'created_at',
+    ], window)
+    
+    def generate():
+        for row in rows:
+            run_id, stage, run_status, scan_id, config_name, model_name, *times = row
+            yield (run_id, stage, run_status, scan_id or 'N/A',
+                   config_name or 'N/A', model_name or 'N/A', *times)
+    
+    return columns, generate()
 
 
 def export_analytics_summary_csv():
     """
     Export analytics summary data to CSV format
     
+    Built from the same cached snapshot as the analytics dashboard.
+    
     Returns:
-        List of dictionaries with analytics summary data
+        Tuple of (columns, rows) with analytics summary data
     """
     from . import analytics
     
-    overview = analytics.get_overview_counts()
+    return ['section', 'metric', 'value'], analytics.get_summary_rows()
+
+
+# Wide (one row per segmentation result) metric export
+
+# Output column -> normalized metric name
+WIDE_METRICS = {
+    'dice': 'dice',
+    'iou': 'iou',
+    'volume': 'volume',
+    'hausdorff': 'hausdorff',
+}
+
+# Output column -> SegmentationResult lookup for the metadata columns
+WIDE_COLUMNS = {
+    'result_id': 'id',
+    'pipeline_run_id': 'pipeline_run_id',
+    'stage': 'pipeline_run__stage',
+    'status': 'pipeline_run__status',
+    'scan_id': 'pipeline_run__mri_scan_id',
+    'sequence_type': 'pipeline_run__mri_scan__sequence_type',
+    'data_type': 'pipeline_run__mri_scan__data_type',
+    'role': 'pipeline_run__mri_scan__role',
+    'resolution': 'pipeline_run__mri_scan__resolution',
+    'acquisition_date': 'pipeline_run__mri_scan__acquisition_date',
+    'organoid_id': 'pipeline_run__mri_scan__organoid_id',
+    'organoid': 'pipeline_run__mri_scan__organoid__name',
+    'species': 'pipeline_run__mri_scan__organoid__species',
+    'organoid_experiment_id': 'pipeline_run__mri_scan__organoid__experiment_id',
+    'experiment_config': 'pipeline_run__experiment_config__name',
+    'model_version': 'pipeline_run__model_version__name',
+    'created_at': 'created_at',
+}
+
+# Query parameter -> SegmentationResult filter lookup
+WIDE_FILTER_LOOKUPS = {
+    'stage': 'pipeline_run__stage',
+    'status': 'pipeline_run__status',
+    'species': 'pipeline_run__mri_scan__organoid__species',
+    'sequence_type': 'pipeline_run__mri_scan__sequence_type',
+    'data_type': 'pipeline_run__mri_scan__data_type',
+    'role': 'pipeline_run__mri_scan__role',
+    'organoid': 'pipeline_run__mri_scan__organoid',
+    'experiment_config': 'pipeline_run__experiment_config',
+    'model_version': 'pipeline_run__model_version',
+    'created_after': 'created_at__gte',
+    'created_before': 'created_at__lt',
+}
+
+
+def wide_metrics_queryset(filters=None, window=None):
+    """
+    Build the pivoted metrics query: one row per SegmentationResult.
+    
+    Each WIDE_METRICS column is a conditional MAX over the result's metrics,
+    so the pivot happens in a single GROUP BY instead of in Python.
+    
+    Args:
+        filters: Optional dict of WIDE_FILTER_LOOKUPS keys to values
+        window: Optional ChangeWindow over SegmentationResult
+        
+    Returns:
+        ValuesListQuerySet yielding tuples in wide_metrics_columns() order
+        
+    Raises:
+        ValueError: Unknown filter or unparsable date
+    """
+    queryset = SegmentationResult.objects.all()
+    for key, value in (filters or {}).items():
+        if key not in WIDE_FILTER_LOOKUPS:
+            raise ValueError(f"Unsupported filter: {key}")
+        if key in ('created_after', 'created_before'):
+            parsed = parse_datetime(value) if isinstance(value, str) else value
+            if parsed is None:
+                raise ValueError(f"{key} must be an ISO 8601 datetime")
+            value = parsed
+        queryset = queryset.filter(**{WIDE_FILTER_LOOKUPS[key]: value})
+    if window is not None:
+        queryset = window.filter(queryset)
+    
+    return queryset.order_by().values_list(*WIDE_COLUMNS.values()).annotate(**{
+        f'{column}_value': Max('metrics__metric_value', filter=Q(metrics__metric_name=name))
+        for column, name in WIDE_METRICS.items()
+    })
+
+
+def wide_metrics_columns():
+    """Column names of the wide metric export."""
+    return list(WIDE_COLUMNS) + list(WIDE_METRICS)
+
+
+def export_metrics_wide(filters=None, window=None):
+    """
+    Export metrics pivoted to one row per segmentation result
+    
+    Args:
+        filters: Optional dict of WIDE_FILTER_LOOKUPS keys to values
+        window: Optional ChangeWindow over SegmentationResult
+        
+    Returns:
+        Tuple of (columns, row iterator) with result metadata and metric columns
+    """
+    rows = wide_metrics_queryset(filters, window).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    return wide_metrics_columns(), rows
+
+
+# Columnar (Parquet / Arrow IPC) exports
+
+COLUMNAR_FORMATS = {
+    'parquet': 'application/vnd.apache.parquet',
+    'arrow': 'application/vnd.apache.arrow.stream',
+}
+
+
+def _uuid_type():
+    # Canonical UUID extension type on pyarrow >= 18, raw 16 bytes otherwise
+    return pa.uuid() if hasattr(pa, 'uuid') else pa.binary(16)
+
+
+def _category_type():
+    return pa.dictionary(pa.int32(), pa.string())
+
+
+def _timestamp_type():
+    return pa.timestamp('us', tz='UTC')
+
+
+def metrics_arrow_schema():
+    """Arrow schema of the columnar metrics export."""
+    return pa.schema([
+        ('id', _uuid_type()),
+        ('metric_name', _category_type()),
+        ('metric_value', pa.float64()),
+        ('unit', _category_type()),
+        ('segmentation_result_id', _uuid_type()),
+        ('pipeline_run_id', _uuid_type()),
+        ('experiment_config', _category_type()),
+        ('created_at', _timestamp_type()),
+    ])
+
+
+def runs_arrow_schema():
+    """Arrow schema of the columnar pipeline runs export."""
+    return pa.schema([
+        ('id', _uuid_type()),
+        ('stage', _category_type()),
+        ('status', _category_type()),
+        ('mri_scan_id', _uuid_type()),
+        ('experiment_config', _category_type()),
+        ('model_version', _category_type()),
+        ('started_at', _timestamp_type()),
+        ('finished_at', _timestamp_type()),
+        ('created_at', _timestamp_type()),
+    ])
+
+
+def wide_metrics_arrow_schema():
+    """Arrow schema of the wide metric export."""
+    return pa.schema([
+        ('result_id', _uuid_type()),
+        ('pipeline_run_id', _uuid_type()),
+        ('stage', _category_type()),
+        ('status', _category_type()),
+        ('scan_id', _uuid_type()),
+        ('sequence_type', _category_type()),
+        ('data_type', _category_type()),
+        ('role', _category_type()),
+        ('resolution', _category_type()),
+        ('acquisition_date', pa.date32()),
+        ('organoid_id', _uuid_type()),
+        ('organoid', pa.string()),
+        ('species', _category_type()),
+        ('organoid_experiment_id', pa.string()),
+        ('experiment_config', _category_type()),
+        ('model_version', _category_type()),
+        ('created_at', _timestamp_type()),
+    ] + [(column, pa.float64()) for column in WIDE_METRICS])
+
+
+def analytics_summary_arrow_schema():
+    """Arrow schema of the analytics summary export."""
+    return pa.schema([
+        ('section', _category_type()),
+        ('metric', pa.string()),
+        ('value', pa.float64()),
+    ])
+
+
+def export_analytics_summary_columnar():
+    """
+    Export the analytics summary for Parquet/Arrow output
+    
+    Returns:
+        Tuple of (schema, rows) with analytics summary data
+    """
+    _, rows = export_analytics_summary_csv()
+    return analytics_summary_arrow_schema(), [(section, metric, float(value)) for section, metric, value in rows]
+
+
+def export_metrics_columnar(window=None):
+    """
+    Export all metrics for Parquet/Arrow output
     
-    data = [
-        {'metric': 'Total Organoids', 'value': overview.get('organoids', 0)},
-        {'metric': 'Total MRI Scans', 'value': overview.get('scans', 0)},
-        {'metric': 'Total Pipeline Runs', 'value': overview.get('runs', 0)},
-        {'metric': 'Total Segmentation Results', 'value': overview.get('results', 0)},
-        {'metric': 'Total Metrics', 'value': overview.get('metrics', 0)},
-        {'metric': 'Total Experiment Configs', 'value': overview.get('experiments', 0)},
-    ]
+    Args:
+        window: Optional ChangeWindow over Metric for incremental exports
+        
+    Returns:
+        Tuple of (schema, row iterator) with metric data
+    """
+    rows = _stream(Metric.objects.all(), [
+        'id',
+        'metric_name',
+        'metric_value',
+        'unit',
+        'segmentation_result_id',
+        'segmentation_result__pipeline_run_id',
+        'segmentation_result__pipeline_run__experiment_config__name',
+        'created_at',
+    ], window)
+    return metrics_arrow_schema(), rows
+
+
+def export_pipeline_runs_columnar(window=None):
+    """
+    Export all pipeline runs for Parquet/Arrow output
     
-    return data
+    Args:
+        window: Optional ChangeWindow over PipelineRun for incremental exports
+        
+    Returns:
+        Tuple of (schema, row iterator) with pipeline run data
+    """
+    rows = _stream(PipelineRun.objects.all(), [
+        'id', 'stage', 'status', 'mri_scan_id', 'experiment_config__name',
+        'model_version__name', 'started_at', 'finished_at', 'created_at',
+    ], window)
+    return runs_arrow_schema(), rows
+
+
+def _arrow_column(values, arrow_type):
+    """Build a typed Arrow array from one column of Python values."""
+    if arrow_type == _uuid_type():
+        storage = pa.array([v.bytes if v is not None else None for v in values], pa.binary(16))
+        if arrow_type == pa.binary(16):
+            return storage
+        return pa.ExtensionArray.from_storage(arrow_type, storage)
+    if pa.types.is_dictionary(arrow_type):
+        return pa.array(values, pa.string()).dictionary_encode()
+    return pa.array(values, arrow_type)
+
+
+def iter_record_batches(schema, rows, batch_size=EXPORT_CHUNK_SIZE):
+    """
+    Group row tuples into Arrow record batches.
+    
+    Args:
+        schema: Arrow schema matching the row tuples
+        rows: Iterable of row tuples
+        batch_size: Rows per record batch
+        
+    Yields:
+        pyarrow.RecordBatch
+    """
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, batch_size))
+        if not chunk:
+            return
+        columns = list(zip(*chunk))
+        yield pa.RecordBatch.from_arrays(
+            [_arrow_column(columns[i], field.type) for i, field in enumerate(schema)],
+            schema=schema
+        )
+
+
+class ChunkSink:
+    """Write-only file object collecting bytes until they are drained."""
+    
+    closed = False
+    
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+    
+    def write(self, data):
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+    
+    def tell(self):
+        return self.position
+    
+    def flush(self):
+        pass
+    
+    def writable(self):
+        return True
+    
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def iter_columnar(schema, rows, file_format):
+    """
+    Yield a Parquet file or Arrow IPC stream in chunks, one per record batch.
+    
+    Args:
+        schema: Arrow schema
+        rows: Iterable of row tuples matching the schema
+        file_format: 'parquet' or 'arrow'
+        
+    Yields:
+        bytes: Encoded file content
+    """
+    sink = ChunkSink()
+    if file_format == 'parquet':
+        writer = pq.ParquetWriter(sink, schema, compression='zstd')
+    else:
+        # The IPC stream format allows each batch to carry its own dictionary
+        writer = pa.ipc.new_stream(sink, schema)
+    
+    try:
+        for batch in iter_record_batches(schema, rows):
+            writer.write_batch(batch)
+            data = sink.drain()
+            if data:
+                yield data
+    except BaseException:
+        writer.close()
+        raise
+    writer.close()
+    yield sink.drain()
+
+
+def generate_columnar_response(schema, rows, filename, file_format, request=None):
+    """
+    Generate a streaming HTTP response with Parquet or Arrow IPC data
+    
+    Args:
+        schema: Arrow schema
+        rows: Iterable of row tuples matching the schema
+        filename: Name for the downloaded file
+        file_format: 'parquet' or 'arrow'
+        request: Request being answered, to stream asynchronously under ASGI
+        
+    Returns:
+        StreamingHttpResponse with the file attachment
+    """
+    response = StreamingHttpResponse(
+        streaming_content(iter_columnar(schema, rows, file_format), request),
+        content_type=COLUMNAR_FORMATS[file_format]
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,32 @@
+"""
+Management command to rebuild the analytics rollup tables.
+
+Rollups are normally maintained incrementally by model signals. Run this
+after bulk imports, ``QuerySet.update()`` calls, or changes to a run's model
+version/config that the incremental path can't see:
+
+    python manage.py rebuild_analytics_rollups
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from experiments.rollups import rebuild_metric_summaries, rebuild_run_summaries
+
+
+class Command(BaseCommand):
+    help = 'Rebuild analytics rollup tables (MetricSummary, PipelineRunSummary) from source data'
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        self.stdout.write("Rebuilding metric summaries...")
+        num_rows = rebuild_metric_summaries()
+        self.stdout.write(self.style.SUCCESS(f"✓ Wrote {num_rows} metric summary row(s)"))
+
+        self.stdout.write("Rebuilding pipeline run summaries...")
+        num_rows = rebuild_run_summaries()
+        self.stdout.write(self.style.SUCCESS(f"✓ Wrote {num_rows} pipeline run summary row(s)"))
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"Done in {elapsed:.2f}s")
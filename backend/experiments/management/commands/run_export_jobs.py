@@ -0,0 +1,62 @@
+"""
+Management command to process pending export jobs.
+
+This command can be run via:
+- Docker CLI: docker compose run backend python manage.py run_export_jobs
+- Cron job: for scheduled execution
+- Manual: python manage.py run_export_jobs
+
+It picks up PENDING export jobs (and RUNNING ones whose worker stopped
+updating them), writes their files and expires old ones.
+"""
+
+from django.core.management.base import BaseCommand
+from experiments.models import ExportJob
+from experiments.export_jobs import claimable_jobs, purge_expired_jobs, run_export_job
+
+
+class Command(BaseCommand):
+    help = 'Process pending export jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=10,
+            help='Maximum number of jobs to process (default: 10)'
+        )
+        parser.add_argument(
+            '--job-id',
+            type=str,
+            help='Process a specific export job by ID'
+        )
+
+    def handle(self, *args, **options):
+        expired = purge_expired_jobs()
+        if expired:
+            self.stdout.write(f"Cleaned up {expired} expired or abandoned export job(s)")
+
+        if options.get('job_id'):
+            jobs = ExportJob.objects.filter(id=options['job_id'])
+            if not jobs.exists():
+                self.stdout.write(self.style.ERROR(f"Export job {options['job_id']} not found"))
+                return
+        else:
+            jobs = claimable_jobs().order_by('created_at')[:options['limit']]
+
+        jobs = list(jobs)
+        if not jobs:
+            self.stdout.write("No pending export jobs found")
+            return
+
+        for job in jobs:
+            self.stdout.write(f"Processing export {job.id}: {job.kind}.{job.file_format}")
+            result = run_export_job(job)
+            if result is None:
+                self.stdout.write("  - Skipped (already running)")
+            elif result:
+                self.stdout.write(self.style.SUCCESS(
+                    f"  ✓ {job.rows_written} rows, {job.file_size} bytes"
+                ))
+            else:
+                self.stdout.write(self.style.ERROR(f"  ✗ Failed: {job.error}"))
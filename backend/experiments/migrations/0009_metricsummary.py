@@ -0,0 +1,78 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:01
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.utils import timezone
+
+
+# Frozen copy of the rollup logic at the time of this migration; it must not
+# import experiments.rollups, whose code follows the current models
+HISTOGRAM_BINS = 20
+
+
+def backfill_metric_summaries(apps, schema_editor):
+    """Summarize the metrics recorded before the rollup existed."""
+    Metric = apps.get_model('experiments', 'Metric')
+    MetricSummary = apps.get_model('experiments', 'MetricSummary')
+
+    rows = Metric.objects.order_by().values_list(
+        'metric_name',
+        'metric_value',
+        'created_at',
+        'segmentation_result__pipeline_run__model_version_id',
+        'segmentation_result__pipeline_run__experiment_config_id',
+        'segmentation_result__pipeline_run__mri_scan__organoid__species',
+    )
+    summaries = {}
+    for name, value, created_at, model_version_id, config_id, species in rows.iterator(chunk_size=2000):
+        key = (
+            (name or '').strip().lower(), model_version_id, config_id, species or '',
+            timezone.localtime(created_at).date(),
+        )
+        summary = summaries.get(key)
+        if summary is None:
+            summary = summaries[key] = MetricSummary(
+                metric_name=key[0], model_version_id=key[1], experiment_config_id=key[2],
+                species=key[3], day=key[4], histogram=[0] * HISTOGRAM_BINS,
+            )
+        summary.count += 1
+        summary.value_sum += value
+        summary.value_sum_sq += value * value
+        summary.min_value = value if summary.min_value is None else min(summary.min_value, value)
+        summary.max_value = value if summary.max_value is None else max(summary.max_value, value)
+        if 0.0 <= value <= 1.0:
+            summary.histogram[min(int(value * HISTOGRAM_BINS), HISTOGRAM_BINS - 1)] += 1
+
+    MetricSummary.objects.bulk_create(summaries.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('experiments', '0008_bidsdataset'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MetricSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric_name', models.CharField(help_text='Lower-cased metric name', max_length=100)),
+                ('species', models.CharField(blank=True, max_length=50)),
+                ('day', models.DateField(help_text='Day the metrics were recorded')),
+                ('count', models.BigIntegerField(default=0)),
+                ('value_sum', models.FloatField(default=0.0)),
+                ('value_sum_sq', models.FloatField(default=0.0, help_text='Sum of squared values (for variance)')),
+                ('min_value', models.FloatField(blank=True, null=True)),
+                ('max_value', models.FloatField(blank=True, null=True)),
+                ('histogram', models.JSONField(blank=True, default=list, help_text='Counts per [0, 1] bucket')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('experiment_config', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='metric_summaries', to='experiments.experimentconfig')),
+                ('model_version', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='metric_summaries', to='experiments.modelversion')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['metric_name', 'model_version'], name='metricsummary_model_idx'), models.Index(fields=['metric_name', 'experiment_config'], name='metricsummary_config_idx'), models.Index(fields=['metric_name', 'day'], name='metricsummary_day_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_metric_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:03
+
+from django.db import migrations, models
+
+
+# Frozen copy of the rollup logic at the time of this migration; it must not
+# import experiments.rollups, whose code follows the current models
+TERMINAL_STATUSES = ('SUCCESS', 'FAILED')
+DURATION_BUCKETS = [0.5, 1, 2, 5, 10, 30, 60, 120, 300, 600, 1800, 3600, 7200, 21600, 86400, float('inf')]
+
+
+def _duration_bucket(seconds):
+    for index, upper in enumerate(DURATION_BUCKETS):
+        if seconds <= upper:
+            return index
+    return len(DURATION_BUCKETS) - 1
+
+
+def backfill_run_summaries(apps, schema_editor):
+    """Summarize the runs that finished before the rollup existed."""
+    PipelineRun = apps.get_model('experiments', 'PipelineRun')
+    PipelineRunSummary = apps.get_model('experiments', 'PipelineRunSummary')
+
+    runs = PipelineRun.objects.filter(status__in=TERMINAL_STATUSES).order_by().values_list(
+        'stage', 'status', 'created_at', 'started_at', 'finished_at'
+    )
+    summaries = {}
+    for stage, status, created_at, started_at, finished_at in runs.iterator(chunk_size=2000):
+        bucket_start = (finished_at or created_at).replace(second=0, microsecond=0)
+        key = (bucket_start, stage, status)
+        summary = summaries.get(key)
+        if summary is None:
+            summary = summaries[key] = PipelineRunSummary(
+                bucket_start=bucket_start, stage=stage, status=status,
+                queue_wait_histogram=[0] * len(DURATION_BUCKETS),
+                execution_histogram=[0] * len(DURATION_BUCKETS),
+            )
+        summary.count += 1
+        if created_at and started_at:
+            queue_wait = max((started_at - created_at).total_seconds(), 0.0)
+            summary.queue_wait_count += 1
+            summary.queue_wait_sum += queue_wait
+            summary.queue_wait_histogram[_duration_bucket(queue_wait)] += 1
+        if started_at and finished_at:
+            execution = max((finished_at - started_at).total_seconds(), 0.0)
+            summary.execution_count += 1
+            summary.execution_sum += execution
+            summary.execution_histogram[_duration_bucket(execution)] += 1
+
+    PipelineRunSummary.objects.bulk_create(summaries.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('experiments', '0009_metricsummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PipelineRunSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket_start', models.DateTimeField(help_text='Minute in which the runs finished')),
+                ('stage', models.CharField(choices=[('PREPROCESSING', 'Preprocessing'), ('GMM', 'GMM Segmentation'), ('UNET', 'U-Net Segmentation'), ('FULL_PIPELINE', 'Full Pipeline')], max_length=50)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('RUNNING', 'Running'), ('SUCCESS', 'Success'), ('FAILED', 'Failed')], max_length=50)),
+                ('count', models.BigIntegerField(default=0)),
+                ('queue_wait_count', models.BigIntegerField(default=0, help_text='Runs with a known queue wait')),
+                ('queue_wait_sum', models.FloatField(default=0.0, help_text='Total queue wait (seconds)')),
+                ('queue_wait_histogram', models.JSONField(blank=True, default=list)),
+                ('execution_count', models.BigIntegerField(default=0, help_text='Runs with a known execution time')),
+                ('execution_sum', models.FloatField(default=0.0, help_text='Total execution time (seconds)')),
+                ('execution_histogram', models.JSONField(blank=True, default=list)),
+            ],
+            options={
+                'ordering': ['bucket_start'],
+                'indexes': [models.Index(fields=['bucket_start', 'stage'], name='runsummary_bucket_stage_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_run_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:40
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+def backfill_updated_at(apps, schema_editor):
+    """Existing rows have not changed since they were created."""
+    for model_name in ('Metric', 'PipelineRun', 'SegmentationResult'):
+        model = apps.get_model('experiments', model_name)
+        model.objects.update(updated_at=models.F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('experiments', '0010_pipelinerunsummary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='metric',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='pipelinerun',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='segmentationresult',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, help_text="Also touched when the result's metrics or pipeline run change"),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='metric',
+            index=models.Index(fields=['updated_at', 'id'], name='metric_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pipelinerun',
+            index=models.Index(fields=['updated_at', 'id'], name='pipelinerun_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='segmentationresult',
+            index=models.Index(fields=['updated_at', 'id'], name='segresult_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:12
+
+from django.db import migrations, models
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('experiments', '0011_change_tracking'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('metrics', 'Metrics'), ('runs', 'Pipeline Runs'), ('metrics_wide', 'Metrics (one row per result)')], max_length=20)),
+                ('file_format', models.CharField(choices=[('csv', 'CSV'), ('parquet', 'Parquet'), ('arrow', 'Arrow IPC stream')], default='csv', max_length=10)),
+                ('filters', models.JSONField(blank=True, default=dict, help_text="Export filters (including 'since')")),
+                ('columns', models.JSONField(blank=True, default=list, help_text='Selected columns (empty for all)')),
+                ('spec_hash', models.CharField(db_index=True, max_length=64)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('RUNNING', 'Running'), ('SUCCESS', 'Success'), ('FAILED', 'Failed'), ('EXPIRED', 'Expired')], default='PENDING', max_length=20)),
+                ('progress', models.PositiveSmallIntegerField(default=0, help_text='Percent complete')),
+                ('rows_written', models.BigIntegerField(default=0)),
+                ('file_path', models.CharField(blank=True, max_length=500)),
+                ('file_size', models.BigIntegerField(blank=True, null=True)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('expires_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='exportjob_status_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:21
+
+from django.db import migrations, models
+from django.db.models.functions import Lower, Trim
+
+
+def normalize_metric_names(apps, schema_editor):
+    """Lower-case existing metric names ('Dice' -> 'dice')."""
+    Metric = apps.get_model('experiments', 'Metric')
+    Metric.objects.update(metric_name=Lower(Trim('metric_name')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('experiments', '0013_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_metric_names, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='metric',
+            name='metric_name',
+            field=models.CharField(help_text="Lower-cased on save, e.g. 'dice', 'iou', 'volume'", max_length=100),
+        ),
+        migrations.AddIndex(
+            model_name='metric',
+            index=models.Index(fields=['metric_name', 'metric_value'], name='metric_name_value_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='metric',
+            index=models.Index(fields=['segmentation_result', 'metric_name'], name='metric_result_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mriscan',
+            index=models.Index(fields=['acquisition_date'], name='mriscan_acquired_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mriscan',
+            index=models.Index(fields=['sequence_type', 'acquisition_date'], name='mriscan_sequence_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mriscan',
+            index=models.Index(fields=['role', 'data_type'], name='mriscan_role_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mriscan',
+            index=models.Index(fields=['data_type'], name='mriscan_data_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='organoid',
+            index=models.Index(fields=['species', 'created_at'], name='organoid_species_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pipelinerun',
+            index=models.Index(fields=['status', 'created_at', 'id'], name='pipelinerun_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pipelinerun',
+            index=models.Index(fields=['stage', 'created_at', 'id'], name='pipelinerun_stage_idx'),
+        ),
+    ]
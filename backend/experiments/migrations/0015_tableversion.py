@@ -0,0 +1,20 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('experiments', '0014_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TableVersion',
+            fields=[
+                ('label', models.CharField(help_text='Model label, e.g. experiments.metric', max_length=100, primary_key=True, serialize=False)),
+                ('version', models.BigIntegerField(help_text='Nanosecond timestamp of the last change')),
+            ],
+        ),
+    ]
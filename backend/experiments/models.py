@@ -2,6 +2,11 @@ from django.db import models
 import uuid
 
 
+def normalize_metric_name(name: str) -> str:
+    """Canonical (lower-case, trimmed) form of a metric name, e.g. 'Dice' -> 'dice'."""
+    return (name or '').strip().lower()
+
+
 class ExperimentConfig(models.Model):
     """
     Stores pipeline configuration parameters for reproducible experiments.
@@ -60,6 +65,9 @@ class Organoid(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['species', 'created_at'], name='organoid_species_idx'),
+        ]
 
 
 class MRIScan(models.Model):
@@ -150,6 +158,12 @@ class MRIScan(models.Model):
     
     class Meta:
         ordering = ['-acquisition_date']
+        indexes = [
+            models.Index(fields=['acquisition_date'], name='mriscan_acquired_idx'),
+            models.Index(fields=['sequence_type', 'acquisition_date'], name='mriscan_sequence_idx'),
+            models.Index(fields=['role', 'data_type'], name='mriscan_role_idx'),
+            models.Index(fields=['data_type'], name='mriscan_data_type_idx'),
+        ]
 
 
 class PipelineRun(models.Model):
@@ -205,12 +219,19 @@ class PipelineRun(models.Model):
     docker_image = models.CharField(max_length=200, blank=True, help_text="Docker image used")
     cli_command = models.TextField(blank=True, help_text="Command executed")
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self):
         return f"{self.mri_scan.organoid.name} - {self.stage} ({self.status})"
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['updated_at', 'id'], name='pipelinerun_updated_idx'),
+            models.Index(fields=['created_at', 'id'], name='pipelinerun_created_idx'),
+            models.Index(fields=['status', 'created_at', 'id'], name='pipelinerun_status_idx'),
+            models.Index(fields=['stage', 'created_at', 'id'], name='pipelinerun_stage_idx'),
+        ]
 
 
 class SegmentationResult(models.Model):
@@ -224,9 +245,18 @@ class SegmentationResult(models.Model):
     preview_images = models.JSONField(default=dict, blank=True, help_text="Dictionary of preview image paths (axial, sagittal, coronal)")
     model_version = models.CharField(max_length=100, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        help_text="Also touched when the result's metrics or pipeline run change"
+    )
     
     def __str__(self):
         return f"Result for {self.pipeline_run}"
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['updated_at', 'id'], name='segresult_updated_idx'),
+        ]
 
 
 class Metric(models.Model):
@@ -235,13 +265,124 @@ class Metric(models.Model):
     """
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     segmentation_result = models.ForeignKey(SegmentationResult, on_delete=models.CASCADE, related_name='metrics')
-    metric_name = models.CharField(max_length=100, help_text="e.g., 'Dice', 'IoU', 'Volume'")
+    metric_name = models.CharField(
+        max_length=100,
+        help_text="Lower-cased on save, e.g. 'dice', 'iou', 'volume'"
+    )
     metric_value = models.FloatField()
     unit = models.CharField(max_length=50, blank=True, help_text="e.g., 'mm3', 'score'")
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self):
         return f"{self.metric_name}: {self.metric_value} {self.unit}"
+    
+    def save(self, *args, **kwargs):
+        # Queries match names exactly (so they can use the indexes below)
+        self.metric_name = normalize_metric_name(self.metric_name)
+        super().save(*args, **kwargs)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['updated_at', 'id'], name='metric_updated_idx'),
+            models.Index(fields=['created_at', 'id'], name='metric_created_idx'),
+            models.Index(fields=['metric_name', 'metric_value'], name='metric_name_value_idx'),
+            models.Index(fields=['segmentation_result', 'metric_name'], name='metric_result_name_idx'),
+        ]
+
+
+class MetricSummary(models.Model):
+    """
+    Daily rollup of metric values per metric name, model version,
+    experiment config and organoid species.
+    
+    Maintained incrementally from Metric save/delete signals (see
+    experiments.rollups) and rebuilt with ``manage.py rebuild_analytics_rollups``.
+    Several rows may share a key; readers always SUM over matching rows.
+    """
+    HISTOGRAM_BINS = 20  # Equal-width buckets over [0, 1]
+    
+    metric_name = models.CharField(max_length=100, help_text="Lower-cased metric name")
+    model_version = models.ForeignKey(
+        ModelVersion,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='metric_summaries'
+    )
+    experiment_config = models.ForeignKey(
+        ExperimentConfig,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='metric_summaries'
+    )
+    species = models.CharField(max_length=50, blank=True)
+    day = models.DateField(help_text="Day the metrics were recorded")
+    count = models.BigIntegerField(default=0)
+    value_sum = models.FloatField(default=0.0)
+    value_sum_sq = models.FloatField(default=0.0, help_text="Sum of squared values (for variance)")
+    min_value = models.FloatField(null=True, blank=True)
+    max_value = models.FloatField(null=True, blank=True)
+    histogram = models.JSONField(default=list, blank=True, help_text="Counts per [0, 1] bucket")
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.metric_name} ({self.day}): n={self.count}"
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['metric_name', 'model_version'], name='metricsummary_model_idx'),
+            models.Index(fields=['metric_name', 'experiment_config'], name='metricsummary_config_idx'),
+            models.Index(fields=['metric_name', 'day'], name='metricsummary_day_idx'),
+        ]
+
+
+class PipelineRunSummary(models.Model):
+    """
+    Per-minute rollup of finished pipeline runs by stage and final status.
+    
+    Holds run counts plus queue-wait (started_at - created_at) and execution
+    (finished_at - started_at) totals and log-spaced duration histograms, so
+    throughput, latency percentiles and failure rates can be charted without
+    scanning PipelineRun. Maintained from PipelineRun status transitions (see
+    experiments.rollups).
+    """
+    bucket_start = models.DateTimeField(help_text="Minute in which the runs finished")
+    stage = models.CharField(max_length=50, choices=PipelineRun.STAGE_CHOICES)
+    status = models.CharField(max_length=50, choices=PipelineRun.STATUS_CHOICES)
+    count = models.BigIntegerField(default=0)
+    queue_wait_count = models.BigIntegerField(default=0, help_text="Runs with a known queue wait")
+    queue_wait_sum = models.FloatField(default=0.0, help_text="Total queue wait (seconds)")
+    queue_wait_histogram = models.JSONField(default=list, blank=True)
+    execution_count = models.BigIntegerField(default=0, help_text="Runs with a known execution time")
+    execution_sum = models.FloatField(default=0.0, help_text="Total execution time (seconds)")
+    execution_histogram = models.JSONField(default=list, blank=True)
+    
+    def __str__(self):
+        return f"{self.bucket_start:%Y-%m-%d %H:%M} {self.stage}/{self.status}: {self.count}"
+    
+    class Meta:
+        ordering = ['bucket_start']
+        indexes = [
+            models.Index(fields=['bucket_start', 'stage'], name='runsummary_bucket_stage_idx'),
+        ]
+
+
+class TableVersion(models.Model):
+    """
+    Version stamp of a model table, bumped whenever one of its rows changes.
+    
+    Kept in the database rather than the (per-process) Django cache, so
+    writes made by worker processes such as ``run_pipeline_jobs`` invalidate
+    cached values and HTTP validators of the web server too (see
+    experiments.caching).
+    """
+    label = models.CharField(max_length=100, primary_key=True, help_text="Model label, e.g. experiments.metric")
+    version = models.BigIntegerField(help_text="Nanosecond timestamp of the last change")
+    
+    def __str__(self):
+        return f"{self.label}={self.version}"
 
 
 class BIDSDataset(models.Model):
@@ -278,3 +419,61 @@ class BIDSDataset(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+
+
+class ExportJob(models.Model):
+    """
+    A data export produced in the background by the ``run_export_jobs`` worker.
+    
+    Jobs are deduplicated by ``spec_hash`` (export spec plus the versions of
+    the exported tables), so identical requests reuse the finished file
+    until it expires.
+    """
+    KIND_CHOICES = [
+        ('metrics', 'Metrics'),
+        ('runs', 'Pipeline Runs'),
+        ('metrics_wide', 'Metrics (one row per result)'),
+    ]
+    
+    FORMAT_CHOICES = [
+        ('csv', 'CSV'),
+        ('parquet', 'Parquet'),
+        ('arrow', 'Arrow IPC stream'),
+    ]
+    
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('SUCCESS', 'Success'),
+        ('FAILED', 'Failed'),
+        ('EXPIRED', 'Expired'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    file_format = models.CharField(max_length=10, choices=FORMAT_CHOICES, default='csv')
+    filters = models.JSONField(default=dict, blank=True, help_text="Export filters (including 'since')")
+    columns = models.JSONField(default=list, blank=True, help_text="Selected columns (empty for all)")
+    spec_hash = models.CharField(max_length=64, db_index=True)
+    
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    progress = models.PositiveSmallIntegerField(default=0, help_text="Percent complete")
+    rows_written = models.BigIntegerField(default=0)
+    file_path = models.CharField(max_length=500, blank=True)
+    file_size = models.BigIntegerField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, help_text="Last status or progress update")
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField(null=True, blank=True)
+    
+    def __str__(self):
+        return f"{self.kind}.{self.file_format} ({self.status})"
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='exportjob_status_idx'),
+        ]
@@ -0,0 +1,231 @@
+"""
+Keyset (seek) pagination for high-volume list endpoints.
+
+Pages are selected with ``WHERE (created_at, id) < (cursor)`` over the
+``(created_at, id)`` ordering instead of ``OFFSET``, so fetching page 10,000
+costs the same as page 1, and no ``COUNT(*)`` is run unless the client asks
+for one with ``count=exact`` or ``count=estimate``.
+
+Cursors are opaque URL-safe tokens. Requests ordering by any other field
+(e.g. ``ordering=metric_value``) fall back to page-number pagination.
+"""
+
+import base64
+import binascii
+import json
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import connections
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination on ``(created_at, id)``, newest first by default.
+
+    Query Parameters:
+        - cursor: Opaque cursor from a previous page's next/previous link
+        - page_size: Rows per page (capped at KEYSET_MAX_PAGE_SIZE)
+        - ordering: created_at (oldest first) or -created_at (default)
+        - count: 'exact' for COUNT(*), 'estimate' for a planner estimate
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    count_query_param = 'count'
+    ordering_query_param = 'ordering'
+    time_field = 'created_at'
+    id_field = 'id'
+
+    # Above this many rows count=estimate stops counting (non-PostgreSQL)
+    estimate_cap = 10000
+
+    def __init__(self):
+        self.fallback = None
+
+    @property
+    def page_size(self):
+        return getattr(settings, 'REST_FRAMEWORK', {}).get('PAGE_SIZE') or 10
+
+    @property
+    def max_page_size(self):
+        return getattr(settings, 'KEYSET_MAX_PAGE_SIZE', 1000)
+
+    def get_page_size(self, request):
+        value = request.query_params.get(self.page_size_query_param)
+        if not value:
+            return self.page_size
+        try:
+            size = int(value)
+        except ValueError:
+            raise ValidationError({self.page_size_query_param: 'Must be a positive integer.'})
+        if size < 1:
+            raise ValidationError({self.page_size_query_param: 'Must be a positive integer.'})
+        return min(size, self.max_page_size)
+
+    def encode_cursor(self, row, reverse=False):
+        payload = {'t': getattr(row, self.time_field).isoformat(), 'i': str(getattr(row, self.id_field))}
+        if reverse:
+            payload['r'] = 1
+        raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+    def decode_cursor(self, token, model):
+        try:
+            padded = token + '=' * (-len(token) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+            created_at = parse_datetime(payload['t'])
+            pk = model._meta.get_field(self.id_field).to_python(payload['i'])
+        except (binascii.Error, UnicodeError, ValueError, KeyError, TypeError, DjangoValidationError):
+            raise NotFound('Invalid cursor')
+        if created_at is None:
+            raise NotFound('Invalid cursor')
+        return created_at, pk, bool(payload.get('r'))
+
+    def _descending(self, request):
+        ordering = request.query_params.get(self.ordering_query_param)
+        return ordering != self.time_field
+
+    def _uses_keyset(self, request):
+        ordering = request.query_params.get(self.ordering_query_param)
+        return ordering in (None, '', self.time_field, f'-{self.time_field}')
+
+    def _seek(self, queryset, created_at, pk, forward_descending):
+        """Rows strictly after (created_at, pk) in the given direction."""
+        op = 'lt' if forward_descending else 'gt'
+        return queryset.filter(
+            Q(**{f'{self.time_field}__{op}': created_at})
+            | Q(**{self.time_field: created_at, f'{self.id_field}__{op}': pk})
+        )
+
+    def _order(self, queryset, descending):
+        prefix = '-' if descending else ''
+        return queryset.order_by(f'{prefix}{self.time_field}', f'{prefix}{self.id_field}')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self._uses_keyset(request):
+            self.fallback = PageNumberPagination()
+            return self.fallback.paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.count = self._count(queryset, request)
+
+        page_size = self.get_page_size(request)
+        descending = self._descending(request)
+
+        token = request.query_params.get(self.cursor_query_param)
+        reverse = False
+        position = None
+        if token:
+            created_at, pk, reverse = self.decode_cursor(token, queryset.model)
+            position = (created_at, pk)
+
+        # A "previous" cursor walks backwards from the first row of the page
+        direction = (not descending) if reverse else descending
+        page_queryset = self._order(queryset, direction)
+        if position:
+            page_queryset = self._seek(page_queryset, *position, forward_descending=direction)
+
+        rows = list(page_queryset[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+
+        if reverse:
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        self.page = rows
+        return rows
+
+    def _count(self, queryset, request):
+        mode = request.query_params.get(self.count_query_param)
+        if not mode:
+            return None
+        if mode == 'exact':
+            return {'count': queryset.count(), 'estimated': False}
+        if mode == 'estimate':
+            return self._estimate(queryset)
+        raise ValidationError({self.count_query_param: "Must be 'exact' or 'estimate'."})
+
+    def _estimate(self, queryset):
+        """
+        Approximate row count: the planner's estimate on PostgreSQL,
+        otherwise an exact count capped at ``estimate_cap``.
+        """
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql':
+            sql, params = queryset.order_by().query.sql_with_params()
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+                plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return {'count': int(plan[0]['Plan']['Plan Rows']), 'estimated': True}
+
+        capped = queryset.order_by()[:self.estimate_cap + 1].count()
+        return {'count': min(capped, self.estimate_cap), 'estimated': capped > self.estimate_cap}
+
+    def _link(self, row, reverse):
+        url = remove_query_param(self.base_url, self.cursor_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(row, reverse))
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self._link(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self._link(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        if self.fallback is not None:
+            return self.fallback.get_paginated_response(data)
+
+        response = OrderedDict()
+        if self.count is not None:
+            response['count'] = self.count['count']
+            response['count_estimated'] = self.count['estimated']
+        response['next'] = self.get_next_link()
+        response['previous'] = self.get_previous_link()
+        response['results'] = data
+        return Response(response)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'count': {'type': 'integer', 'description': "Only with count=exact|estimate"},
+                'count_estimated': {'type': 'boolean'},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param, 'required': False, 'in': 'query',
+                'description': 'Opaque pagination cursor', 'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param, 'required': False, 'in': 'query',
+                'description': f'Rows per page (max {self.max_page_size})', 'schema': {'type': 'integer'},
+            },
+            {
+                'name': self.count_query_param, 'required': False, 'in': 'query',
+                'description': "Include a total: 'exact' or 'estimate'",
+                'schema': {'type': 'string', 'enum': ['exact', 'estimate']},
+            },
+        ]
@@ -16,6 +16,7 @@ from typing import Dict, Any, Optional
 from django.utils import timezone
 from django.conf import settings
 from experiments.models import PipelineRun, SegmentationResult, Metric
+from experiments.streams import ALL_PIPELINES_GROUP, pipeline_group_name, record_event
 from asgiref.sync import async_to_sync
 from channels.layers import get_channel_layer
 import datetime as dt
@@ -38,31 +39,21 @@ def broadcast_pipeline_status(run_id, status, stage=None, progress=None, message
     channel_layer = get_channel_layer()
     if channel_layer:
         try:
-            async_to_sync(channel_layer.group_send)(
-                "pipeline_updates",
-                {
-                    'type': 'pipeline.status',
-                    'run_id': run_id,
-                    'status': status,
-                    'stage': stage,
-                    'progress': progress,
-                    'message': message,
-                    'timestamp': dt.datetime.now().isoformat(),
-                }
-            )
+            event = {
+                'type': 'pipeline.status',
+                'run_id': str(run_id),
+                'status': status,
+                'stage': stage,
+                'progress': progress,
+                'message': message,
+                'timestamp': dt.datetime.now().isoformat(),
+            }
+            # Sequence ID lets SSE clients resume via Last-Event-ID
+            event['event_id'] = record_event(event)
+
+            async_to_sync(channel_layer.group_send)(ALL_PIPELINES_GROUP, event)
             # Also send to specific pipeline group
-            async_to_sync(channel_layer.group_send)(
-                f"pipeline_{run_id}",
-                {
-                    'type': 'pipeline.status',
-                    'run_id': run_id,
-                    'status': status,
-                    'stage': stage,
-                    'progress': progress,
-                    'message': message,
-                    'timestamp': dt.datetime.now().isoformat(),
-                }
-            )
+            async_to_sync(channel_layer.group_send)(pipeline_group_name(run_id), event)
         except Exception as e:
             logger.warning(f"Failed to broadcast status: {e}")
 
@@ -334,21 +325,21 @@ class PipelineRunner:
         # Create simulated metrics
         Metric.objects.create(
             segmentation_result=result,
-            metric_name="Dice",
+            metric_name="dice",
             metric_value=0.85,
             unit="score"
         )
         
         Metric.objects.create(
             segmentation_result=result,
-            metric_name="IoU",
+            metric_name="iou",
             metric_value=0.74,
             unit="score"
         )
         
         Metric.objects.create(
             segmentation_result=result,
-            metric_name="Volume",
+            metric_name="volume",
             metric_value=1250.5,
             unit="mm3"
         )
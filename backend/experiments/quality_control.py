@@ -341,16 +341,18 @@ def detect_metric_outliers(metric_name: str, method: str = 'iqr') -> Dict:
     Detect outliers for a specific metric across all results.
     
     Args:
-        metric_name: Name of metric to analyze ('Dice', 'IoU', etc.)
+        metric_name: Name of metric to analyze ('dice', 'iou', etc.; any casing)
         method: 'zscore' or 'iqr'
         
     Returns:
         Dictionary with outlier information
     """
-    from experiments.models import Metric
+    from experiments.models import Metric, normalize_metric_name
     
     # Get all values for this metric
-    metrics = Metric.objects.filter(metric_name=metric_name).values_list('id', 'metric_value')
+    metrics = Metric.objects.filter(
+        metric_name=normalize_metric_name(metric_name)
+    ).values_list('id', 'metric_value')
     
     if len(metrics) < 4:
         return {
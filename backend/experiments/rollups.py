@@ -0,0 +1,366 @@
+"""
+Incrementally maintained analytics rollups.
+
+MetricSummary rows hold count, sum, sum of squares, min, max and a [0, 1]
+histogram of metric values per (metric name, model version, experiment
+config, species, day). They are updated from Metric signals as metrics are
+written, so analytics queries read a handful of summary rows instead of
+re-aggregating the whole Metric table.
+
+PipelineRunSummary rows count finished runs per (minute, stage, status) with
+queue-wait and execution-time totals and histograms. They are updated when a
+run transitions into a terminal status.
+
+NOTE: Changing a run's model version/config or an organoid's species after
+metrics were recorded, writing metrics or runs with ``bulk_create``/
+``update()``, or deleting finished runs bypasses the incremental path. Run
+``manage.py rebuild_analytics_rollups`` after such bulk changes.
+"""
+
+import logging
+
+from django.db import transaction
+from django.db.models import Count, F, Max, Min, Q, Sum, Value
+from django.db.models.functions import Coalesce, Floor, Least, TruncDate, TruncMinute
+from django.db.models.lookups import Exact
+from django.utils import timezone
+
+from .models import (
+    Metric, MetricSummary, PipelineRun, PipelineRunSummary, SegmentationResult, normalize_metric_name
+)
+
+logger = logging.getLogger(__name__)
+
+# Run statuses that end a run and are counted in PipelineRunSummary
+TERMINAL_STATUSES = ('SUCCESS', 'FAILED')
+
+# PipelineRun fields that decide which summary row a finished run counts in
+RUN_SUMMARY_FIELDS = ('stage', 'status', 'created_at', 'started_at', 'finished_at')
+
+# Upper bounds (seconds) of the duration histogram buckets; the last is open
+DURATION_BUCKETS = [0.5, 1, 2, 5, 10, 30, 60, 120, 300, 600, 1800, 3600, 7200, 21600, 86400, float('inf')]
+
+# Metric lookups for each summary key field
+SUMMARY_KEY_LOOKUPS = {
+    'model_version_id': 'segmentation_result__pipeline_run__model_version',
+    'experiment_config_id': 'segmentation_result__pipeline_run__experiment_config',
+    'species': 'segmentation_result__pipeline_run__mri_scan__organoid__species',
+}
+
+
+def histogram_bucket(value: float):
+    """Index of the [0, 1] histogram bucket for a value, or None if outside."""
+    if value is None or value < 0.0 or value > 1.0:
+        return None
+    return min(int(value * MetricSummary.HISTOGRAM_BINS), MetricSummary.HISTOGRAM_BINS - 1)
+
+
+def summary_key(metric_name, segmentation_result_id, created_at) -> dict:
+    """
+    Resolve the MetricSummary key for a metric.
+
+    Args:
+        metric_name: Metric name (any casing)
+        segmentation_result_id: ID of the metric's SegmentationResult
+        created_at: Metric creation timestamp
+
+    Returns:
+        dict: MetricSummary field values identifying the rollup row
+    """
+    run_info = SegmentationResult.objects.filter(pk=segmentation_result_id).values(
+        'pipeline_run__model_version',
+        'pipeline_run__experiment_config',
+        'pipeline_run__mri_scan__organoid__species',
+    ).first() or {}
+
+    return {
+        'metric_name': normalize_metric_name(metric_name),
+        'model_version_id': run_info.get('pipeline_run__model_version'),
+        'experiment_config_id': run_info.get('pipeline_run__experiment_config'),
+        'species': run_info.get('pipeline_run__mri_scan__organoid__species') or '',
+        'day': timezone.localtime(created_at or timezone.now()).date(),
+    }
+
+
+def _key_filter(key: dict) -> dict:
+    """ORM filter for a summary key (NULL-safe for the foreign keys)."""
+    return {
+        (f'{field}__isnull' if value is None else field): (True if value is None else value)
+        for field, value in key.items()
+    }
+
+
+def _metrics_for_key(key: dict):
+    """Metric queryset covering exactly one summary key."""
+    filters = {'metric_name': key['metric_name'], 'created_at__date': key['day']}
+    for field, lookup in SUMMARY_KEY_LOOKUPS.items():
+        value = key[field]
+        if field == 'species':
+            filters[lookup] = value
+        elif value is None:
+            filters[f'{lookup}__isnull'] = True
+        else:
+            filters[lookup] = value
+    return Metric.objects.filter(**filters)
+
+
+def _summary_aggregates():
+    """Aggregate expressions producing MetricSummary values from Metric rows."""
+    aggregates = {
+        'count': Count('id'),
+        'value_sum': Sum('metric_value'),
+        'value_sum_sq': Sum(F('metric_value') * F('metric_value')),
+        'min_value': Min('metric_value'),
+        'max_value': Max('metric_value'),
+    }
+    # Same bucketing as histogram_bucket(): floor(value * bins), 1.0 in the last bucket
+    bins = MetricSummary.HISTOGRAM_BINS
+    bucket = Least(Floor(F('metric_value') * Value(float(bins))), Value(float(bins - 1)))
+    in_range = Q(metric_value__gte=0.0, metric_value__lte=1.0)
+    for i in range(bins):
+        aggregates[f'bucket_{i}'] = Count('id', filter=in_range & Q(Exact(bucket, float(i))))
+    return aggregates
+
+
+def _summary_from_row(row: dict, key: dict) -> MetricSummary:
+    return MetricSummary(
+        **key,
+        count=row['count'],
+        value_sum=row['value_sum'] or 0.0,
+        value_sum_sq=row['value_sum_sq'] or 0.0,
+        min_value=row['min_value'],
+        max_value=row['max_value'],
+        histogram=[row[f'bucket_{i}'] for i in range(MetricSummary.HISTOGRAM_BINS)],
+    )
+
+
+def refresh_summary(key: dict):
+    """
+    Recompute one summary key exactly from the Metric table.
+
+    Used when an update or delete invalidates min/max, which can't be
+    maintained incrementally.
+    """
+    with transaction.atomic():
+        MetricSummary.objects.filter(**_key_filter(key)).delete()
+        row = _metrics_for_key(key).aggregate(**_summary_aggregates())
+        if row['count']:
+            _summary_from_row(row, key).save()
+
+
+def apply_metric(key: dict, value: float, sign: int = 1):
+    """
+    Add (sign=1) or remove (sign=-1) a single metric value from its summary.
+
+    Args:
+        key: Summary key from ``summary_key``
+        value: Metric value
+        sign: 1 to add the value, -1 to remove it
+    """
+    bucket = histogram_bucket(value)
+
+    with transaction.atomic():
+        summary = MetricSummary.objects.select_for_update().filter(**_key_filter(key)).first()
+
+        if sign < 0:
+            if summary is None or summary.count <= 1 or value in (summary.min_value, summary.max_value):
+                # Extremes (or an empty row) must be recomputed from the source
+                refresh_summary(key)
+                return
+        elif summary is None:
+            summary = MetricSummary(**key, histogram=[0] * MetricSummary.HISTOGRAM_BINS)
+
+        summary.count += sign
+        summary.value_sum += sign * value
+        summary.value_sum_sq += sign * value * value
+        if sign > 0:
+            summary.min_value = value if summary.min_value is None else min(summary.min_value, value)
+            summary.max_value = value if summary.max_value is None else max(summary.max_value, value)
+        if bucket is not None:
+            histogram = list(summary.histogram) or [0] * MetricSummary.HISTOGRAM_BINS
+            histogram[bucket] += sign
+            summary.histogram = histogram
+        summary.save()
+
+
+def rebuild_metric_summaries() -> int:
+    """
+    Rebuild all MetricSummary rows from the Metric table.
+
+    Runs a single GROUP BY over metrics joined to their run, scan and
+    organoid, then bulk-inserts the results.
+
+    Returns:
+        int: Number of summary rows written
+    """
+    rows = Metric.objects.order_by().annotate(
+        day=TruncDate('created_at'),
+        **{field: F(lookup) for field, lookup in SUMMARY_KEY_LOOKUPS.items() if field != 'species'},
+        organoid_species=F(SUMMARY_KEY_LOOKUPS['species']),
+        name=F('metric_name'),
+    ).values(
+        'name', 'day', 'organoid_species', *[f for f in SUMMARY_KEY_LOOKUPS if f != 'species']
+    ).annotate(**_summary_aggregates())
+
+    summaries = []
+    for row in rows.iterator():
+        key = {
+            'metric_name': normalize_metric_name(row['name']),
+            'model_version_id': row['model_version_id'],
+            'experiment_config_id': row['experiment_config_id'],
+            'species': row['organoid_species'] or '',
+            'day': row['day'],
+        }
+        summaries.append(_summary_from_row(row, key))
+
+    with transaction.atomic():
+        MetricSummary.objects.all().delete()
+        MetricSummary.objects.bulk_create(summaries, batch_size=1000)
+
+    logger.info(f"Rebuilt {len(summaries)} metric summary rows")
+    return len(summaries)
+
+
+def duration_bucket(seconds: float) -> int:
+    """Index of the DURATION_BUCKETS bucket for a duration."""
+    for index, upper in enumerate(DURATION_BUCKETS):
+        if seconds <= upper:
+            return index
+    return len(DURATION_BUCKETS) - 1
+
+
+def histogram_percentile(histogram, q: float):
+    """
+    Estimate a percentile from a DURATION_BUCKETS histogram.
+
+    Interpolates linearly inside the bucket containing the q-th value; the
+    open last bucket reports its lower bound.
+
+    Args:
+        histogram: Counts per DURATION_BUCKETS bucket
+        q: Percentile in [0, 100]
+
+    Returns:
+        float or None: Estimated duration in seconds (None if empty)
+    """
+    total = sum(histogram)
+    if not total:
+        return None
+
+    target = total * q / 100.0
+    cumulative = 0
+    for index, count in enumerate(histogram):
+        if count and cumulative + count >= target:
+            lower = DURATION_BUCKETS[index - 1] if index > 0 else 0.0
+            upper = DURATION_BUCKETS[index]
+            if upper == float('inf'):
+                return lower
+            return lower + (upper - lower) * (target - cumulative) / count
+        cumulative += count
+    return DURATION_BUCKETS[-2]
+
+
+def run_durations(created_at, started_at, finished_at):
+    """Queue wait and execution time of a run in seconds (None if unknown)."""
+    queue_wait = execution = None
+    if created_at and started_at:
+        queue_wait = max((started_at - created_at).total_seconds(), 0.0)
+    if started_at and finished_at:
+        execution = max((finished_at - started_at).total_seconds(), 0.0)
+    return queue_wait, execution
+
+
+def _add_run(summary: PipelineRunSummary, queue_wait, execution, sign: int = 1):
+    """Fold one run's durations into (sign=1) or out of (sign=-1) a summary row (in memory)."""
+    summary.count += sign
+    if queue_wait is not None:
+        summary.queue_wait_count += sign
+        summary.queue_wait_sum += sign * queue_wait
+        summary.queue_wait_histogram[duration_bucket(queue_wait)] += sign
+    if execution is not None:
+        summary.execution_count += sign
+        summary.execution_sum += sign * execution
+        summary.execution_histogram[duration_bucket(execution)] += sign
+
+
+def _new_run_summary(bucket_start, stage, status) -> PipelineRunSummary:
+    return PipelineRunSummary(
+        bucket_start=bucket_start,
+        stage=stage,
+        status=status,
+        queue_wait_histogram=[0] * len(DURATION_BUCKETS),
+        execution_histogram=[0] * len(DURATION_BUCKETS),
+    )
+
+
+def _minute(value):
+    return (value or timezone.now()).replace(second=0, microsecond=0)
+
+
+def finished_run_key(run):
+    """
+    Fields of a run that decide its PipelineRunSummary contribution.
+
+    Returns:
+        tuple: (stage, status, created_at, started_at, finished_at), or None
+        if the run has not finished
+    """
+    if run.status not in TERMINAL_STATUSES:
+        return None
+    return tuple(getattr(run, field) for field in RUN_SUMMARY_FIELDS)
+
+
+def record_finished_run(run, sign: int = 1):
+    """
+    Add (sign=1) or remove (sign=-1) a finished run from its summary.
+
+    Args:
+        run: PipelineRun whose status is SUCCESS or FAILED, or an unsaved
+            PipelineRun holding the stored values of ``RUN_SUMMARY_FIELDS``
+        sign: 1 to count the run, -1 to take it back out
+    """
+    queue_wait, execution = run_durations(run.created_at, run.started_at, run.finished_at)
+    bucket_start = _minute(run.finished_at or run.created_at)
+
+    with transaction.atomic():
+        summary = PipelineRunSummary.objects.select_for_update().filter(
+            bucket_start=bucket_start, stage=run.stage, status=run.status
+        ).first()
+        if summary is None:
+            if sign < 0:
+                return
+            summary = _new_run_summary(bucket_start, run.stage, run.status)
+        _add_run(summary, queue_wait, execution, sign)
+        if summary.count > 0:
+            summary.save()
+        elif summary.pk:
+            summary.delete()
+
+
+def rebuild_run_summaries() -> int:
+    """
+    Rebuild all PipelineRunSummary rows from finished PipelineRuns.
+
+    Streams the finished runs once, truncating finish times to the minute
+    in SQL, and aggregates them in memory per (minute, stage, status).
+
+    Returns:
+        int: Number of summary rows written
+    """
+    runs = PipelineRun.objects.filter(status__in=TERMINAL_STATUSES).order_by().annotate(
+        bucket=TruncMinute(Coalesce('finished_at', 'created_at'))
+    ).values_list('bucket', 'stage', 'status', 'created_at', 'started_at', 'finished_at')
+
+    summaries = {}
+    for bucket_start, stage, status, created_at, started_at, finished_at in runs.iterator(chunk_size=2000):
+        key = (bucket_start, stage, status)
+        if key not in summaries:
+            summaries[key] = _new_run_summary(*key)
+        _add_run(summaries[key], *run_durations(created_at, started_at, finished_at))
+
+    with transaction.atomic():
+        PipelineRunSummary.objects.all().delete()
+        PipelineRunSummary.objects.bulk_create(summaries.values(), batch_size=1000)
+
+    logger.info(f"Rebuilt {len(summaries)} pipeline run summary rows")
+    return len(summaries)
@@ -1,5 +1,15 @@
 from rest_framework import serializers
-from .models import Organoid, MRIScan, PipelineRun, SegmentationResult, Metric, ExperimentConfig, ModelVersion, BIDSDataset
+from django.urls import reverse
+from .models import Organoid, MRIScan, PipelineRun, SegmentationResult, Metric, ExperimentConfig, ModelVersion, BIDSDataset, ExportJob
+
+
+def _annotated_count(obj, annotation, related_manager):
+    """
+    Use a count annotated by the viewset queryset, falling back to a query
+    for instances that weren't loaded through it (e.g. after create).
+    """
+    count = getattr(obj, annotation, None)
+    return count if count is not None else related_manager.count()
 
 
 class ExperimentConfigSerializer(serializers.ModelSerializer):
@@ -12,7 +22,7 @@ class ExperimentConfigSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
     
     def get_pipeline_runs_count(self, obj):
-        return obj.pipeline_runs.count()
+        return _annotated_count(obj, 'num_pipeline_runs', obj.pipeline_runs)
 
 
 class ModelVersionSerializer(serializers.ModelSerializer):
@@ -25,7 +35,7 @@ class ModelVersionSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
     
     def get_pipeline_runs_count(self, obj):
-        return obj.pipeline_runs.count()
+        return _annotated_count(obj, 'num_pipeline_runs', obj.pipeline_runs)
 
 
 class OrganoidSerializer(serializers.ModelSerializer):
@@ -38,7 +48,7 @@ class OrganoidSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
     
     def get_scans_count(self, obj):
-        return obj.scans.count()
+        return _annotated_count(obj, 'num_scans', obj.scans)
 
 
 class MRIScanSerializer(serializers.ModelSerializer):
@@ -60,7 +70,7 @@ class MRIScanSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'file_size', 'file_hash', 'upload_status', 'upload_error']
     
     def get_pipeline_runs_count(self, obj):
-        return obj.pipeline_runs.count()
+        return _annotated_count(obj, 'num_pipeline_runs', obj.pipeline_runs)
 
 
 class PipelineRunSerializer(serializers.ModelSerializer):
@@ -135,3 +145,23 @@ class BIDSDatasetSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at', 'last_validated_at', 'last_validation_status', 'last_validation_summary']
+
+
+class ExportJobSerializer(serializers.ModelSerializer):
+    """Serializer for ExportJob model (read-only; jobs are created via submit_export)."""
+    format = serializers.CharField(source='file_format', read_only=True)
+    download_url = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = ExportJob
+        fields = [
+            'id', 'kind', 'format', 'filters', 'columns', 'status', 'progress',
+            'rows_written', 'file_size', 'error', 'created_at', 'started_at',
+            'finished_at', 'expires_at', 'download_url'
+        ]
+        read_only_fields = fields
+    
+    def get_download_url(self, obj):
+        if obj.status != 'SUCCESS':
+            return None
+        return reverse('exportjob-download', args=[obj.id])
@@ -0,0 +1,107 @@
+"""
+Signal handlers for the experiments app.
+
+Keeps derived data (cache versions, analytics rollups) in sync with
+model changes.
+"""
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import rollups
+from .caching import bump_table_version
+from .models import (
+    ExperimentConfig, ModelVersion, Organoid, MRIScan,
+    PipelineRun, SegmentationResult, Metric, BIDSDataset
+)
+
+VERSIONED_MODELS = [
+    ExperimentConfig, ModelVersion, Organoid, MRIScan,
+    PipelineRun, SegmentationResult, Metric, BIDSDataset,
+]
+
+
+def bump_version_on_change(sender, **kwargs):
+    """Invalidate cached values that depend on the changed table."""
+    bump_table_version(sender)
+
+
+for model in VERSIONED_MODELS:
+    post_save.connect(bump_version_on_change, sender=model, dispatch_uid=f'bump_version_save_{model.__name__}')
+    post_delete.connect(bump_version_on_change, sender=model, dispatch_uid=f'bump_version_delete_{model.__name__}')
+
+
+@receiver(pre_save, sender=Metric, dispatch_uid='metric_summary_pre_save')
+def remember_previous_metric_key(sender, instance, **kwargs):
+    """Capture the summary key of an existing metric before it changes."""
+    instance._previous_summary_key = None
+    if instance._state.adding:
+        return
+    previous = Metric.objects.filter(pk=instance.pk).values(
+        'metric_name', 'segmentation_result_id', 'created_at'
+    ).first()
+    if previous:
+        instance._previous_summary_key = rollups.summary_key(
+            previous['metric_name'], previous['segmentation_result_id'], previous['created_at']
+        )
+
+
+@receiver(post_save, sender=Metric, dispatch_uid='metric_summary_post_save')
+def update_metric_summary(sender, instance, created, **kwargs):
+    """Fold a new metric into its rollup, or recompute rollups of an edited one."""
+    key = rollups.summary_key(instance.metric_name, instance.segmentation_result_id, instance.created_at)
+    if created:
+        rollups.apply_metric(key, instance.metric_value)
+        return
+
+    previous_key = getattr(instance, '_previous_summary_key', None)
+    if previous_key and previous_key != key:
+        rollups.refresh_summary(previous_key)
+    rollups.refresh_summary(key)
+
+
+@receiver(post_delete, sender=Metric, dispatch_uid='metric_summary_post_delete')
+def remove_metric_from_summary(sender, instance, **kwargs):
+    """Subtract a deleted metric from its rollup."""
+    key = rollups.summary_key(instance.metric_name, instance.segmentation_result_id, instance.created_at)
+    rollups.apply_metric(key, instance.metric_value, sign=-1)
+
+
+@receiver(pre_save, sender=PipelineRun, dispatch_uid='run_summary_pre_save')
+def remember_previous_finished_run(sender, instance, **kwargs):
+    """Capture the stored fields of a finished run before it changes."""
+    instance._previous_finished_run = None
+    if instance._state.adding:
+        return
+    previous = PipelineRun.objects.filter(
+        pk=instance.pk, status__in=rollups.TERMINAL_STATUSES
+    ).values(*rollups.RUN_SUMMARY_FIELDS).first()
+    if previous:
+        instance._previous_finished_run = PipelineRun(**previous)
+
+
+@receiver(post_save, sender=PipelineRun, dispatch_uid='run_summary_post_save')
+def update_run_summary(sender, instance, created, **kwargs):
+    """Count a finished run once, moving it when its status or timing changes."""
+    previous = getattr(instance, '_previous_finished_run', None)
+    if previous is not None:
+        if rollups.finished_run_key(previous) == rollups.finished_run_key(instance):
+            return
+        rollups.record_finished_run(previous, sign=-1)
+    if instance.status in rollups.TERMINAL_STATUSES:
+        rollups.record_finished_run(instance)
+
+
+@receiver(post_save, sender=Metric, dispatch_uid='metric_touch_result_save')
+@receiver(post_delete, sender=Metric, dispatch_uid='metric_touch_result_delete')
+def touch_result_on_metric_change(sender, instance, **kwargs):
+    """Mark the parent result as changed so incremental wide exports pick it up."""
+    SegmentationResult.objects.filter(pk=instance.segmentation_result_id).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=PipelineRun, dispatch_uid='run_touch_result_save')
+def touch_result_on_run_change(sender, instance, created, **kwargs):
+    """Run status/config changes alter the result's wide export row too."""
+    if not created:
+        SegmentationResult.objects.filter(pipeline_run=instance).update(updated_at=timezone.now())
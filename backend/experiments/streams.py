@@ -0,0 +1,274 @@
+"""
+Server-Sent Events (SSE) streaming for pipeline status updates.
+
+A lightweight, one-way alternative to the WebSocket consumer for dashboards
+and CLI tools that only need to watch pipeline progress, or that sit behind
+proxies which terminate WebSocket upgrades.
+
+The stream is driven by the same channel-layer groups as
+``PipelineStatusConsumer``. Every broadcast event is also recorded in a small
+replay buffer in the Django cache, so clients reconnecting with the
+``Last-Event-ID`` header (sent automatically by ``EventSource``) resume where
+they left off instead of missing updates.
+
+NOTE: The endpoint needs an ASGI server (daphne/uvicorn). Under WSGI Django
+would try to consume the whole (endless) stream before responding, so WSGI
+requests are refused with 501.
+
+NOTE: The channel layer and the replay buffer must be shared by every
+process that broadcasts events (set ``REDIS_URL``). With the in-memory
+defaults, only events from runs executed inside the web server process are
+streamed; runs processed by a separate ``run_pipeline_jobs`` process are not.
+"""
+
+import asyncio
+import json
+import logging
+
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse
+
+logger = logging.getLogger(__name__)
+
+ALL_PIPELINES_GROUP = 'pipeline_updates'
+
+EVENT_SEQUENCE_KEY = 'pipeline_events:seq'
+EVENT_KEY = 'pipeline_events:{}'
+
+# Channel-layer message types forwarded to SSE clients, mapped to the
+# SSE ``event:`` name (mirrors the handlers on PipelineStatusConsumer).
+EVENT_TYPES = {
+    'pipeline.status': 'status',
+    'pipeline.log': 'log',
+    'pipeline.progress': 'progress',
+}
+
+
+def pipeline_group_name(run_id) -> str:
+    """Channel-layer group used for updates of a single pipeline run."""
+    return f"pipeline_{run_id}"
+
+
+def record_event(event: dict) -> int:
+    """
+    Store an event in the replay buffer and return its sequence ID.
+
+    The sequence counter lives in the Django cache, so with a shared cache
+    backend (Redis, see ``REDIS_URL``) IDs are consistent across processes.
+
+    Args:
+        event: Channel-layer message dict
+
+    Returns:
+        Monotonically increasing event ID
+    """
+    cache.add(EVENT_SEQUENCE_KEY, 0, timeout=None)
+    try:
+        event_id = cache.incr(EVENT_SEQUENCE_KEY)
+    except ValueError:
+        # Key evicted between add() and incr(); restart the sequence
+        cache.set(EVENT_SEQUENCE_KEY, 1, timeout=None)
+        event_id = 1
+
+    cache.set(
+        EVENT_KEY.format(event_id),
+        {**event, 'event_id': event_id},
+        timeout=getattr(settings, 'PIPELINE_EVENT_REPLAY_TTL', 3600)
+    )
+    return event_id
+
+
+async def events_since(last_event_id: int) -> list:
+    """
+    Get buffered events with an ID greater than ``last_event_id``.
+
+    Only the most recent ``PIPELINE_EVENT_REPLAY_SIZE`` events are kept;
+    older ones are silently skipped.
+
+    Args:
+        last_event_id: Last event ID seen by the client
+
+    Returns:
+        List of event dicts ordered by event ID
+    """
+    current = await cache.aget(EVENT_SEQUENCE_KEY, 0)
+    replay_size = getattr(settings, 'PIPELINE_EVENT_REPLAY_SIZE', 500)
+    start = max(last_event_id + 1, current - replay_size + 1)
+    if start > current:
+        return []
+
+    keys = [EVENT_KEY.format(event_id) for event_id in range(start, current + 1)]
+    found = await cache.aget_many(keys)
+    return [found[key] for key in keys if key in found]
+
+
+def event_matches(event: dict, filters: dict) -> bool:
+    """
+    Check whether an event passes the client's stream filters.
+
+    Args:
+        event: Channel-layer message dict
+        filters: Dict with optional 'run_ids', 'statuses' and 'types' sets
+
+    Returns:
+        bool: True if the event should be sent to the client
+    """
+    if event.get('type') not in EVENT_TYPES:
+        return False
+    if filters.get('run_ids') and str(event.get('run_id')) not in filters['run_ids']:
+        return False
+    if filters.get('statuses') and str(event.get('status', '')).lower() not in filters['statuses']:
+        return False
+    if filters.get('types') and EVENT_TYPES[event['type']] not in filters['types']:
+        return False
+    return True
+
+
+def format_sse(event: dict) -> str:
+    """
+    Serialize an event in the ``text/event-stream`` wire format.
+
+    Args:
+        event: Channel-layer message dict (with optional 'event_id')
+
+    Returns:
+        str: SSE frame terminated by a blank line
+    """
+    lines = []
+    if event.get('event_id') is not None:
+        lines.append(f"id: {event['event_id']}")
+    lines.append(f"event: {EVENT_TYPES.get(event.get('type'), 'message')}")
+    lines.append(f"data: {json.dumps(event, default=str)}")
+    return '\n'.join(lines) + '\n\n'
+
+
+def _parse_csv_param(value) -> set:
+    if not value:
+        return set()
+    return {item.strip() for item in value.split(',') if item.strip()}
+
+
+def parse_stream_filters(query_params) -> dict:
+    """
+    Build stream filters from request query parameters.
+
+    Supported parameters (comma-separated values allowed):
+        - run_id: Only events for these pipeline runs
+        - status: Only events with these statuses (running/completed/failed)
+        - type: Only these event types (status/log/progress)
+    """
+    return {
+        'run_ids': _parse_csv_param(query_params.get('run_id')),
+        'statuses': {s.lower() for s in _parse_csv_param(query_params.get('status'))},
+        'types': {t.lower() for t in _parse_csv_param(query_params.get('type'))},
+    }
+
+
+async def event_stream(channel_layer, channel_name, groups, filters, last_event_id=None):
+    """
+    Async generator yielding SSE frames for a subscribed channel.
+
+    Replays buffered events after ``last_event_id`` first, then forwards live
+    channel-layer messages. A comment line is sent every
+    ``SSE_KEEPALIVE_SECONDS`` so proxies don't close idle connections, and the
+    stream ends after ``SSE_MAX_STREAM_SECONDS`` (clients reconnect and resume
+    via ``Last-Event-ID``).
+    """
+    keepalive = getattr(settings, 'SSE_KEEPALIVE_SECONDS', 15)
+    max_duration = getattr(settings, 'SSE_MAX_STREAM_SECONDS', 300)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + max_duration
+
+    try:
+        yield f"retry: {getattr(settings, 'SSE_RETRY_MILLISECONDS', 3000)}\n\n"
+
+        replayed_up_to = last_event_id or 0
+        if last_event_id is not None:
+            for event in await events_since(last_event_id):
+                replayed_up_to = max(replayed_up_to, event.get('event_id') or 0)
+                if event_matches(event, filters):
+                    yield format_sse(event)
+
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                message = await asyncio.wait_for(
+                    channel_layer.receive(channel_name),
+                    timeout=min(keepalive, remaining)
+                )
+            except asyncio.TimeoutError:
+                yield ': keep-alive\n\n'
+                continue
+
+            # Skip live copies of events that were already replayed
+            event_id = message.get('event_id')
+            if event_id is not None and event_id <= replayed_up_to:
+                continue
+            if event_matches(message, filters):
+                yield format_sse(message)
+    finally:
+        for group in groups:
+            await channel_layer.group_discard(group, channel_name)
+
+
+async def pipeline_status_stream(request):
+    """
+    Stream pipeline status updates as Server-Sent Events.
+
+    GET /api/pipeline-runs/stream/?run_id=<uuid>&status=running,failed&type=status
+
+    Query Parameters:
+        - run_id: Comma-separated pipeline run IDs (default: all runs)
+        - status: Comma-separated event statuses to include
+        - type: Comma-separated event types (status, log, progress)
+        - last_event_id: Resume point, for clients that can't set headers
+
+    The ``Last-Event-ID`` header takes precedence over ``last_event_id``.
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+
+    # A WSGI server buffers the endless response instead of streaming it
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {'error': 'Event streams require an ASGI server (see DEPLOYMENT.md)'},
+            status=501
+        )
+
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return JsonResponse(
+            {'error': 'Channel layer is not configured'},
+            status=503
+        )
+
+    filters = parse_stream_filters(request.GET)
+
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        return JsonResponse({'error': 'Invalid Last-Event-ID'}, status=400)
+
+    # Per-run groups when filtering by run, otherwise the global group
+    if filters['run_ids']:
+        groups = [pipeline_group_name(run_id) for run_id in filters['run_ids']]
+    else:
+        groups = [ALL_PIPELINES_GROUP]
+
+    channel_name = await channel_layer.new_channel()
+    for group in groups:
+        await channel_layer.group_add(group, channel_name)
+
+    response = StreamingHttpResponse(
+        event_stream(channel_layer, channel_name, groups, filters, last_event_id),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Disable nginx response buffering
+    return response
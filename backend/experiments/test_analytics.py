@@ -0,0 +1,335 @@
+"""
+Tests for the analytics module and its cached endpoints.
+"""
+
+import csv
+import os
+import time
+import unittest
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from experiments import analytics
+from experiments.models import (
+    Organoid, MRIScan, PipelineRun, SegmentationResult, Metric,
+    ModelVersion, ExperimentConfig
+)
+
+
+class AnalyticsOverviewTest(TestCase):
+    """Test overview counts, scan distributions and caching."""
+
+    def setUp(self):
+        cache.clear()
+        human = Organoid.objects.create(name="H1", species="HUMAN")
+        marmoset = Organoid.objects.create(name="M1", species="MARMOSET")
+        self.scan = MRIScan.objects.create(
+            organoid=human, sequence_type="T1W", data_type="IN_VITRO",
+            role="TRAIN", resolution="100um"
+        )
+        MRIScan.objects.create(
+            organoid=human, sequence_type="T2W", data_type="IN_VITRO",
+            role="TEST", resolution="100um"
+        )
+        MRIScan.objects.create(
+            organoid=marmoset, sequence_type="T2W", data_type="EX_VIVO",
+            role="TEST", resolution="100um"
+        )
+        for run_status in ["SUCCESS", "SUCCESS", "FAILED", "PENDING"]:
+            PipelineRun.objects.create(mri_scan=self.scan, stage="GMM", status=run_status)
+        ModelVersion.objects.create(name="UNet_v1", weights_path="/w.pth")
+        ExperimentConfig.objects.create(name="GMM_3")
+
+    def test_overview_counts(self):
+        """Counts come from a single query and use real run statuses."""
+        with CaptureQueriesContext(connection) as queries:
+            counts = analytics.get_overview_counts()
+        self.assertEqual(len(queries), 1)
+        # Run counts are conditional aggregates over one scan of the run table
+        sql = queries[0]['sql']
+        self.assertEqual(sql.count('FROM "experiments_pipelinerun"'), 1)
+        self.assertNotIn('UNION', sql)
+        self.assertEqual(counts, {
+            'num_organoids': 2,
+            'num_scans': 3,
+            'num_pipeline_runs': 4,
+            'num_successful_runs': 2,
+            'num_failed_runs': 1,
+            'num_results': 0,
+            'num_metrics': 0,
+            'num_models': 1,
+            'num_configs': 1,
+            'success_rate': 50.0,
+        })
+
+    def test_scan_distributions(self):
+        """All four distributions come from one grouped query."""
+        with self.assertNumQueries(1):
+            distributions = analytics.get_scan_distributions()
+        self.assertEqual(
+            distributions['scans_by_species'],
+            [{'label': 'HUMAN', 'value': 2}, {'label': 'MARMOSET', 'value': 1}]
+        )
+        self.assertEqual(
+            distributions['scans_by_role'],
+            [{'label': 'TEST', 'value': 2}, {'label': 'TRAIN', 'value': 1}]
+        )
+        self.assertEqual(
+            distributions['scans_by_sequence_type'],
+            [{'label': 'T2W', 'value': 2}, {'label': 'T1W', 'value': 1}]
+        )
+
+    def test_overview_is_cached(self):
+        """A warm overview costs only the table version lookup."""
+        analytics.get_overview()
+        with self.assertNumQueries(1):
+            overview = analytics.get_overview()
+        self.assertEqual(overview['counts']['num_scans'], 3)
+
+    def test_overview_invalidated_on_save_and_delete(self):
+        """Model signals invalidate the cached overview."""
+        analytics.get_overview()
+
+        organoid = Organoid.objects.create(name="H2", species="HUMAN")
+        self.assertEqual(analytics.get_overview()['counts']['num_organoids'], 3)
+
+        organoid.delete()
+        self.assertEqual(analytics.get_overview()['counts']['num_organoids'], 2)
+
+    def test_overview_invalidated_by_other_process(self):
+        """Writes made by a process with its own cache (e.g. run_pipeline_jobs) invalidate it."""
+        from django.core.cache.backends.locmem import LocMemCache
+
+        analytics.get_overview()
+        worker_cache = LocMemCache('worker', {})
+        with mock.patch('experiments.caching.cache', worker_cache):
+            PipelineRun.objects.create(mri_scan=self.scan, stage="UNET", status="SUCCESS")
+        self.assertEqual(analytics.get_overview()['counts']['num_pipeline_runs'], 5)
+
+    def test_cold_versions_shared(self):
+        """Processes starting with empty caches agree on the initial versions."""
+        from experiments.caching import get_table_versions
+
+        first = get_table_versions(analytics.OVERVIEW_MODELS)
+        cache.clear()
+        self.assertEqual(get_table_versions(analytics.OVERVIEW_MODELS), first)
+
+    def test_version_bump_is_one_update(self):
+        """Bumping an existing stamp costs a single UPDATE and moves it forward."""
+        from experiments.caching import bump_table_version, get_table_versions
+
+        before = get_table_versions([Organoid])
+        with self.assertNumQueries(1):
+            bump_table_version(Organoid)
+        self.assertGreater(get_table_versions([Organoid])['experiments.organoid'], before['experiments.organoid'])
+
+    def test_overview_endpoint(self):
+        """The endpoint returns counts and distributions."""
+        response = self.client.get('/api/analytics/overview/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['counts']['num_pipeline_runs'], 4)
+        self.assertIn('scans_by_data_type', response.data)
+
+
+class AnalyticsSummaryExportTest(TestCase):
+    """Test that the summary exports are built from the dashboard snapshot."""
+
+    def setUp(self):
+        cache.clear()
+        organoid = Organoid.objects.create(name="H1", species="HUMAN")
+        scan = MRIScan.objects.create(organoid=organoid, sequence_type="T1W", resolution="100um")
+        for run_status in ["SUCCESS", "FAILED", "SUCCESS"]:
+            run = PipelineRun.objects.create(mri_scan=scan, stage="GMM", status=run_status)
+            result = SegmentationResult.objects.create(pipeline_run=run)
+            Metric.objects.create(segmentation_result=result, metric_name="Dice", metric_value=0.8)
+        ExperimentConfig.objects.create(name="GMM_3")
+
+    def _summary(self):
+        response = self.client.get('/api/exports/analytics.csv')
+        self.assertEqual(response.status_code, 200)
+        content = b''.join(response.streaming_content).decode('utf-8')
+        header, *rows = csv.reader(StringIO(content))
+        self.assertEqual(header, ['section', 'metric', 'value'])
+        return {(section, metric): value for section, metric, value in rows}
+
+    def test_summary_has_real_counts(self):
+        """Counts match the entities instead of defaulting to zero."""
+        summary = self._summary()
+        self.assertEqual(summary[('counts', 'Total Organoids')], '1')
+        self.assertEqual(summary[('counts', 'Total Pipeline Runs')], '3')
+        self.assertEqual(summary[('counts', 'Total Segmentation Results')], '3')
+        self.assertEqual(summary[('counts', 'Total Metrics')], '3')
+        self.assertEqual(summary[('counts', 'Total Experiment Configs')], '1')
+        self.assertEqual(summary[('counts', 'Success Rate (%)')], '66.7')
+        self.assertEqual(summary[('scans_by_species', 'HUMAN')], '1')
+
+    def test_summary_matches_dashboard(self):
+        """CSV and JSON share one cached computation."""
+        overview = self.client.get('/api/analytics/overview/').data
+        with self.assertNumQueries(1):
+            summary = self._summary()
+        self.assertEqual(int(summary[('counts', 'Total MRI Scans')]), overview['counts']['num_scans'])
+
+        Metric.objects.create(
+            segmentation_result=SegmentationResult.objects.first(), metric_name="IoU", metric_value=0.7
+        )
+        self.assertEqual(self._summary()[('counts', 'Total Metrics')], '4')
+
+    def test_summary_parquet(self):
+        """The summary is available as Parquet."""
+        from experiments.exports import PYARROW_AVAILABLE
+        if not PYARROW_AVAILABLE:
+            self.skipTest("pyarrow not installed")
+        import pyarrow.parquet as pq
+
+        response = self.client.get('/api/exports/analytics.parquet')
+        table = pq.read_table(BytesIO(b''.join(response.streaming_content)))
+        rows = {(r['section'], r['metric']): r['value'] for r in table.to_pylist()}
+        self.assertEqual(rows[('counts', 'Total Metrics')], 3.0)
+
+
+@unittest.skipUnless(os.getenv('RUN_BENCHMARKS'), "set RUN_BENCHMARKS=1 to run benchmarks")
+class AnalyticsSnapshotBenchmark(TestCase):
+    """Cold vs. warm analytics snapshot at scale (opt-in)."""
+
+    SCANS = 200
+    RUNS_PER_SCAN = 10
+    METRICS_PER_RUN = 3
+
+    @classmethod
+    def setUpTestData(cls):
+        organoids = Organoid.objects.bulk_create(
+            [Organoid(name=f"O{i}", species=("HUMAN", "MARMOSET")[i % 2]) for i in range(20)]
+        )
+        scans = MRIScan.objects.bulk_create([
+            MRIScan(organoid=organoids[i % 20], sequence_type=("T1W", "T2W")[i % 2], resolution="100um")
+            for i in range(cls.SCANS)
+        ])
+        runs = PipelineRun.objects.bulk_create([
+            PipelineRun(mri_scan=scan, stage="GMM", status=("SUCCESS", "FAILED")[i % 4 == 0])
+            for scan in scans for i in range(cls.RUNS_PER_SCAN)
+        ])
+        results = SegmentationResult.objects.bulk_create([SegmentationResult(pipeline_run=run) for run in runs])
+        Metric.objects.bulk_create([
+            Metric(segmentation_result=result, metric_name=name, metric_value=0.5)
+            for result in results for name in ("Dice", "IoU", "Volume")[:cls.METRICS_PER_RUN]
+        ], batch_size=5000)
+
+    def test_snapshot_benchmark(self):
+        cache.clear()
+        start = time.perf_counter()
+        cold = analytics.get_summary_rows()
+        cold_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(100):
+            warm = analytics.get_summary_rows()
+        warm_time = (time.perf_counter() - start) / 100
+
+        self.assertEqual(cold, warm)
+        counts = dict(((section, label), value) for section, label, value in warm)
+        self.assertEqual(counts[('counts', 'Total Metrics')], self.SCANS * self.RUNS_PER_SCAN * self.METRICS_PER_RUN)
+        print(f"\nanalytics snapshot: cold {cold_time * 1000:.1f} ms, warm {warm_time * 1000:.3f} ms")
+        self.assertLess(warm_time, cold_time)
+
+
+class MetricHistogramTest(TestCase):
+    """Test database-side metric histograms."""
+
+    def setUp(self):
+        cache.clear()
+        organoid = Organoid.objects.create(name="H1", species="HUMAN")
+        scan = MRIScan.objects.create(organoid=organoid, sequence_type="T1W", resolution="100um")
+        self.model_version = ModelVersion.objects.create(name="UNet_v1", weights_path="/w.pth")
+
+        values = [0.0, 0.15, 0.2, 0.55, 0.81, 0.9, 1.0]
+        for value in values:
+            run = PipelineRun.objects.create(
+                mri_scan=scan, stage="UNET", status="SUCCESS",
+                model_version=self.model_version
+            )
+            result = SegmentationResult.objects.create(pipeline_run=run)
+            Metric.objects.create(segmentation_result=result, metric_name="Dice", metric_value=value)
+            Metric.objects.create(segmentation_result=result, metric_name="Volume", metric_value=value * 1000)
+
+        failed_run = PipelineRun.objects.create(mri_scan=scan, stage="GMM", status="FAILED")
+        result = SegmentationResult.objects.create(pipeline_run=failed_run)
+        Metric.objects.create(segmentation_result=result, metric_name="Dice", metric_value=0.5)
+
+    def test_sql_histogram_bins(self):
+        """Values are binned with the last bin closed on the right."""
+        histogram = analytics.metric_histogram(
+            'dice', bins=5, range=(0, 1), filters={'status': 'SUCCESS'}
+        )
+        self.assertEqual([b['value'] for b in histogram], [2, 1, 1, 0, 3])
+        self.assertEqual(histogram[0]['label'], '0.0–0.2')
+
+    def test_sql_matches_numpy(self):
+        """SQL and numpy binning agree."""
+        for bins in (1, 3, 7, 10):
+            sql = analytics.metric_histogram('dice', bins=bins, range=(0, 1))
+            numpy = analytics.metric_histogram('dice', bins=bins, range=(0, 1), method='numpy')
+            self.assertEqual([b['value'] for b in sql], [b['value'] for b in numpy])
+
+    def test_histogram_single_query(self):
+        """Binning with a fixed range costs one query regardless of bins."""
+        with self.assertNumQueries(1):
+            analytics.metric_histogram('dice', bins=50, range=(0, 1))
+
+    def test_histogram_auto_range(self):
+        """Without a range the observed min/max are used."""
+        histogram = analytics.metric_histogram('volume', bins=4)
+        self.assertEqual(histogram[0]['lower'], 0.0)
+        self.assertEqual(histogram[-1]['upper'], 1000.0)
+        self.assertEqual(sum(b['value'] for b in histogram), 7)
+
+    def test_histogram_filters(self):
+        """Filters restrict the histogrammed metrics."""
+        histogram = analytics.metric_histogram(
+            'dice', bins=2, range=(0, 1), filters={'status': 'FAILED'}
+        )
+        self.assertEqual([b['value'] for b in histogram], [0, 1])
+        with self.assertRaises(ValueError):
+            analytics.metric_histogram('dice', filters={'unknown': 'x'})
+
+    def test_metrics_endpoint_params(self):
+        """The endpoint accepts metric names, bins and filters."""
+        response = self.client.get('/api/analytics/metrics/', {
+            'metrics': 'dice,volume', 'bins': 10,
+            'model_version': str(self.model_version.id),
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['histograms']['dice']), 10)
+        self.assertEqual(sum(b['value'] for b in response.data['histograms']['volume']), 7)
+        self.assertEqual(sum(b['value'] for b in response.data['histogram_dice']), 7)
+
+    def test_one_sided_range(self):
+        """A single bound is completed from the observed values."""
+        histogram = analytics.metric_histogram('volume', bins=2, range=(500, None))
+        self.assertEqual((histogram[0]['lower'], histogram[-1]['upper']), (500.0, 1000.0))
+        self.assertEqual(sum(b['value'] for b in histogram), 4)
+
+        histogram = analytics.metric_histogram('volume', bins=2, range=(None, -10))
+        self.assertEqual(histogram[-1]['upper'], -10.0)
+        self.assertEqual(sum(b['value'] for b in histogram), 0)
+
+        response = self.client.get('/api/analytics/metrics/', {'metrics': 'volume,dice', 'range_min': 5})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['histograms']['volume'][-1]['upper'], 1000.0)
+        self.assertEqual(response.data['histograms']['dice'][0]['lower'], 5.0)
+
+    def test_metrics_endpoint_rejects_non_finite_range(self):
+        """NaN and infinite range bounds are client errors."""
+        for value in ('nan', 'inf', '-inf'):
+            response = self.client.get('/api/analytics/metrics/', {'metrics': 'volume', 'range_max': value})
+            self.assertEqual(response.status_code, 400, value)
+
+    def test_metrics_endpoint_rejects_bad_bins(self):
+        """Invalid bin counts are rejected."""
+        response = self.client.get('/api/analytics/metrics/', {'bins': 0})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,84 @@
+"""
+Tests for ETag / Last-Modified conditional GET support.
+"""
+
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from experiments.models import Organoid, MRIScan
+
+
+class ConditionalGetTest(TestCase):
+    """Unchanged responses are answered with 304 before touching the DB."""
+
+    def setUp(self):
+        cache.clear()
+        self.organoid = Organoid.objects.create(name="Cached", species="HUMAN")
+
+    def test_analytics_overview_not_modified(self):
+        """A matching If-None-Match returns 304 after only the table version lookup."""
+        response = self.client.get('/api/analytics/overview/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('max-age=5', response['Cache-Control'])
+        self.assertIn('Last-Modified', response)
+        etag = response['ETag']
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/analytics/overview/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_change_invalidates_etag(self):
+        """Writing a dependent table changes the ETag."""
+        etag = self.client.get('/api/analytics/overview/')['ETag']
+        MRIScan.objects.create(organoid=self.organoid, sequence_type="T1W", resolution="100um")
+
+        response = self.client.get('/api/analytics/overview/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_change_in_other_process_invalidates_etag(self):
+        """Writes by a process with its own cache (e.g. run_pipeline_jobs) change the ETag."""
+        etag = self.client.get('/api/scans/')['ETag']
+        worker_cache = LocMemCache('worker', {})
+        with mock.patch('experiments.caching.cache', worker_cache):
+            MRIScan.objects.create(organoid=self.organoid, sequence_type="T1W", resolution="100um")
+
+        response = self.client.get('/api/scans/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 1)
+
+    def test_list_endpoints(self):
+        """Lists revalidate on every use and have one ETag per query string."""
+        response = self.client.get('/api/organoids/')
+        self.assertIn('no-cache', response['Cache-Control'])
+        self.assertNotEqual(response['ETag'], self.client.get('/api/organoids/?species=HUMAN')['ETag'])
+
+        response = self.client.get('/api/organoids/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+        detail = f'/api/organoids/{self.organoid.id}/'
+        response = self.client.get(detail, HTTP_IF_MODIFIED_SINCE=self.client.get(detail)['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_unrelated_change_keeps_etag(self):
+        """Tables the endpoint doesn't read don't invalidate it."""
+        etag = self.client.get('/api/metrics/')['ETag']
+        Organoid.objects.create(name="Other", species="HUMAN")
+        response = self.client.get('/api/metrics/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_writes_are_unconditional(self):
+        """Non-GET requests are not affected."""
+        etag = self.client.get('/api/organoids/')['ETag']
+        response = self.client.post(
+            '/api/organoids/', {'name': 'New', 'species': 'HUMAN'}, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn('ETag', response)
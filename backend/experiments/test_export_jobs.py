@@ -0,0 +1,205 @@
+"""
+Tests for background export jobs.
+"""
+
+import csv
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.utils import timezone
+
+from rest_framework_simplejwt.tokens import AccessToken
+
+from experiments.export_jobs import run_export_job
+from experiments.models import (
+    Organoid, MRIScan, PipelineRun, SegmentationResult, Metric, ExportJob
+)
+
+
+class ExportJobTest(TestCase):
+    """Test submission, deduplication, the worker and downloads."""
+
+    def setUp(self):
+        cache.clear()
+        self.export_dir = tempfile.mkdtemp()
+        self.settings_override = override_settings(EXPORT_JOB_DIR=self.export_dir)
+        self.settings_override.enable()
+
+        user = get_user_model().objects.create_user(username="analyst", password="unused")
+        self.auth = {'Authorization': f'Bearer {AccessToken.for_user(user)}'}
+        self.client = Client(headers=self.auth)
+
+        organoid = Organoid.objects.create(name="H1", species="HUMAN")
+        scan = MRIScan.objects.create(organoid=organoid, sequence_type="T1W", resolution="100um")
+        run = PipelineRun.objects.create(mri_scan=scan, stage="GMM", status="SUCCESS")
+        result = SegmentationResult.objects.create(pipeline_run=run)
+        for i in range(3):
+            Metric.objects.create(segmentation_result=result, metric_name="Dice", metric_value=i / 10)
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.export_dir, ignore_errors=True)
+
+    def _submit(self, **spec):
+        return self.client.post('/api/export-jobs/', spec, content_type='application/json')
+
+    def _download(self, job_id, **headers):
+        response = self.client.get(f'/api/export-jobs/{job_id}/download/', **headers)
+        return response, b''.join(response.streaming_content) if response.streaming else response.content
+
+    def test_submit_run_and_download(self):
+        """A submitted job is produced by the worker and downloadable."""
+        response = self._submit(kind='metrics', format='csv', columns=['metric_name', 'metric_value'])
+        self.assertEqual(response.status_code, 202)
+        job_id = response.json()['id']
+        self.assertIsNone(response.json()['download_url'])
+
+        self.assertEqual(self._download(job_id)[0].status_code, 409)
+
+        out = StringIO()
+        call_command('run_export_jobs', stdout=out)
+        self.assertIn('3 rows', out.getvalue())
+
+        job = ExportJob.objects.get(id=job_id)
+        self.assertEqual((job.status, job.progress, job.rows_written), ('SUCCESS', 100, 3))
+
+        response, content = self._download(job_id)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        rows = list(csv.reader(StringIO(content.decode('utf-8'))))
+        self.assertEqual(rows[0], ['metric_name', 'metric_value'])
+        self.assertEqual(len(rows), 4)
+
+    def test_identical_spec_reuses_job(self):
+        """Identical requests are served by the same job until the data changes."""
+        first = self._submit(kind='runs', format='csv').json()['id']
+        run_export_job(ExportJob.objects.get(id=first))
+
+        response = self._submit(kind='runs', format='csv')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['id'], first)
+        self.assertIsNotNone(response.json()['download_url'])
+
+        self.assertNotEqual(self._submit(kind='runs', format='csv', columns=['id']).json()['id'], first)
+
+        PipelineRun.objects.update(status='FAILED')
+        PipelineRun.objects.first().save()
+        self.assertNotEqual(self._submit(kind='runs', format='csv').json()['id'], first)
+
+    def test_range_requests(self):
+        """Partial content is served for byte ranges."""
+        job_id = self._submit(kind='metrics', format='csv').json()['id']
+        run_export_job(ExportJob.objects.get(id=job_id))
+        _, full = self._download(job_id)
+
+        response, content = self._download(job_id, HTTP_RANGE='bytes=5-14')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(content, full[5:15])
+        self.assertEqual(response['Content-Range'], f'bytes 5-14/{len(full)}')
+
+        response, content = self._download(job_id, HTTP_RANGE='bytes=-10')
+        self.assertEqual(content, full[-10:])
+
+        response, _ = self._download(job_id, HTTP_RANGE=f'bytes={len(full)}-')
+        self.assertEqual(response.status_code, 416)
+
+    async def test_asgi_download_streams(self):
+        """Downloads over ASGI stream the file instead of reading it into memory."""
+        response = await self.async_client.post(
+            '/api/export-jobs/', {'kind': 'metrics', 'format': 'csv'},
+            content_type='application/json', headers=self.auth
+        )
+        job_id = response.json()['id']
+        await sync_to_async(lambda: run_export_job(ExportJob.objects.get(id=job_id)))()
+
+        url = f'/api/export-jobs/{job_id}/download/'
+        response = await self.async_client.get(url, headers=self.auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        full = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(response['Content-Length'], str(len(full)))
+        self.assertEqual(len(list(csv.reader(StringIO(full.decode('utf-8'))))), 4)
+
+        response = await self.async_client.get(url, headers={**self.auth, 'Range': 'bytes=5-14'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join([chunk async for chunk in response.streaming_content]), full[5:15])
+
+    @override_settings(EXPORT_JOB_TTL_SECONDS=0)
+    def test_expired_jobs(self):
+        """Expired files are removed and requests create a new job."""
+        job_id = self._submit(kind='metrics', format='csv').json()['id']
+        run_export_job(ExportJob.objects.get(id=job_id))
+
+        self.assertNotEqual(self._submit(kind='metrics', format='csv').json()['id'], job_id)
+        call_command('run_export_jobs', stdout=StringIO())
+        self.assertEqual(ExportJob.objects.get(id=job_id).status, 'EXPIRED')
+        self.assertEqual(self._download(job_id)[0].status_code, 410)
+
+    def test_abandoned_running_job(self):
+        """A RUNNING job without progress is re-claimed, not reused."""
+        job_id = self._submit(kind='metrics', format='csv').json()['id']
+        ExportJob.objects.filter(id=job_id).update(status='RUNNING', updated_at=timezone.now())
+        self.assertIsNone(run_export_job(ExportJob.objects.get(id=job_id)))
+        self.assertEqual(self._submit(kind='metrics', format='csv').json()['id'], job_id)
+
+        ExportJob.objects.filter(id=job_id).update(updated_at=timezone.now() - timedelta(hours=1))
+        call_command('run_export_jobs', stdout=StringIO())
+        self.assertEqual(ExportJob.objects.get(id=job_id).status, 'SUCCESS')
+
+    def test_abandoned_job_replaced(self):
+        """A new request replaces an abandoned job, which is then failed."""
+        job_id = self._submit(kind='metrics', format='csv').json()['id']
+        ExportJob.objects.filter(id=job_id).update(
+            status='RUNNING', updated_at=timezone.now() - timedelta(hours=1)
+        )
+        response = self._submit(kind='metrics', format='csv')
+        self.assertEqual(response.status_code, 202)
+        self.assertNotEqual(response.json()['id'], job_id)
+
+        out = StringIO()
+        call_command('run_export_jobs', stdout=out)
+        self.assertIn('Cleaned up 1', out.getvalue())
+        self.assertEqual(ExportJob.objects.get(id=job_id).status, 'FAILED')
+        self.assertEqual(ExportJob.objects.get(id=response.json()['id']).status, 'SUCCESS')
+
+    def test_requires_authentication(self):
+        """Anonymous clients can't submit, list or download exports."""
+        anonymous = Client()
+        self.assertEqual(anonymous.post('/api/export-jobs/', {'kind': 'metrics'}).status_code, 401)
+        self.assertEqual(anonymous.get('/api/export-jobs/').status_code, 401)
+        self.assertEqual(ExportJob.objects.count(), 0)
+
+    def test_invalid_specs(self):
+        """Unknown kinds, formats, filters and columns are rejected."""
+        for spec in (
+            {'kind': 'organoids'},
+            {'kind': 'metrics', 'format': 'xlsx'},
+            {'kind': 'metrics', 'filters': {'species': 'HUMAN'}},
+            {'kind': 'metrics_wide', 'filters': {'organoid': 'not-a-uuid'}},
+            {'kind': 'metrics', 'columns': ['nope']},
+            {'kind': 'metrics', 'filters': {'since': 'garbage'}},
+        ):
+            self.assertEqual(self._submit(**spec).status_code, 400, spec)
+        self.assertEqual(ExportJob.objects.count(), 0)
+
+    def test_wide_parquet_job(self):
+        """Columnar wide exports run through the same worker."""
+        from experiments.exports import PYARROW_AVAILABLE
+        if not PYARROW_AVAILABLE:
+            self.skipTest("pyarrow not installed")
+        import pyarrow.parquet as pq
+
+        job_id = self._submit(
+            kind='metrics_wide', format='parquet', filters={'species': 'HUMAN'}, columns=['organoid', 'dice']
+        ).json()['id']
+        self.assertTrue(run_export_job(ExportJob.objects.get(id=job_id)))
+        table = pq.read_table(ExportJob.objects.get(id=job_id).file_path)
+        self.assertEqual(table.column_names, ['organoid', 'dice'])
+        self.assertEqual(table.column('dice').to_pylist(), [0.2])
@@ -0,0 +1,280 @@
+"""
+Tests for the CSV export endpoints.
+"""
+
+import csv
+import unittest
+from io import BytesIO, StringIO
+
+from django.test import AsyncRequestFactory, TestCase
+
+from experiments.exports import PYARROW_AVAILABLE
+
+if PYARROW_AVAILABLE:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+from experiments.models import (
+    Organoid, MRIScan, PipelineRun, SegmentationResult, Metric,
+    ExperimentConfig, ModelVersion
+)
+
+
+def _read_csv(response):
+    content = b''.join(response.streaming_content).decode('utf-8')
+    return list(csv.reader(StringIO(content)))
+
+
+class ExportTestMixin:
+    """Shared export fixture: two runs, one with five Dice metrics."""
+
+    def setUp(self):
+        organoid = Organoid.objects.create(name="H1", species="HUMAN")
+        scan = MRIScan.objects.create(organoid=organoid, sequence_type="T1W", resolution="100um")
+        self.config = ExperimentConfig.objects.create(name="GMM_3", description="three, components")
+        model = ModelVersion.objects.create(name="UNet_v1", weights_path="/w.pth")
+        self.run = PipelineRun.objects.create(
+            mri_scan=scan, stage="UNET", status="SUCCESS",
+            experiment_config=self.config, model_version=model
+        )
+        PipelineRun.objects.create(mri_scan=scan, stage="GMM")
+        result = SegmentationResult.objects.create(pipeline_run=self.run)
+        for i in range(5):
+            Metric.objects.create(segmentation_result=result, metric_name="Dice", metric_value=i / 10)
+
+
+class WideExportTest(TestCase):
+    """Test the pivoted one-row-per-result export."""
+
+    def setUp(self):
+        self.organoid = Organoid.objects.create(name="M1", species="MARMOSET", experiment_id="EXP-7")
+        scan = MRIScan.objects.create(organoid=self.organoid, sequence_type="T2W", resolution="50um")
+        other = MRIScan.objects.create(
+            organoid=Organoid.objects.create(name="H1", species="HUMAN"),
+            sequence_type="T1W", resolution="100um"
+        )
+        self.config = ExperimentConfig.objects.create(name="GMM_3")
+        run = PipelineRun.objects.create(
+            mri_scan=scan, stage="GMM", status="SUCCESS", experiment_config=self.config
+        )
+        self.result = SegmentationResult.objects.create(pipeline_run=run)
+        for name, value in [("Dice", 0.9), ("iou", 0.8), ("Volume", 1200.0)]:
+            Metric.objects.create(segmentation_result=self.result, metric_name=name, metric_value=value)
+        SegmentationResult.objects.create(
+            pipeline_run=PipelineRun.objects.create(mri_scan=other, stage="UNET", status="FAILED")
+        )
+
+    def _rows(self, **params):
+        response = self.client.get('/api/exports/metrics-wide.csv', params)
+        self.assertEqual(response.status_code, 200)
+        header, *rows = _read_csv(response)
+        return [dict(zip(header, row)) for row in rows]
+
+    def test_pivot_joins_metadata(self):
+        """Metrics become columns next to scan, organoid and config fields."""
+        rows = {row['organoid']: row for row in self._rows()}
+        self.assertEqual(len(rows), 2)
+        row = rows['M1']
+        self.assertEqual((row['dice'], row['iou'], row['volume'], row['hausdorff']), ('0.9', '0.8', '1200.0', ''))
+        self.assertEqual((row['species'], row['sequence_type'], row['organoid_experiment_id']), ('MARMOSET', 'T2W', 'EXP-7'))
+        self.assertEqual(row['experiment_config'], 'GMM_3')
+        self.assertEqual(rows['H1']['dice'], '')
+
+    def test_filters(self):
+        """Filters restrict the exported results."""
+        self.assertEqual([r['organoid'] for r in self._rows(species='HUMAN')], ['H1'])
+        self.assertEqual([r['organoid'] for r in self._rows(experiment_config=self.config.id)], ['M1'])
+        self.assertEqual(self._rows(created_after='2999-01-01T00:00:00Z'), [])
+
+    def test_invalid_filter_values(self):
+        """Unparsable IDs or dates are rejected before streaming starts."""
+        for params in ({'organoid': 'not-a-uuid'}, {'created_before': 'soon'}):
+            response = self.client.get('/api/exports/metrics-wide.csv', params)
+            self.assertEqual(response.status_code, 400)
+
+    def test_single_query(self):
+        """The pivot runs as one grouped query."""
+        from experiments import exports
+        with self.assertNumQueries(1):
+            self.assertEqual(len(list(exports.export_metrics_wide()[1])), 2)
+
+    @unittest.skipUnless(PYARROW_AVAILABLE, "pyarrow not installed")
+    def test_parquet(self):
+        """The wide export is available as Parquet."""
+        response = self.client.get('/api/exports/metrics-wide.parquet', {'status': 'SUCCESS'})
+        table = pq.read_table(BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(table.num_rows, 1)
+        self.assertEqual(table.column('dice').to_pylist(), [0.9])
+        self.assertEqual(table.column('organoid_id')[0].as_py(), self.organoid.id)
+
+
+class CSVExportTest(ExportTestMixin, TestCase):
+    """Test that exports stream row by row and keep their columns."""
+
+    def test_metrics_export_streams(self):
+        """Metrics are streamed with one row per metric."""
+        response = self.client.get('/api/exports/metrics.csv')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertIn('attachment', response['Content-Disposition'])
+
+        rows = _read_csv(response)
+        self.assertEqual(rows[0], [
+            'id', 'metric_name', 'metric_value', 'experiment_config', 'pipeline_run_id', 'created_at'
+        ])
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[1][3], 'GMM_3')
+        self.assertEqual(rows[1][4], str(self.run.id))
+
+    def test_runs_export_fills_missing_relations(self):
+        """Runs without config/model export 'N/A' and blank timestamps."""
+        rows = _read_csv(self.client.get('/api/exports/runs.csv'))
+        by_stage = {row[1]: row for row in rows[1:]}
+        self.assertEqual(by_stage['UNET'][4:6], ['GMM_3', 'UNet_v1'])
+        self.assertEqual(by_stage['GMM'][4:7], ['N/A', 'N/A', ''])
+
+    def test_experiments_export_quotes_values(self):
+        """Values containing delimiters are quoted correctly."""
+        rows = _read_csv(self.client.get('/api/exports/experiments.csv'))
+        self.assertEqual(rows[0], ['id', 'name', 'description', 'created_at', 'updated_at'])
+        self.assertEqual(rows[1][2], 'three, components')
+
+    def test_export_uses_single_query(self):
+        """Related names come from joins, not per-row queries."""
+        from experiments import exports
+        columns, rows = exports.export_metrics_csv()
+        with self.assertNumQueries(1):
+            list(exports.iter_csv(columns, rows))
+
+    async def test_asgi_export_streams_asynchronously(self):
+        """Under ASGI the body is an async iterator, not a list built up front."""
+        response = await self.async_client.get('/api/exports/metrics.csv')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        content = b''.join([chunk async for chunk in response.streaming_content])
+        rows = list(csv.reader(StringIO(content.decode('utf-8'))))
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[1][3], 'GMM_3')
+
+    async def test_asgi_chunks_fetched_in_batches(self):
+        """Only one batch of the sync iterator is read ahead of the client."""
+        from experiments import exports
+        pulled = []
+
+        def chunks():
+            for i in range(10):
+                pulled.append(i)
+                yield f"{i}\n"
+
+        content = exports.streaming_content(chunks(), AsyncRequestFactory().get('/'), batch_size=3)
+        self.assertEqual(await content.__anext__(), "0\n1\n2\n")
+        self.assertEqual(len(pulled), 3)
+        await content.aclose()
+        # WSGI requests keep the sync iterator
+        self.assertFalse(hasattr(exports.streaming_content(chunks()), '__aiter__'))
+
+
+@unittest.skipUnless(PYARROW_AVAILABLE, "pyarrow not installed")
+class ColumnarExportTest(ExportTestMixin, TestCase):
+    """Test Parquet and Arrow IPC exports."""
+
+    def _content(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content)
+
+    def test_metrics_parquet(self):
+        """Parquet metrics keep typed and dictionary-encoded columns."""
+        table = pq.read_table(BytesIO(self._content('/api/exports/metrics.parquet')))
+        self.assertEqual(table.num_rows, 5)
+        self.assertEqual(table.schema.field('metric_value').type, pa.float64())
+        self.assertTrue(pa.types.is_dictionary(table.schema.field('metric_name').type))
+        self.assertTrue(pa.types.is_timestamp(table.schema.field('created_at').type))
+        self.assertEqual(
+            sorted(table.column('metric_value').to_pylist()), [0.0, 0.1, 0.2, 0.3, 0.4]
+        )
+        self.assertEqual(set(table.column('experiment_config').to_pylist()), {'GMM_3'})
+        self.assertEqual(table.column('pipeline_run_id')[0].as_py(), self.run.id)
+
+    def test_runs_arrow_stream(self):
+        """Runs are readable as an Arrow IPC stream, with nulls preserved."""
+        table = pa.ipc.open_stream(self._content('/api/exports/runs.arrow')).read_all()
+        self.assertEqual(table.num_rows, 2)
+        rows = {row['stage']: row for row in table.to_pylist()}
+        self.assertEqual(rows['UNET']['model_version'], 'UNet_v1')
+        self.assertIsNone(rows['GMM']['experiment_config'])
+        self.assertIsNone(rows['GMM']['started_at'])
+
+    def test_multiple_batches(self):
+        """Large exports are written as several record batches."""
+        from experiments import exports
+        schema, rows = exports.export_metrics_columnar()
+        batches = list(exports.iter_record_batches(schema, rows, batch_size=2))
+        self.assertEqual([batch.num_rows for batch in batches], [2, 2, 1])
+
+        schema, rows = exports.export_metrics_columnar()
+        chunks = list(exports.iter_columnar(schema, iter(rows), 'arrow'))
+        self.assertEqual(pa.ipc.open_stream(b''.join(chunks)).read_all().num_rows, 5)
+
+
+class IncrementalExportTest(ExportTestMixin, TestCase):
+    """Test ``since`` resume tokens on the exports."""
+
+    def _export(self, url, since=None):
+        response = self.client.get(url, {'since': since} if since else {})
+        self.assertEqual(response.status_code, 200)
+        return _read_csv(response)[1:], response.get('X-Resume-Token')
+
+    def test_only_changed_rows_after_token(self):
+        """A second sync returns only new or updated rows."""
+        rows, token = self._export('/api/exports/metrics.csv')
+        self.assertEqual(len(rows), 5)
+
+        rows, same_token = self._export('/api/exports/metrics.csv', token)
+        self.assertEqual((rows, same_token), ([], token))
+
+        changed = Metric.objects.order_by('created_at').first()
+        changed.metric_value = 0.99
+        changed.save()
+        Metric.objects.create(
+            segmentation_result=changed.segmentation_result, metric_name="IoU", metric_value=0.5
+        )
+
+        rows, next_token = self._export('/api/exports/metrics.csv', token)
+        self.assertEqual(sorted(row[1] for row in rows), ['dice', 'iou'])
+        self.assertNotEqual(next_token, token)
+
+    def test_runs_export(self):
+        """Run exports are incremental too."""
+        rows, token = self._export('/api/exports/runs.csv')
+        self.assertEqual(len(rows), 2)
+        self.run.qc_status = 'ACCEPTED'
+        self.run.save()
+        rows, _ = self._export('/api/exports/runs.csv', token)
+        self.assertEqual([row[0] for row in rows], [str(self.run.id)])
+
+    def test_metric_change_touches_wide_row(self):
+        """Editing a metric re-exports its result in the wide format."""
+        rows, token = self._export('/api/exports/metrics-wide.csv')
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(self._export('/api/exports/metrics-wide.csv', token)[0], [])
+
+        Metric.objects.filter(metric_name="dice").first().delete()
+        rows, _ = self._export('/api/exports/metrics-wide.csv', token)
+        self.assertEqual(len(rows), 1)
+
+    def test_equal_timestamps_use_id_tiebreak(self):
+        """Rows sharing an updated_at are split by primary key, not skipped."""
+        from experiments.exports import encode_resume_token
+        Metric.objects.update(updated_at=self.run.created_at)
+        first = Metric.objects.order_by('id').first()
+        rows, _ = self._export('/api/exports/metrics.csv', encode_resume_token(first.updated_at, first.id))
+        self.assertEqual(len(rows), 4)
+        self.assertNotIn(str(first.id), [row[0] for row in rows])
+
+    def test_invalid_token(self):
+        """Malformed tokens are rejected."""
+        for token in ('garbage', 'bm90LWEtdG9rZW4='):
+            response = self.client.get('/api/exports/metrics.csv', {'since': token})
+            self.assertEqual(response.status_code, 400)
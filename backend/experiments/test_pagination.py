@@ -0,0 +1,111 @@
+"""
+Tests for keyset pagination on the metrics and pipeline run endpoints.
+"""
+
+from datetime import timedelta
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from experiments.models import Organoid, MRIScan, PipelineRun, SegmentationResult, Metric
+
+
+class KeysetPaginationTest(TestCase):
+    """Test cursor navigation, page sizes and count modes."""
+
+    def setUp(self):
+        organoid = Organoid.objects.create(name="Keyset", species="HUMAN")
+        scan = MRIScan.objects.create(organoid=organoid, sequence_type="T1W", resolution="100um")
+        run = PipelineRun.objects.create(mri_scan=scan, stage="UNET", status="SUCCESS")
+        result = SegmentationResult.objects.create(pipeline_run=run)
+
+        # Pairs of metrics share a timestamp so ties are broken by id
+        base = timezone.now() - timedelta(hours=1)
+        for i in range(25):
+            metric = Metric.objects.create(segmentation_result=result, metric_name="dice", metric_value=i / 25)
+            Metric.objects.filter(pk=metric.pk).update(created_at=base + timedelta(minutes=i // 2))
+
+        self.expected = list(
+            Metric.objects.order_by('-created_at', '-id').values_list('id', flat=True)
+        )
+
+    def _ids(self, response):
+        return [row['id'] for row in response.json()['results']]
+
+    def _walk(self, url):
+        seen = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen += self._ids(response)
+            url = response.json()['next']
+        return seen
+
+    def test_pages_cover_all_rows_in_order(self):
+        """Following next links visits every row once, newest first."""
+        seen = self._walk('/api/metrics/?page_size=4')
+        self.assertEqual(seen, [str(pk) for pk in self.expected])
+
+    def test_ascending_ordering(self):
+        """ordering=created_at pages oldest first."""
+        seen = self._walk('/api/metrics/?page_size=7&ordering=created_at')
+        self.assertEqual(seen, [str(pk) for pk in reversed(self.expected)])
+
+    def test_previous_link(self):
+        """The previous link returns the preceding page."""
+        first = self.client.get('/api/metrics/?page_size=5').json()
+        self.assertIsNone(first['previous'])
+
+        second = self.client.get(first['next']).json()
+        back = self.client.get(second['previous']).json()
+        self.assertEqual(back['results'], first['results'])
+        self.assertIsNotNone(back['next'])
+
+    def test_no_count_or_offset(self):
+        """Deep pages neither count rows nor use OFFSET."""
+        first = self.client.get('/api/metrics/?page_size=10').json()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(first['next'])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('count', response.json())
+        for query in queries:
+            self.assertNotIn('COUNT(', query['sql'].upper())
+            self.assertNotIn('OFFSET', query['sql'].upper())
+
+    def test_count_modes(self):
+        """count=exact and count=estimate include a total."""
+        exact = self.client.get('/api/metrics/?count=exact').json()
+        self.assertEqual(exact['count'], 25)
+        self.assertFalse(exact['count_estimated'])
+
+        estimate = self.client.get('/api/metrics/?count=estimate').json()
+        self.assertEqual(estimate['count'], 25)
+
+        self.assertEqual(self.client.get('/api/metrics/?count=maybe').status_code, 400)
+
+    @override_settings(KEYSET_MAX_PAGE_SIZE=8)
+    def test_max_page_size(self):
+        """page_size is capped by KEYSET_MAX_PAGE_SIZE."""
+        response = self.client.get('/api/metrics/?page_size=500')
+        self.assertEqual(len(response.json()['results']), 8)
+        self.assertEqual(self.client.get('/api/metrics/?page_size=0').status_code, 400)
+
+    def test_invalid_cursor(self):
+        """Tampered cursors are rejected."""
+        response = self.client.get('/api/metrics/?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, 404)
+
+    def test_other_orderings_use_page_numbers(self):
+        """Ordering by a non-key field falls back to page-number pagination."""
+        data = self.client.get('/api/metrics/?ordering=metric_value&page=2').json()
+        self.assertEqual(data['count'], 25)
+        self.assertEqual(len(data['results']), 10)
+
+    def test_pipeline_runs_use_cursors(self):
+        """Pipeline runs are keyset-paginated too."""
+        data = self.client.get('/api/pipeline-runs/').json()
+        self.assertIn('next', data)
+        self.assertNotIn('count', data)
+        self.assertEqual(len(data['results']), 1)
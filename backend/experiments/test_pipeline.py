@@ -67,9 +67,9 @@ class PipelineRunnerTest(TestCase):
         self.assertEqual(metrics.count(), 3)
         
         metric_names = [m.metric_name for m in metrics]
-        self.assertIn("Dice", metric_names)
-        self.assertIn("IoU", metric_names)
-        self.assertIn("Volume", metric_names)
+        self.assertIn("dice", metric_names)
+        self.assertIn("iou", metric_names)
+        self.assertIn("volume", metric_names)
     
     def test_unet_execution(self):
         """Test U-Net stage execution."""
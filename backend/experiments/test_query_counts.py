@@ -0,0 +1,91 @@
+"""
+Query-count regression tests for the list endpoints.
+
+Each list page must cost a constant number of queries, independent of how
+many rows it contains (no per-row counts or foreign-key lookups).
+"""
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from experiments.models import (
+    Organoid, MRIScan, PipelineRun, SegmentationResult, Metric,
+    ExperimentConfig, ModelVersion
+)
+
+
+class ListQueryCountTest(TestCase):
+    """Compare query counts for pages with few and many rows."""
+
+    ENDPOINTS = [
+        '/api/experiment-configs/',
+        '/api/model-versions/',
+        '/api/organoids/',
+        '/api/scans/',
+        '/api/pipeline-runs/',
+        '/api/segmentation-results/',
+        '/api/metrics/',
+    ]
+
+    def _create_rows(self, count):
+        for i in range(count):
+            config = ExperimentConfig.objects.create(name=f"Config {i}")
+            model = ModelVersion.objects.create(name=f"Model {i}", weights_path=f"/w{i}.pth")
+            organoid = Organoid.objects.create(name=f"O{i}", species="HUMAN")
+            scan = MRIScan.objects.create(organoid=organoid, sequence_type="T1W", resolution="100um")
+            run = PipelineRun.objects.create(
+                mri_scan=scan, stage="UNET", status="SUCCESS",
+                experiment_config=config, model_version=model
+            )
+            result = SegmentationResult.objects.create(pipeline_run=run)
+            for name in ("Dice", "IoU"):
+                Metric.objects.create(segmentation_result=result, metric_name=name, metric_value=0.5)
+
+    def _query_count(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return len(queries)
+
+    def test_queries_do_not_grow_with_rows(self):
+        """Pages of 2 and 8 rows take the same number of queries."""
+        self._create_rows(2)
+        small = {url: self._query_count(url) for url in self.ENDPOINTS}
+
+        self._create_rows(6)
+        for url in self.ENDPOINTS:
+            with self.subTest(url=url):
+                self.assertEqual(self._query_count(url), small[url])
+
+    def test_query_budgets(self):
+        """Each list page stays within its query budget (versions + count + page + prefetch)."""
+        self._create_rows(5)
+        budgets = {
+            '/api/experiment-configs/': 3,
+            '/api/model-versions/': 3,
+            '/api/organoids/': 3,
+            '/api/scans/': 3,
+            '/api/pipeline-runs/': 3,
+            '/api/segmentation-results/': 4,
+            '/api/metrics/': 3,
+        }
+        for url, budget in budgets.items():
+            with self.subTest(url=url):
+                self.assertLessEqual(self._query_count(url), budget)
+
+    def test_counts_are_correct(self):
+        """Annotated counts match the related rows."""
+        self._create_rows(1)
+        organoid = Organoid.objects.get()
+        MRIScan.objects.create(organoid=organoid, sequence_type="T2W", resolution="100um")
+
+        organoids = self.client.get('/api/organoids/').data['results']
+        self.assertEqual(organoids[0]['scans_count'], 2)
+        configs = self.client.get('/api/experiment-configs/').data['results']
+        self.assertEqual(configs[0]['pipeline_runs_count'], 1)
+        runs = self.client.get('/api/pipeline-runs/').data['results']
+        self.assertTrue(runs[0]['has_result'])
+        self.assertEqual(runs[0]['scan_info']['organoid_name'], 'O0')
+        results = self.client.get('/api/segmentation-results/').data['results']
+        self.assertEqual(len(results[0]['metrics']), 2)
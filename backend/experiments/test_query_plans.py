@@ -0,0 +1,103 @@
+"""
+Query plan audit for the filtered list and analytics endpoints.
+
+Every SELECT an endpoint runs is re-run through the database's EXPLAIN, and
+the test fails if any experiments table is read with a full table scan
+instead of an index. On PostgreSQL sequential scans are disabled for the
+EXPLAIN, so a seq scan in the plan means no usable index exists (small test
+tables would otherwise always be seq-scanned).
+"""
+
+import re
+
+from django.db import connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from experiments.models import Organoid, MRIScan, PipelineRun, SegmentationResult, Metric
+
+# SQLite: "SCAN experiments_metric" (no "USING ... INDEX") is a full table scan
+SQLITE_FULL_SCAN = re.compile(r'^SCAN (experiments_\w+)$')
+POSTGRES_FULL_SCAN = re.compile(r'Seq Scan on (experiments_\w+)')
+
+
+def query_plan(sql):
+    """
+    EXPLAIN a captured query.
+
+    Args:
+        sql: SQL with parameters inlined (as captured by CaptureQueriesContext)
+
+    Returns:
+        list: Plan lines
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute(f'EXPLAIN {sql}')
+            return [row[0] for row in cursor.fetchall()]
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def full_scans(plan):
+    """Tables read with a full table scan in a query plan."""
+    pattern = POSTGRES_FULL_SCAN if connection.vendor == 'postgresql' else SQLITE_FULL_SCAN
+    return [match.group(1) for line in plan for match in [pattern.search(line.strip())] if match]
+
+
+class QueryPlanTest(TestCase):
+    """Key endpoints must be served from indexes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        organoid = Organoid.objects.create(name="Plan", species="HUMAN")
+        scan = MRIScan.objects.create(
+            organoid=organoid, sequence_type="T1W", resolution="100um", role="TRAIN"
+        )
+        run = PipelineRun.objects.create(mri_scan=scan, stage="UNET", status="SUCCESS")
+        cls.result = SegmentationResult.objects.create(pipeline_run=run)
+        Metric.objects.create(segmentation_result=cls.result, metric_name="Dice", metric_value=0.8)
+
+    def _endpoint_plans(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return [
+            (query['sql'], query_plan(query['sql']))
+            for query in queries if query['sql'].lstrip().upper().startswith('SELECT')
+        ]
+
+    def test_filtered_endpoints_use_indexes(self):
+        """Filtered lists and analytics never fall back to a full table scan."""
+        urls = [
+            '/api/pipeline-runs/?status=SUCCESS',
+            '/api/pipeline-runs/?stage=UNET',
+            '/api/scans/?role=TRAIN&data_type=IN_VITRO',
+            '/api/scans/?sequence_type=T1W',
+            '/api/organoids/?species=HUMAN',
+            '/api/metrics/?metric_name=Dice',
+            f'/api/metrics/?segmentation_result={self.result.id}',
+            '/api/analytics/metrics/',
+        ]
+        for url in urls:
+            for sql, plan in self._endpoint_plans(url):
+                with self.subTest(url=url, sql=sql[:120]):
+                    self.assertEqual(full_scans(plan), [], '\n'.join(plan))
+
+    def test_keyset_pages_need_no_sort(self):
+        """Keyset-paginated lists read rows in index order."""
+        if connection.vendor != 'sqlite':
+            self.skipTest('Plan wording is SQLite-specific')
+        for url in ['/api/metrics/', '/api/pipeline-runs/', '/api/pipeline-runs/?status=SUCCESS']:
+            for sql, plan in self._endpoint_plans(url):
+                with self.subTest(url=url, sql=sql[:120]):
+                    self.assertFalse(
+                        any('TEMP B-TREE FOR ORDER BY' in line for line in plan), '\n'.join(plan)
+                    )
+
+    def test_metric_names_are_normalized(self):
+        """Metric names are stored lower-cased and matched in any casing."""
+        self.assertEqual(Metric.objects.get().metric_name, 'dice')
+        response = self.client.get('/api/metrics/?metric_name=DICE')
+        self.assertEqual(len(response.json()['results']), 1)
@@ -0,0 +1,271 @@
+"""
+Tests for incrementally maintained analytics rollups.
+"""
+
+from datetime import timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from experiments import analytics
+from experiments.models import (
+    Organoid, MRIScan, PipelineRun, SegmentationResult, Metric,
+    MetricSummary, ModelVersion, ExperimentConfig, PipelineRunSummary
+)
+from experiments.rollups import (
+    DURATION_BUCKETS, histogram_percentile, rebuild_metric_summaries, rebuild_run_summaries
+)
+
+
+def _summary_snapshot():
+    """Summary totals per key, independent of how rows are split."""
+    totals = {}
+    for row in MetricSummary.objects.all():
+        key = (row.metric_name, row.model_version_id, row.experiment_config_id, row.species, row.day)
+        entry = totals.setdefault(key, {'count': 0, 'sum': 0.0, 'min': None, 'max': None, 'hist': [0] * 20})
+        entry['count'] += row.count
+        entry['sum'] = round(entry['sum'] + row.value_sum, 9)
+        entry['min'] = row.min_value if entry['min'] is None else min(entry['min'], row.min_value)
+        entry['max'] = row.max_value if entry['max'] is None else max(entry['max'], row.max_value)
+        entry['hist'] = [a + b for a, b in zip(entry['hist'], row.histogram)]
+    return totals
+
+
+class MetricSummaryTest(TestCase):
+    """Test MetricSummary maintenance and the analytics built on it."""
+
+    def setUp(self):
+        cache.clear()
+        organoid = Organoid.objects.create(name="H1", species="HUMAN")
+        scan = MRIScan.objects.create(organoid=organoid, sequence_type="T1W", resolution="100um")
+        self.unet = ModelVersion.objects.create(name="UNet_v1", weights_path="/w1.pth")
+        self.unet2 = ModelVersion.objects.create(name="UNet_v2", weights_path="/w2.pth")
+        self.config = ExperimentConfig.objects.create(name="GMM_3")
+
+        self.results = []
+        for model_version, dice in [(self.unet, 0.7), (self.unet, 0.9), (self.unet2, 0.95), (None, 0.5)]:
+            run = PipelineRun.objects.create(
+                mri_scan=scan, stage="UNET", status="SUCCESS",
+                model_version=model_version, experiment_config=self.config
+            )
+            result = SegmentationResult.objects.create(pipeline_run=run)
+            Metric.objects.create(segmentation_result=result, metric_name="Dice", metric_value=dice)
+            Metric.objects.create(segmentation_result=result, metric_name="Volume", metric_value=dice * 1000)
+            self.results.append(result)
+
+    def test_incremental_matches_rebuild(self):
+        """Signal-maintained rows equal a full rebuild."""
+        incremental = _summary_snapshot()
+        rebuild_metric_summaries()
+        self.assertEqual(incremental, _summary_snapshot())
+
+    def test_summary_values(self):
+        """Rows hold count, sum, extremes and histogram buckets."""
+        summary = MetricSummary.objects.get(metric_name='dice', model_version=self.unet)
+        self.assertEqual(summary.count, 2)
+        self.assertAlmostEqual(summary.value_sum, 1.6)
+        self.assertAlmostEqual(summary.value_sum_sq, 0.7 ** 2 + 0.9 ** 2)
+        self.assertEqual((summary.min_value, summary.max_value), (0.7, 0.9))
+        self.assertEqual(summary.histogram[14], 1)
+        self.assertEqual(summary.histogram[18], 1)
+        self.assertEqual(summary.species, 'HUMAN')
+
+    def test_delete_and_update_keep_summary_exact(self):
+        """Deleting or editing metrics updates the affected rows."""
+        Metric.objects.get(segmentation_result=self.results[1], metric_name="dice").delete()
+        summary = MetricSummary.objects.get(metric_name='dice', model_version=self.unet)
+        self.assertEqual((summary.count, summary.max_value), (1, 0.7))
+
+        metric = Metric.objects.get(segmentation_result=self.results[0], metric_name="dice")
+        metric.metric_value = 0.8
+        metric.save()
+        summary = MetricSummary.objects.get(metric_name='dice', model_version=self.unet)
+        self.assertEqual((summary.count, summary.min_value), (1, 0.8))
+
+        self.results[0].delete()
+        self.assertFalse(MetricSummary.objects.filter(metric_name='dice', model_version=self.unet).exists())
+
+    def test_avg_dice_from_summary(self):
+        """Averages per model/config read the rollup."""
+        with self.assertNumQueries(1):
+            by_model = analytics.get_avg_dice_by_model()
+        self.assertEqual(by_model, [
+            {'label': 'UNet_v2', 'value': 0.95},
+            {'label': 'UNet_v1', 'value': 0.8},
+        ])
+        self.assertEqual(
+            analytics.get_avg_dice_by_config(),
+            [{'label': 'GMM_3', 'value': 0.762}]
+        )
+
+    def test_rebuild_command(self):
+        """The management command recreates the rollup."""
+        MetricSummary.objects.all().delete()
+        out = StringIO()
+        call_command('rebuild_analytics_rollups', stdout=out)
+        self.assertIn("metric summary row", out.getvalue())
+        self.assertEqual(
+            MetricSummary.objects.filter(metric_name='dice').count(), 3
+        )
+
+
+def _run_snapshot():
+    return sorted(
+        (row.bucket_start, row.stage, row.status, row.count, row.queue_wait_count,
+         round(row.queue_wait_sum, 6), row.execution_count, round(row.execution_sum, 6),
+         row.queue_wait_histogram, row.execution_histogram)
+        for row in PipelineRunSummary.objects.all()
+    )
+
+
+class PipelineRunSummaryTest(TestCase):
+    """Test the pipeline run rollup and the timeseries analytics."""
+
+    def setUp(self):
+        cache.clear()
+        organoid = Organoid.objects.create(name="H1", species="HUMAN")
+        self.scan = MRIScan.objects.create(organoid=organoid, sequence_type="T1W", resolution="100um")
+
+    def _finish_run(self, stage, status, queue_wait, execution):
+        run = PipelineRun.objects.create(mri_scan=self.scan, stage=stage)
+        run.created_at = timezone.now() - timedelta(minutes=5)
+        run.status = 'RUNNING'
+        run.started_at = run.created_at + timedelta(seconds=queue_wait)
+        run.save()
+        run.status = status
+        run.finished_at = run.started_at + timedelta(seconds=execution)
+        run.save()
+        return run
+
+    def test_terminal_transition_counted_once(self):
+        """Only the transition into a terminal status is recorded."""
+        run = self._finish_run('GMM', 'SUCCESS', 2, 40)
+        run.notes = "reviewed"
+        run.save()
+
+        summary = PipelineRunSummary.objects.get()
+        self.assertEqual((summary.stage, summary.status, summary.count), ('GMM', 'SUCCESS', 1))
+        self.assertAlmostEqual(summary.queue_wait_sum, 2, places=3)
+        self.assertAlmostEqual(summary.execution_sum, 40, places=3)
+
+    def test_changed_terminal_status_moves_run(self):
+        """A run that goes SUCCESS -> FAILED is counted only as FAILED."""
+        run = self._finish_run('GMM', 'SUCCESS', 2, 40)
+        run.status = 'FAILED'
+        run.save()
+
+        summary = PipelineRunSummary.objects.get()
+        self.assertEqual((summary.status, summary.count, summary.execution_count), ('FAILED', 1, 1))
+        self.assertAlmostEqual(summary.execution_sum, 40, places=3)
+        self.assertEqual(sum(summary.execution_histogram), 1)
+
+        incremental = _run_snapshot()
+        rebuild_run_summaries()
+        self.assertEqual(incremental, _run_snapshot())
+
+        run.status = 'PENDING'
+        run.save()
+        self.assertFalse(PipelineRunSummary.objects.exists())
+
+    def test_incremental_matches_rebuild(self):
+        """Signal-maintained rows equal a full rebuild."""
+        self._finish_run('GMM', 'SUCCESS', 1, 20)
+        self._finish_run('GMM', 'FAILED', 3, 5)
+        self._finish_run('UNET', 'SUCCESS', 0.2, 90)
+        PipelineRun.objects.create(mri_scan=self.scan, stage='UNET')
+
+        incremental = _run_snapshot()
+        self.assertEqual(rebuild_run_summaries(), 3)
+        self.assertEqual(incremental, _run_snapshot())
+
+    def test_histogram_percentile(self):
+        """Percentiles interpolate inside the containing bucket."""
+        histogram = [0] * len(DURATION_BUCKETS)
+        histogram[DURATION_BUCKETS.index(10)] = 10  # ten runs in (5, 10]
+        self.assertAlmostEqual(histogram_percentile(histogram, 50), 7.5)
+        self.assertAlmostEqual(histogram_percentile(histogram, 100), 10)
+        self.assertIsNone(histogram_percentile([0] * len(DURATION_BUCKETS), 50))
+
+    def test_timeseries(self):
+        """Buckets report counts, failure rate and latency percentiles."""
+        for _ in range(3):
+            self._finish_run('GMM', 'SUCCESS', 1, 20)
+        self._finish_run('GMM', 'FAILED', 1, 20)
+        PipelineRun.objects.create(mri_scan=self.scan, stage='UNET')
+
+        data = analytics.get_pipeline_timeseries(interval='day')
+        self.assertEqual(len(data['buckets']), 1)
+        bucket = data['buckets'][0]
+        self.assertEqual(bucket['runs'], 4)
+        self.assertEqual(bucket['by_status'], {'SUCCESS': 3, 'FAILED': 1})
+        self.assertEqual(bucket['failure_rate'], 0.25)
+        self.assertAlmostEqual(bucket['execution']['mean'], 20, places=2)
+        self.assertTrue(10 < bucket['execution']['p50'] <= 30)
+        self.assertEqual(data['in_flight'], {'pending': 1, 'running': 0})
+
+        self.assertEqual(analytics.get_pipeline_timeseries(stage='UNET')['buckets'], [])
+
+    def test_timeseries_endpoint(self):
+        """The endpoint validates interval and dates."""
+        self._finish_run('GMM', 'SUCCESS', 1, 20)
+        response = self.client.get('/api/analytics/timeseries/', {'interval': 'day'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['buckets'][0]['runs'], 1)
+
+        self.assertEqual(self.client.get('/api/analytics/timeseries/', {'interval': 'week'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/analytics/timeseries/', {'since': 'yesterday'}).status_code, 400)
+
+
+class RollupBackfillMigrationTest(TransactionTestCase):
+    """Test that the rollup migrations summarize existing data."""
+
+    before = ('experiments', '0008_bidsdataset')
+    after = ('experiments', '0010_pipelinerunsummary')
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        self.latest = executor.loader.graph.leaf_nodes('experiments')
+        executor.migrate([self.before])
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.latest)
+
+    def test_summaries_backfilled(self):
+        """Metrics and runs saved before the rollups appear in them."""
+        apps = MigrationExecutor(connection).loader.project_state([self.before]).apps
+        organoid = apps.get_model('experiments', 'Organoid').objects.create(name="H1", species="HUMAN")
+        scan = apps.get_model('experiments', 'MRIScan').objects.create(
+            organoid=organoid, sequence_type="T1W", resolution="100um"
+        )
+        finished_at = timezone.now()
+        run = apps.get_model('experiments', 'PipelineRun').objects.create(
+            mri_scan=scan, stage="UNET", status="SUCCESS",
+            started_at=finished_at - timedelta(seconds=30), finished_at=finished_at
+        )
+        result = apps.get_model('experiments', 'SegmentationResult').objects.create(pipeline_run=run)
+        metric_model = apps.get_model('experiments', 'Metric')
+        for value in (0.6, 0.8):
+            metric_model.objects.create(segmentation_result=result, metric_name="Dice", metric_value=value)
+
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate([self.after])
+
+        apps = executor.loader.project_state([self.after]).apps
+        summary = apps.get_model('experiments', 'MetricSummary').objects.get()
+        self.assertEqual((summary.metric_name, summary.species, summary.count), ('dice', 'HUMAN', 2))
+        self.assertAlmostEqual(summary.value_sum, 1.4)
+        self.assertEqual((summary.min_value, summary.max_value), (0.6, 0.8))
+        self.assertEqual([i for i, count in enumerate(summary.histogram) if count], [12, 16])
+
+        run_summary = apps.get_model('experiments', 'PipelineRunSummary').objects.get()
+        self.assertEqual((run_summary.stage, run_summary.status, run_summary.count), ('UNET', 'SUCCESS', 1))
+        self.assertAlmostEqual(run_summary.execution_sum, 30, places=3)
+        self.assertEqual(run_summary.bucket_start, finished_at.replace(second=0, microsecond=0))
+        self.assertEqual(sum(run_summary.execution_histogram), 1)
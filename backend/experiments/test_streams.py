@@ -0,0 +1,123 @@
+"""
+Tests for the Server-Sent Events pipeline status stream.
+"""
+
+import asyncio
+import json
+
+from channels.layers import get_channel_layer
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from experiments.pipeline_runner import broadcast_pipeline_status
+from experiments.streams import (
+    ALL_PIPELINES_GROUP, event_matches, event_stream, events_since,
+    format_sse, parse_stream_filters, record_event,
+)
+
+
+def _status_event(run_id, status='running'):
+    return {'type': 'pipeline.status', 'run_id': run_id, 'status': status}
+
+
+class StreamHelpersTest(TestCase):
+    """Test SSE formatting, filtering and the replay buffer."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_format_sse(self):
+        """Events are framed with id, event name and JSON data."""
+        frame = format_sse({**_status_event('abc'), 'event_id': 7})
+        lines = frame.split('\n')
+        self.assertEqual(lines[0], 'id: 7')
+        self.assertEqual(lines[1], 'event: status')
+        self.assertEqual(json.loads(lines[2][len('data: '):])['run_id'], 'abc')
+        self.assertTrue(frame.endswith('\n\n'))
+
+    def test_event_filters(self):
+        """Filters restrict events by run, status and type."""
+        filters = parse_stream_filters({'run_id': 'a,b', 'status': 'FAILED'})
+        self.assertTrue(event_matches(_status_event('a', 'failed'), filters))
+        self.assertFalse(event_matches(_status_event('a', 'running'), filters))
+        self.assertFalse(event_matches(_status_event('c', 'failed'), filters))
+        self.assertFalse(event_matches({'type': 'other.event'}, parse_stream_filters({})))
+
+    def test_replay_buffer(self):
+        """Recorded events are returned after the given event ID."""
+        first = record_event(_status_event('a'))
+        second = record_event(_status_event('b'))
+        self.assertEqual(second, first + 1)
+
+        events = asyncio.run(events_since(first))
+        self.assertEqual([e['run_id'] for e in events], ['b'])
+        self.assertEqual(events[0]['event_id'], second)
+
+    @override_settings(PIPELINE_EVENT_REPLAY_SIZE=2)
+    def test_replay_buffer_is_bounded(self):
+        """Only the most recent events are replayed."""
+        for run_id in 'abcd':
+            record_event(_status_event(run_id))
+        events = asyncio.run(events_since(0))
+        self.assertEqual([e['run_id'] for e in events], ['c', 'd'])
+
+
+@override_settings(SSE_KEEPALIVE_SECONDS=0.05)
+class EventStreamTest(TestCase):
+    """Test the async SSE generator against the in-memory channel layer."""
+
+    def setUp(self):
+        cache.clear()
+
+    async def _collect(self, last_event_id=None, filters=None, count=2):
+        channel_layer = get_channel_layer()
+        channel_name = await channel_layer.new_channel()
+        await channel_layer.group_add(ALL_PIPELINES_GROUP, channel_name)
+
+        stream = event_stream(
+            channel_layer, channel_name, [ALL_PIPELINES_GROUP],
+            filters or parse_stream_filters({}), last_event_id
+        )
+        frames = [await stream.__anext__() for _ in range(count)]
+        await stream.aclose()
+        return frames
+
+    def test_live_event_is_streamed(self):
+        """Broadcast status updates reach the stream."""
+        async def scenario():
+            task = asyncio.ensure_future(self._collect(count=2))
+            await asyncio.sleep(0.01)
+            await get_channel_layer().group_send(
+                ALL_PIPELINES_GROUP, {**_status_event('run-1'), 'event_id': 1}
+            )
+            return await task
+
+        frames = asyncio.run(scenario())
+        self.assertTrue(frames[0].startswith('retry:'))
+        self.assertIn('"run-1"', frames[1])
+
+    def test_keepalive_sent_when_idle(self):
+        """Idle streams emit comment pings."""
+        frames = asyncio.run(self._collect(count=2))
+        self.assertEqual(frames[1], ': keep-alive\n\n')
+
+    def test_resume_from_last_event_id(self):
+        """Missed events are replayed before live ones."""
+        broadcast_pipeline_status('run-1', 'running')
+        broadcast_pipeline_status('run-2', 'completed')
+
+        frames = asyncio.run(self._collect(last_event_id=1, count=2))
+        self.assertIn('"run-2"', frames[1])
+        self.assertTrue(frames[1].startswith('id: 2'))
+
+    async def test_stream_endpoint_rejects_bad_event_id(self):
+        """An unparsable Last-Event-ID is a client error."""
+        response = await self.async_client.get(
+            '/api/pipeline-runs/stream/', headers={'Last-Event-ID': 'not-a-number'}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_stream_endpoint_requires_asgi(self):
+        """WSGI requests are refused instead of buffering the endless stream."""
+        response = self.client.get('/api/pipeline-runs/stream/')
+        self.assertEqual(response.status_code, 501)
@@ -11,15 +11,22 @@ from .views import (
     SegmentationResultViewSet,
     MetricViewSet,
     BIDSDatasetViewSet,
+    ExportJobViewSet,
     analytics_overview,
     analytics_metrics,
+    analytics_timeseries,
     export_metrics_csv,
     export_experiments_csv,
     export_runs_csv,
-    export_analytics_csv
+    export_analytics_csv,
+    export_metrics_columnar,
+    export_runs_columnar,
+    export_metrics_wide,
+    export_analytics_columnar,
 )
 from .auth_views import RegisterView, current_user, logout_view
 from .upload_views import upload_scan_file, create_scan_with_upload
+from .streams import pipeline_status_stream
 
 # Create router and register viewsets
 router = DefaultRouter()
@@ -31,6 +38,7 @@ router.register(r'pipeline-runs', PipelineRunViewSet, basename='pipelinerun')
 router.register(r'segmentation-results', SegmentationResultViewSet, basename='segmentationresult')
 router.register(r'metrics', MetricViewSet, basename='metric')
 router.register(r'bids-datasets', BIDSDatasetViewSet, basename='bidsdataset')
+router.register(r'export-jobs', ExportJobViewSet, basename='exportjob')
 
 urlpatterns = [
     # Authentication endpoints
@@ -44,15 +52,28 @@ urlpatterns = [
     path('scans/<uuid:scan_id>/upload/', upload_scan_file, name='upload_scan_file'),
     path('scans/upload/', create_scan_with_upload, name='create_scan_with_upload'),
     
+    # Server-Sent Events stream (must precede the router's pipeline-runs/<pk>/)
+    path('pipeline-runs/stream/', pipeline_status_stream, name='pipeline-runs-stream'),
+    
     # Analytics endpoints
     path('analytics/overview/', analytics_overview, name='analytics-overview'),
     path('analytics/metrics/', analytics_metrics, name='analytics-metrics'),
+    path('analytics/timeseries/', analytics_timeseries, name='analytics-timeseries'),
     
     # Export endpoints
     path('exports/metrics.csv', export_metrics_csv, name='export-metrics-csv'),
     path('exports/experiments.csv', export_experiments_csv, name='export-experiments-csv'),
     path('exports/runs.csv', export_runs_csv, name='export-runs-csv'),
     path('exports/analytics.csv', export_analytics_csv, name='export-analytics-csv'),
+    path('exports/metrics.parquet', export_metrics_columnar, {'file_format': 'parquet'}, name='export-metrics-parquet'),
+    path('exports/metrics.arrow', export_metrics_columnar, {'file_format': 'arrow'}, name='export-metrics-arrow'),
+    path('exports/runs.parquet', export_runs_columnar, {'file_format': 'parquet'}, name='export-runs-parquet'),
+    path('exports/runs.arrow', export_runs_columnar, {'file_format': 'arrow'}, name='export-runs-arrow'),
+    path('exports/analytics.parquet', export_analytics_columnar, {'file_format': 'parquet'}, name='export-analytics-parquet'),
+    path('exports/analytics.arrow', export_analytics_columnar, {'file_format': 'arrow'}, name='export-analytics-arrow'),
+    path('exports/metrics-wide.csv', export_metrics_wide, {'file_format': 'csv'}, name='export-metrics-wide-csv'),
+    path('exports/metrics-wide.parquet', export_metrics_wide, {'file_format': 'parquet'}, name='export-metrics-wide-parquet'),
+    path('exports/metrics-wide.arrow', export_metrics_wide, {'file_format': 'arrow'}, name='export-metrics-wide-arrow'),
     
     # API endpoints
     path('', include(router.urls)),
@@ -1,53 +1,73 @@
-from rest_framework import viewsets, filters, status
+import math
+import os
+
+from rest_framework import mixins, viewsets, filters, status
 from rest_framework.decorators import api_view, permission_classes, action
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
+from django.db.models import Count
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.utils.dateparse import parse_datetime
 
 from .models import (
     ExperimentConfig, ModelVersion, Organoid, MRIScan,
-    PipelineRun, SegmentationResult, Metric, BIDSDataset
+    PipelineRun, SegmentationResult, Metric, BIDSDataset, ExportJob,
+    normalize_metric_name
 )
 from .serializers import (
     ExperimentConfigSerializer, ModelVersionSerializer, OrganoidSerializer,
     MRIScanSerializer, PipelineRunSerializer, SegmentationResultSerializer,
-    MetricSerializer, BIDSDatasetSerializer
+    MetricSerializer, BIDSDatasetSerializer, ExportJobSerializer
 )
 from . import analytics
+from .conditional import ConditionalGetMixin, conditional_on_tables
+from .pagination import KeysetPagination
+
+# Cache-Control max-age (seconds) for polled analytics; lists always revalidate
+ANALYTICS_MAX_AGE = 5
+
+# Histogram limits for /api/analytics/metrics/
+MAX_HISTOGRAM_BINS = 100
+UNIT_INTERVAL_METRICS = {'dice', 'iou'}
 
 
-class ExperimentConfigViewSet(viewsets.ModelViewSet):
+class ExperimentConfigViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing experiment configurations.
     Defines preprocessing and segmentation pipeline parameters.
     """
-    queryset = ExperimentConfig.objects.all()
+    # Aggregation drops Meta.ordering, so it is restated explicitly
+    queryset = ExperimentConfig.objects.annotate(num_pipeline_runs=Count('pipeline_runs')).order_by('-created_at')
     serializer_class = ExperimentConfigSerializer
+    conditional_models = [ExperimentConfig, PipelineRun]
     permission_classes = [AllowAny]
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name', 'description']
     ordering_fields = ['created_at', 'updated_at', 'name']
 
 
-class ModelVersionViewSet(viewsets.ModelViewSet):
+class ModelVersionViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing model versions.
     Tracks trained model weights and metadata.
     """
-    queryset = ModelVersion.objects.all()
+    queryset = ModelVersion.objects.annotate(num_pipeline_runs=Count('pipeline_runs')).order_by('-created_at')
     serializer_class = ModelVersionSerializer
+    conditional_models = [ModelVersion, PipelineRun]
     permission_classes = [AllowAny]
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name', 'description', 'training_dataset_description']
     ordering_fields = ['created_at', 'name']
 
 
-class OrganoidViewSet(viewsets.ModelViewSet):
+class OrganoidViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing organoid samples.
     Provides CRUD operations for brain organoid experiments.
     """
-    queryset = Organoid.objects.all()
+    queryset = Organoid.objects.annotate(num_scans=Count('scans')).order_by('-created_at')
     serializer_class = OrganoidSerializer
+    conditional_models = [Organoid, MRIScan]
     permission_classes = [AllowAny]
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name', 'experiment_id', 'description']
@@ -61,13 +81,16 @@ class OrganoidViewSet(viewsets.ModelViewSet):
         return queryset
 
 
-class MRIScanViewSet(viewsets.ModelViewSet):
+class MRIScanViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing MRI scans.
     Supports filtering by organoid and sequence type.
     """
-    queryset = MRIScan.objects.all()
+    queryset = MRIScan.objects.select_related('organoid').annotate(
+        num_pipeline_runs=Count('pipeline_runs')
+    ).order_by('-acquisition_date')
     serializer_class = MRIScanSerializer
+    conditional_models = [MRIScan, Organoid, PipelineRun]
     permission_classes = [AllowAny]
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['file_path', 'notes']
@@ -91,14 +114,18 @@ class MRIScanViewSet(viewsets.ModelViewSet):
         return queryset
 
 
-class PipelineRunViewSet(viewsets.ModelViewSet):
+class PipelineRunViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing pipeline runs.
     Tracks preprocessing, GMM, U-Net segmentation stages.
     """
-    queryset = PipelineRun.objects.all()
+    queryset = PipelineRun.objects.select_related(
+        'mri_scan__organoid', 'experiment_config', 'model_version', 'segmentation_result'
+    )
     serializer_class = PipelineRunSerializer
+    conditional_models = [PipelineRun, MRIScan, Organoid, ExperimentConfig, ModelVersion, SegmentationResult]
     permission_classes = [AllowAny]
+    pagination_class = KeysetPagination
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['log_excerpt']
     ordering_fields = ['created_at', 'started_at', 'finished_at']
@@ -124,13 +151,16 @@ class PipelineRunViewSet(viewsets.ModelViewSet):
         return queryset
 
 
-class SegmentationResultViewSet(viewsets.ModelViewSet):
+class SegmentationResultViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing segmentation results.
     Stores masks, previews, and associated metrics.
     """
-    queryset = SegmentationResult.objects.all()
+    queryset = SegmentationResult.objects.select_related(
+        'pipeline_run__mri_scan__organoid'
+    ).prefetch_related('metrics')
     serializer_class = SegmentationResultSerializer
+    conditional_models = [SegmentationResult, PipelineRun, MRIScan, Organoid, Metric]
     permission_classes = [AllowAny]
     filter_backends = [filters.OrderingFilter]
     ordering_fields = ['created_at']
@@ -143,14 +173,16 @@ class SegmentationResultViewSet(viewsets.ModelViewSet):
         return queryset
 
 
-class MetricViewSet(viewsets.ModelViewSet):
+class MetricViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing quantitative metrics.
     Stores Dice, IoU, volume, and other biomarkers.
     """
     queryset = Metric.objects.all()
     serializer_class = MetricSerializer
+    conditional_models = [Metric]
     permission_classes = [AllowAny]
+    pagination_class = KeysetPagination
     filter_backends = [filters.OrderingFilter]
     ordering_fields = ['created_at', 'metric_value']
 
@@ -161,17 +193,20 @@ class MetricViewSet(viewsets.ModelViewSet):
         if segmentation_result:
             queryset = queryset.filter(segmentation_result=segmentation_result)
         if metric_name:
-            queryset = queryset.filter(metric_name=metric_name)
+            queryset = queryset.filter(metric_name=normalize_metric_name(metric_name))
         return queryset
 
 
 # Analytics endpoints
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@conditional_on_tables(analytics.OVERVIEW_MODELS, max_age=ANALYTICS_MAX_AGE)
 def analytics_overview(request):
     """
     Get overview analytics including counts and data distributions.
     
+    Served from a versioned cache that model save/delete signals invalidate.
+    
     Returns:
         - counts: Overview counts (organoids, scans, runs, etc.)
         - scans_by_species: Distribution of scans by species
@@ -180,14 +215,7 @@ def analytics_overview(request):
         - scans_by_sequence_type: Distribution by sequence type (T1W, T2W, etc.)
     """
     try:
-        data = {
-            'counts': analytics.get_overview_counts(),
-            'scans_by_species': analytics.get_scans_by_species(),
-            'scans_by_data_type': analytics.get_scans_by_data_type(),
-            'scans_by_role': analytics.get_scans_by_role(),
-            'scans_by_sequence_type': analytics.get_scans_by_sequence_type(),
-        }
-        return Response(data)
+        return Response(analytics.get_overview())
     except Exception as e:
         return Response(
             {'error': str(e)},
@@ -195,26 +223,87 @@ def analytics_overview(request):
         )
 
 
+def _finite_param(params, key):
+    """Optional float query parameter; NaN and infinities are rejected."""
+    value = params.get(key)
+    if value in (None, ''):
+        return None
+    number = float(value)
+    if not math.isfinite(number):
+        raise ValueError(f"{key} must be a finite number")
+    return number
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@conditional_on_tables(analytics.METRIC_ANALYTICS_MODELS, max_age=ANALYTICS_MAX_AGE)
 def analytics_metrics(request):
     """
     Get metrics analytics including histograms and averages.
     
+    Query Parameters:
+        - metrics: Comma-separated metric names to histogram (default: dice,iou)
+        - bins: Number of histogram bins (default: 5, max: 100)
+        - range_min / range_max: Histogram range; a missing bound defaults to
+          0 or 1 for Dice/IoU and to the observed value for other metrics
+        - model_version, experiment_config, stage, status, species,
+          sequence_type: Restrict the histogrammed metrics
+    
     Returns:
+        - histograms: Histogram per requested metric
         - histogram_dice: Histogram of Dice scores
         - histogram_iou: Histogram of IoU scores
         - avg_dice_by_model: Average Dice per model version
         - avg_dice_by_config: Average Dice per experiment config
     """
+    params = request.query_params
+    try:
+        bins = int(params.get('bins', 5))
+        if not 1 <= bins <= MAX_HISTOGRAM_BINS:
+            raise ValueError(f"bins must be between 1 and {MAX_HISTOGRAM_BINS}")
+        
+        range_min = _finite_param(params, 'range_min')
+        range_max = _finite_param(params, 'range_max')
+        
+        filters = {
+            key: params[key]
+            for key in analytics.METRIC_FILTER_LOOKUPS
+            if params.get(key)
+        }
+        filters.setdefault('status', 'SUCCESS')
+        
+        metric_names = [
+            name.strip().lower()
+            for name in params.get('metrics', 'dice,iou').split(',')
+            if name.strip()
+        ]
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
     try:
+        histograms = {}
+        for name in metric_names:
+            lower, upper = range_min, range_max
+            if name in UNIT_INTERVAL_METRICS:
+                # Default to [0, 1], widened to include the given bound
+                if lower is None:
+                    lower = 0.0 if upper is None else min(0.0, upper)
+                if upper is None:
+                    upper = max(1.0, lower)
+            histograms[name] = analytics.metric_histogram(
+                name, bins=bins, range=(lower, upper), filters=filters
+            )
+        
         data = {
-            'histogram_dice': analytics.get_metrics_histogram_dice(),
-            'histogram_iou': analytics.get_metrics_histogram_iou(),
+            'histograms': histograms,
+            'histogram_dice': histograms.get('dice') or analytics.get_metrics_histogram_dice(),
+            'histogram_iou': histograms.get('iou') or analytics.get_metrics_histogram_iou(),
             'avg_dice_by_model': analytics.get_avg_dice_by_model(),
             'avg_dice_by_config': analytics.get_avg_dice_by_config(),
         }
         return Response(data)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
         return Response(
             {'error': str(e)},
@@ -222,12 +311,46 @@ def analytics_metrics(request):
         )
 
 
-class BIDSDatasetViewSet(viewsets.ModelViewSet):
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def analytics_timeseries(request):
+    """
+    Get pipeline throughput and latency over time.
+    
+    Query Parameters:
+        - interval: minute, hour (default) or day
+        - since / until: ISO 8601 datetimes (default: the last 24 hours)
+        - stage: Only runs of this stage
+    
+    Returns:
+        - buckets: Per-bucket run counts by stage and status, failure rate,
+          and queue wait / execution time (mean, p50, p95, p99 in seconds)
+        - in_flight: Current number of pending and running runs
+    """
+    params = request.query_params
+    try:
+        since = parse_datetime(params['since']) if params.get('since') else None
+        until = parse_datetime(params['until']) if params.get('until') else None
+        if (params.get('since') and since is None) or (params.get('until') and until is None):
+            raise ValueError("since/until must be ISO 8601 datetimes")
+        data = analytics.get_pipeline_timeseries(
+            interval=params.get('interval', 'hour'),
+            since=since,
+            until=until,
+            stage=params.get('stage'),
+        )
+        return Response(data)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class BIDSDatasetViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing BIDS datasets.
     """
     queryset = BIDSDataset.objects.all().order_by('-created_at')
     serializer_class = BIDSDatasetSerializer
+    conditional_models = [BIDSDataset]
     permission_classes = [AllowAny]  # TODO: Change to IsAuthenticated for production
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name', 'root_path', 'description']
@@ -259,13 +382,44 @@ class BIDSDatasetViewSet(viewsets.ModelViewSet):
 
 
 # Export endpoints
+RESUME_TOKEN_HEADER = 'X-Resume-Token'
+
+
+def _change_window(request, model):
+    """ChangeWindow for the request's ``since`` token (raises ValueError if malformed)."""
+    from . import exports
+    return exports.ChangeWindow(model, request.query_params.get('since') or None)
+
+
+def _with_resume_token(response, window):
+    if window.resume_token:
+        response[RESUME_TOKEN_HEADER] = window.resume_token
+    return response
+
+
+def _bad_request(error):
+    message = error.messages[0] if isinstance(error, DjangoValidationError) else str(error)
+    return Response({'error': message}, status=status.HTTP_400_BAD_REQUEST)
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def export_metrics_csv(request):
-    """Export all metrics to CSV file"""
+    """
+    Export all metrics to CSV file
+    
+    Pass the X-Resume-Token header of a previous export as ``since`` to
+    get only metrics created or updated after it.
+    """
     from . import exports
-    data = exports.export_metrics_csv()
-    return exports.generate_csv_response(data, 'metrics_export.csv')
+    try:
+        window = _change_window(request, Metric)
+    except ValueError as e:
+        return _bad_request(e)
+    columns, rows = exports.export_metrics_csv(window)
+    return _with_resume_token(
+        exports.generate_csv_response(columns, rows, 'metrics_export.csv', request), window
+    )
 
 
 @api_view(['GET'])
@@ -273,17 +427,27 @@ def export_metrics_csv(request):
 def export_experiments_csv(request):
     """Export all experiment configurations to CSV file"""
     from . import exports
-    data = exports.export_experiments_csv()
-    return exports.generate_csv_response(data, 'experiments_export.csv')
+    columns, rows = exports.export_experiments_csv()
+    return exports.generate_csv_response(columns, rows, 'experiments_export.csv', request)
 
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def export_runs_csv(request):
-    """Export all pipeline runs to CSV file"""
+    """
+    Export all pipeline runs to CSV file
+    
+    Supports incremental exports via ``since`` (see export_metrics_csv).
+    """
     from . import exports
-    data = exports.export_pipeline_runs_csv()
-    return exports.generate_csv_response(data, 'pipeline_runs_export.csv')
+    try:
+        window = _change_window(request, PipelineRun)
+    except ValueError as e:
+        return _bad_request(e)
+    columns, rows = exports.export_pipeline_runs_csv(window)
+    return _with_resume_token(
+        exports.generate_csv_response(columns, rows, 'pipeline_runs_export.csv', request), window
+    )
 
 
 @api_view(['GET'])
@@ -291,5 +455,168 @@ def export_runs_csv(request):
 def export_analytics_csv(request):
     """Export analytics summary to CSV file"""
     from . import exports
-    data = exports.export_analytics_summary_csv()
-    return exports.generate_csv_response(data, 'analytics_summary.csv')
+    columns, rows = exports.export_analytics_summary_csv()
+    return exports.generate_csv_response(columns, rows, 'analytics_summary.csv', request)
+
+
+def _pyarrow_missing():
+    return Response(
+        {
+            'error': 'Columnar export dependencies not installed',
+            'note': 'Install with: pip install pyarrow'
+        },
+        status=status.HTTP_503_SERVICE_UNAVAILABLE
+    )
+
+
+def _columnar_export(request, model, export, basename, file_format):
+    from . import exports
+    
+    if not exports.PYARROW_AVAILABLE:
+        return _pyarrow_missing()
+    try:
+        window = _change_window(request, model)
+    except ValueError as e:
+        return _bad_request(e)
+    
+    schema, rows = getattr(exports, export)(window)
+    return _with_resume_token(
+        exports.generate_columnar_response(schema, rows, f'{basename}.{file_format}', file_format, request),
+        window
+    )
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def export_metrics_columnar(request, file_format='parquet'):
+    """Export all (or, with ``since``, changed) metrics as a Parquet file or Arrow IPC stream"""
+    return _columnar_export(request, Metric, 'export_metrics_columnar', 'metrics_export', file_format)
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def export_runs_columnar(request, file_format='parquet'):
+    """Export all (or, with ``since``, changed) pipeline runs as a Parquet file or Arrow IPC stream"""
+    return _columnar_export(request, PipelineRun, 'export_pipeline_runs_columnar', 'pipeline_runs_export', file_format)
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def export_analytics_columnar(request, file_format='parquet'):
+    """Export the analytics summary as a Parquet file or Arrow IPC stream"""
+    from . import exports
+    
+    if not exports.PYARROW_AVAILABLE:
+        return _pyarrow_missing()
+    schema, rows = exports.export_analytics_summary_columnar()
+    return exports.generate_columnar_response(
+        schema, rows, f'analytics_summary.{file_format}', file_format, request
+    )
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def export_metrics_wide(request, file_format='csv'):
+    """
+    Export metrics pivoted to one row per segmentation result.
+    
+    Each row holds the scan, organoid, config and model attributes plus
+    dice, iou, volume and hausdorff columns.
+    
+    Query Parameters:
+        - stage, status, species, sequence_type, data_type, role
+        - organoid, experiment_config, model_version: IDs
+        - created_after / created_before: ISO 8601 datetimes
+        - since: Resume token; only results whose metrics or run changed after it
+    """
+    from . import exports
+    
+    filters = {
+        key: request.query_params[key]
+        for key in exports.WIDE_FILTER_LOOKUPS
+        if request.query_params.get(key)
+    }
+    try:
+        window = _change_window(request, SegmentationResult)
+        queryset = exports.wide_metrics_queryset(filters, window)
+    except (ValueError, DjangoValidationError) as e:
+        return _bad_request(e)
+    
+    rows = queryset.iterator(chunk_size=exports.EXPORT_CHUNK_SIZE)
+    filename = f'metrics_wide_export.{file_format}'
+    if file_format == 'csv':
+        response = exports.generate_csv_response(exports.wide_metrics_columns(), rows, filename, request)
+        return _with_resume_token(response, window)
+    
+    if not exports.PYARROW_AVAILABLE:
+        return _pyarrow_missing()
+    response = exports.generate_columnar_response(
+        exports.wide_metrics_arrow_schema(), rows, filename, file_format, request
+    )
+    return _with_resume_token(response, window)
+
+
+class ExportJobViewSet(mixins.CreateModelMixin,
+                       mixins.RetrieveModelMixin,
+                       mixins.ListModelMixin,
+                       viewsets.GenericViewSet):
+    """
+    Background export jobs.
+    
+    POST a spec to queue an export; identical specs over unchanged data
+    return the existing job (200) instead of queuing a new one (202).
+    Jobs are processed by ``manage.py run_export_jobs``; progress is
+    broadcast over the WebSocket as ``export.progress`` messages.
+    """
+    queryset = ExportJob.objects.all()
+    serializer_class = ExportJobSerializer
+    permission_classes = [IsAuthenticated]  # Downloads are full-table dumps
+    
+    def create(self, request, *args, **kwargs):
+        """
+        Submit an export.
+        
+        Body:
+            - kind: metrics, runs or metrics_wide
+            - format: csv (default), parquet or arrow
+            - filters: Optional dict ('since' token; wide export filters)
+            - columns: Optional list of columns to include
+        """
+        from . import export_jobs
+        
+        filters_spec = request.data.get('filters') or {}
+        columns = request.data.get('columns') or []
+        if not isinstance(filters_spec, dict) or not isinstance(columns, list):
+            return Response(
+                {'error': 'filters must be an object and columns a list'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            job, created = export_jobs.submit_export(
+                request.data.get('kind'),
+                request.data.get('format', 'csv'),
+                filters=filters_spec,
+                columns=columns,
+            )
+        except ValueError as e:
+            return _bad_request(e)
+        
+        return Response(
+            self.get_serializer(job).data,
+            status=status.HTTP_202_ACCEPTED if created else status.HTTP_200_OK
+        )
+    
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """Download the finished file (supports Range requests)."""
+        from . import export_jobs
+        
+        job = self.get_object()
+        if job.status == 'EXPIRED' or (job.status == 'SUCCESS' and not os.path.exists(job.file_path)):
+            return Response({'error': 'Export has expired'}, status=status.HTTP_410_GONE)
+        if job.status != 'SUCCESS':
+            return Response(
+                {'error': f'Export is not ready (status: {job.status})'},
+                status=status.HTTP_409_CONFLICT
+            )
+        return export_jobs.ranged_file_response(request, job)
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import json
 import os
 from pathlib import Path
 from dotenv import load_dotenv
@@ -35,6 +36,7 @@ ALLOWED_HOSTS = os.getenv('ALLOWED_HOSTS', 'localhost,127.0.0.1').split(',')
 # Application definition
 
 INSTALLED_APPS = [
+    'daphne',  # ASGI runserver (must precede staticfiles); SSE streaming needs ASGI
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -163,6 +165,9 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 10
 }
 
+# Largest page_size accepted by keyset-paginated endpoints (metrics, pipeline runs)
+KEYSET_MAX_PAGE_SIZE = int(os.getenv('KEYSET_MAX_PAGE_SIZE', '1000'))
+
 # drf-spectacular Settings
 SPECTACULAR_SETTINGS = {
     'TITLE': 'MRI Organoids Segmentation API',
@@ -207,11 +212,30 @@ SIMPLE_JWT = {
 
 # CORS Settings - Allow credentials for JWT
 CORS_ALLOW_CREDENTIALS = True
+CORS_EXPOSE_HEADERS = [
+    'X-Resume-Token',  # Incremental export watermark
+    'ETag', 'Last-Modified',  # Conditional GET validators
+]
 
 # AI Assistant Configuration (Optional - for RAG-based documentation Q&A)
 # This feature is completely optional and controlled via environment variables
 AI_ASSISTANT_ENABLED = os.getenv('AI_ASSISTANT_ENABLED', 'True').lower() == 'true'
 AI_VECTOR_INDEX_PATH = BASE_DIR / 'ai_index'
+AI_ASSISTANT_WARMUP = os.getenv('AI_ASSISTANT_WARMUP', 'True').lower() == 'true'  # Load model/index at startup
+AI_EMBEDDING_CACHE_SIZE = int(os.getenv('AI_EMBEDDING_CACHE_SIZE', '1024'))  # Cached query embeddings
+AI_RESULT_CACHE_SIZE = int(os.getenv('AI_RESULT_CACHE_SIZE', '256'))  # Cached search results
+AI_INDEX_TYPE = os.getenv('AI_INDEX_TYPE', 'flat-ip')  # 'flat-ip', 'hnsw', 'sq8' (int8) or 'ivf-pq'
+AI_INDEX_PARAMS = json.loads(os.getenv('AI_INDEX_PARAMS', '{}'))  # e.g. {"efSearch": 128} or {"rerank": 8}
+AI_INDEX_MMAP = os.getenv('AI_INDEX_MMAP', 'True').lower() == 'true'  # Memory-map the served index (shared, read-only)
+AI_EMBEDDING_BATCH_SIZE = int(os.getenv('AI_EMBEDDING_BATCH_SIZE', '64'))  # Texts per model forward pass
+AI_EMBEDDING_DEVICES = [d for d in os.getenv('AI_EMBEDDING_DEVICES', '').split(',') if d]  # e.g. cpu,cpu,cpu,cpu or cuda:0,cuda:1
+AI_CHUNK_TOKENS = int(os.getenv('AI_CHUNK_TOKENS', '0'))  # Token budget per doc chunk (0: the model's max sequence length)
+AI_CHUNK_WORKERS = int(os.getenv('AI_CHUNK_WORKERS', str(os.cpu_count() or 1)))  # Processes chunking files
+AI_INDEX_ADD_BATCH_SIZE = int(os.getenv('AI_INDEX_ADD_BATCH_SIZE', '4096'))  # Vectors added to FAISS per batch
+AI_RETRIEVAL_MODE = os.getenv('AI_RETRIEVAL_MODE', 'hybrid')  # 'vector', 'lexical' or 'hybrid' (BM25 + vector)
+AI_INDEX_SOURCES = [  # Experiment records indexed besides the markdown docs
+    s for s in os.getenv('AI_INDEX_SOURCES', 'experiment_configs,model_versions,pipeline_runs,organoids').split(',') if s
+]
 AI_LLM_PROVIDER = os.getenv('AI_LLM_PROVIDER', None)  # 'openai' or None (for future use)
 AI_LLM_API_KEY = os.getenv('AI_LLM_API_KEY', None)  # For future LLM integration
 AI_LLM_MODEL = os.getenv('AI_LLM_MODEL', 'gpt-4')  # For future LLM integration
@@ -221,6 +245,39 @@ ASGI_APPLICATION = 'mri_organoids.asgi.application'
 
 CHANNEL_LAYERS = {
     'default': {
-        'BACKEND': 'channels.layers.InMemoryChannelLayer',  # Use Redis in production
+        'BACKEND': 'channels.layers.InMemoryChannelLayer',
     },
 }
+
+# Shared cache and channel layer for deployments with several processes
+# (web server workers plus ``run_pipeline_jobs``). The in-memory defaults are
+# private to each process, so pipeline status events broadcast by a worker
+# process never reach WebSocket/SSE clients of the web server without them.
+REDIS_URL = os.getenv('REDIS_URL', '')  # e.g. redis://localhost:6379/0 (needs redis and channels-redis)
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        },
+    }
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {'hosts': [REDIS_URL]},
+        },
+    }
+
+# Server-Sent Events (pipeline status stream)
+SSE_KEEPALIVE_SECONDS = int(os.getenv('SSE_KEEPALIVE_SECONDS', '15'))
+SSE_MAX_STREAM_SECONDS = int(os.getenv('SSE_MAX_STREAM_SECONDS', '300'))
+PIPELINE_EVENT_REPLAY_SIZE = 500  # Events kept for Last-Event-ID resume
+PIPELINE_EVENT_REPLAY_TTL = 3600  # Seconds
+
+# Analytics caching (entries are also invalidated by model signals)
+ANALYTICS_CACHE_TIMEOUT = int(os.getenv('ANALYTICS_CACHE_TIMEOUT', '300'))
+
+# Background export jobs (see experiments/export_jobs.py)
+EXPORT_JOB_DIR = Path(os.getenv('EXPORT_JOB_DIR', BASE_DIR / 'export_jobs'))  # Not under MEDIA_ROOT: served via the API only
+EXPORT_JOB_TTL_SECONDS = int(os.getenv('EXPORT_JOB_TTL_SECONDS', str(24 * 3600)))
+EXPORT_JOB_STALE_SECONDS = int(os.getenv('EXPORT_JOB_STALE_SECONDS', '1800'))  # RUNNING jobs without progress for this long are re-claimed
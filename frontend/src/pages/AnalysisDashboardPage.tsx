@@ -13,6 +13,8 @@ interface AnalyticsData {
         num_pipeline_runs: number;
         num_successful_runs: number;
         num_failed_runs: number;
+        num_results: number;
+        num_metrics: number;
         num_models: number;
         num_configs: number;
         success_rate: number;
@@ -182,13 +182,13 @@ export default function RunComparisonPage() {
                         </h3>
                         <MetricCard
                             label="Dice Score"
-                            leftValue={leftResult?.metrics.find(m => m.metric_name === 'Dice')?.metric_value}
-                            rightValue={rightResult?.metrics.find(m => m.metric_name === 'Dice')?.metric_value}
+                            leftValue={leftResult?.metrics.find(m => m.metric_name === 'dice')?.metric_value}
+                            rightValue={rightResult?.metrics.find(m => m.metric_name === 'dice')?.metric_value}
                         />
                         <MetricCard
                             label="IoU"
-                            leftValue={leftResult?.metrics.find(m => m.metric_name === 'IoU')?.metric_value}
-                            rightValue={rightResult?.metrics.find(m => m.metric_name === 'IoU')?.metric_value}
+                            leftValue={leftResult?.metrics.find(m => m.metric_name === 'iou')?.metric_value}
+                            rightValue={rightResult?.metrics.find(m => m.metric_name === 'iou')?.metric_value}
                         />
                     </div>
 